@@ -3,3 +3,8 @@ from django.apps import AppConfig as DjangoAppConfig
 class CoreConfig(DjangoAppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app"
+
+    def ready(self):
+        # Conecta la cache de grupos por request y la invalidacion de
+        # catalogos y tableros de gestion a las senales de Django.
+        from . import catalogos, gestion_cache, permissions  # noqa: F401
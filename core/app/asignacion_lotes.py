@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .maquinaria_resumen import refrescar_centro_costos
+from .models import HistorialConsumible
+from .saldos import refrescar_saldos_lotes
+from .vida_util import refrescar_vida_util_lotes
+
+
+# Campos que el sobrante conserva del historial que se parte.
+CAMPOS_SOBRANTE = (
+    "lote_id",
+    "item_id",
+    "unidad_medida_id",
+    "almacen_id",
+    "trabajador_id",
+    "maquinaria_id",
+    "orden_trabajo_id",
+    "horometro_inicio",
+)
+
+
+def planificar_fifo(historiales, cantidad):
+    """
+    Reparte ``cantidad`` sobre los historiales en orden FIFO. Devuelve
+    ``[(historial, tomado, sobrante), ...]`` con los historiales tocados y
+    el total disponible; solo el ultimo puede quedar con sobrante.
+    """
+    restante = Decimal(cantidad)
+    plan = []
+    disponible = Decimal("0")
+    for historial in historiales:
+        cantidad_historial = Decimal(historial.cantidad)
+        disponible += cantidad_historial
+        if restante <= 0:
+            continue
+        tomado = min(cantidad_historial, restante)
+        plan.append((historial, tomado, cantidad_historial - tomado))
+        restante -= tomado
+    return plan, disponible
+
+
+def asignar_fifo(historiales, cantidad, mensaje_insuficiente, destino=None, fecha=None):
+    """
+    Descuenta ``cantidad`` de los historiales abiertos indicados (FIFO por
+    fecha_inicio, id): bloquea los candidatos una vez, cierra los tomados con
+    la cantidad usada, reabre el sobrante conservando su fecha_inicio y, si se
+    indica ``destino`` (campos de ubicacion), abre alli un historial por tramo.
+    Escribe en bloque: el numero de consultas no depende de los lotes tocados.
+    """
+    with transaction.atomic():
+        candidatos = list(
+            historiales
+            .select_for_update(of=("self",))
+            .filter(fecha_fin__isnull=True)
+            .order_by("fecha_inicio", "id")
+        )
+        plan, disponible = planificar_fifo(candidatos, cantidad)
+        if disponible < Decimal(cantidad):
+            raise ValidationError(mensaje_insuficiente)
+
+        fecha = fecha or timezone.now()
+        cerrados = []
+        sobrantes = []
+        destinos = []
+        for historial, tomado, sobrante in plan:
+            historial.fecha_fin = fecha
+            historial.cantidad = tomado
+            cerrados.append(historial)
+
+            if sobrante > 0:
+                sobrantes.append(
+                    HistorialConsumible(
+                        cantidad=sobrante,
+                        fecha_inicio=historial.fecha_inicio,
+                        **{campo: getattr(historial, campo) for campo in CAMPOS_SOBRANTE},
+                    )
+                )
+            if destino is not None:
+                destinos.append(
+                    HistorialConsumible(
+                        lote_id=historial.lote_id,
+                        item_id=historial.item_id,
+                        unidad_medida_id=historial.unidad_medida_id,
+                        cantidad=tomado,
+                        **destino,
+                    )
+                )
+
+        HistorialConsumible.objects.bulk_update(cerrados, ["fecha_fin", "cantidad"])
+        fechas_sobrantes = [sobrante.fecha_inicio for sobrante in sobrantes]
+        HistorialConsumible.objects.bulk_create(sobrantes + destinos)
+        if sobrantes:
+            # auto_now_add pisa fecha_inicio al crear; el sobrante conserva la original.
+            for sobrante, fecha_inicio in zip(sobrantes, fechas_sobrantes):
+                sobrante.fecha_inicio = fecha_inicio
+            HistorialConsumible.objects.bulk_update(sobrantes, ["fecha_inicio"])
+
+        _refrescar_derivados(cerrados + sobrantes + destinos)
+
+    return destinos
+
+
+def _refrescar_derivados(historiales):
+    """Lo que HistorialConsumible.save refresca por fila, una vez para todo el bloque."""
+    lote_ids = {historial.lote_id for historial in historiales}
+    refrescar_saldos_lotes(lote_ids)
+    refrescar_vida_util_lotes(lote_ids)
+    refrescar_centro_costos({historial.maquinaria_id for historial in historiales})
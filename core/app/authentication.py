@@ -0,0 +1,53 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .permissions import asignar_grupos_usuario, grupos_usuario
+
+
+CLAIM_ROLES = "roles"
+
+
+def _roles_en_token():
+    return getattr(settings, "JWT_ROLES_EN_TOKEN", False)
+
+
+def _access_con_roles(access, user):
+    """Reemite el access token con los grupos actuales del usuario como claim."""
+    token = AccessToken(access)
+    token[CLAIM_ROLES] = sorted(grupos_usuario(user))
+    return str(token)
+
+
+class RolesTokenObtainPairSerializer(TokenObtainPairSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if _roles_en_token():
+            data["access"] = _access_con_roles(data["access"], self.user)
+        return data
+
+
+class RolesTokenRefreshSerializer(TokenRefreshSerializer):
+    # Los roles se leen de nuevo en cada refresh; solo viajan en el access token.
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if _roles_en_token():
+            token = AccessToken(data["access"])
+            user = JWTAuthentication().get_user(token)
+            data["access"] = _access_con_roles(data["access"], user)
+        return data
+
+
+class RolesJWTAuthentication(JWTAuthentication):
+    """Con JWT_ROLES_EN_TOKEN los grupos salen del claim y no se consultan."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        roles = validated_token.get(CLAIM_ROLES)
+        if _roles_en_token() and roles is not None:
+            asignar_grupos_usuario(user, roles)
+        return user
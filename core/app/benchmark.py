@@ -0,0 +1,186 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import CompraDetalle, Item
+
+
+# Parametros de crear_datos_masivos para la escala 1x; cada escala los multiplica.
+PARAMETROS_BASE = {
+    "maquinarias": 10,
+    "repuestos": 10,
+    "consumibles": 6,
+    "ordenes": 120,
+    "ordenes_compra": 16,
+}
+VISTAS_ITEMS = ("general", "almacen", "tecnicos", "maquinaria")
+GESTION_ENDPOINTS = (
+    "gestion-matriz",
+    "gestion-matriz-proveedores-repuestos",
+    "gestion-historial-items",
+    "gestion-bubble-repuestos",
+    "gestion-supervivencia-repuestos",
+    "gestion-indicadores-maquinaria",
+)
+
+
+def parametros_escala(escala):
+    return {clave: valor * escala for clave, valor in PARAMETROS_BASE.items()}
+
+
+def _contenido(response):
+    if getattr(response, "streaming", False):
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+def escenarios():
+    """Llamadas fijas que reproduce el benchmark, con ids tomados de los datos cargados."""
+    item_con_compras_id = (
+        CompraDetalle.objects
+        .order_by("item_id")
+        .values_list("item_id", flat=True)
+        .first()
+    ) or Item.objects.order_by("id").values_list("id", flat=True).first()
+
+    llamadas = [
+        {"nombre": f"items_{vista}", "ruta": "/api/items/", "params": {"vista": vista}}
+        for vista in VISTAS_ITEMS
+    ]
+    if item_con_compras_id:
+        llamadas.append(
+            {
+                "nombre": "kardex_contable",
+                "ruta": f"/api/items/{item_con_compras_id}/kardex_contable/",
+            }
+        )
+    llamadas.extend(
+        {"nombre": endpoint.replace("-", "_"), "ruta": f"/api/maquinarias/{endpoint}/"}
+        for endpoint in GESTION_ENDPOINTS
+    )
+    llamadas.extend(
+        [
+            {"nombre": "ordenes_trabajo", "ruta": "/api/trabajos/"},
+            {"nombre": "compras", "ruta": "/api/compras/"},
+            {"nombre": "catalogo_exportar", "ruta": "/api/catalogo-sync/"},
+            {
+                "nombre": "catalogo_importar",
+                "ruta": "/api/catalogo-sync/",
+                "metodo": "post",
+                # Reimporta lo exportado: recorre el camino de upsert sin cambiar datos.
+                "preparar": lambda client: json.loads(_contenido(client.get("/api/catalogo-sync/"))),
+            },
+        ]
+    )
+    return llamadas
+
+
+class _ContadorConsultas:
+    # CaptureQueriesContext no sirve aqui: request_started reinicia queries_log.
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+def _ejecutar(client, llamada, datos):
+    metodo = llamada.get("metodo", "get")
+    if metodo == "get":
+        response = client.get(llamada["ruta"], llamada.get("params"))
+    else:
+        response = client.post(llamada["ruta"], datos, format="json")
+    return response, _contenido(response)
+
+
+def _tiempos(client, llamada, datos, repeticiones, en_frio):
+    tiempos = []
+    for _ in range(max(repeticiones, 1)):
+        if en_frio:
+            cache.clear()
+        inicio = time.perf_counter()
+        _ejecutar(client, llamada, datos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def medir_llamada(client, llamada, repeticiones=5):
+    """
+    Mide la llamada en frio (cache vaciada antes de cada ejecucion: tableros de
+    gestion, catalogos, tipos de cambio) y en caliente, por separado.
+    """
+    datos = llamada["preparar"](client) if "preparar" in llamada else None
+
+    # Primera ejecucion: consultas y memoria pico (tracemalloc distorsiona el tiempo).
+    cache.clear()
+    contador = _ContadorConsultas()
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper(contador):
+            response, contenido = _ejecutar(client, llamada, datos)
+        _, pico_memoria = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    frio = _tiempos(client, llamada, datos, repeticiones, en_frio=True)
+    caliente = _tiempos(client, llamada, datos, repeticiones, en_frio=False)
+
+    return {
+        "status": response.status_code,
+        "mediana_ms": round(statistics.median(frio), 2),
+        "max_ms": round(max(frio), 2),
+        "caliente_ms": round(statistics.median(caliente), 2),
+        "consultas": contador.total,
+        "pico_memoria_kb": round(pico_memoria / 1024, 1),
+        "bytes_respuesta": len(contenido),
+    }
+
+
+def ejecutar_benchmark(client, repeticiones=5):
+    return {
+        llamada["nombre"]: medir_llamada(client, llamada, repeticiones)
+        for llamada in escenarios()
+    }
+
+
+def comparar_con_base(reporte, base, tolerancia=0.2, umbral_ms=5):
+    """
+    Devuelve las regresiones frente a un reporte base: tiempo o memoria por
+    encima de la tolerancia relativa, o mas consultas que antes.
+    """
+    regresiones = []
+    for escala, resultado in reporte.get("escalas", {}).items():
+        llamadas_base = base.get("escalas", {}).get(escala, {}).get("llamadas", {})
+        for nombre, actual in resultado.get("llamadas", {}).items():
+            anterior = llamadas_base.get(nombre)
+            if not anterior:
+                continue
+
+            etiqueta = f"[{escala}] {nombre}"
+            for clave, descripcion in (("mediana_ms", "en frio"), ("caliente_ms", "en caliente")):
+                if clave not in actual or clave not in anterior:
+                    continue
+                limite_ms = anterior[clave] * (1 + tolerancia)
+                if actual[clave] > limite_ms and actual[clave] - anterior[clave] > umbral_ms:
+                    regresiones.append(
+                        f"{etiqueta}: {anterior[clave]} ms -> {actual[clave]} ms {descripcion}"
+                    )
+            if actual["consultas"] > anterior["consultas"]:
+                regresiones.append(
+                    f"{etiqueta}: {anterior['consultas']} -> {actual['consultas']} consultas"
+                )
+            if actual["pico_memoria_kb"] > anterior["pico_memoria_kb"] * (1 + tolerancia):
+                regresiones.append(
+                    f"{etiqueta}: {anterior['pico_memoria_kb']} KB -> "
+                    f"{actual['pico_memoria_kb']} KB de memoria pico"
+                )
+            if actual["status"] != anterior["status"]:
+                regresiones.append(
+                    f"{etiqueta}: status {anterior['status']} -> {actual['status']}"
+                )
+    return regresiones
@@ -1,11 +1,16 @@
+import codecs
 import csv
 import json
-from io import BytesIO, StringIO
+import tempfile
+from collections.abc import Iterator
+from itertools import islice
 
-from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError as DjangoValidationError
 from django.core.management.color import no_style
-from django.db import IntegrityError, connection, transaction
-from django.http import HttpResponse, JsonResponse
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Q
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
 from openpyxl import Workbook, load_workbook
 from openpyxl.utils.exceptions import InvalidFileException
@@ -15,6 +20,8 @@ from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .catalogos import MODELOS_CATALOGO, invalidar_cache_catalogos
+from .gestion_cache import MODELOS_GESTION, invalidar_cache_gestion_al_confirmar
 from .models import (
     ActividadTrabajo,
     Almacen,
@@ -35,7 +42,9 @@ from .models import (
     UbicacionCliente,
     UnidadMedida,
     UnidadRelacion,
+    sincronizar_secuencias_codigo,
 )
+from .tareas import encolar, guardar_archivo_tarea, respuesta_encolada, solicita_asincrono
 from .permissions import CatalogoPermission
 
 
@@ -43,6 +52,52 @@ SUPPORTED_FORMATS = ("json", "csv", "xlsx")
 XLSX_CONTENT_TYPE = (
     "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 )
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BLOCK_SIZE = 64 * 1024
+IMPORT_BATCH_SIZE = 1000
+
+
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def _json_dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _agrupar_bloques(piezas, tamano=STREAM_BLOCK_SIZE):
+    bloque = []
+    acumulado = 0
+    for pieza in piezas:
+        bloque.append(pieza)
+        acumulado += len(pieza)
+        if acumulado >= tamano:
+            yield "".join(bloque)
+            bloque = []
+            acumulado = 0
+    if bloque:
+        yield "".join(bloque)
+
+def _iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _compact_ids(record_ids):
+    """Agrupa ids consecutivos en rangos [inicio, fin] para que el diff no crezca fila a fila."""
+    rangos = []
+    for record_id in sorted(record_ids):
+        if rangos and rangos[-1][1] + 1 == record_id:
+            rangos[-1][1] = record_id
+        else:
+            rangos.append([record_id, record_id])
+    return [inicio if inicio == fin else [inicio, fin] for inicio, fin in rangos]
+
 
 TABLE_CONFIGS = (
     {
@@ -301,24 +356,66 @@ class CatalogoSyncView(APIView):
 
     def post(self, request):
         table_key = request.data.get("table") or request.query_params.get("table")
+        dry_run = self._is_truthy(
+            request.data.get("dry_run") or request.query_params.get("dry_run")
+        )
+        uploaded_file = request.FILES.get("file") or request.FILES.get("archivo")
 
-        if table_key:
+        if uploaded_file and solicita_asincrono(request):
+            # El archivo se guarda tal cual y el worker lo lee por partes.
+            if table_key:
+                self._get_table_config(table_key)
+            tarea = encolar(
+                "importar_catalogo",
+                {
+                    "archivo": guardar_archivo_tarea(uploaded_file),
+                    "table": table_key,
+                    "dry_run": dry_run,
+                },
+                usuario=request.user,
+            )
+            return respuesta_encolada(request, tarea)
+
+        if uploaded_file:
+            tables_payload = self._parse_tables_file(uploaded_file, table_key)
+        elif table_key:
             config = self._get_table_config(table_key)
-            rows = self._parse_selected_table_rows(request, config)
-            summary = self._import_tables({config["key"]: rows})
-        else:
             payload = self._parse_payload(request)
-            tables_payload = self._extract_tables(payload)
-            summary = self._import_tables(tables_payload)
+            tables_payload = {
+                config["key"]: self._extract_rows_for_selected_table(payload, config)
+            }
+        else:
+            tables_payload = self._extract_tables(self._parse_payload(request))
+
+        if solicita_asincrono(request):
+            tarea = encolar(
+                "importar_catalogo",
+                {"tables": tables_payload, "dry_run": dry_run},
+                usuario=request.user,
+            )
+            return respuesta_encolada(request, tarea)
 
+        summary, diff = self._import_tables(tables_payload, dry_run=dry_run)
         return Response(
-            {
-                "message": "Importacion completada correctamente.",
-                "summary": summary,
-            },
+            self._import_response(summary, diff, dry_run),
             status=status.HTTP_200_OK,
         )
 
+    @staticmethod
+    def _import_response(summary, diff, dry_run):
+        if dry_run:
+            return {
+                "message": "Simulacion completada. No se guardo ningun cambio.",
+                "dry_run": True,
+                "summary": summary,
+                "diff": diff,
+            }
+
+        return {
+            "message": "Importacion completada correctamente.",
+            "summary": summary,
+        }
+
     def _build_metadata(self):
         return {
             "formats": list(SUPPORTED_FORMATS),
@@ -337,31 +434,30 @@ class CatalogoSyncView(APIView):
         generated_at = timezone.now()
         if timezone.is_aware(generated_at):
             generated_at = timezone.localtime(generated_at)
-        tables = {}
-        record_counts = {}
-
-        for config in TABLE_CONFIGS:
-            records = self._get_table_records(config)
-            tables[config["key"]] = records
-            record_counts[config["key"]] = len(records)
-
-        payload = {
-            "meta": {
-                "format": "fredal.catalog-sync",
-                "version": 2,
-                "generated_at": generated_at.isoformat(),
-                "table_order": [config["key"] for config in TABLE_CONFIGS],
-                "record_counts": record_counts,
+
+        meta = {
+            "format": "fredal.catalog-sync",
+            "version": 2,
+            "generated_at": generated_at.isoformat(),
+            "table_order": [config["key"] for config in TABLE_CONFIGS],
+            "record_counts": {
+                config["key"]: config["model"].objects.count()
+                for config in TABLE_CONFIGS
             },
-            "tables": tables,
         }
 
-        response = JsonResponse(
-            payload,
-            json_dumps_params={
-                "ensure_ascii": False,
-                "indent": 2,
-            },
+        def contenido():
+            yield '{\n  "meta": ' + _json_dumps(meta) + ',\n  "tables": {'
+            for index, config in enumerate(TABLE_CONFIGS):
+                separador = "," if index else ""
+                yield f"{separador}\n    {_json_dumps(config['key'])}: ["
+                yield from self._stream_json_rows(config)
+                yield "]"
+            yield "\n  }\n}\n"
+
+        response = StreamingHttpResponse(
+            contenido(),
+            content_type="application/json",
         )
         response["Content-Disposition"] = (
             "attachment; "
@@ -373,13 +469,12 @@ class CatalogoSyncView(APIView):
         generated_at = timezone.now()
         if timezone.is_aware(generated_at):
             generated_at = timezone.localtime(generated_at)
-        records = self._get_table_records(config)
         filename = (
             f'{config["key"]}-{generated_at.strftime("%Y%m%d-%H%M%S")}.{export_format}'
         )
 
         if export_format == "json":
-            payload = {
+            encabezado = {
                 "meta": {
                     "format": "fredal.table-sync",
                     "version": 2,
@@ -388,44 +483,47 @@ class CatalogoSyncView(APIView):
                 "table": config["key"],
                 "label": config["label"],
                 "fields": config["fields"],
-                "rows": records,
             }
-            response = JsonResponse(
-                payload,
-                json_dumps_params={
-                    "ensure_ascii": False,
-                    "indent": 2,
-                },
-            )
+
+            def contenido():
+                # Se abre el objeto y se deja "rows" al final para escribirlo por bloques.
+                yield _json_dumps(encabezado)[:-1] + ', "rows": ['
+                yield from self._stream_json_rows(config)
+                yield "\n]}\n"
+
+            response = StreamingHttpResponse(contenido(), content_type="application/json")
             response["Content-Disposition"] = f'attachment; filename="{filename}"'
             return response
 
         if export_format == "csv":
-            csv_buffer = StringIO()
-            writer = csv.DictWriter(csv_buffer, fieldnames=config["fields"])
-            writer.writeheader()
-
-            for row in records:
-                writer.writerow(
-                    {
-                        field_name: self._serialize_tabular_value(row.get(field_name))
-                        for field_name in config["fields"]
-                    }
+            writer = csv.writer(_EchoBuffer())
+
+            def contenido():
+                yield "\ufeff" + writer.writerow(config["fields"])
+                yield from _agrupar_bloques(
+                    writer.writerow(
+                        [
+                            self._serialize_tabular_value(row.get(field_name))
+                            for field_name in config["fields"]
+                        ]
+                    )
+                    for row in self._iter_table_records(config)
                 )
 
-            response = HttpResponse(
-                "\ufeff" + csv_buffer.getvalue(),
+            response = StreamingHttpResponse(
+                contenido(),
                 content_type="text/csv; charset=utf-8",
             )
             response["Content-Disposition"] = f'attachment; filename="{filename}"'
             return response
 
-        workbook = Workbook()
-        worksheet = workbook.active
-        worksheet.title = self._sheet_title(config["label"])
+        # write_only vuelca las filas a disco mientras se agregan; el zip final
+        # se envia por bloques desde el archivo temporal.
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(self._sheet_title(config["label"]))
         worksheet.append(config["fields"])
 
-        for row in records:
+        for row in self._iter_table_records(config):
             worksheet.append(
                 [
                     self._serialize_tabular_value(row.get(field_name))
@@ -433,37 +531,46 @@ class CatalogoSyncView(APIView):
                 ]
             )
 
-        output = BytesIO()
+        output = tempfile.TemporaryFile()
         workbook.save(output)
-        response = HttpResponse(
-            output.getvalue(),
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=filename,
             content_type=XLSX_CONTENT_TYPE,
         )
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        return response
 
-    def _get_table_records(self, config):
-        return list(
-            config["model"].objects.order_by("id").values(*config["fields"])
+    def _iter_table_records(self, config):
+        return (
+            config["model"].objects
+            .order_by("id")
+            .values(*config["fields"])
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
         )
 
-    def _parse_selected_table_rows(self, request, config):
-        uploaded_file = request.FILES.get("file") or request.FILES.get("archivo")
-
-        if uploaded_file:
-            file_format = self._detect_uploaded_format(uploaded_file.name)
+    def _stream_json_rows(self, config):
+        return _agrupar_bloques(
+            ("," if index else "") + "\n      " + _json_dumps(row)
+            for index, row in enumerate(self._iter_table_records(config))
+        )
 
-            if file_format == "csv":
-                return self._parse_csv_file(uploaded_file)
+    def _parse_tables_file(self, uploaded_file, table_key=None):
+        """Tablas a importar desde un archivo: ``table`` elige una sola (json, csv o xlsx)."""
+        if not table_key:
+            return self._extract_tables(self._parse_uploaded_json(uploaded_file))
 
-            if file_format == "xlsx":
-                return self._parse_xlsx_file(uploaded_file)
+        config = self._get_table_config(table_key)
+        file_format = self._detect_uploaded_format(uploaded_file.name)
 
+        if file_format == "csv":
+            rows = self._parse_csv_file(uploaded_file)
+        elif file_format == "xlsx":
+            rows = self._parse_xlsx_file(uploaded_file)
+        else:
             payload = self._parse_uploaded_json(uploaded_file)
-            return self._extract_rows_for_selected_table(payload, config)
-
-        payload = self._parse_payload(request)
-        return self._extract_rows_for_selected_table(payload, config)
+            rows = self._extract_rows_for_selected_table(payload, config)
+        return {config["key"]: rows}
 
     def _parse_payload(self, request):
         uploaded_file = request.FILES.get("file") or request.FILES.get("archivo")
@@ -511,29 +618,35 @@ class CatalogoSyncView(APIView):
             ) from exc
 
     def _parse_csv_file(self, uploaded_file):
+        uploaded_file.seek(0)
+        lines = codecs.iterdecode(uploaded_file, "utf-8-sig")
+        reader = csv.DictReader(lines)
         try:
-            raw_content = uploaded_file.read().decode("utf-8-sig")
+            fieldnames = reader.fieldnames
         except UnicodeDecodeError as exc:
             raise ParseError("El archivo CSV debe estar codificado en UTF-8.") from exc
 
-        reader = csv.DictReader(StringIO(raw_content))
-        if not reader.fieldnames:
+        if not fieldnames:
             raise ParseError(
                 "El archivo CSV debe incluir encabezados en la primera fila."
             )
 
-        rows = []
-        for row in reader:
-            normalized_row = self._normalize_tabular_row(row)
-            if normalized_row is not None:
-                rows.append(normalized_row)
+        return self._iter_csv_rows(reader)
 
-        return rows
+    def _iter_csv_rows(self, reader):
+        try:
+            for row in reader:
+                normalized_row = self._normalize_tabular_row(row)
+                if normalized_row is not None:
+                    yield normalized_row
+        except UnicodeDecodeError as exc:
+            raise ParseError("El archivo CSV debe estar codificado en UTF-8.") from exc
 
     def _parse_xlsx_file(self, uploaded_file):
         try:
             workbook = load_workbook(
-                filename=BytesIO(uploaded_file.read()),
+                filename=uploaded_file,
+                read_only=True,
                 data_only=True,
             )
         except InvalidFileException as exc:
@@ -541,12 +654,12 @@ class CatalogoSyncView(APIView):
         except Exception as exc:
             raise ParseError("No se pudo leer el archivo Excel.") from exc
 
-        worksheet = workbook.active
-        iterator = worksheet.iter_rows(values_only=True)
+        iterator = workbook.active.iter_rows(values_only=True)
 
         try:
             headers_row = next(iterator)
         except StopIteration as exc:
+            workbook.close()
             raise ParseError("El archivo Excel no contiene datos.") from exc
 
         headers = [
@@ -554,22 +667,26 @@ class CatalogoSyncView(APIView):
             for header in headers_row
         ]
         if not any(headers):
+            workbook.close()
             raise ParseError(
                 "La primera fila del archivo Excel debe contener encabezados."
             )
 
-        rows = []
-        for values in iterator:
-            raw_row = {
-                headers[index]: values[index] if index < len(values) else None
-                for index in range(len(headers))
-                if headers[index]
-            }
-            normalized_row = self._normalize_tabular_row(raw_row)
-            if normalized_row is not None:
-                rows.append(normalized_row)
+        return self._iter_xlsx_rows(workbook, iterator, headers)
 
-        return rows
+    def _iter_xlsx_rows(self, workbook, iterator, headers):
+        try:
+            for values in iterator:
+                raw_row = {
+                    headers[index]: values[index] if index < len(values) else None
+                    for index in range(len(headers))
+                    if headers[index]
+                }
+                normalized_row = self._normalize_tabular_row(raw_row)
+                if normalized_row is not None:
+                    yield normalized_row
+        finally:
+            workbook.close()
 
     def _extract_rows_for_selected_table(self, payload, config):
         if isinstance(payload, list):
@@ -647,7 +764,7 @@ class CatalogoSyncView(APIView):
 
         return selected_tables
 
-    def _import_tables(self, tables_payload):
+    def _import_tables(self, tables_payload, dry_run=False):
         summary = {
             "processed": 0,
             "created": 0,
@@ -655,7 +772,9 @@ class CatalogoSyncView(APIView):
             "unchanged": 0,
             "tables": [],
         }
+        diff = {} if dry_run else None
         models_to_reset = []
+        changed_models = set()
 
         with transaction.atomic():
             for config in TABLE_CONFIGS:
@@ -663,7 +782,7 @@ class CatalogoSyncView(APIView):
                 if rows is None:
                     continue
 
-                if not isinstance(rows, list):
+                if not isinstance(rows, (list, Iterator)):
                     raise ValidationError(
                         {
                             "detail": (
@@ -682,39 +801,27 @@ class CatalogoSyncView(APIView):
                     "updated": 0,
                     "unchanged": 0,
                 }
+                table_diff = None
+                if diff is not None:
+                    table_diff = diff[config["key"]] = {
+                        "created": [],
+                        "updated": [],
+                        "unchanged": [],
+                    }
+
+                import_batch = (
+                    self._import_batch_bulk
+                    if self._supports_bulk_import(config)
+                    else self._import_batch_one_by_one
+                )
                 seen_ids = set()
+                for batch in _iter_batches(enumerate(rows, start=1), IMPORT_BATCH_SIZE):
+                    import_batch(config, batch, seen_ids, table_summary, table_diff)
 
-                for row_index, row in enumerate(rows, start=1):
-                    cleaned = self._clean_row(config, row, row_index, seen_ids)
-                    record_id = cleaned["id"]
-                    instance = config["model"].objects.filter(pk=record_id).first()
-
-                    if instance is None:
-                        instance = config["model"](id=record_id)
-                        self._apply_changes(config, instance, cleaned)
-                        self._save_instance(
-                            config,
-                            instance,
-                            row_index=row_index,
-                            record_id=record_id,
-                            force_insert=True,
-                        )
-                        models_to_reset.append(config["model"])
-                        table_summary["created"] += 1
-                    else:
-                        changed = self._apply_changes(config, instance, cleaned)
-                        if changed:
-                            self._save_instance(
-                                config,
-                                instance,
-                                row_index=row_index,
-                                record_id=record_id,
-                            )
-                            table_summary["updated"] += 1
-                        else:
-                            table_summary["unchanged"] += 1
-
-                    table_summary["processed"] += 1
+                if table_summary["created"]:
+                    models_to_reset.append(config["model"])
+                if table_summary["created"] or table_summary["updated"]:
+                    changed_models.add(config["model"])
 
                 summary["processed"] += table_summary["processed"]
                 summary["created"] += table_summary["created"]
@@ -722,12 +829,175 @@ class CatalogoSyncView(APIView):
                 summary["unchanged"] += table_summary["unchanged"]
                 summary["tables"].append(table_summary)
 
-            if models_to_reset:
-                self._reset_sequences(models_to_reset)
+            if dry_run:
+                # La simulacion recorre el mismo camino de escritura y lo
+                # descarta al final; las secuencias no se tocan porque setval
+                # no se revierte en PostgreSQL.
+                transaction.set_rollback(True)
+            else:
+                if models_to_reset:
+                    self._reset_sequences(models_to_reset)
+                # Los codigos importados tal cual adelantan sus contadores.
+                sincronizar_secuencias_codigo(changed_models)
+
+        if not dry_run and changed_models.intersection(MODELOS_CATALOGO):
+            # bulk_create/bulk_update no emiten post_save.
+            invalidar_cache_catalogos()
+            transaction.on_commit(invalidar_cache_catalogos)
+        if not dry_run and changed_models.intersection(MODELOS_GESTION):
+            invalidar_cache_gestion_al_confirmar()
+
+        if diff is not None:
+            diff = {
+                table_key: {
+                    estado: _compact_ids(record_ids)
+                    for estado, record_ids in table_diff.items()
+                }
+                for table_key, table_diff in diff.items()
+            }
+        return summary, diff
 
-        return summary
+    @staticmethod
+    def _supports_bulk_import(config):
+        # Los modelos con save() propio (codigos, stock, relaciones inversas)
+        # siguen guardandose fila por fila para no saltarse esa logica.
+        return config["model"].save is models.Model.save
+
+    @staticmethod
+    def _record_result(table_summary, table_diff, result, record_id):
+        table_summary[result] += 1
+        if table_diff is not None:
+            table_diff[result].append(record_id)
+
+    def _import_batch_one_by_one(self, config, batch, seen_ids, table_summary, table_diff):
+        existing, related_cache = self._prefetch_table(config, [row for _, row in batch])
+
+        for row_index, row in batch:
+            cleaned = self._clean_row(config, row, row_index, seen_ids, related_cache)
+            record_id = cleaned["id"]
+            instance = existing.get(record_id)
+
+            if instance is None:
+                instance = config["model"](id=record_id)
+                self._apply_changes(config, instance, cleaned)
+                self._save_instance(
+                    config,
+                    instance,
+                    row_index=row_index,
+                    record_id=record_id,
+                    force_insert=True,
+                )
+                result = "created"
+            elif self._apply_changes(config, instance, cleaned):
+                self._save_instance(
+                    config,
+                    instance,
+                    row_index=row_index,
+                    record_id=record_id,
+                )
+                result = "updated"
+            else:
+                result = "unchanged"
+
+            self._record_result(table_summary, table_diff, result, record_id)
+            table_summary["processed"] += 1
+
+    def _import_batch_bulk(self, config, batch, seen_ids, table_summary, table_diff):
+        existing, related_cache = self._prefetch_table(config, [row for _, row in batch])
+        to_create = []
+        to_update = []
+        update_fields = set()
+        pending = []
+
+        for row_index, row in batch:
+            cleaned = self._clean_row(config, row, row_index, seen_ids, related_cache)
+            record_id = cleaned["id"]
+            instance = existing.get(record_id)
+            table_summary["processed"] += 1
+
+            if instance is None:
+                instance = config["model"](id=record_id)
+                self._apply_changes(config, instance, cleaned)
+                to_create.append(instance)
+                result = "created"
+            elif self._apply_changes(config, instance, cleaned):
+                to_update.append(instance)
+                update_fields.update(name for name in cleaned if name != "id")
+                result = "updated"
+            else:
+                self._record_result(table_summary, table_diff, "unchanged", record_id)
+                continue
 
-    def _clean_row(self, config, row, row_index, seen_ids):
+            self._validate_instance(
+                config,
+                instance,
+                row_index=row_index,
+                record_id=record_id,
+                validate_unique=False,
+            )
+            pending.append((row_index, record_id, instance))
+            if table_diff is not None:
+                table_diff[result].append(record_id)
+
+        self._validate_unique_in_bulk(config, pending)
+
+        try:
+            with transaction.atomic():
+                config["model"].objects.bulk_create(to_create, batch_size=IMPORT_BATCH_SIZE)
+                if to_update:
+                    update_fields.update(self._touch_auto_now_fields(config, to_update))
+                    config["model"].objects.bulk_update(
+                        to_update,
+                        sorted(update_fields),
+                        batch_size=IMPORT_BATCH_SIZE,
+                    )
+        except IntegrityError as exc:
+            raise ValidationError(
+                {
+                    "detail": "No se pudo guardar la tabla importada.",
+                    "table": config["key"],
+                    "label": config["label"],
+                    "errors": [str(exc)],
+                }
+            ) from exc
+
+        table_summary["created"] += len(to_create)
+        table_summary["updated"] += len(to_update)
+
+    def _prefetch_table(self, config, rows):
+        """Trae en una consulta los registros existentes y en otra cada FK referenciada."""
+        model = config["model"]
+        dict_rows = [row for row in rows if isinstance(row, dict)]
+
+        record_ids = self._cleanable_ids(model, (row.get("id") for row in dict_rows))
+        existing = model.objects.in_bulk(record_ids) if record_ids else {}
+
+        related_cache = {}
+        for field_name, related_model in config.get("foreign_keys", {}).items():
+            related_ids = self._cleanable_ids(
+                related_model,
+                (row.get(field_name) for row in dict_rows),
+            )
+            related_cache[field_name] = (
+                related_model.objects.in_bulk(related_ids) if related_ids else {}
+            )
+
+        return existing, related_cache
+
+    @staticmethod
+    def _cleanable_ids(model, raw_values):
+        ids = set()
+        for raw_value in raw_values:
+            if raw_value in (None, ""):
+                continue
+            try:
+                ids.add(model._meta.pk.clean(raw_value, None))
+            except DjangoValidationError:
+                # El error se reporta con su fila al limpiar el registro.
+                continue
+        return list(ids)
+
+    def _clean_row(self, config, row, row_index, seen_ids, related_cache):
         if not isinstance(row, dict):
             raise ValidationError(
                 {
@@ -782,6 +1052,7 @@ class CatalogoSyncView(APIView):
                 cleaned[field_name] = self._resolve_related_instance(
                     config=config,
                     field_name=field_name,
+                    related_cache=related_cache,
                     raw_value=row[field_name],
                     row_index=row_index,
                     record_id=record_id,
@@ -819,6 +1090,7 @@ class CatalogoSyncView(APIView):
         self,
         config,
         field_name,
+        related_cache,
         raw_value,
         row_index,
         record_id,
@@ -844,7 +1116,7 @@ class CatalogoSyncView(APIView):
                 }
             ) from exc
 
-        related_instance = related_model.objects.filter(pk=related_id).first()
+        related_instance = related_cache[field_name].get(related_id)
         if related_instance is None:
             raise ValidationError(
                 {
@@ -891,20 +1163,9 @@ class CatalogoSyncView(APIView):
         record_id,
         force_insert=False,
     ):
+        self._validate_instance(config, instance, row_index=row_index, record_id=record_id)
         try:
-            instance.full_clean()
             instance.save(force_insert=force_insert)
-        except DjangoValidationError as exc:
-            raise ValidationError(
-                {
-                    "detail": "No se pudo validar el registro importado.",
-                    "table": config["key"],
-                    "label": config["label"],
-                    "row": row_index,
-                    "id": record_id,
-                    "errors": getattr(exc, "message_dict", exc.messages),
-                }
-            ) from exc
         except IntegrityError as exc:
             raise ValidationError(
                 {
@@ -917,6 +1178,129 @@ class CatalogoSyncView(APIView):
                 }
             ) from exc
 
+    def _validate_instance(
+        self,
+        config,
+        instance,
+        row_index,
+        record_id,
+        validate_unique=True,
+    ):
+        # Las FK ya se resolvieron contra el cache precargado; validarlas de
+        # nuevo costaria una consulta por campo y fila.
+        resolved_foreign_keys = [
+            field_name
+            for field_name in config.get("foreign_keys", {})
+            if getattr(instance, f"{field_name}_id", None) is not None
+        ]
+        steps = [
+            lambda: instance.clean_fields(exclude=resolved_foreign_keys),
+            instance.clean,
+        ]
+        if validate_unique:
+            steps.extend([instance.validate_unique, instance.validate_constraints])
+
+        errors = {}
+        for step in steps:
+            try:
+                step()
+            except DjangoValidationError as exc:
+                errors = exc.update_error_dict(errors)
+
+        if errors:
+            raise self._row_validation_error(
+                config,
+                row_index,
+                record_id,
+                DjangoValidationError(errors),
+            )
+
+    def _validate_unique_in_bulk(self, config, pending):
+        """
+        Valida unique/unique_together de todas las filas a guardar con una
+        consulta por restriccion, considerando el estado final de la tabla.
+        """
+        if not pending:
+            return
+
+        model = config["model"]
+        unique_checks, _ = pending[0][2]._get_unique_checks(include_meta_constraints=True)
+        pending_ids = [record_id for _, record_id, _ in pending]
+
+        for model_class, unique_check in unique_checks:
+            if tuple(unique_check) == (model._meta.pk.name,):
+                continue
+
+            attnames = [model._meta.get_field(name).attname for name in unique_check]
+            owners = {}
+            keyed_rows = []
+            for row_index, record_id, instance in pending:
+                key = tuple(getattr(instance, attname) for attname in attnames)
+                if None in key:
+                    continue
+                keyed_rows.append((key, row_index, record_id, instance))
+                owners.setdefault(key, record_id)
+
+            if not keyed_rows:
+                continue
+
+            for key, owner_id in self._existing_unique_owners(model, attnames, owners, pending_ids):
+                owners[key] = owner_id
+
+            for key, row_index, record_id, instance in keyed_rows:
+                if owners[key] == record_id:
+                    continue
+                error_key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                exc = DjangoValidationError(
+                    {error_key: [instance.unique_error_message(model_class, unique_check)]}
+                )
+                raise self._row_validation_error(config, row_index, record_id, exc)
+
+    @staticmethod
+    def _existing_unique_owners(model, attnames, owners, pending_ids):
+        keys = list(owners)
+        excluded_ids = set(pending_ids)
+        for start in range(0, len(keys), IMPORT_BATCH_SIZE):
+            chunk = keys[start:start + IMPORT_BATCH_SIZE]
+            if len(attnames) == 1:
+                condition = Q(**{f"{attnames[0]}__in": [key[0] for key in chunk]})
+            else:
+                condition = Q()
+                for key in chunk:
+                    condition |= Q(**dict(zip(attnames, key)))
+
+            for row in model.objects.filter(condition).values_list("pk", *attnames):
+                if row[0] not in excluded_ids:
+                    yield tuple(row[1:]), row[0]
+
+    @staticmethod
+    def _touch_auto_now_fields(config, instances):
+        # bulk_update no pasa por pre_save, asi que auto_now se fija a mano.
+        field_names = [
+            field.name
+            for field in config["model"]._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+        if field_names:
+            now = timezone.now()
+            for instance in instances:
+                for field_name in field_names:
+                    setattr(instance, field_name, now)
+        return field_names
+
+    @staticmethod
+    def _row_validation_error(config, row_index, record_id, exc):
+        return ValidationError(
+            {
+                "detail": "No se pudo validar el registro importado.",
+                "table": config["key"],
+                "label": config["label"],
+                "row": row_index,
+                "id": record_id,
+                "errors": getattr(exc, "message_dict", exc.messages),
+            }
+        )
+
     def _reset_sequences(self, models_to_reset):
         unique_models = []
         seen = set()
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .models import Almacen, Dimension, Sistema, UnidadMedida, UnidadRelacion
+
+
+CACHE_VERSION_KEY = "catalogos:version"
+CACHE_TIMEOUT = 60 * 60
+MODELOS_CATALOGO = (Almacen, Dimension, Sistema, UnidadMedida, UnidadRelacion)
+
+
+def _version_cache():
+    return cache.get_or_set(CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def _cache_key(nombre, version):
+    return f"catalogos:{version}:{nombre}"
+
+
+def invalidar_cache_catalogos():
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def _catalogo_modificado(sender, **kwargs):
+    invalidar_cache_catalogos()
+    transaction.on_commit(invalidar_cache_catalogos)
+
+
+for _modelo in MODELOS_CATALOGO:
+    post_save.connect(_catalogo_modificado, sender=_modelo, dispatch_uid=f"catalogos:{_modelo.__name__}:save")
+    post_delete.connect(_catalogo_modificado, sender=_modelo, dispatch_uid=f"catalogos:{_modelo.__name__}:delete")
+
+
+def obtener_catalogo(nombre, construir):
+    """
+    Entrada ``{"datos", "etag", "modificado"}`` del catalogo ``nombre``.
+    ``construir`` solo se llama si la version vigente no esta en cache.
+    """
+    clave = _cache_key(nombre, _version_cache())
+    entrada = cache.get(clave)
+    if entrada is not None:
+        return entrada
+
+    contenido = json.dumps(construir(), cls=DjangoJSONEncoder)
+    entrada = {
+        "datos": json.loads(contenido),
+        "etag": quote_etag(hashlib.md5(contenido.encode()).hexdigest()),
+        "modificado": int(time.time()),
+    }
+    # Lo leido dentro de una transaccion podria revertirse; solo se
+    # comparte con otros requests lo confirmado.
+    if not transaction.get_connection().in_atomic_block:
+        cache.set(clave, entrada, timeout=CACHE_TIMEOUT)
+    return entrada
+
+
+def respuesta_catalogo(request, nombre, construir):
+    """Responde el catalogo cacheado con ETag/Last-Modified, o 304 si el cliente ya lo tiene."""
+    entrada = obtener_catalogo(nombre, construir)
+    respuesta = get_conditional_response(
+        request,
+        etag=entrada["etag"],
+        last_modified=entrada["modificado"],
+    ) or Response(entrada["datos"])
+    respuesta["ETag"] = entrada["etag"]
+    respuesta["Last-Modified"] = http_date(entrada["modificado"])
+    return respuesta
@@ -0,0 +1,121 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import (
+    ActividadTrabajo,
+    Compra,
+    CompraDetalle,
+    HistorialConsumible,
+    HistorialUbicacionItem,
+    Item,
+    Maquinaria,
+    OrdenTrabajo,
+    Proveedor,
+    TipoCambioDiario,
+)
+from .tareas import PARAMETRO_ASINCRONO, solicita_asincrono
+
+
+CACHE_VERSION_KEY = "gestion:version"
+# Con cache en memoria local cada proceso guarda su propia version; el
+# vencimiento acota cuanto puede tardar un worker en ver un cambio hecho en
+# otro. Con CACHE_DIR (cache en disco) la version es compartida.
+CACHE_TIMEOUT = 60 * 15
+MODELOS_GESTION = (
+    ActividadTrabajo,
+    Compra,
+    CompraDetalle,
+    HistorialConsumible,
+    HistorialUbicacionItem,
+    Item,
+    Maquinaria,
+    OrdenTrabajo,
+    Proveedor,
+    TipoCambioDiario,
+)
+
+
+def invalidar_cache_gestion():
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def invalidar_cache_gestion_al_confirmar():
+    invalidar_cache_gestion()
+    transaction.on_commit(invalidar_cache_gestion)
+
+
+def _dato_modificado(sender, **kwargs):
+    invalidar_cache_gestion_al_confirmar()
+
+
+for _modelo in MODELOS_GESTION:
+    post_save.connect(_dato_modificado, sender=_modelo, dispatch_uid=f"gestion:{_modelo.__name__}:save")
+    post_delete.connect(_dato_modificado, sender=_modelo, dispatch_uid=f"gestion:{_modelo.__name__}:delete")
+
+
+def _cache_key(nombre, query_params):
+    # Mismo resultado sin importar el orden de los parametros.
+    consulta = sorted(
+        (clave, valor)
+        for clave in query_params
+        if clave != PARAMETRO_ASINCRONO
+        for valor in query_params.getlist(clave)
+    )
+    return f"gestion:{nombre}:{hashlib.md5(repr(consulta).encode()).hexdigest()}"
+
+
+def respuesta_gestion(request, nombre, construir):
+    """
+    Responde el resultado cacheado del tablero ``nombre`` para los parametros
+    del request. La version y la entrada se leen juntas: una carga repetida
+    cuesta una sola lectura de cache. ``construir`` devuelve la Response.
+    """
+    clave = _cache_key(nombre, request.query_params)
+    guardado = cache.get_many([CACHE_VERSION_KEY, clave])
+    version = guardado.get(CACHE_VERSION_KEY)
+    entrada = guardado.get(clave)
+    if version is not None and entrada is not None and entrada["version"] == version:
+        return Response(entrada["datos"])
+
+    if version is None:
+        cache.add(CACHE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CACHE_VERSION_KEY)
+
+    respuesta = construir()
+    # Lo leido dentro de una transaccion podria revertirse; solo se
+    # comparte con otros requests lo confirmado.
+    if (
+        respuesta.status_code == status.HTTP_200_OK
+        and version is not None
+        and not transaction.get_connection().in_atomic_block
+    ):
+        cache.set(clave, {"version": version, "datos": respuesta.data}, timeout=CACHE_TIMEOUT)
+    return respuesta
+
+
+def cachear_resultado_gestion(vista):
+    """
+    Cachea la accion ``gestion-*`` de MaquinariaViewSet. Sin permiso o con
+    ``?async`` se llama a la vista tal cual para conservar su respuesta.
+    """
+
+    @wraps(vista)
+    def envoltura(self, request, *args, **kwargs):
+        if not self._puede_ver_gestion(request.user) or solicita_asincrono(request):
+            return vista(self, request, *args, **kwargs)
+        return respuesta_gestion(
+            request,
+            vista.__name__,
+            lambda: vista(self, request, *args, **kwargs),
+        )
+
+    return envoltura
@@ -0,0 +1,169 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import (
+    HistorialConsumible,
+    HistorialUbicacionItem,
+    ItemUnidad,
+    Maquinaria,
+)
+from .vida_util import refrescar_vida_util_lotes, refrescar_vida_util_unidades
+
+
+TAMANO_LOTE = 500
+
+# Campo del item y de la unidad/lote de cada historial encadenable por horometro.
+CAMPOS_HISTORIAL = {
+    HistorialUbicacionItem: ("item_unidad__item_id", "item_unidad_id"),
+    HistorialConsumible: ("item_id", "lote_id"),
+}
+
+
+def historiales_encadenables(modelo, maquinaria_id):
+    """Historiales instalados en la maquinaria por una OT: los que reciben horometro de inicio y fin."""
+    historiales = modelo.objects.filter(
+        orden_trabajo__isnull=False,
+        maquinaria_id=maquinaria_id,
+        trabajador__isnull=True,
+        almacen__isnull=True,
+    )
+    if modelo is HistorialUbicacionItem:
+        historiales = historiales.filter(estado=ItemUnidad.Estado.USADO)
+    return historiales
+
+
+def ordenes_previas_por_item(modelo, orden, item_ids):
+    """
+    Para cada item, la OT anterior a ``orden`` en la misma maquinaria cuyo
+    historial sigue sin horometro de fin. Una sola consulta con ventana.
+    """
+    campo_item, _ = CAMPOS_HISTORIAL[modelo]
+    candidatos = (
+        historiales_encadenables(modelo, orden.maquinaria_id)
+        .filter(
+            **{f"{campo_item}__in": item_ids},
+            horometro_inicio__isnull=False,
+            horometro_fin__isnull=True,
+        )
+        .exclude(orden_trabajo=orden)
+        .filter(
+            Q(orden_trabajo__fecha__lt=orden.fecha)
+            | Q(orden_trabajo__fecha=orden.fecha, orden_trabajo_id__lt=orden.id)
+        )
+        .annotate(
+            posicion=Window(
+                RowNumber(),
+                partition_by=[F(campo_item)],
+                order_by=[
+                    F("orden_trabajo__fecha").desc(),
+                    F("orden_trabajo_id").desc(),
+                    F("id").desc(),
+                ],
+            )
+        )
+        .filter(posicion=1)
+        .values_list(campo_item, "orden_trabajo_id")
+    )
+    return dict(candidatos)
+
+
+def cerrar_horometro_previos(modelo, orden, item_ids):
+    """
+    Completa el horometro de fin de los historiales de la OT previa de cada
+    item con el horometro de ``orden``. Devuelve las unidades o lotes tocados.
+    """
+    previas = ordenes_previas_por_item(modelo, orden, item_ids)
+    if not previas:
+        return set()
+
+    campo_item, campo_destino = CAMPOS_HISTORIAL[modelo]
+    condicion = Q()
+    for item_id, orden_id in previas.items():
+        condicion |= Q(**{campo_item: item_id}, orden_trabajo_id=orden_id)
+
+    historiales = list(
+        historiales_encadenables(modelo, orden.maquinaria_id)
+        .filter(condicion, horometro_fin__isnull=True)
+        .values_list("id", campo_destino)
+    )
+    modelo.objects.filter(pk__in=[pk for pk, _ in historiales]).update(
+        horometro_fin=orden.horometro,
+    )
+    return {destino_id for _, destino_id in historiales}
+
+
+def _reencadenar(modelo, maquinaria_id):
+    """Recalcula inicio y fin de los historiales de la maquinaria en una pasada por item."""
+    campo_item, campo_destino = CAMPOS_HISTORIAL[modelo]
+    historiales = list(
+        historiales_encadenables(modelo, maquinaria_id)
+        .filter(orden_trabajo__horometro__isnull=False)
+        .annotate(
+            item_cadena=F(campo_item),
+            fecha_orden=F("orden_trabajo__fecha"),
+            horometro_orden=F("orden_trabajo__horometro"),
+        )
+        .order_by("item_cadena", "fecha_orden", "orden_trabajo_id", "id")
+    )
+
+    ordenes_por_item = defaultdict(list)
+    for historial in historiales:
+        ordenes = ordenes_por_item[historial.item_cadena]
+        if not ordenes or ordenes[-1][0] != historial.orden_trabajo_id:
+            ordenes.append((historial.orden_trabajo_id, historial.horometro_orden))
+
+    siguiente_horometro = {}
+    for item_id, ordenes in ordenes_por_item.items():
+        for (orden_id, _), (_, horometro) in zip(ordenes, ordenes[1:]):
+            siguiente_horometro[(item_id, orden_id)] = horometro
+
+    modificados = []
+    for historial in historiales:
+        cambio = False
+        if historial.horometro_inicio is None:
+            historial.horometro_inicio = historial.horometro_orden
+            cambio = True
+        horometro_fin = siguiente_horometro.get((historial.item_cadena, historial.orden_trabajo_id))
+        if horometro_fin is not None and historial.horometro_fin != horometro_fin:
+            historial.horometro_fin = horometro_fin
+            cambio = True
+        if cambio:
+            modificados.append(historial)
+
+    modelo.objects.bulk_update(
+        modificados,
+        ["horometro_inicio", "horometro_fin"],
+        batch_size=TAMANO_LOTE,
+    )
+    return {getattr(historial, campo_destino) for historial in modificados}
+
+
+def recalcular_horometros_maquinaria(maquinaria_id):
+    """
+    Reencadena todo el historial de la maquinaria: cada OT con horometro cierra
+    los historiales de la OT anterior del mismo item. Pensado para despues de
+    editar OTs con fecha u horometro retroactivos.
+    """
+    with transaction.atomic():
+        item_unidad_ids = _reencadenar(HistorialUbicacionItem, maquinaria_id)
+        lote_ids = _reencadenar(HistorialConsumible, maquinaria_id)
+        refrescar_vida_util_unidades(item_unidad_ids)
+        refrescar_vida_util_lotes(lote_ids)
+    return len(item_unidad_ids), len(lote_ids)
+
+
+def recalcular_horometros(maquinaria_ids=None):
+    """Reencadena las maquinarias indicadas (todas si no se indican); devuelve totales."""
+    maquinarias = Maquinaria.objects.order_by("id")
+    if maquinaria_ids:
+        maquinarias = maquinarias.filter(pk__in=maquinaria_ids)
+
+    total_unidades = total_lotes = 0
+    for maquinaria_id in maquinarias.values_list("id", flat=True):
+        unidades, lotes = recalcular_horometros_maquinaria(maquinaria_id)
+        total_unidades += unidades
+        total_lotes += lotes
+    return total_unidades, total_lotes
@@ -0,0 +1,166 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import (
+    Case,
+    DurationField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    When,
+    Window,
+)
+from django.db.models.functions import ExtractHour, ExtractMinute, Lag, TruncMonth
+
+from .models import ActividadTrabajo, OrdenTrabajo
+
+
+def _minutos(campo):
+    return ExtractHour(campo) * 60 + ExtractMinute(campo)
+
+
+def ordenes_filtradas(fecha_desde=None, fecha_hasta=None, tipo_mantenimiento=None, prioridad=None):
+    ordenes = OrdenTrabajo.objects.filter(maquinaria__isnull=False)
+    if fecha_desde:
+        ordenes = ordenes.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        ordenes = ordenes.filter(fecha__lte=fecha_hasta)
+    if prioridad:
+        ordenes = ordenes.filter(prioridad=prioridad)
+    if tipo_mantenimiento:
+        ordenes = ordenes.filter(
+            Exists(
+                ActividadTrabajo.objects.filter(
+                    orden_id=OuterRef("pk"),
+                    tipo_mantenimiento=tipo_mantenimiento,
+                )
+            )
+        )
+    return ordenes
+
+
+def _intervalos(ordenes):
+    """
+    Una fila por OT con el intervalo desde la OT anterior de la misma
+    maquinaria (LAG sobre maquinaria, fecha) y su duracion en minutos. Los
+    filtros se aplican antes de la ventana: el intervalo es entre OTs filtradas.
+    """
+    return (
+        ordenes
+        .annotate(
+            fecha_anterior=Window(
+                Lag("fecha"),
+                partition_by=[F("maquinaria_id")],
+                order_by=[F("fecha").asc(), F("id").asc()],
+            ),
+            minutos=ExpressionWrapper(
+                _minutos("hora_fin") - _minutos("hora_inicio"),
+                output_field=IntegerField(),
+            ),
+        )
+        .annotate(
+            maquina=F("maquinaria_id"),
+            mes=TruncMonth("fecha"),
+            intervalo=ExpressionWrapper(F("fecha") - F("fecha_anterior"), output_field=DurationField()),
+            duracion_minutos=Case(When(minutos__gt=0, then=F("minutos")), default=None),
+        )
+        .order_by()
+        .values("maquina", "mes", "intervalo", "duracion_minutos")
+    )
+
+
+def _duracion(valor):
+    if valor is None or isinstance(valor, timedelta):
+        return valor or timedelta(0)
+    # Motores sin intervalo nativo (SQLite) devuelven microsegundos.
+    return connection.ops.convert_durationfield_value(valor, None, connection)
+
+
+def acumulados_por_mes(ordenes):
+    """
+    Totales por (maquinaria, mes) agregados en la base sobre la ventana LAG:
+    ``[{"maquinaria_id", "mes", "ordenes", "intervalo", "intervalos",
+    "minutos", "duraciones"}, ...]``. Una sola consulta para toda la flota.
+    """
+    sql, params = _intervalos(ordenes).query.sql_with_params()
+    q = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {q('maquina')}, {q('mes')}, COUNT(*), "
+            f"SUM({q('intervalo')}), COUNT({q('intervalo')}), "
+            f"SUM({q('duracion_minutos')}), COUNT({q('duracion_minutos')}) "
+            f"FROM ({sql}) intervalos "
+            f"GROUP BY {q('maquina')}, {q('mes')}",
+            params,
+        )
+        filas = cursor.fetchall()
+
+    return [
+        {
+            "maquinaria_id": maquinaria_id,
+            # SQLite devuelve el mes como texto; PostgreSQL como fecha.
+            "mes": str(mes)[:7],
+            "ordenes": ordenes_mes,
+            "intervalo": _duracion(intervalo),
+            "intervalos": intervalos,
+            "minutos": int(minutos or 0),
+            "duraciones": duraciones,
+        }
+        for maquinaria_id, mes, ordenes_mes, intervalo, intervalos, minutos, duraciones in filas
+    ]
+
+
+def _promedios(total_intervalo, intervalos, minutos, duraciones):
+    mtbf_dias = (
+        round(Decimal(total_intervalo.days) / Decimal(intervalos), 2) if intervalos else None
+    )
+    mttr_horas = (
+        round(Decimal(minutos) / Decimal("60") / Decimal(duraciones), 2) if duraciones else None
+    )
+    return (
+        float(mtbf_dias) if mtbf_dias is not None else None,
+        float(mttr_horas) if mttr_horas is not None else None,
+    )
+
+
+def indicadores_maquinaria(ordenes):
+    """
+    MTBF (dias entre OTs consecutivas) y MTTR (horas por OT) por maquinaria y
+    por mes para toda la flota: ``({maquinaria_id: totales}, [tendencia])``.
+    """
+    por_maquinaria = defaultdict(lambda: [0, timedelta(0), 0, 0, 0])
+    por_mes = defaultdict(lambda: [0, timedelta(0), 0, 0, 0])
+    for fila in acumulados_por_mes(ordenes):
+        for destino in (por_maquinaria[fila["maquinaria_id"]], por_mes[fila["mes"]]):
+            destino[0] += fila["ordenes"]
+            destino[1] += fila["intervalo"]
+            destino[2] += fila["intervalos"]
+            destino[3] += fila["minutos"]
+            destino[4] += fila["duraciones"]
+
+    indicadores = {}
+    for maquinaria_id, (total_ordenes, *acumulado) in por_maquinaria.items():
+        mtbf_dias, mttr_horas = _promedios(*acumulado)
+        indicadores[maquinaria_id] = {
+            "total_ordenes": total_ordenes,
+            "mtbf_dias": mtbf_dias,
+            "mttr_horas": mttr_horas,
+        }
+
+    tendencia = []
+    for mes in sorted(por_mes):
+        total_ordenes, *acumulado = por_mes[mes]
+        mtbf_dias, mttr_horas = _promedios(*acumulado)
+        tendencia.append(
+            {
+                "mes": mes,
+                "total_ordenes": total_ordenes,
+                "mtbf_dias": mtbf_dias,
+                "mttr_horas": mttr_horas,
+            }
+        )
+    return indicadores, tendencia
@@ -0,0 +1,265 @@
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import (
+    Compra,
+    CompraDetalle,
+    Item,
+    KardexMovimiento,
+    MovimientoConsumible,
+    MovimientoRepuesto,
+)
+from .tipo_cambio import ResolutorTipoCambio
+
+
+TAMANO_LOTE = 500
+
+# Desempate para movimientos con la misma fecha: compras antes que salidas.
+_PRIORIDAD_TIPO = {
+    KardexMovimiento.Tipo.COMPRA: 0,
+    KardexMovimiento.Tipo.SALIDA_REPUESTO: 1,
+    KardexMovimiento.Tipo.SALIDA_CONSUMIBLE: 2,
+}
+
+
+def fecha_kardex_compra(fecha):
+    fecha_compra = datetime.combine(fecha, time.min)
+    if timezone.is_aware(timezone.now()):
+        fecha_compra = timezone.make_aware(fecha_compra, timezone.get_current_timezone())
+    return fecha_compra
+
+
+def _maquinaria_de(movimiento):
+    orden = movimiento.actividad.orden if movimiento.actividad else None
+    return orden, (orden.maquinaria if orden else None)
+
+
+def _eventos_item(item_id, desde, resolutor):
+    compras = CompraDetalle.objects.filter(item_id=item_id).select_related("compra")
+    salidas = (
+        MovimientoRepuesto.objects
+        .filter(item_unidad__item_id=item_id, actividad__es_planificada=False)
+        .select_related(
+            "actividad__orden__maquinaria",
+            "item_unidad__compra_detalle__compra",
+        )
+    )
+    salidas_consumible = (
+        MovimientoConsumible.objects
+        .filter(item_id=item_id, actividad__es_planificada=False)
+        .select_related("actividad__orden__maquinaria")
+    )
+    if desde is not None:
+        compras = compras.filter(compra__fecha__gte=desde.date())
+        salidas = salidas.filter(fecha__gte=desde)
+        salidas_consumible = salidas_consumible.filter(fecha__gte=desde)
+
+    compras = list(compras)
+    salidas = list(salidas)
+    resolutor.precargar_detalles(compras + [s.item_unidad.compra_detalle for s in salidas])
+
+    eventos = []
+    for detalle in compras:
+        fecha = fecha_kardex_compra(detalle.compra.fecha)
+        costo_unitario = resolutor.monto_pen_por_detalle(detalle.costo_unitario, detalle)
+        if costo_unitario is None or (desde is not None and fecha < desde):
+            continue
+        eventos.append({
+            "orden": (fecha, _PRIORIDAD_TIPO[KardexMovimiento.Tipo.COMPRA], detalle.id),
+            "tipo": KardexMovimiento.Tipo.COMPRA,
+            "fecha": fecha,
+            "cantidad": Decimal(detalle.cantidad),
+            "costo_unitario": costo_unitario,
+            "registro": f"{detalle.compra.tipo_comprobante} {detalle.compra.codigo_comprobante}",
+            "compra_detalle_id": detalle.id,
+        })
+
+    for salida in salidas:
+        detalle = salida.item_unidad.compra_detalle
+        costo_unitario = (
+            resolutor.monto_pen_por_detalle(detalle.costo_unitario, detalle)
+            if detalle else Decimal("0.00")
+        )
+        if costo_unitario is None:
+            continue
+        orden, maquinaria = _maquinaria_de(salida)
+        eventos.append({
+            "orden": (salida.fecha, _PRIORIDAD_TIPO[KardexMovimiento.Tipo.SALIDA_REPUESTO], salida.id),
+            "tipo": KardexMovimiento.Tipo.SALIDA_REPUESTO,
+            "fecha": salida.fecha,
+            "cantidad": Decimal("1"),
+            "costo_unitario": costo_unitario,
+            "registro": orden.codigo_orden if orden else "OT",
+            "movimiento_repuesto_id": salida.id,
+            "maquinaria_id": maquinaria.id if maquinaria else None,
+        })
+
+    for salida in salidas_consumible:
+        orden, maquinaria = _maquinaria_de(salida)
+        eventos.append({
+            "orden": (salida.fecha, _PRIORIDAD_TIPO[KardexMovimiento.Tipo.SALIDA_CONSUMIBLE], salida.id),
+            "tipo": KardexMovimiento.Tipo.SALIDA_CONSUMIBLE,
+            "fecha": salida.fecha,
+            "cantidad": salida.cantidad,
+            "costo_unitario": None,
+            "registro": orden.codigo_orden if orden else "OT",
+            "movimiento_consumible_id": salida.id,
+            "maquinaria_id": maquinaria.id if maquinaria else None,
+        })
+
+    eventos.sort(key=lambda evento: evento["orden"])
+    return eventos
+
+
+def _construir_registros(item_id, eventos, saldo, posicion):
+    """Aplica el promedio ponderado desde el saldo dado; devuelve filas sin guardar."""
+    stock, costo_total, costo_promedio = saldo
+    registros = []
+
+    for evento in eventos:
+        inventario_inicial = stock
+
+        if evento["tipo"] == KardexMovimiento.Tipo.COMPRA:
+            entrada = evento["cantidad"]
+            salida = Decimal("0")
+            costo_total += entrada * evento["costo_unitario"]
+            stock += entrada
+            costo_promedio = costo_total / stock if stock > 0 else Decimal("0.00")
+        else:
+            entrada = Decimal("0")
+            salida = evento["cantidad"]
+            costo_salida = (
+                evento["costo_unitario"]
+                if evento["costo_unitario"] is not None
+                else costo_promedio
+            )
+            costo_total -= costo_salida * salida
+            stock -= salida
+
+        registros.append(
+            KardexMovimiento(
+                item_id=item_id,
+                posicion=posicion,
+                tipo=evento["tipo"],
+                fecha=evento["fecha"],
+                compra_detalle_id=evento.get("compra_detalle_id"),
+                movimiento_repuesto_id=evento.get("movimiento_repuesto_id"),
+                movimiento_consumible_id=evento.get("movimiento_consumible_id"),
+                maquinaria_id=evento.get("maquinaria_id"),
+                registro=evento["registro"][:120],
+                inventario_inicial=inventario_inicial,
+                entrada=entrada,
+                salida=salida,
+                costo_unitario=(
+                    evento["costo_unitario"]
+                    if evento["tipo"] == KardexMovimiento.Tipo.SALIDA_REPUESTO
+                    else costo_promedio
+                ),
+                inventario_final_cantidad=stock,
+                inventario_final_costo=costo_total,
+                costo_promedio=costo_promedio,
+            )
+        )
+        posicion += 1
+
+    return registros
+
+
+def refrescar_kardex_item(item_id, desde=None, resolutor=None):
+    """
+    Recalcula el kardex del item desde la fecha indicada, partiendo del saldo
+    de la ultima fila anterior. Sin fecha se recalcula completo.
+    """
+    if not item_id:
+        return
+
+    with transaction.atomic():
+        # Serializa los recalculos concurrentes del mismo item.
+        list(Item.objects.select_for_update().filter(pk=item_id).values_list("pk", flat=True))
+
+        filas = KardexMovimiento.objects.filter(item_id=item_id)
+        base = None
+        if desde is not None:
+            base = filas.filter(fecha__lt=desde).order_by("-posicion").first()
+
+        if base is None:
+            desde = None
+            saldo = (Decimal("0"), Decimal("0.00"), Decimal("0.00"))
+            posicion = 1
+            filas.delete()
+        else:
+            saldo = (
+                base.inventario_final_cantidad,
+                base.inventario_final_costo,
+                base.costo_promedio,
+            )
+            posicion = base.posicion + 1
+            filas.filter(posicion__gt=base.posicion).delete()
+
+        eventos = _eventos_item(item_id, desde, resolutor or ResolutorTipoCambio())
+        KardexMovimiento.objects.bulk_create(
+            _construir_registros(item_id, eventos, saldo, posicion),
+            batch_size=TAMANO_LOTE,
+        )
+
+
+def refrescar_kardex_items(desde_por_item, resolutor=None):
+    """Recalcula varios items: ``{item_id: desde}`` (``desde`` None = completo)."""
+    resolutor = resolutor or ResolutorTipoCambio()
+    for item_id, desde in desde_por_item.items():
+        refrescar_kardex_item(item_id, desde=desde, resolutor=resolutor)
+
+
+def fechas_kardex_por_actividades(actividades):
+    """Items con salidas en las actividades indicadas y la fecha de la primera salida."""
+    desde_por_item = {}
+    consultas = (
+        MovimientoRepuesto.objects
+        .filter(actividad__in=actividades)
+        .values("item_unidad__item_id")
+        .annotate(desde=Min("fecha"))
+        .values_list("item_unidad__item_id", "desde"),
+        MovimientoConsumible.objects
+        .filter(actividad__in=actividades)
+        .values("item_id")
+        .annotate(desde=Min("fecha"))
+        .values_list("item_id", "desde"),
+    )
+    for consulta in consultas:
+        for item_id, desde in consulta:
+            actual = desde_por_item.get(item_id)
+            desde_por_item[item_id] = desde if actual is None else min(actual, desde)
+    return desde_por_item
+
+
+def fechas_kardex_por_compra(fecha, solo_moneda_extranjera=False):
+    """Items comprados en la fecha indicada, para recalcular desde ese dia."""
+    detalles = CompraDetalle.objects.filter(compra__fecha=fecha)
+    if solo_moneda_extranjera:
+        detalles = detalles.exclude(moneda=Compra.Moneda.PEN)
+    desde = fecha_kardex_compra(fecha)
+    return {
+        item_id: desde
+        for item_id in detalles.values_list("item_id", flat=True).distinct()
+    }
+
+
+def reconstruir_kardex():
+    """Reconstruye el kardex de todos los items con movimientos; devuelve (items, filas)."""
+    resolutor = ResolutorTipoCambio()
+    item_ids = (
+        set(CompraDetalle.objects.values_list("item_id", flat=True).distinct())
+        | set(MovimientoRepuesto.objects.values_list("item_unidad__item_id", flat=True).distinct())
+        | set(MovimientoConsumible.objects.values_list("item_id", flat=True).distinct())
+    )
+
+    with transaction.atomic():
+        KardexMovimiento.objects.all().delete()
+        for item_id in sorted(item_ids):
+            refrescar_kardex_item(item_id, resolutor=resolutor)
+
+    return len(item_ids), KardexMovimiento.objects.count()
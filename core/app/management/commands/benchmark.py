@@ -0,0 +1,164 @@
+import json
+from contextlib import contextmanager
+from io import StringIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.benchmark import comparar_con_base, ejecutar_benchmark, parametros_escala
+from app.models import (
+    CompraDetalle,
+    HistorialConsumible,
+    HistorialUbicacionItem,
+    Item,
+    ItemUnidad,
+    OrdenTrabajo,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide tiempo, consultas y memoria pico de las llamadas criticas de la API "
+        "sobre datasets escalados con crear_datos_masivos y guarda un reporte JSON. "
+        "Con --base compara contra un reporte anterior y falla si hay regresiones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--escalas",
+            default="1",
+            help="Escalas separadas por coma, por ejemplo 1,10,100.",
+        )
+        parser.add_argument(
+            "--sin-datos",
+            action="store_true",
+            help="No regenera datos: mide sobre la base actual (escala reportada como 'actual').",
+        )
+        parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones cronometradas por llamada.")
+        parser.add_argument("--seed", type=int, default=20260507, help="Semilla de crear_datos_masivos.")
+        parser.add_argument("--salida", default="benchmark.json", help="Ruta del reporte JSON.")
+        parser.add_argument("--base", help="Reporte JSON base contra el cual comparar.")
+        parser.add_argument(
+            "--tolerancia",
+            type=float,
+            default=0.2,
+            help="Incremento relativo permitido en tiempo y memoria (0.2 = 20%%).",
+        )
+        parser.add_argument(
+            "--umbral-ms",
+            type=float,
+            default=5,
+            help="Diferencia minima en ms para considerar una regresion de tiempo.",
+        )
+        parser.add_argument(
+            "--yes",
+            action="store_true",
+            help="Confirma que se limpiaran los datos operativos para generar cada escala.",
+        )
+
+    def handle(self, *args, **options):
+        if options["sin_datos"]:
+            escalas = ["actual"]
+        else:
+            try:
+                escalas = [int(valor) for valor in options["escalas"].split(",") if valor.strip()]
+            except ValueError as exc:
+                raise CommandError("Las escalas deben ser enteros separados por coma.") from exc
+            if not escalas or min(escalas) < 1:
+                raise CommandError("Indica al menos una escala mayor o igual a 1.")
+            if not options["yes"]:
+                raise CommandError(
+                    "El benchmark limpia y regenera los datos operativos. Usa --yes para confirmar."
+                )
+
+        reporte = {
+            "generado_en": timezone.now().isoformat(),
+            "motor": connection.vendor,
+            "repeticiones": options["repeticiones"],
+            "escalas": {},
+        }
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        for escala in escalas:
+            if escala != "actual":
+                self.stdout.write(self.style.WARNING(f"Generando dataset {escala}x..."))
+                call_command(
+                    "crear_datos_masivos",
+                    yes=True,
+                    seed=options["seed"],
+                    stdout=StringIO(),
+                    **parametros_escala(escala),
+                )
+
+            self.stdout.write(self.style.WARNING(f"Midiendo escala {escala}..."))
+            with self._usuario_temporal() as usuario, override_settings(ALLOWED_HOSTS=hosts):
+                client = APIClient()
+                client.force_authenticate(user=usuario)
+                llamadas = ejecutar_benchmark(client, options["repeticiones"])
+
+            reporte["escalas"][f"{escala}x" if escala != "actual" else escala] = {
+                "conteos": self._conteos(),
+                "llamadas": llamadas,
+            }
+            for nombre, metricas in llamadas.items():
+                self.stdout.write(
+                    f"- {nombre}: {metricas['mediana_ms']} ms en frio, "
+                    f"{metricas['caliente_ms']} ms en caliente, "
+                    f"{metricas['consultas']} consultas, "
+                    f"{metricas['pico_memoria_kb']} KB (HTTP {metricas['status']})"
+                )
+
+        with open(options["salida"], "w", encoding="utf-8") as archivo:
+            json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Reporte guardado en {options['salida']}"))
+
+        if options.get("base"):
+            with open(options["base"], encoding="utf-8") as archivo:
+                base = json.load(archivo)
+            regresiones = comparar_con_base(
+                reporte,
+                base,
+                tolerancia=options["tolerancia"],
+                umbral_ms=options["umbral_ms"],
+            )
+            if regresiones:
+                for regresion in regresiones:
+                    self.stdout.write(self.style.ERROR(f"- {regresion}"))
+                raise CommandError(f"Se detectaron {len(regresiones)} regresiones frente a la base.")
+            self.stdout.write(self.style.SUCCESS("Sin regresiones frente a la base."))
+
+    @staticmethod
+    @contextmanager
+    def _usuario_temporal():
+        # Se crea despues de generar los datos para que ninguno quede a su nombre,
+        # y se elimina aunque la medicion falle.
+        usuario = User.objects.create_user(
+            username=f"benchmark-{uuid4().hex[:12]}",
+            is_staff=True,
+            is_superuser=True,
+        )
+        try:
+            yield usuario
+        finally:
+            usuario.delete()
+
+    @staticmethod
+    def _conteos():
+        return {
+            modelo._meta.model_name: modelo.objects.count()
+            for modelo in (
+                Item,
+                ItemUnidad,
+                HistorialUbicacionItem,
+                HistorialConsumible,
+                CompraDetalle,
+                OrdenTrabajo,
+            )
+        }
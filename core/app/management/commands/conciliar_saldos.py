@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.saldos import conciliar_saldos
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la tabla de saldos por ubicacion con los historiales abiertos "
+        "de consumibles y la ubicacion actual de las unidades. Con --corregir "
+        "reescribe los lotes e items desalineados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corregir",
+            action="store_true",
+            help="Recalcula los saldos con diferencias.",
+        )
+
+    def handle(self, *args, **options):
+        diferencias = conciliar_saldos(corregir=options["corregir"])
+
+        for diferencia in diferencias:
+            self.stdout.write(
+                f"- Item {diferencia['item_id']} lote {diferencia['lote_id'] or '-'} "
+                f"{diferencia['tipo_ubicacion']} {diferencia['ubicacion_id']}: "
+                f"{diferencia['guardado']} -> {diferencia['esperado']}"
+            )
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("Los saldos por ubicacion son consistentes."))
+        elif options["corregir"]:
+            self.stdout.write(self.style.SUCCESS(f"Se corrigieron {len(diferencias)} saldos."))
+        else:
+            raise CommandError(
+                f"{len(diferencias)} saldos no coinciden con los historiales. "
+                "Ejecuta con --corregir para recalcularlos."
+            )
@@ -48,6 +48,7 @@ from app.serializers import (
     OrdenTrabajoSerializer,
     actualizar_stock_item,
 )
+from app.tareas import encolar, reportar_progreso
 
 
 @dataclass
@@ -77,6 +78,26 @@ class Command(BaseCommand):
         "trabajadores."
     )
 
+    # Opciones que se reenvian al worker cuando la generacion se encola.
+    OPCIONES_GENERACION = (
+        "prefijo",
+        "seed",
+        "clientes",
+        "ubicaciones_por_cliente",
+        "proveedores",
+        "maquinarias",
+        "repuestos",
+        "consumibles",
+        "ordenes",
+        "actividades_min",
+        "actividades_max",
+        "ordenes_compra",
+        "ordenes_requerimiento_fraccion",
+        "fraccion_pendientes",
+        "fraccion_en_proceso",
+        "yes",
+    )
+
     CLIENTES_BASE = [
         "Mineria Andina",
         "Servicios del Pacifico",
@@ -217,8 +238,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Confirma la limpieza y generacion sin pedir texto adicional.",
         )
+        parser.add_argument(
+            "--encolar",
+            action="store_true",
+            help="Encola la generacion para el worker (procesar_tareas) y termina. Requiere --yes.",
+        )
 
     def handle(self, *args, **options):
+        if options["encolar"]:
+            self._encolar(options)
+            return
+
         self.prefijo = self._normalizar_prefijo(options["prefijo"])
         self.random = random.Random(options["seed"])
         self.actividades_min = options["actividades_min"]
@@ -279,9 +309,11 @@ class Command(BaseCommand):
                 "No hay trabajadores tecnicos disponibles. Conserva o crea al menos uno antes de ejecutar este comando."
             )
 
+        reportar_progreso(5, "Limpiando datos operativos actuales")
         self.stdout.write(self.style.WARNING("Limpiando datos operativos actuales..."))
         call_command("limpiar_tablas", yes=True, stdout=self.stdout)
 
+        reportar_progreso(15, "Creando catalogos base")
         self.stdout.write(self.style.WARNING("Creando catalogos base..."))
         self._crear_unidades_base()
         self.almacen_central = Almacen.objects.get_or_create(nombre="Almacen Central")[0]
@@ -300,17 +332,36 @@ class Command(BaseCommand):
         self._crear_item_grupos()
         self._crear_tipos_cambio()
 
+        reportar_progreso(30, "Generando ordenes, actividades y materiales")
         self.stdout.write(self.style.WARNING("Generando ordenes, actividades y materiales..."))
         self._crear_ordenes_trabajo(
             total_ordenes=options["ordenes"],
             fraccion_requerimientos=options["ordenes_requerimiento_fraccion"],
         )
 
+        reportar_progreso(90, "Generando ordenes de compra demo")
         self.stdout.write(self.style.WARNING("Generando ordenes de compra demo..."))
         self._crear_ordenes_compra(options["ordenes_compra"])
 
         self._mostrar_resumen()
 
+    def _encolar(self, options):
+        if not options["yes"]:
+            raise CommandError("--encolar requiere --yes: el worker no puede pedir confirmacion.")
+
+        tarea = encolar(
+            "comando",
+            {
+                "nombre": "crear_datos_masivos",
+                "opciones": {nombre: options[nombre] for nombre in self.OPCIONES_GENERACION},
+            },
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generacion encolada como tarea {tarea.pk}. Ejecutala con procesar_tareas."
+            )
+        )
+
     def _normalizar_prefijo(self, prefijo):
         prefijo = (prefijo or "MASIVO").strip().upper().replace(" ", "-")
         return prefijo or "MASIVO"
@@ -0,0 +1,148 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum
+
+from app.models import (
+    CompraDetalle,
+    HistorialConsumible,
+    HistorialUbicacionItem,
+    ItemUnidad,
+    MovimientoConsumible,
+    MovimientoRepuesto,
+    OrdenTrabajo,
+)
+
+
+def consultas_criticas():
+    """Consultas de los endpoints mas usados, con parametros tomados de los datos cargados."""
+    unidad = ItemUnidad.objects.order_by("id").first()
+    unidad_id = getattr(unidad, "id", None)
+    item_repuesto_id = getattr(unidad, "item_id", None)
+    maquinaria_id = OrdenTrabajo.objects.values_list("maquinaria_id", flat=True).first()
+    historial_item = HistorialUbicacionItem.objects.filter(fecha_fin__isnull=True).first()
+    historial_consumible = HistorialConsumible.objects.filter(fecha_fin__isnull=True).first()
+    item_consumible_id = getattr(historial_consumible, "item_id", None)
+
+    return {
+        "historial_unidad_ordenado": (
+            HistorialUbicacionItem.objects
+            .filter(item_unidad_id=unidad_id)
+            .order_by("fecha_inicio", "id")
+        ),
+        "historial_abierto_unidad": HistorialUbicacionItem.objects.filter(
+            item_unidad_id=unidad_id,
+            fecha_fin__isnull=True,
+        ),
+        "historial_abierto_almacen": HistorialUbicacionItem.objects.filter(
+            almacen_id=getattr(historial_item, "almacen_id", None),
+            fecha_fin__isnull=True,
+        ),
+        "historial_abierto_maquinaria": HistorialUbicacionItem.objects.filter(
+            maquinaria_id=maquinaria_id,
+            fecha_fin__isnull=True,
+        ),
+        "consumibles_abiertos_tecnicos": (
+            HistorialConsumible.objects
+            .filter(
+                item_id=item_consumible_id,
+                trabajador__isnull=False,
+                fecha_fin__isnull=True,
+            )
+            .values("item_id")
+            .annotate(total=Sum("cantidad"))
+        ),
+        "consumibles_lote_ordenado": (
+            HistorialConsumible.objects
+            .filter(lote_id=getattr(historial_consumible, "lote_id", None))
+            .order_by("fecha_inicio", "id")
+        ),
+        "ordenes_maquinaria_por_fecha": (
+            OrdenTrabajo.objects
+            .filter(maquinaria_id=maquinaria_id, horometro__isnull=False)
+            .order_by("-fecha")
+        ),
+        "ordenes_por_fecha": OrdenTrabajo.objects.order_by("-fecha", "-id")[:50],
+        "compras_por_item": (
+            CompraDetalle.objects
+            .filter(item_id=item_repuesto_id)
+            .values("item_id")
+            .annotate(total=Sum("cantidad"))
+        ),
+        "compras_por_fecha": (
+            CompraDetalle.objects
+            .select_related("compra")
+            .order_by("-compra__fecha")[:50]
+        ),
+        "salidas_repuesto_por_unidad": (
+            MovimientoRepuesto.objects
+            .filter(item_unidad_id=unidad_id)
+            .order_by("fecha")
+        ),
+        "salidas_consumible_por_item": (
+            MovimientoConsumible.objects
+            .filter(item_id=item_consumible_id)
+            .values("item_id")
+            .annotate(total=Count("id"))
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra el plan de ejecucion y la latencia mediana de las consultas "
+        "criticas de historiales, movimientos, compras y ordenes de trabajo. "
+        "Sirve para comparar el efecto de los indices antes y despues de migrar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=20,
+            help="Cantidad de ejecuciones por consulta para calcular la mediana.",
+        )
+        parser.add_argument(
+            "--salida",
+            help="Ruta opcional de un archivo JSON con los resultados.",
+        )
+        parser.add_argument(
+            "--sin-plan",
+            action="store_true",
+            help="Omite la impresion del plan de ejecucion.",
+        )
+
+    def handle(self, *args, **options):
+        repeticiones = max(options["repeticiones"], 1)
+        resultados = {}
+        for nombre, consulta in consultas_criticas().items():
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                list(consulta.all())
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+
+            plan = consulta.explain()
+            resultados[nombre] = {
+                "mediana_ms": round(statistics.median(tiempos), 3),
+                "plan": plan,
+            }
+
+            self.stdout.write(
+                self.style.SUCCESS(f"{nombre}: {resultados[nombre]['mediana_ms']} ms")
+            )
+            if not options["sin_plan"]:
+                self.stdout.write(plan)
+
+        if options.get("salida"):
+            with open(options["salida"], "w", encoding="utf-8") as archivo:
+                json.dump(
+                    {"motor": connection.vendor, "consultas": resultados},
+                    archivo,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
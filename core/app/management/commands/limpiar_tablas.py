@@ -34,6 +34,7 @@ from app.models import (
     ItemGrupoDetalle,
     ItemProveedor,
     ItemUnidad,
+    KardexMovimiento,
     LoteConsumible,
     Maquinaria,
     MedidaCorrectiva,
@@ -47,6 +48,8 @@ from app.models import (
     Proveedor,
     ReporteIPERC,
     ReporteOrden,
+    SaldoUbicacion,
+    SecuenciaCodigo,
     SecuenciaControlRiesgo,
     Sistema,
     SoporteVisualDocumentoEstandarizado,
@@ -58,6 +61,7 @@ from app.models import (
     UnidadMedida,
     UnidadRelacion,
     Evento,
+    VidaUtilRegistro,
 )
 
 
@@ -99,8 +103,11 @@ class Command(BaseCommand):
         OrdenCompraDetalle,
         OrdenCompra,
         ActividadTrabajoEvidencia,
+        KardexMovimiento,
         MovimientoRepuesto,
         MovimientoConsumible,
+        VidaUtilRegistro,
+        SaldoUbicacion,
         HistorialUbicacionItem,
         HistorialConsumible,
         TecnicoAsignado,
@@ -125,6 +132,7 @@ class Command(BaseCommand):
         UnidadMedida,
         Dimension,
         Almacen,
+        SecuenciaCodigo,
     ]
 
     def add_arguments(self, parser):
@@ -0,0 +1,75 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.tareas import TIEMPO_LIMITE, ejecutar, recuperar_tareas_vencidas, tomar_siguiente
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de tareas en base de datos: ejecuta las operaciones "
+        "encoladas con ?async=1 (y crear_datos_masivos --encolar) y guarda su "
+        "estado, progreso y resultado para /api/jobs/<id>/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--una-vez",
+            action="store_true",
+            help="Procesa las tareas pendientes y termina en lugar de seguir esperando.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Segundos de espera entre consultas cuando la cola esta vacia.",
+        )
+        parser.add_argument(
+            "--max-tareas",
+            type=int,
+            default=None,
+            help="Termina despues de procesar esta cantidad de tareas.",
+        )
+        parser.add_argument(
+            "--tiempo-limite",
+            type=int,
+            default=int(TIEMPO_LIMITE.total_seconds() // 60),
+            help=(
+                "Minutos tras los que una tarea en proceso se marca como fallida "
+                "(su worker se detuvo sin terminarla)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self._detener = False
+        # Railway y systemd detienen con SIGTERM: se termina la tarea en curso.
+        signal.signal(signal.SIGTERM, self._solicitar_detencion)
+
+        tiempo_limite = timedelta(minutes=max(options["tiempo_limite"], 1))
+        procesadas = 0
+        while not self._detener:
+            if options["max_tareas"] is not None and procesadas >= options["max_tareas"]:
+                break
+
+            close_old_connections()
+            recuperadas = recuperar_tareas_vencidas(tiempo_limite)
+            if recuperadas:
+                self.stdout.write(self.style.WARNING(f"Tareas vencidas marcadas como fallidas: {recuperadas}."))
+            tarea = tomar_siguiente()
+            if tarea is None:
+                if options["una_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+                continue
+
+            tarea = ejecutar(tarea)
+            procesadas += 1
+            self.stdout.write(f"Tarea {tarea.pk} ({tarea.tipo}): {tarea.estado}")
+
+        self.stdout.write(self.style.SUCCESS(f"Tareas procesadas: {procesadas}."))
+
+    def _solicitar_detencion(self, *args):
+        self._detener = True
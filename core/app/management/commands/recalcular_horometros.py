@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from app.horometros import recalcular_horometros
+
+
+class Command(BaseCommand):
+    help = (
+        "Reencadena el horometro de inicio y fin de los historiales de repuestos "
+        "y consumibles de cada maquinaria siguiendo el orden de sus OTs. Util tras "
+        "editar OTs con fecha u horometro retroactivos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--maquinaria",
+            type=int,
+            action="append",
+            dest="maquinarias",
+            help="Id de la maquinaria a recalcular. Se puede repetir; sin el, todas.",
+        )
+
+    def handle(self, *args, **options):
+        total_unidades, total_lotes = recalcular_horometros(options["maquinarias"])
+        self.stdout.write(self.style.SUCCESS("Horometros de historiales recalculados."))
+        self.stdout.write(f"- Unidades de repuesto actualizadas: {total_unidades}")
+        self.stdout.write(f"- Lotes de consumible actualizados: {total_lotes}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app.kardex import reconstruir_kardex
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye desde cero el kardex valorizado de todos los items a partir "
+        "de las compras y salidas registradas. Usalo tras cargas o borrados "
+        "masivos que no pasan por save()/delete() de los modelos."
+    )
+
+    def handle(self, *args, **options):
+        total_items, total_filas = reconstruir_kardex()
+        self.stdout.write(self.style.SUCCESS("Kardex reconstruido."))
+        self.stdout.write(f"- Items: {total_items}")
+        self.stdout.write(f"- Movimientos: {total_filas}")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from app.vida_util import TAMANO_LOTE, reconstruir_vida_util
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye desde cero la tabla de vida util usada por los tableros "
+        "de gestion a partir de los historiales de repuestos y consumibles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamano-lote",
+            type=int,
+            default=TAMANO_LOTE,
+            help="Cantidad de unidades o lotes procesados por bloque.",
+        )
+
+    def handle(self, *args, **options):
+        total_repuestos, total_consumibles = reconstruir_vida_util(
+            tamano_lote=max(options["tamano_lote"], 1),
+        )
+        self.stdout.write(self.style.SUCCESS("Tabla de vida util reconstruida."))
+        self.stdout.write(f"- Registros de repuestos: {total_repuestos}")
+        self.stdout.write(f"- Registros de consumibles: {total_consumibles}")
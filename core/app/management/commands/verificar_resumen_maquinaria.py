@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.maquinaria_resumen import verificar_resumen_maquinarias
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara horometro actual, fuente, fecha del ultimo horometro y centro "
+        "de costos guardados en cada maquinaria con su calculo desde ordenes e "
+        "historiales. Con --corregir reescribe los valores desalineados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corregir",
+            action="store_true",
+            help="Actualiza las maquinarias con diferencias.",
+        )
+
+    def handle(self, *args, **options):
+        diferencias = verificar_resumen_maquinarias(corregir=options["corregir"])
+
+        for diferencia in diferencias:
+            detalle = ", ".join(
+                f"{campo}: {guardado} -> {esperado}"
+                for campo, (guardado, esperado) in diferencia["campos"].items()
+            )
+            self.stdout.write(f"- Maquinaria {diferencia['maquinaria_id']}: {detalle}")
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("El resumen de maquinarias es consistente."))
+        elif options["corregir"]:
+            self.stdout.write(self.style.SUCCESS(f"Se corrigieron {len(diferencias)} maquinarias."))
+        else:
+            raise CommandError(
+                f"{len(diferencias)} maquinarias tienen el resumen desalineado. "
+                "Ejecuta con --corregir para actualizarlas."
+            )
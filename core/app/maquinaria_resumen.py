@@ -0,0 +1,168 @@
+from decimal import Decimal
+
+from django.db import transaction
+
+from .gestion_cache import invalidar_cache_gestion_al_confirmar
+from .models import (
+    Compra,
+    HistorialConsumible,
+    HistorialUbicacionItem,
+    Maquinaria,
+    VidaUtilRegistro,
+)
+from .supervivencia import invalidar_cache_supervivencia
+from .tipo_cambio import ResolutorTipoCambio
+
+
+def calcular_centros_costos(maquinaria_ids, resolutor=None):
+    """Centro de costos en PEN por maquinaria: repuestos y consumibles activos en cada una."""
+    maquinaria_ids = {maquinaria_id for maquinaria_id in maquinaria_ids if maquinaria_id}
+    if not maquinaria_ids:
+        return {}
+
+    resolutor = resolutor or ResolutorTipoCambio()
+    historiales_repuesto = list(
+        HistorialUbicacionItem.objects
+        .select_related("item_unidad__compra_detalle__compra")
+        .filter(
+            maquinaria_id__in=maquinaria_ids,
+            fecha_fin__isnull=True,
+            item_unidad__compra_detalle__isnull=False,
+        )
+    )
+    historiales_consumible = list(
+        HistorialConsumible.objects
+        .select_related("lote__compra_detalle__compra")
+        .filter(
+            maquinaria_id__in=maquinaria_ids,
+            fecha_fin__isnull=True,
+            lote__compra_detalle__isnull=False,
+        )
+    )
+
+    costos_pen = resolutor.montos_pen_por_detalles(
+        [h.item_unidad.compra_detalle for h in historiales_repuesto]
+        + [h.lote.compra_detalle for h in historiales_consumible]
+    )
+
+    totales = dict.fromkeys(maquinaria_ids, Decimal("0.00"))
+    for h in historiales_repuesto:
+        totales[h.maquinaria_id] += costos_pen.get(h.item_unidad.compra_detalle_id) or Decimal("0.00")
+
+    for h in historiales_consumible:
+        costo_unitario = costos_pen.get(h.lote.compra_detalle_id) or Decimal("0.00")
+        totales[h.maquinaria_id] += Decimal(h.cantidad) * costo_unitario
+
+    return totales
+
+
+def refrescar_centro_costos(maquinaria_ids, resolutor=None):
+    totales = calcular_centros_costos(maquinaria_ids, resolutor)
+    for maquinaria_id, total in totales.items():
+        Maquinaria.objects.filter(pk=maquinaria_id).update(centro_costos_pen=total)
+    if totales:
+        invalidar_cache_gestion_al_confirmar()
+
+
+def refrescar_horometros(maquinaria_ids):
+    maquinaria_ids = {maquinaria_id for maquinaria_id in maquinaria_ids if maquinaria_id}
+    if not maquinaria_ids:
+        return
+    for maquinaria in Maquinaria.objects.filter(pk__in=maquinaria_ids):
+        maquinaria.refrescar_resumen_horometro()
+    # Las unidades aun montadas se censuran en el horometro actual: solo
+    # cambian las curvas de sus items.
+    item_ids = set(
+        VidaUtilRegistro.objects
+        .filter(
+            origen=VidaUtilRegistro.Origen.REPUESTO,
+            maquinaria_id__in=maquinaria_ids,
+            horometro_fin__isnull=True,
+        )
+        .values_list("item_id", flat=True)
+        .distinct()
+    )
+    if item_ids:
+        invalidar_cache_supervivencia(item_ids)
+        transaction.on_commit(lambda: invalidar_cache_supervivencia(item_ids))
+    invalidar_cache_gestion_al_confirmar()
+
+
+def maquinarias_con_compra_detalles(compra_detalle_ids):
+    """Maquinarias que hoy tienen unidades o lotes de los detalles de compra indicados."""
+    return set(
+        HistorialUbicacionItem.objects
+        .filter(
+            fecha_fin__isnull=True,
+            maquinaria__isnull=False,
+            item_unidad__compra_detalle_id__in=compra_detalle_ids,
+        )
+        .values_list("maquinaria_id", flat=True)
+    ) | set(
+        HistorialConsumible.objects
+        .filter(
+            fecha_fin__isnull=True,
+            maquinaria__isnull=False,
+            lote__compra_detalle_id__in=compra_detalle_ids,
+        )
+        .values_list("maquinaria_id", flat=True)
+    )
+
+
+def refrescar_centro_costos_por_fecha_compra(fecha):
+    """Tras cambiar el tipo de cambio del dia: maquinarias con compras en moneda extranjera de esa fecha."""
+    maquinaria_ids = set(
+        HistorialUbicacionItem.objects
+        .filter(
+            fecha_fin__isnull=True,
+            maquinaria__isnull=False,
+            item_unidad__compra_detalle__compra__fecha=fecha,
+        )
+        .exclude(item_unidad__compra_detalle__moneda=Compra.Moneda.PEN)
+        .values_list("maquinaria_id", flat=True)
+    ) | set(
+        HistorialConsumible.objects
+        .filter(
+            fecha_fin__isnull=True,
+            maquinaria__isnull=False,
+            lote__compra_detalle__compra__fecha=fecha,
+        )
+        .exclude(lote__compra_detalle__moneda=Compra.Moneda.PEN)
+        .values_list("maquinaria_id", flat=True)
+    )
+    refrescar_centro_costos(maquinaria_ids)
+
+
+def verificar_resumen_maquinarias(corregir=False):
+    """
+    Compara las columnas denormalizadas de cada maquinaria con su calculo
+    desde ordenes e historiales. Devuelve la lista de diferencias encontradas.
+    """
+    maquinarias = list(Maquinaria.objects.order_by("id"))
+    centros_costos = calcular_centros_costos(
+        [maquinaria.id for maquinaria in maquinarias],
+    )
+    diferencias = []
+
+    for maquinaria in maquinarias:
+        esperado = {
+            "horometro_actual": maquinaria.obtener_horometro_actual(),
+            "horometro_fuente": maquinaria.obtener_fuente_horometro_actual() or "",
+            "fecha_ultimo_horometro": maquinaria.obtener_fecha_ultimo_horometro(),
+            "centro_costos_pen": centros_costos.get(maquinaria.id, Decimal("0.00")).quantize(
+                Decimal("0.000001")
+            ),
+        }
+        distintos = {
+            campo: (getattr(maquinaria, campo), valor)
+            for campo, valor in esperado.items()
+            if getattr(maquinaria, campo) != valor
+        }
+        if not distintos:
+            continue
+
+        diferencias.append({"maquinaria_id": maquinaria.id, "campos": distintos})
+        if corregir:
+            Maquinaria.objects.filter(pk=maquinaria.id).update(**esperado)
+
+    return diferencias
@@ -0,0 +1,57 @@
+from rest_framework.exceptions import ValidationError
+
+
+# ``format`` lo reserva DRF para elegir el renderer.
+PARAMETRO_FORMATO = "formato"
+FORMATO_FILAS = "filas"
+FORMATO_COLUMNAR = "columnar"
+FORMATOS = (FORMATO_FILAS, FORMATO_COLUMNAR)
+
+
+def formato_matriz(request):
+    formato = (request.query_params.get(PARAMETRO_FORMATO) or FORMATO_FILAS).lower()
+    if formato not in FORMATOS:
+        raise ValidationError(
+            {PARAMETRO_FORMATO: f"Formato no valido. Opciones: {', '.join(FORMATOS)}."}
+        )
+    return formato
+
+
+def filas_con_valores(filas, columna_ids, celdas):
+    """
+    Formato por filas: cada fila lleva ``values`` con una llave por columna
+    (id como texto) y ``None`` donde no hay muestras.
+    """
+    for fila in filas:
+        celdas_fila = celdas.get(fila["item_id"], {})
+        fila["values"] = {
+            str(columna_id): celdas_fila.get(columna_id)
+            for columna_id in columna_ids
+        }
+    return filas
+
+
+def matriz_columnar(filas, columna_ids, celdas, campos_celda):
+    """
+    Formato columnar disperso (COO): ``rows`` y ``cells`` son objetos de
+    arrays paralelos. ``cells.row``/``cells.column`` son indices en las filas
+    y en la lista de columnas; solo se incluyen las celdas con muestras.
+    """
+    indice_columna = {columna_id: indice for indice, columna_id in enumerate(columna_ids)}
+    campos_fila = list(filas[0]) if filas else []
+    columnas_filas = {campo: [] for campo in campos_fila}
+    columnas_celdas = {"row": [], "column": [], **{campo: [] for campo in campos_celda}}
+
+    for indice_fila, fila in enumerate(filas):
+        for campo in campos_fila:
+            columnas_filas[campo].append(fila[campo])
+
+        celdas_fila = celdas.get(fila["item_id"], {})
+        for columna_id in sorted(celdas_fila, key=indice_columna.__getitem__):
+            celda = celdas_fila[columna_id]
+            columnas_celdas["row"].append(indice_fila)
+            columnas_celdas["column"].append(indice_columna[columna_id])
+            for campo in campos_celda:
+                columnas_celdas[campo].append(celda[campo])
+
+    return {"rows": columnas_filas, "cells": columnas_celdas}
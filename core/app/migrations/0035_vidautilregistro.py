@@ -0,0 +1,45 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:49
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0034_gestioncambio_moneda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VidaUtilRegistro',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origen', models.CharField(choices=[('REPUESTO', 'Repuesto'), ('CONSUMIBLE', 'Consumible')], max_length=15)),
+                ('estado', models.CharField(blank=True, max_length=15)),
+                ('cantidad', models.DecimalField(decimal_places=6, default=Decimal('1'), max_digits=16)),
+                ('horometro_inicio', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('horometro_fin', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('vida_util', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('vida_util_matriz', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('costo_unitario_pen', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18)),
+                ('valor_unitario_pen', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18)),
+                ('costo_total_pen', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18)),
+                ('duracion_ot_horas', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('compra_detalle', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.compradetalle')),
+                ('historial_consumible', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vida_util', to='app.historialconsumible')),
+                ('historial_item', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vida_util', to='app.historialubicacionitem')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_vida_util', to='app.item')),
+                ('item_unidad', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='app.itemunidad')),
+                ('lote', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='app.loteconsumible')),
+                ('maquinaria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='app.maquinaria')),
+                ('orden_trabajo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.ordentrabajo')),
+                ('proveedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.proveedor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['origen', 'item'], name='vida_util_origen_item_idx'), models.Index(fields=['item', 'maquinaria'], name='vida_util_item_maq_idx'), models.Index(fields=['item', 'proveedor'], name='vida_util_item_prov_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0035_vidautilregistro'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaCodigo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefijo', models.CharField(max_length=30)),
+                ('periodo', models.CharField(blank=True, default='', max_length=10)),
+                ('ultimo_valor', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('prefijo', 'periodo'), name='uniq_secuencia_codigo_prefijo_periodo')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0036_secuenciacodigo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['fecha'], name='compra_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compradetalle',
+            index=models.Index(fields=['item', 'compra'], name='compra_det_item_compra_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialconsumible',
+            index=models.Index(fields=['lote', 'fecha_inicio', 'id'], name='hist_cons_lote_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialconsumible',
+            index=models.Index(condition=models.Q(('fecha_fin__isnull', True)), fields=['item', 'almacen'], name='hist_cons_abierto_alm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialconsumible',
+            index=models.Index(condition=models.Q(('fecha_fin__isnull', True)), fields=['item', 'trabajador'], name='hist_cons_abierto_trab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialconsumible',
+            index=models.Index(condition=models.Q(('fecha_fin__isnull', True)), fields=['item', 'maquinaria'], name='hist_cons_abierto_maq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialubicacionitem',
+            index=models.Index(fields=['item_unidad', 'fecha_inicio', 'id'], name='hist_item_unidad_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialubicacionitem',
+            index=models.Index(condition=models.Q(('fecha_fin__isnull', True)), fields=['item_unidad'], name='hist_item_abierto_unidad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialubicacionitem',
+            index=models.Index(condition=models.Q(('fecha_fin__isnull', True)), fields=['almacen'], name='hist_item_abierto_alm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialubicacionitem',
+            index=models.Index(condition=models.Q(('fecha_fin__isnull', True)), fields=['trabajador'], name='hist_item_abierto_trab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialubicacionitem',
+            index=models.Index(condition=models.Q(('fecha_fin__isnull', True)), fields=['maquinaria'], name='hist_item_abierto_maq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoconsumible',
+            index=models.Index(fields=['item', 'fecha'], name='mov_cons_item_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientorepuesto',
+            index=models.Index(fields=['item_unidad', 'fecha'], name='mov_rep_unidad_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordentrabajo',
+            index=models.Index(fields=['maquinaria', 'fecha'], name='ot_maquinaria_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordentrabajo',
+            index=models.Index(fields=['fecha', 'id'], name='ot_fecha_idx'),
+        ),
+    ]
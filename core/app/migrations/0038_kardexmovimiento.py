@@ -0,0 +1,41 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:30
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0037_indices_historial_movimientos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KardexMovimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveIntegerField()),
+                ('tipo', models.CharField(choices=[('COMPRA', 'Compra'), ('SALIDA_REPUESTO', 'Salida de repuesto'), ('SALIDA_CONSUMIBLE', 'Salida de consumible')], max_length=20)),
+                ('fecha', models.DateTimeField()),
+                ('registro', models.CharField(blank=True, max_length=120)),
+                ('inventario_inicial', models.DecimalField(decimal_places=6, max_digits=18)),
+                ('entrada', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18)),
+                ('salida', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18)),
+                ('costo_unitario', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('inventario_final_cantidad', models.DecimalField(decimal_places=6, max_digits=18)),
+                ('inventario_final_costo', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('costo_promedio', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('compra_detalle', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='kardex_movimientos', to='app.compradetalle')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kardex_movimientos', to='app.item')),
+                ('maquinaria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app.maquinaria')),
+                ('movimiento_consumible', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='kardex', to='app.movimientoconsumible')),
+                ('movimiento_repuesto', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='kardex', to='app.movimientorepuesto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'fecha'], name='kardex_item_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'posicion'), name='uniq_kardex_item_posicion')],
+            },
+        ),
+    ]
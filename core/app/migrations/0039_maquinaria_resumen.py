@@ -0,0 +1,131 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:36
+
+from datetime import datetime
+from decimal import Decimal
+from django.db import migrations, models
+
+
+IGV = Decimal("1.18")
+
+
+def _orden_tiene_prioridad(orden, maquinaria):
+    if maquinaria.horometro_manual is None or not maquinaria.horometro_manual_actualizado_en:
+        return True
+    fecha_manual = maquinaria.horometro_manual_actualizado_en
+    if orden.fecha != fecha_manual.date():
+        return orden.fecha > fecha_manual.date()
+    hora_orden = orden.hora_fin or orden.hora_inicio
+    if not hora_orden:
+        return False
+    return datetime.combine(orden.fecha, hora_orden) >= fecha_manual.replace(tzinfo=None)
+
+
+def _costo_pen(detalle, tipos_cambio):
+    costo = detalle.valor_unitario * IGV
+    if detalle.moneda == "PEN":
+        return costo
+    tipo_cambio = tipos_cambio.get(detalle.compra.fecha)
+    tasa = getattr(tipo_cambio, {"USD": "compra_usd", "EUR": "compra_eur"}.get(detalle.moneda, ""), None)
+    if not tasa or tasa <= 0:
+        return Decimal("0")
+    return costo * tasa
+
+
+def backfill_resumen(apps, schema_editor):
+    Maquinaria = apps.get_model("app", "Maquinaria")
+    OrdenTrabajo = apps.get_model("app", "OrdenTrabajo")
+    HistorialUbicacionItem = apps.get_model("app", "HistorialUbicacionItem")
+    HistorialConsumible = apps.get_model("app", "HistorialConsumible")
+    TipoCambioDiario = apps.get_model("app", "TipoCambioDiario")
+
+    ultimas_ordenes = {}
+    for orden in (
+        OrdenTrabajo.objects
+        .filter(maquinaria__isnull=False, horometro__isnull=False)
+        .order_by("maquinaria_id", "-fecha", "-hora_fin", "-hora_inicio", "-id")
+        .only("maquinaria_id", "horometro", "fecha", "hora_inicio", "hora_fin")
+        .iterator()
+    ):
+        ultimas_ordenes.setdefault(orden.maquinaria_id, orden)
+
+    historiales_repuesto = list(
+        HistorialUbicacionItem.objects
+        .select_related("item_unidad__compra_detalle__compra")
+        .filter(maquinaria__isnull=False, fecha_fin__isnull=True, item_unidad__compra_detalle__isnull=False)
+    )
+    historiales_consumible = list(
+        HistorialConsumible.objects
+        .select_related("lote__compra_detalle__compra")
+        .filter(maquinaria__isnull=False, fecha_fin__isnull=True, lote__compra_detalle__isnull=False)
+    )
+    tipos_cambio = {
+        tipo_cambio.fecha: tipo_cambio
+        for tipo_cambio in TipoCambioDiario.objects.filter(
+            fecha__in={h.item_unidad.compra_detalle.compra.fecha for h in historiales_repuesto}
+            | {h.lote.compra_detalle.compra.fecha for h in historiales_consumible}
+        )
+    }
+    centros_costos = {}
+    for h in historiales_repuesto:
+        costo = _costo_pen(h.item_unidad.compra_detalle, tipos_cambio)
+        centros_costos[h.maquinaria_id] = centros_costos.get(h.maquinaria_id, Decimal("0")) + costo
+    for h in historiales_consumible:
+        costo = Decimal(h.cantidad) * _costo_pen(h.lote.compra_detalle, tipos_cambio)
+        centros_costos[h.maquinaria_id] = centros_costos.get(h.maquinaria_id, Decimal("0")) + costo
+
+    for maquinaria in Maquinaria.objects.iterator():
+        orden = ultimas_ordenes.get(maquinaria.id)
+        if orden and _orden_tiene_prioridad(orden, maquinaria):
+            resumen = {
+                "horometro_actual": orden.horometro,
+                "horometro_fuente": "ORDEN_TRABAJO",
+                "fecha_ultimo_horometro": orden.fecha,
+            }
+        elif maquinaria.horometro_manual is not None:
+            resumen = {
+                "horometro_actual": maquinaria.horometro_manual,
+                "horometro_fuente": "MANUAL",
+                "fecha_ultimo_horometro": (
+                    maquinaria.horometro_manual_actualizado_en.date()
+                    if maquinaria.horometro_manual_actualizado_en
+                    else None
+                ),
+            }
+        else:
+            resumen = {}
+        centro_costos = centros_costos.get(maquinaria.id)
+        if centro_costos:
+            resumen["centro_costos_pen"] = centro_costos.quantize(Decimal("0.000001"))
+        if resumen:
+            Maquinaria.objects.filter(pk=maquinaria.pk).update(**resumen)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0038_kardexmovimiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maquinaria',
+            name='centro_costos_pen',
+            field=models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='maquinaria',
+            name='fecha_ultimo_horometro',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='maquinaria',
+            name='horometro_actual',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='maquinaria',
+            name='horometro_fuente',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.RunPython(backfill_resumen, migrations.RunPython.noop),
+    ]
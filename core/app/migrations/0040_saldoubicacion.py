@@ -0,0 +1,87 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def _ubicacion(almacen_id, trabajador_id, maquinaria_id):
+    if almacen_id:
+        return "ALMACEN", almacen_id
+    if trabajador_id:
+        return "TRABAJADOR", trabajador_id
+    return "MAQUINARIA", maquinaria_id
+
+
+def backfill_saldos(apps, schema_editor):
+    HistorialConsumible = apps.get_model("app", "HistorialConsumible")
+    ItemUnidad = apps.get_model("app", "ItemUnidad")
+    SaldoUbicacion = apps.get_model("app", "SaldoUbicacion")
+
+    saldos = {}
+    consumibles = (
+        HistorialConsumible.objects
+        .filter(fecha_fin__isnull=True, cantidad__gt=0)
+        .filter(Q(almacen__isnull=False) | Q(trabajador__isnull=False) | Q(maquinaria__isnull=False))
+        .values_list("item_id", "lote_id", "almacen_id", "trabajador_id", "maquinaria_id")
+        .annotate(total=Sum("cantidad"))
+    )
+    for item_id, lote_id, almacen_id, trabajador_id, maquinaria_id, total in consumibles:
+        clave = (item_id, lote_id, *_ubicacion(almacen_id, trabajador_id, maquinaria_id))
+        saldos[clave] = saldos.get(clave, 0) + total
+
+    unidades = (
+        ItemUnidad.objects
+        .exclude(estado="INOPERATIVO")
+        .filter(
+            Q(almacen_actual__isnull=False)
+            | Q(trabajador_actual__isnull=False)
+            | Q(maquinaria_actual__isnull=False)
+        )
+        .values_list("item_id", "almacen_actual_id", "trabajador_actual_id", "maquinaria_actual_id")
+        .annotate(total=Count("id"))
+    )
+    for item_id, almacen_id, trabajador_id, maquinaria_id, total in unidades:
+        clave = (item_id, None, *_ubicacion(almacen_id, trabajador_id, maquinaria_id))
+        saldos[clave] = saldos.get(clave, 0) + total
+
+    SaldoUbicacion.objects.bulk_create(
+        [
+            SaldoUbicacion(
+                item_id=item_id,
+                lote_id=lote_id,
+                tipo_ubicacion=tipo,
+                ubicacion_id=ubicacion_id,
+                cantidad=cantidad,
+            )
+            for (item_id, lote_id, tipo, ubicacion_id), cantidad in saldos.items()
+            if cantidad
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0039_maquinaria_resumen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoUbicacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_ubicacion', models.CharField(choices=[('ALMACEN', 'Almacen'), ('TRABAJADOR', 'Trabajador'), ('MAQUINARIA', 'Maquinaria')], max_length=12)),
+                ('ubicacion_id', models.PositiveBigIntegerField()),
+                ('cantidad', models.DecimalField(decimal_places=6, max_digits=16)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_ubicacion', to='app.item')),
+                ('lote', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saldos_ubicacion', to='app.loteconsumible')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'tipo_ubicacion', 'ubicacion_id'], name='saldo_item_ubicacion_idx'), models.Index(fields=['tipo_ubicacion', 'ubicacion_id'], name='saldo_ubicacion_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('lote__isnull', False)), fields=('lote', 'tipo_ubicacion', 'ubicacion_id'), name='uniq_saldo_lote_ubicacion'), models.UniqueConstraint(condition=models.Q(('lote__isnull', True)), fields=('item', 'tipo_ubicacion', 'ubicacion_id'), name='uniq_saldo_unidad_ubicacion')],
+            },
+        ),
+        migrations.RunPython(backfill_saldos, migrations.RunPython.noop),
+    ]
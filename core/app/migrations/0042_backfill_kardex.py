@@ -0,0 +1,153 @@
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+
+IGV = Decimal("1.18")
+TASAS = {"USD": "compra_usd", "EUR": "compra_eur"}
+
+
+def _fecha_compra(fecha):
+    fecha_compra = datetime.combine(fecha, time.min)
+    if timezone.is_aware(timezone.now()):
+        fecha_compra = timezone.make_aware(fecha_compra, timezone.get_current_timezone())
+    return fecha_compra
+
+
+def _costo_pen(detalle, tipos_cambio):
+    costo = detalle.valor_unitario * IGV
+    if detalle.moneda == "PEN":
+        return costo
+    tasa = getattr(tipos_cambio.get(detalle.compra.fecha), TASAS.get(detalle.moneda, ""), None)
+    if not tasa or tasa <= 0:
+        return None
+    return costo * Decimal(tasa)
+
+
+def _orden_y_maquinaria(movimiento):
+    orden = movimiento.actividad.orden if movimiento.actividad else None
+    return orden, (orden.maquinaria_id if orden else None)
+
+
+def backfill_kardex(apps, schema_editor):
+    KardexMovimiento = apps.get_model("app", "KardexMovimiento")
+    CompraDetalle = apps.get_model("app", "CompraDetalle")
+    MovimientoRepuesto = apps.get_model("app", "MovimientoRepuesto")
+    MovimientoConsumible = apps.get_model("app", "MovimientoConsumible")
+    TipoCambioDiario = apps.get_model("app", "TipoCambioDiario")
+    if KardexMovimiento.objects.exists():
+        return
+
+    compras = list(CompraDetalle.objects.select_related("compra"))
+    salidas = list(
+        MovimientoRepuesto.objects
+        .filter(actividad__es_planificada=False)
+        .select_related("actividad__orden", "item_unidad__compra_detalle__compra")
+    )
+    salidas_consumible = list(
+        MovimientoConsumible.objects
+        .filter(actividad__es_planificada=False)
+        .select_related("actividad__orden")
+    )
+    tipos_cambio = {tipo_cambio.fecha: tipo_cambio for tipo_cambio in TipoCambioDiario.objects.all()}
+
+    # Mismo orden y valorizacion que app.kardex: compras antes que salidas en la misma fecha.
+    eventos = defaultdict(list)
+    for detalle in compras:
+        costo_unitario = _costo_pen(detalle, tipos_cambio)
+        if costo_unitario is None:
+            continue
+        fecha = _fecha_compra(detalle.compra.fecha)
+        eventos[detalle.item_id].append(((fecha, 0, detalle.id), {
+            "tipo": "COMPRA",
+            "fecha": fecha,
+            "cantidad": Decimal(detalle.cantidad),
+            "costo_unitario": costo_unitario,
+            "registro": f"{detalle.compra.tipo_comprobante} {detalle.compra.codigo_comprobante}",
+            "compra_detalle_id": detalle.id,
+        }))
+
+    for salida in salidas:
+        detalle = salida.item_unidad.compra_detalle
+        costo_unitario = _costo_pen(detalle, tipos_cambio) if detalle else Decimal("0.00")
+        if costo_unitario is None:
+            continue
+        orden, maquinaria_id = _orden_y_maquinaria(salida)
+        eventos[salida.item_unidad.item_id].append(((salida.fecha, 1, salida.id), {
+            "tipo": "SALIDA_REPUESTO",
+            "fecha": salida.fecha,
+            "cantidad": Decimal("1"),
+            "costo_unitario": costo_unitario,
+            "registro": orden.codigo_orden if orden else "OT",
+            "movimiento_repuesto_id": salida.id,
+            "maquinaria_id": maquinaria_id,
+        }))
+
+    for salida in salidas_consumible:
+        orden, maquinaria_id = _orden_y_maquinaria(salida)
+        eventos[salida.item_id].append(((salida.fecha, 2, salida.id), {
+            "tipo": "SALIDA_CONSUMIBLE",
+            "fecha": salida.fecha,
+            "cantidad": salida.cantidad,
+            "costo_unitario": None,
+            "registro": orden.codigo_orden if orden else "OT",
+            "movimiento_consumible_id": salida.id,
+            "maquinaria_id": maquinaria_id,
+        }))
+
+    registros = []
+    for item_id in sorted(eventos):
+        stock, costo_total, costo_promedio = Decimal("0"), Decimal("0.00"), Decimal("0.00")
+        for posicion, (_, evento) in enumerate(sorted(eventos[item_id], key=lambda par: par[0]), start=1):
+            inventario_inicial = stock
+            if evento["tipo"] == "COMPRA":
+                entrada, salida = evento["cantidad"], Decimal("0")
+                costo_total += entrada * evento["costo_unitario"]
+                stock += entrada
+                costo_promedio = costo_total / stock if stock > 0 else Decimal("0.00")
+            else:
+                entrada, salida = Decimal("0"), evento["cantidad"]
+                costo_salida = (
+                    evento["costo_unitario"] if evento["costo_unitario"] is not None else costo_promedio
+                )
+                costo_total -= costo_salida * salida
+                stock -= salida
+
+            registros.append(
+                KardexMovimiento(
+                    item_id=item_id,
+                    posicion=posicion,
+                    tipo=evento["tipo"],
+                    fecha=evento["fecha"],
+                    compra_detalle_id=evento.get("compra_detalle_id"),
+                    movimiento_repuesto_id=evento.get("movimiento_repuesto_id"),
+                    movimiento_consumible_id=evento.get("movimiento_consumible_id"),
+                    maquinaria_id=evento.get("maquinaria_id"),
+                    registro=evento["registro"][:120],
+                    inventario_inicial=inventario_inicial,
+                    entrada=entrada,
+                    salida=salida,
+                    costo_unitario=(
+                        evento["costo_unitario"] if evento["tipo"] == "SALIDA_REPUESTO" else costo_promedio
+                    ),
+                    inventario_final_cantidad=stock,
+                    inventario_final_costo=costo_total,
+                    costo_promedio=costo_promedio,
+                )
+            )
+
+    KardexMovimiento.objects.bulk_create(registros, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0041_tareaasincrona'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_kardex, migrations.RunPython.noop),
+    ]
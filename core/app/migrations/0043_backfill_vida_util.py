@@ -0,0 +1,174 @@
+from decimal import Decimal
+
+from django.db import migrations
+
+
+IGV = Decimal("1.18")
+TASAS = {"USD": "compra_usd", "EUR": "compra_eur"}
+
+
+def _a_pen(monto, detalle, tipos_cambio):
+    if detalle.moneda == "PEN":
+        return monto
+    tasa = getattr(tipos_cambio.get(detalle.compra.fecha), TASAS.get(detalle.moneda, ""), None)
+    if not tasa or tasa <= 0:
+        return Decimal("0")
+    return monto * Decimal(tasa)
+
+
+def _montos_pen(detalle, tipos_cambio):
+    """(costo_unitario, valor_unitario, costo_por_unidad) en PEN, como app.vida_util."""
+    if not detalle:
+        return Decimal("0"), Decimal("0"), Decimal("0")
+    costo_total = _a_pen(detalle.cantidad * detalle.valor_unitario * IGV, detalle, tipos_cambio)
+    costo_por_unidad = costo_total / Decimal(detalle.cantidad) if detalle.cantidad else Decimal("0")
+    return (
+        _a_pen(detalle.valor_unitario * IGV, detalle, tipos_cambio),
+        _a_pen(detalle.valor_unitario, detalle, tipos_cambio),
+        costo_por_unidad,
+    )
+
+
+def _vida_util(inicio, siguiente_inicio=None, fin=None):
+    if inicio is None:
+        return None
+    inicio = Decimal(inicio)
+    if siguiente_inicio is not None and Decimal(siguiente_inicio) > inicio:
+        return Decimal(siguiente_inicio) - inicio
+    if fin is not None and Decimal(fin) > inicio:
+        return Decimal(fin) - inicio
+    return None
+
+
+def _redondear(valor):
+    return valor.quantize(Decimal("0.01")) if valor is not None else None
+
+
+def _duracion_orden(orden):
+    if not orden or not orden.hora_inicio or not orden.hora_fin:
+        return None
+    minutos = (
+        orden.hora_fin.hour * 60 + orden.hora_fin.minute
+        - orden.hora_inicio.hour * 60 - orden.hora_inicio.minute
+    )
+    return _redondear(Decimal(minutos) / Decimal("60")) if minutos > 0 else None
+
+
+def _es_relevante(historial):
+    return bool(
+        historial.maquinaria_id
+        or historial.orden_trabajo_id
+        or historial.horometro_inicio is not None
+        or historial.horometro_fin is not None
+    )
+
+
+def _registros_unidades(VidaUtilRegistro, historiales, tipos_cambio):
+    por_unidad = {}
+    for historial in historiales:
+        por_unidad.setdefault(historial.item_unidad_id, []).append(historial)
+
+    for grupo in por_unidad.values():
+        usados = [h for h in grupo if h.maquinaria_id and h.estado == "USADO"]
+        vida_matriz = {
+            actual.id: _vida_util(
+                actual.horometro_inicio,
+                siguiente_inicio=usados[indice + 1].horometro_inicio if indice + 1 < len(usados) else None,
+                fin=actual.horometro_fin,
+            )
+            for indice, actual in enumerate(usados)
+        }
+        for historial in grupo:
+            if not _es_relevante(historial):
+                continue
+            unidad = historial.item_unidad
+            detalle = unidad.compra_detalle
+            costo_unitario, valor_unitario, costo_por_unidad = _montos_pen(detalle, tipos_cambio)
+            yield VidaUtilRegistro(
+                origen="REPUESTO",
+                historial_item=historial,
+                item_id=unidad.item_id,
+                item_unidad_id=unidad.id,
+                maquinaria_id=historial.maquinaria_id,
+                proveedor_id=detalle.compra.proveedor_id if detalle else None,
+                orden_trabajo_id=historial.orden_trabajo_id,
+                compra_detalle_id=detalle.id if detalle else None,
+                estado=historial.estado,
+                cantidad=Decimal("1"),
+                horometro_inicio=historial.horometro_inicio,
+                horometro_fin=historial.horometro_fin,
+                vida_util=_redondear(_vida_util(historial.horometro_inicio, fin=historial.horometro_fin)),
+                vida_util_matriz=_redondear(vida_matriz.get(historial.id)),
+                costo_unitario_pen=costo_unitario,
+                valor_unitario_pen=valor_unitario,
+                costo_total_pen=costo_por_unidad,
+                duracion_ot_horas=_duracion_orden(historial.orden_trabajo),
+            )
+
+
+def _registros_lotes(VidaUtilRegistro, historiales, tipos_cambio):
+    for historial in historiales:
+        if not _es_relevante(historial):
+            continue
+        detalle = historial.lote.compra_detalle
+        costo_unitario, valor_unitario, _ = _montos_pen(detalle, tipos_cambio)
+        cantidad = Decimal(historial.cantidad or 0)
+        vida_util = _redondear(_vida_util(historial.horometro_inicio, fin=historial.horometro_fin))
+        yield VidaUtilRegistro(
+            origen="CONSUMIBLE",
+            historial_consumible=historial,
+            item_id=historial.item_id,
+            lote_id=historial.lote_id,
+            maquinaria_id=historial.maquinaria_id,
+            proveedor_id=detalle.compra.proveedor_id if detalle else None,
+            orden_trabajo_id=historial.orden_trabajo_id,
+            compra_detalle_id=detalle.id if detalle else None,
+            cantidad=cantidad,
+            horometro_inicio=historial.horometro_inicio,
+            horometro_fin=historial.horometro_fin,
+            vida_util=vida_util,
+            vida_util_matriz=vida_util if historial.maquinaria_id else None,
+            costo_unitario_pen=costo_unitario,
+            valor_unitario_pen=valor_unitario,
+            costo_total_pen=cantidad * costo_unitario,
+            duracion_ot_horas=_duracion_orden(historial.orden_trabajo),
+        )
+
+
+def backfill_vida_util(apps, schema_editor):
+    VidaUtilRegistro = apps.get_model("app", "VidaUtilRegistro")
+    HistorialUbicacionItem = apps.get_model("app", "HistorialUbicacionItem")
+    HistorialConsumible = apps.get_model("app", "HistorialConsumible")
+    TipoCambioDiario = apps.get_model("app", "TipoCambioDiario")
+    if VidaUtilRegistro.objects.exists():
+        return
+
+    tipos_cambio = {tipo_cambio.fecha: tipo_cambio for tipo_cambio in TipoCambioDiario.objects.all()}
+    historiales_unidades = (
+        HistorialUbicacionItem.objects
+        .select_related("item_unidad__compra_detalle__compra", "orden_trabajo")
+        .order_by("item_unidad_id", "fecha_inicio", "id")
+    )
+    historiales_lotes = (
+        HistorialConsumible.objects
+        .select_related("lote__compra_detalle__compra", "orden_trabajo")
+        .order_by("lote_id", "fecha_inicio", "id")
+    )
+    VidaUtilRegistro.objects.bulk_create(
+        [
+            *_registros_unidades(VidaUtilRegistro, historiales_unidades, tipos_cambio),
+            *_registros_lotes(VidaUtilRegistro, historiales_lotes, tipos_cambio),
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0042_backfill_kardex'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_vida_util, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,115 @@
+import hashlib
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .catalogos import respuesta_catalogo
+from .perf import medir_serializacion, obtener_medicion
+
+
+def _parsear_rutas(valor):
+    arbol = {}
+    for ruta in (valor or "").split(","):
+        ruta = ruta.strip()
+        if not ruta:
+            continue
+        nodo = arbol
+        for parte in ruta.split("."):
+            nodo = nodo.setdefault(parte.strip(), {})
+    return arbol
+
+
+def _serializer_base(serializer):
+    if isinstance(serializer, serializers.ListSerializer):
+        return serializer.child
+    return serializer
+
+
+def podar_campos(serializer, incluir=None, omitir=None):
+    """Limita los campos de un serializer segun arboles de rutas incluir/omitir."""
+    serializer = _serializer_base(serializer)
+    if not isinstance(serializer, serializers.Serializer):
+        return
+
+    campos = serializer.fields
+
+    if incluir:
+        for nombre in list(campos):
+            if nombre not in incluir:
+                campos.pop(nombre)
+        for nombre, subarbol in incluir.items():
+            if subarbol and nombre in campos:
+                podar_campos(campos[nombre], incluir=subarbol)
+
+    for nombre, subarbol in (omitir or {}).items():
+        if nombre not in campos:
+            continue
+        if subarbol:
+            podar_campos(campos[nombre], omitir=subarbol)
+        else:
+            campos.pop(nombre)
+
+
+class CamposDinamicosMixin:
+    """
+    Permite ``?fields=`` y ``?omit=`` en lecturas; acepta rutas anidadas con punto,
+    por ejemplo ``?omit=actividades`` o ``?fields=id,codigo_orden,actividades.id``.
+    """
+
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+
+    def _rutas_campos(self):
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return {}, {}
+        return (
+            _parsear_rutas(request.query_params.get(self.fields_query_param)),
+            _parsear_rutas(request.query_params.get(self.omit_query_param)),
+        )
+
+    def campo_solicitado(self, ruta):
+        """``ruta`` admite puntos, por ejemplo ``actividades.evidencias``."""
+        incluir, omitir = self._rutas_campos()
+        for nombre in ruta.split("."):
+            if incluir and nombre not in incluir:
+                return False
+            if nombre in omitir and not omitir[nombre]:
+                return False
+            incluir = incluir.get(nombre, {})
+            omitir = omitir.get(nombre, {})
+        return True
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        incluir, omitir = self._rutas_campos()
+        if incluir or omitir:
+            podar_campos(serializer, incluir=incluir, omitir=omitir)
+        return serializer
+
+
+class InstrumentacionMixin:
+    """Agrega a la medicion del request el tiempo de serializacion de la vista."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        medicion = obtener_medicion(getattr(self, "request", None))
+        if medicion is not None:
+            medir_serializacion(serializer, medicion)
+        return serializer
+
+
+class CatalogoCacheadoMixin:
+    """
+    Cachea el listado completo de un catalogo pequeno (sin paginar) por
+    parametros de consulta y responde 304 si el cliente ya tiene la version.
+    """
+
+    def list(self, request, *args, **kwargs):
+        listar = super().list
+        consulta = hashlib.md5(request.GET.urlencode().encode()).hexdigest()
+        return respuesta_catalogo(
+            request,
+            f"{self.basename}:{consulta}",
+            lambda: listar(request, *args, **kwargs).data,
+        )
@@ -4,11 +4,12 @@ from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db.models import Max
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
 import uuid
 from datetime import datetime, time, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Avg
 from zoneinfo import ZoneInfo
 
@@ -20,8 +21,7 @@ def current_local_date():
     return datetime.now(LIMA_TIME_ZONE).date()
 
 
-def generate_monthly_sequential_code(model_class, field_name, prefix):
-    created_date = current_local_date()
+def _max_secuencia_existente(model_class, field_name, prefix):
     max_sequence = 0
 
     for code in model_class.objects.filter(
@@ -32,7 +32,112 @@ def generate_monthly_sequential_code(model_class, field_name, prefix):
         except (TypeError, ValueError):
             continue
 
-    return f"{prefix}-{created_date:%Y-%m}-{max_sequence + 1:04d}"
+    return max_sequence
+
+
+def siguiente_secuencia(prefijo, periodo="", valor_inicial=None):
+    """
+    Incrementa el contador (prefijo, periodo) bloqueando su fila.
+
+    ``valor_inicial`` se invoca solo la primera vez que se usa el contador,
+    para continuar la numeracion de los codigos ya existentes.
+    """
+    with transaction.atomic():
+        secuencia = (
+            SecuenciaCodigo.objects
+            .select_for_update()
+            .filter(prefijo=prefijo, periodo=periodo)
+            .first()
+        )
+        if secuencia is None:
+            try:
+                with transaction.atomic():
+                    secuencia = SecuenciaCodigo.objects.create(
+                        prefijo=prefijo,
+                        periodo=periodo,
+                        ultimo_valor=valor_inicial() if valor_inicial else 0,
+                    )
+            except IntegrityError:
+                pass
+            secuencia = SecuenciaCodigo.objects.select_for_update().get(
+                prefijo=prefijo,
+                periodo=periodo,
+            )
+
+        secuencia.ultimo_valor += 1
+        secuencia.save(update_fields=["ultimo_valor"])
+        return secuencia.ultimo_valor
+
+
+def elevar_secuencia(prefijo, valor, periodo=""):
+    """
+    Adelanta el contador hasta ``valor`` si un codigo se escribio a mano o se
+    importo; si el contador aun no existe, su valor inicial ya lo considera.
+    """
+    SecuenciaCodigo.objects.filter(
+        prefijo=prefijo,
+        periodo=periodo,
+        ultimo_valor__lt=valor,
+    ).update(ultimo_valor=valor)
+
+
+def _partes_codigo(codigo, prefijo, anual):
+    """(periodo, correlativo) de un codigo generado con ``prefijo``; None si no coincide."""
+    codigo = str(codigo or "")
+    if not codigo.startswith(f"{prefijo}-"):
+        return None
+    resto = codigo[len(prefijo) + 1:]
+    periodo = resto.split("-", 1)[0] if anual else ""
+    correlativo = resto.rsplit("-", 1)[-1]
+    if not correlativo.isdigit() or (anual and not periodo.isdigit()):
+        return None
+    return periodo, int(correlativo)
+
+
+def registrar_codigo_manual(prefijo, codigo, anual=False):
+    partes = _partes_codigo(codigo, prefijo, anual)
+    if partes is not None:
+        periodo, correlativo = partes
+        elevar_secuencia(prefijo, correlativo, periodo=periodo)
+
+
+def sincronizar_secuencias_codigo(modelos):
+    """Sube los contadores de los modelos indicados al mayor codigo existente."""
+    for model_class, field_name, prefijo, anual in SECUENCIAS_CODIGO:
+        if model_class not in modelos:
+            continue
+        maximos = {}
+        for codigo in model_class.objects.filter(
+            **{f"{field_name}__startswith": f"{prefijo}-"}
+        ).values_list(field_name, flat=True).iterator():
+            partes = _partes_codigo(codigo, prefijo, anual)
+            if partes is not None:
+                periodo, correlativo = partes
+                maximos[periodo] = max(maximos.get(periodo, 0), correlativo)
+        for periodo, correlativo in maximos.items():
+            elevar_secuencia(prefijo, correlativo, periodo=periodo)
+
+
+def generate_monthly_sequential_code(model_class, field_name, prefix):
+    created_date = current_local_date()
+    # El correlativo no se reinicia por mes: se comparte un contador por prefijo.
+    sequence = siguiente_secuencia(
+        prefix,
+        valor_inicial=lambda: _max_secuencia_existente(model_class, field_name, prefix),
+    )
+
+    return f"{prefix}-{created_date:%Y-%m}-{sequence:04d}"
+
+
+def generate_yearly_sequential_code(model_class, prefix, year, field_name="codigo"):
+    full_prefix = f"{prefix}-{year}"
+    sequence = siguiente_secuencia(
+        prefix,
+        periodo=str(year),
+        valor_inicial=lambda: _max_secuencia_existente(model_class, field_name, full_prefix),
+    )
+
+    return f"{full_prefix}-{sequence:05d}"
 
 # =========================
 # MODELOS BASE
@@ -46,6 +151,23 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+class SecuenciaCodigo(models.Model):
+    prefijo = models.CharField(max_length=30)
+    periodo = models.CharField(max_length=10, blank=True, default="")
+    ultimo_valor = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["prefijo", "periodo"],
+                name="uniq_secuencia_codigo_prefijo_periodo",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.prefijo} {self.periodo}: {self.ultimo_valor}".strip()
+
+
 # =========================
 # CATÁLOGOS
 # =========================
@@ -61,6 +183,37 @@ class Maquinaria(models.Model):
     gasto = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     horometro_manual = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     horometro_manual_actualizado_en = models.DateTimeField(null=True, blank=True)
+    # Resumen denormalizado para los listados; se mantiene desde los save() de
+    # OrdenTrabajo, historiales y compras (ver app/maquinaria_resumen.py).
+    horometro_actual = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    horometro_fuente = models.CharField(max_length=20, blank=True, default="")
+    fecha_ultimo_horometro = models.DateField(null=True, blank=True)
+    centro_costos_pen = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0"))
+
+    CAMPOS_RESUMEN_HOROMETRO = ("horometro_actual", "horometro_fuente", "fecha_ultimo_horometro")
+
+    def save(self, *args, **kwargs):
+        self.asignar_resumen_horometro()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *self.CAMPOS_RESUMEN_HOROMETRO}
+        super().save(*args, **kwargs)
+
+    def asignar_resumen_horometro(self):
+        if self.pk is None:
+            self._ultima_orden_con_horometro_cache = None
+        else:
+            self.__dict__.pop("_ultima_orden_con_horometro_cache", None)
+
+        self.horometro_actual = self.obtener_horometro_actual()
+        self.horometro_fuente = self.obtener_fuente_horometro_actual() or ""
+        self.fecha_ultimo_horometro = self.obtener_fecha_ultimo_horometro()
+
+    def refrescar_resumen_horometro(self):
+        self.asignar_resumen_horometro()
+        Maquinaria.objects.filter(pk=self.pk).update(
+            **{campo: getattr(self, campo) for campo in self.CAMPOS_RESUMEN_HOROMETRO}
+        )
 
     def obtener_ultima_orden_con_horometro(self):
         if hasattr(self, "_ultima_orden_con_horometro_cache"):
@@ -132,59 +285,11 @@ class Maquinaria(models.Model):
             return self.horometro_manual_actualizado_en.date()
         return None
 
-    def calcular_centro_costos(self):
+    def calcular_centro_costos(self, resolutor_tipo_cambio=None):
         """Suma el centro de costos en PEN de repuestos y consumibles activos en la maquinaria."""
+        from .maquinaria_resumen import calcular_centros_costos
 
-        def costo_unitario_pen(detalle):
-            if not detalle:
-                return Decimal("0.00")
-
-            costo_unitario = Decimal(detalle.costo_unitario)
-            if detalle.moneda == Compra.Moneda.PEN:
-                return costo_unitario
-
-            tipo_cambio = TipoCambioDiario.objects.filter(fecha=detalle.compra.fecha).first()
-            if not tipo_cambio:
-                return Decimal("0.00")
-
-            if detalle.moneda == Compra.Moneda.USD and tipo_cambio.compra_usd > 0:
-                return costo_unitario * Decimal(tipo_cambio.compra_usd)
-
-            if detalle.moneda == Compra.Moneda.EUR and tipo_cambio.compra_eur > 0:
-                return costo_unitario * Decimal(tipo_cambio.compra_eur)
-
-            return Decimal("0.00")
-
-        historiales_repuesto = (
-            HistorialUbicacionItem.objects
-            .select_related("item_unidad__compra_detalle", "item_unidad__compra_detalle__compra")
-            .filter(
-                maquinaria=self,
-                fecha_fin__isnull=True,
-                item_unidad__compra_detalle__isnull=False,
-            )
-        )
-
-        historiales_consumible = (
-            HistorialConsumible.objects
-            .select_related("lote__compra_detalle", "lote__compra_detalle__compra")
-            .filter(
-                maquinaria=self,
-                fecha_fin__isnull=True,
-                lote__compra_detalle__isnull=False,
-            )
-        )
-
-        total = Decimal("0.00")
-
-        for h in historiales_repuesto:
-            total += costo_unitario_pen(h.item_unidad.compra_detalle)
-
-        for h in historiales_consumible:
-            costo_unitario = costo_unitario_pen(h.lote.compra_detalle)
-            total += Decimal(h.cantidad) * costo_unitario
-
-        return total
+        return calcular_centros_costos([self.pk], resolutor_tipo_cambio).get(self.pk, Decimal("0.00"))
 
 
 class Almacen(models.Model):
@@ -282,9 +387,13 @@ class UnidadRelacion(models.Model):
             raise ValidationError("La dimensión debe coincidir con la unidad base")
     
     def save(self, *args, **kwargs):
+        from .unidades import invalidar_cache_unidades
+
         crear_inversa = kwargs.pop("crear_inversa", True)
         self.full_clean()
         super().save(*args, **kwargs)
+        invalidar_cache_unidades()
+        transaction.on_commit(invalidar_cache_unidades)
 
         if not crear_inversa:
             return
@@ -320,6 +429,7 @@ class UnidadRelacion(models.Model):
                 factor=factor_inverso,
                 activo=self.activo,
             )
+            invalidar_cache_unidades()
             return
 
         UnidadRelacion(
@@ -330,6 +440,14 @@ class UnidadRelacion(models.Model):
             activo=self.activo,
         ).save(crear_inversa=False)
 
+    def delete(self, *args, **kwargs):
+        from .unidades import invalidar_cache_unidades
+
+        resultado = super().delete(*args, **kwargs)
+        invalidar_cache_unidades()
+        transaction.on_commit(invalidar_cache_unidades)
+        return resultado
+
     def __str__(self):
         return f"1 {self.unidad_base.nombre} = {self.factor} {self.unidad_relacionada.nombre}"
     
@@ -428,6 +546,8 @@ class ItemUnidad(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
 
     def sincronizar_ubicacion_actual(self):
+        from .saldos import refrescar_saldos_unidades
+
         historial_activo = (
             self.historial
             .select_related("almacen", "trabajador", "maquinaria")
@@ -458,17 +578,34 @@ class ItemUnidad(models.Model):
             trabajador_actual=updates["trabajador_actual"],
             maquinaria_actual=updates["maquinaria_actual"],
         )
+        refrescar_saldos_unidades([self.item_id])
+
+    @staticmethod
+    def reservar_series(item, cantidad):
+        """Reserva ``cantidad`` series consecutivas con un solo incremento del correlativo."""
+        if cantidad <= 0:
+            return []
+
+        with transaction.atomic():
+            item_bloqueado = Item.objects.select_for_update().get(pk=item.pk)
+            inicio = item_bloqueado.ultimo_correlativo + 1
+            item_bloqueado.ultimo_correlativo += cantidad
+            item_bloqueado.save(update_fields=["ultimo_correlativo"])
+
+        item.ultimo_correlativo = item_bloqueado.ultimo_correlativo
+        return [
+            f"{item_bloqueado.codigo}-{correlativo:05d}"
+            for correlativo in range(inicio, inicio + cantidad)
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.serie:
-            with transaction.atomic():
-                item = Item.objects.select_for_update().get(pk=self.item.pk)
-                item.ultimo_correlativo += 1
-                item.save(update_fields=["ultimo_correlativo"])
+        from .saldos import refrescar_saldos_unidades
 
-                self.serie = f"{item.codigo}-{item.ultimo_correlativo:05d}"
+        if not self.serie:
+            self.serie = self.reservar_series(self.item, 1)[0]
 
         super().save(*args, **kwargs)
+        refrescar_saldos_unidades([self.item_id])
 
     def __str__(self):
         return f"{self.item.codigo} - {self.serie}"
@@ -620,19 +757,46 @@ class OrdenTrabajo(models.Model):
         Trabajador, through="TecnicoAsignado"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["maquinaria", "fecha"], name="ot_maquinaria_fecha_idx"),
+            models.Index(fields=["fecha", "id"], name="ot_fecha_idx"),
+        ]
+
     def save(self, *args, **kwargs):
+        from .maquinaria_resumen import refrescar_horometros
+
         if not self.codigo_orden:
             self.codigo_orden = generate_monthly_sequential_code(
                 OrdenTrabajo,
                 "codigo_orden",
                 "OT",
             )
+        elif self._state.adding:
+            registrar_codigo_manual("OT", self.codigo_orden)
 
+        maquinaria_anterior_id = (
+            None
+            if self.pk is None
+            else OrdenTrabajo.objects.filter(pk=self.pk).values_list("maquinaria_id", flat=True).first()
+        )
         super().save(*args, **kwargs)
+        refrescar_horometros([self.maquinaria_id, maquinaria_anterior_id])
 
         if self.lugar == self.Lugar.CAMPO:
             ReporteOrden.ensure_for_orden_trabajo(self)
 
+    def delete(self, *args, **kwargs):
+        from .kardex import fechas_kardex_por_actividades, refrescar_kardex_items
+        from .maquinaria_resumen import refrescar_horometros
+
+        desde_por_item = fechas_kardex_por_actividades(self.actividades.values("id"))
+        maquinaria_id = self.maquinaria_id
+        resultado = super().delete(*args, **kwargs)
+        refrescar_kardex_items(desde_por_item)
+        refrescar_horometros([maquinaria_id])
+        return resultado
+
     def __str__(self):
         return self.codigo_orden
 
@@ -718,15 +882,13 @@ class EncabezadoDocumentoEstandarizacion(TimeStampedModel):
                 self.revision = None
 
         if not self.codigo:
-            year = timezone.now().year
-            last = (
-                EncabezadoDocumentoEstandarizacion.objects
-                .filter(codigo__startswith=f"DE-{year}")
-                .aggregate(max_code=Max("codigo"))
-                ["max_code"]
+            self.codigo = generate_yearly_sequential_code(
+                EncabezadoDocumentoEstandarizacion,
+                "DE",
+                timezone.now().year,
             )
-            seq = int(last.split("-")[-1]) + 1 if last else 1
-            self.codigo = f"DE-{year}-{seq:05d}"
+        elif self._state.adding:
+            registrar_codigo_manual("DE", self.codigo, anual=True)
 
         super().save(*args, **kwargs)
 
@@ -1025,19 +1187,13 @@ class ChecklistEjecucion(TimeStampedModel):
             self.fecha = self.fecha_inicio
 
         if not self.codigo:
-            year = (self.fecha_inicio or self.fecha or current_local_date()).year
-            prefix = f"CHK-EJ-{year}"
-            last = (
-                ChecklistEjecucion.objects
-                .filter(codigo__startswith=prefix)
-                .aggregate(max_code=Max("codigo"))
-                ["max_code"]
+            self.codigo = generate_yearly_sequential_code(
+                ChecklistEjecucion,
+                "CHK-EJ",
+                (self.fecha_inicio or self.fecha or current_local_date()).year,
             )
-            if last:
-                seq = int(last.split("-")[-1]) + 1
-            else:
-                seq = 1
-            self.codigo = f"{prefix}-{seq:05d}"
+        elif self._state.adding:
+            registrar_codigo_manual("CHK-EJ", self.codigo, anual=True)
 
         super().save(*args, **kwargs)
 
@@ -1193,15 +1349,13 @@ class ReporteOrden(TimeStampedModel):
             self.fecha = self.orden_trabajo.fecha
 
         if not self.codigo:
-            year = (self.fecha or current_local_date()).year
-            last = (
-                ReporteOrden.objects
-                .filter(codigo__startswith=f"RTO-{year}")
-                .aggregate(max_code=Max("codigo"))
-                .get("max_code")
+            self.codigo = generate_yearly_sequential_code(
+                ReporteOrden,
+                "RTO",
+                (self.fecha or current_local_date()).year,
             )
-            seq = int(last.split("-")[-1]) + 1 if last else 1
-            self.codigo = f"RTO-{year}-{seq:05d}"
+        elif self._state.adding:
+            registrar_codigo_manual("RTO", self.codigo, anual=True)
 
         super().save(*args, **kwargs)
         self.ensure_supervisor_slots()
@@ -1428,15 +1582,13 @@ class ReporteIPERC(TimeStampedModel):
             self.tarea = self.construir_tarea_desde_orden()
 
         if not self.codigo:
-            year = (self.fecha or current_local_date()).year
-            last = (
-                ReporteIPERC.objects
-                .filter(codigo__startswith=f"RIPERC-{year}")
-                .aggregate(max_code=Max("codigo"))
-                .get("max_code")
+            self.codigo = generate_yearly_sequential_code(
+                ReporteIPERC,
+                "RIPERC",
+                (self.fecha or current_local_date()).year,
             )
-            seq = int(last.split("-")[-1]) + 1 if last else 1
-            self.codigo = f"RIPERC-{year}-{seq:05d}"
+        elif self._state.adding:
+            registrar_codigo_manual("RIPERC", self.codigo, anual=True)
 
         super().save(*args, **kwargs)
         self.ensure_supervisor_pendiente()
@@ -1593,8 +1745,26 @@ class ActividadTrabajo(models.Model):
                 )
 
     def save(self, *args, **kwargs):
+        from .kardex import fechas_kardex_por_actividades, refrescar_kardex_items
+
         self.full_clean()
+        es_planificada_anterior = (
+            None
+            if self.pk is None
+            else ActividadTrabajo.objects.filter(pk=self.pk).values_list("es_planificada", flat=True).first()
+        )
         super().save(*args, **kwargs)
+        # Las salidas de actividades planificadas no cuentan en el kardex.
+        if es_planificada_anterior is not None and es_planificada_anterior != self.es_planificada:
+            refrescar_kardex_items(fechas_kardex_por_actividades([self.pk]))
+
+    def delete(self, *args, **kwargs):
+        from .kardex import fechas_kardex_por_actividades, refrescar_kardex_items
+
+        desde_por_item = fechas_kardex_por_actividades([self.pk])
+        resultado = super().delete(*args, **kwargs)
+        refrescar_kardex_items(desde_por_item)
+        return resultado
 
 
 class ActividadTrabajoEvidencia(TimeStampedModel):
@@ -1633,11 +1803,30 @@ class MovimientoRepuesto(models.Model):
     )
     fecha = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["item_unidad", "fecha"], name="mov_rep_unidad_fecha_idx"),
+        ]
+
     def clean(self):
         if self.item_unidad.estado == ItemUnidad.Estado.INOPERATIVO:
             raise ValidationError(
                 "La unidad no puede estar en estado INOPERATIVO"
             )
+
+    def save(self, *args, **kwargs):
+        from .kardex import refrescar_kardex_item
+
+        super().save(*args, **kwargs)
+        refrescar_kardex_item(self.item_unidad.item_id, desde=self.fecha)
+
+    def delete(self, *args, **kwargs):
+        from .kardex import refrescar_kardex_item
+
+        item_id, fecha = self.item_unidad.item_id, self.fecha
+        resultado = super().delete(*args, **kwargs)
+        refrescar_kardex_item(item_id, desde=fecha)
+        return resultado
         
 
 class MovimientoConsumible(models.Model):
@@ -1664,11 +1853,30 @@ class MovimientoConsumible(models.Model):
     )
     fecha = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["item", "fecha"], name="mov_cons_item_fecha_idx"),
+        ]
+
     def clean(self):
         if self.item.tipo_insumo != Item.TipoInsumo.CONSUMIBLE:
             raise ValidationError(
                 "El item debe ser de tipo CONSUMIBLE"
             )
+
+    def save(self, *args, **kwargs):
+        from .kardex import refrescar_kardex_item
+
+        super().save(*args, **kwargs)
+        refrescar_kardex_item(self.item_id, desde=self.fecha)
+
+    def delete(self, *args, **kwargs):
+        from .kardex import refrescar_kardex_item
+
+        item_id, fecha = self.item_id, self.fecha
+        resultado = super().delete(*args, **kwargs)
+        refrescar_kardex_item(item_id, desde=fecha)
+        return resultado
         
 # =========================
 # COMPRAS
@@ -1684,6 +1892,33 @@ class TipoCambioDiario(models.Model):
     class Meta:
         ordering = ["-fecha"]
 
+    def save(self, *args, **kwargs):
+        from .kardex import fechas_kardex_por_compra, refrescar_kardex_items
+        from .maquinaria_resumen import refrescar_centro_costos_por_fecha_compra
+        from .tipo_cambio import invalidar_cache_tipo_cambio
+        from .vida_util import refrescar_vida_util_por_fecha_compra
+
+        super().save(*args, **kwargs)
+        invalidar_cache_tipo_cambio()
+        transaction.on_commit(invalidar_cache_tipo_cambio)
+        refrescar_vida_util_por_fecha_compra(self.fecha)
+        refrescar_kardex_items(fechas_kardex_por_compra(self.fecha, solo_moneda_extranjera=True))
+        refrescar_centro_costos_por_fecha_compra(self.fecha)
+
+    def delete(self, *args, **kwargs):
+        from .kardex import fechas_kardex_por_compra, refrescar_kardex_items
+        from .maquinaria_resumen import refrescar_centro_costos_por_fecha_compra
+        from .tipo_cambio import invalidar_cache_tipo_cambio
+        from .vida_util import refrescar_vida_util_por_fecha_compra
+
+        resultado = super().delete(*args, **kwargs)
+        invalidar_cache_tipo_cambio()
+        transaction.on_commit(invalidar_cache_tipo_cambio)
+        refrescar_vida_util_por_fecha_compra(self.fecha)
+        refrescar_kardex_items(fechas_kardex_por_compra(self.fecha, solo_moneda_extranjera=True))
+        refrescar_centro_costos_por_fecha_compra(self.fecha)
+        return resultado
+
     def __str__(self):
         return (
             f"{self.fecha} | USD C:{self.compra_usd} V:{self.venta_usd} | "
@@ -1722,6 +1957,41 @@ class Compra(models.Model):
     
     class Meta:
         unique_together = ("tipo_comprobante", "codigo_comprobante")
+        indexes = [
+            models.Index(fields=["fecha"], name="compra_fecha_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .kardex import fecha_kardex_compra, refrescar_kardex_items
+        from .maquinaria_resumen import maquinarias_con_compra_detalles, refrescar_centro_costos
+        from .vida_util import refrescar_vida_util_por_compra_detalles
+
+        es_nueva = self.pk is None
+        fecha_anterior = (
+            None
+            if es_nueva
+            else Compra.objects.filter(pk=self.pk).values_list("fecha", flat=True).first()
+        )
+        super().save(*args, **kwargs)
+        if not es_nueva:
+            refrescar_vida_util_por_compra_detalles(
+                self.detalles.values_list("id", flat=True)
+            )
+            desde = fecha_kardex_compra(min(filter(None, [fecha_anterior, self.fecha])))
+            refrescar_kardex_items(
+                {item_id: desde for item_id in self.detalles.values_list("item_id", flat=True)}
+            )
+            refrescar_centro_costos(
+                maquinarias_con_compra_detalles(self.detalles.values_list("id", flat=True))
+            )
+
+    def delete(self, *args, **kwargs):
+        from .kardex import refrescar_kardex_items
+
+        item_ids = list(self.detalles.values_list("item_id", flat=True))
+        resultado = super().delete(*args, **kwargs)
+        refrescar_kardex_items(dict.fromkeys(item_ids))
+        return resultado
 
 class CompraDetalle(models.Model):
     IGV = Decimal("1.18")
@@ -1755,6 +2025,36 @@ class CompraDetalle(models.Model):
 
     class Meta:
         unique_together = ("compra", "item")
+        indexes = [
+            models.Index(fields=["item", "compra"], name="compra_det_item_compra_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .kardex import fecha_kardex_compra, refrescar_kardex_items
+        from .maquinaria_resumen import maquinarias_con_compra_detalles, refrescar_centro_costos
+        from .vida_util import refrescar_vida_util_por_compra_detalles
+
+        es_nuevo = self.pk is None
+        # Si cambia el item, la compra tambien sale del kardex del anterior.
+        item_ids = {self.item_id}
+        if not es_nuevo:
+            item_ids.update(
+                CompraDetalle.objects.filter(pk=self.pk).values_list("item_id", flat=True)
+            )
+        super().save(*args, **kwargs)
+        if not es_nuevo:
+            refrescar_vida_util_por_compra_detalles([self.pk])
+            refrescar_centro_costos(maquinarias_con_compra_detalles([self.pk]))
+        desde = fecha_kardex_compra(self.compra.fecha)
+        refrescar_kardex_items(dict.fromkeys(item_ids, desde))
+
+    def delete(self, *args, **kwargs):
+        from .kardex import refrescar_kardex_item
+
+        item_id = self.item_id
+        resultado = super().delete(*args, **kwargs)
+        refrescar_kardex_item(item_id)
+        return resultado
 
     @property
     def valor_total(self):
@@ -1811,6 +2111,8 @@ class OrdenCompra(TimeStampedModel):
                 "codigo",
                 "OC",
             )
+        elif self._state.adding:
+            registrar_codigo_manual("OC", self.codigo)
 
         super().save(*args, **kwargs)
 
@@ -1898,6 +2200,8 @@ class OrdenRequerimiento(TimeStampedModel):
                 "codigo",
                 "OR",
             )
+        elif self._state.adding:
+            registrar_codigo_manual("OR", self.codigo)
 
         super().save(*args, **kwargs)
 
@@ -2077,6 +2381,35 @@ class HistorialUbicacionItem(models.Model):
         default=ItemUnidad.Estado.NUEVO
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["item_unidad", "fecha_inicio", "id"],
+                name="hist_item_unidad_inicio_idx",
+            ),
+            # Historiales abiertos: la ubicacion vigente de cada unidad.
+            models.Index(
+                fields=["item_unidad"],
+                condition=Q(fecha_fin__isnull=True),
+                name="hist_item_abierto_unidad_idx",
+            ),
+            models.Index(
+                fields=["almacen"],
+                condition=Q(fecha_fin__isnull=True),
+                name="hist_item_abierto_alm_idx",
+            ),
+            models.Index(
+                fields=["trabajador"],
+                condition=Q(fecha_fin__isnull=True),
+                name="hist_item_abierto_trab_idx",
+            ),
+            models.Index(
+                fields=["maquinaria"],
+                condition=Q(fecha_fin__isnull=True),
+                name="hist_item_abierto_maq_idx",
+            ),
+        ]
+
     def clean(self):
         destinos = [self.maquinaria, self.almacen, self.trabajador]
         if sum(bool(d) for d in destinos) != 1:
@@ -2103,24 +2436,36 @@ class HistorialUbicacionItem(models.Model):
         self.save(update_fields=update_fields)
 
     def save(self, *args, **kwargs):
+        from .maquinaria_resumen import refrescar_centro_costos
+        from .vida_util import refrescar_vida_util_unidades
 
         is_new = self.pk is None
+        maquinaria_ids = {self.maquinaria_id}
 
         if is_new:
-            historiales_activos = list(
-                HistorialUbicacionItem.objects
-                .filter(
-                    item_unidad=self.item_unidad,
-                    fecha_fin__isnull=True
-                )
+            # Se cierran con update(): cerrar() guardaria cada historial y
+            # repetiria los recalculos que se hacen una sola vez al final.
+            historiales_activos = HistorialUbicacionItem.objects.filter(
+                item_unidad=self.item_unidad,
+                fecha_fin__isnull=True
             )
-            for historial_activo in historiales_activos:
-                historial_activo.cerrar()
+            maquinaria_ids.update(historiales_activos.values_list("maquinaria_id", flat=True))
+            historiales_activos.update(fecha_fin=timezone.now())
 
         self.full_clean()
         
         super().save(*args, **kwargs)
         self.item_unidad.sincronizar_ubicacion_actual()
+        refrescar_vida_util_unidades([self.item_unidad_id])
+        refrescar_centro_costos(maquinaria_ids)
+
+    def delete(self, *args, **kwargs):
+        from .maquinaria_resumen import refrescar_centro_costos
+
+        resultado = super().delete(*args, **kwargs)
+        if self.maquinaria_id:
+            refrescar_centro_costos([self.maquinaria_id])
+        return resultado
 
 class HistorialConsumible(models.Model):
 
@@ -2178,6 +2523,29 @@ class HistorialConsumible(models.Model):
     horometro_inicio = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     horometro_fin = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["lote", "fecha_inicio", "id"],
+                name="hist_cons_lote_inicio_idx",
+            ),
+            models.Index(
+                fields=["item", "almacen"],
+                condition=Q(fecha_fin__isnull=True),
+                name="hist_cons_abierto_alm_idx",
+            ),
+            models.Index(
+                fields=["item", "trabajador"],
+                condition=Q(fecha_fin__isnull=True),
+                name="hist_cons_abierto_trab_idx",
+            ),
+            models.Index(
+                fields=["item", "maquinaria"],
+                condition=Q(fecha_fin__isnull=True),
+                name="hist_cons_abierto_maq_idx",
+            ),
+        ]
+
     def clean(self):
         destinos = [self.maquinaria, self.trabajador, self.almacen]
         if sum(bool(d) for d in destinos) != 1:
@@ -2212,4 +2580,276 @@ class HistorialConsumible(models.Model):
         self.save(update_fields=update_fields)
 
     def save(self, *args, **kwargs):
+        from .maquinaria_resumen import refrescar_centro_costos
+        from .saldos import refrescar_saldos_lotes
+        from .vida_util import refrescar_vida_util_lotes
+
         super().save(*args, **kwargs)
+        refrescar_saldos_lotes([self.lote_id])
+        refrescar_vida_util_lotes([self.lote_id])
+        if self.maquinaria_id:
+            refrescar_centro_costos([self.maquinaria_id])
+
+    def delete(self, *args, **kwargs):
+        from .maquinaria_resumen import refrescar_centro_costos
+        from .saldos import refrescar_saldos_lotes
+
+        resultado = super().delete(*args, **kwargs)
+        refrescar_saldos_lotes([self.lote_id])
+        if self.maquinaria_id:
+            refrescar_centro_costos([self.maquinaria_id])
+        return resultado
+
+
+class VidaUtilRegistro(models.Model):
+    """Tabla de hechos de vida util por historial de repuesto o consumible."""
+
+    class Origen(models.TextChoices):
+        REPUESTO = "REPUESTO", "Repuesto"
+        CONSUMIBLE = "CONSUMIBLE", "Consumible"
+
+    origen = models.CharField(max_length=15, choices=Origen.choices)
+    historial_item = models.OneToOneField(
+        HistorialUbicacionItem,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="vida_util",
+    )
+    historial_consumible = models.OneToOneField(
+        HistorialConsumible,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="vida_util",
+    )
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name="registros_vida_util",
+    )
+    item_unidad = models.ForeignKey(
+        ItemUnidad, null=True, blank=True, on_delete=models.CASCADE
+    )
+    lote = models.ForeignKey(
+        LoteConsumible, null=True, blank=True, on_delete=models.CASCADE
+    )
+    maquinaria = models.ForeignKey(
+        Maquinaria, null=True, blank=True, on_delete=models.CASCADE
+    )
+    proveedor = models.ForeignKey(
+        Proveedor, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    orden_trabajo = models.ForeignKey(
+        OrdenTrabajo, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    compra_detalle = models.ForeignKey(
+        CompraDetalle, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    estado = models.CharField(max_length=15, blank=True)
+    cantidad = models.DecimalField(max_digits=16, decimal_places=6, default=Decimal("1"))
+    horometro_inicio = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    horometro_fin = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Diferencia fin - inicio del propio historial.
+    vida_util = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # Vida usada en la matriz item x maquinaria: los repuestos se encadenan con
+    # el siguiente historial USADO en maquinaria de la misma unidad.
+    vida_util_matriz = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    costo_unitario_pen = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0"))
+    valor_unitario_pen = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0"))
+    costo_total_pen = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0"))
+    duracion_ot_horas = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["origen", "item"], name="vida_util_origen_item_idx"),
+            models.Index(fields=["item", "maquinaria"], name="vida_util_item_maq_idx"),
+            models.Index(fields=["item", "proveedor"], name="vida_util_item_prov_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.origen} | {self.item_id} | {self.vida_util}"
+
+
+class KardexMovimiento(models.Model):
+    """Libro kardex valorizado (promedio ponderado) con saldos acumulados por item."""
+
+    class Tipo(models.TextChoices):
+        COMPRA = "COMPRA", "Compra"
+        SALIDA_REPUESTO = "SALIDA_REPUESTO", "Salida de repuesto"
+        SALIDA_CONSUMIBLE = "SALIDA_CONSUMIBLE", "Salida de consumible"
+
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name="kardex_movimientos",
+    )
+    # Orden cronologico dentro del item; la paginacion avanza sobre este campo.
+    posicion = models.PositiveIntegerField()
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    fecha = models.DateTimeField()
+    compra_detalle = models.ForeignKey(
+        CompraDetalle,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="kardex_movimientos",
+    )
+    movimiento_repuesto = models.OneToOneField(
+        MovimientoRepuesto,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="kardex",
+    )
+    movimiento_consumible = models.OneToOneField(
+        MovimientoConsumible,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="kardex",
+    )
+    maquinaria = models.ForeignKey(
+        Maquinaria,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    registro = models.CharField(max_length=120, blank=True)
+    inventario_inicial = models.DecimalField(max_digits=18, decimal_places=6)
+    entrada = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0"))
+    salida = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0"))
+    costo_unitario = models.DecimalField(max_digits=20, decimal_places=6)
+    inventario_final_cantidad = models.DecimalField(max_digits=18, decimal_places=6)
+    inventario_final_costo = models.DecimalField(max_digits=20, decimal_places=6)
+    costo_promedio = models.DecimalField(max_digits=20, decimal_places=6)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "posicion"],
+                name="uniq_kardex_item_posicion",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["item", "fecha"], name="kardex_item_fecha_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} | {self.posicion} | {self.tipo}"
+
+
+class SaldoUbicacion(models.Model):
+    """
+    Saldo vigente por item, lote y ubicacion (ver app/saldos.py). En consumibles
+    suma los historiales abiertos del lote; en repuestos y herramientas cuenta
+    las unidades operativas ubicadas y ``lote`` queda vacio.
+    """
+
+    class TipoUbicacion(models.TextChoices):
+        ALMACEN = "ALMACEN", "Almacen"
+        TRABAJADOR = "TRABAJADOR", "Trabajador"
+        MAQUINARIA = "MAQUINARIA", "Maquinaria"
+
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name="saldos_ubicacion",
+    )
+    lote = models.ForeignKey(
+        LoteConsumible,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="saldos_ubicacion",
+    )
+    tipo_ubicacion = models.CharField(max_length=12, choices=TipoUbicacion.choices)
+    ubicacion_id = models.PositiveBigIntegerField()
+    cantidad = models.DecimalField(max_digits=16, decimal_places=6)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["lote", "tipo_ubicacion", "ubicacion_id"],
+                condition=Q(lote__isnull=False),
+                name="uniq_saldo_lote_ubicacion",
+            ),
+            models.UniqueConstraint(
+                fields=["item", "tipo_ubicacion", "ubicacion_id"],
+                condition=Q(lote__isnull=True),
+                name="uniq_saldo_unidad_ubicacion",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["item", "tipo_ubicacion", "ubicacion_id"],
+                name="saldo_item_ubicacion_idx",
+            ),
+            models.Index(
+                fields=["tipo_ubicacion", "ubicacion_id"],
+                name="saldo_ubicacion_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} | {self.lote_id} | {self.tipo_ubicacion} {self.ubicacion_id}"
+
+
+class TareaAsincrona(models.Model):
+    """
+    Operacion pesada encolada para el worker (ver app/tareas.py y el comando
+    procesar_tareas); el cliente consulta estado, progreso y resultado en
+    /api/jobs/<id>/.
+    """
+
+    class Estado(models.TextChoices):
+        PENDIENTE = "PENDIENTE", "Pendiente"
+        EN_PROCESO = "EN_PROCESO", "En proceso"
+        COMPLETADA = "COMPLETADA", "Completada"
+        FALLIDA = "FALLIDA", "Fallida"
+
+    tipo = models.CharField(max_length=50)
+    estado = models.CharField(
+        max_length=12,
+        choices=Estado.choices,
+        default=Estado.PENDIENTE,
+    )
+    parametros = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    progreso = models.PositiveSmallIntegerField(default=0)
+    mensaje = models.CharField(max_length=255, blank=True, default="")
+    codigo_respuesta = models.PositiveSmallIntegerField(null=True, blank=True)
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True, default="")
+    creado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tareas_asincronas",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    finalizado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["estado", "id"], name="tarea_estado_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.estado})"
+
+
+# Modelos con codigo correlativo: (modelo, campo, prefijo, contador anual).
+SECUENCIAS_CODIGO = (
+    (OrdenTrabajo, "codigo_orden", "OT", False),
+    (OrdenCompra, "codigo", "OC", False),
+    (OrdenRequerimiento, "codigo", "OR", False),
+    (EncabezadoDocumentoEstandarizacion, "codigo", "DE", True),
+    (ChecklistEjecucion, "codigo", "CHK-EJ", True),
+    (ReporteOrden, "codigo", "RTO", True),
+    (ReporteIPERC, "codigo", "RIPERC", True),
+)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CursorPaginacion(CursorPagination):
+    """
+    Paginacion por cursor para los listados de la API.
+
+    Se activa cuando el cliente envia ``cursor`` o ``page_size``; siempre en el
+    listado de las vistas con ``paginacion_obligatoria = True`` (tablas que
+    crecen sin limite) o si ``PAGINACION_CURSOR_OBLIGATORIA`` esta activo.
+    Respeta el orden del queryset de cada vista y agrega la clave primaria como
+    desempate.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self._paginacion_solicitada(request, view):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def _paginacion_solicitada(self, request, view=None):
+        if getattr(settings, "PAGINACION_CURSOR_OBLIGATORIA", False):
+            return True
+        if getattr(view, "paginacion_obligatoria", False) and getattr(view, "action", None) == "list":
+            return True
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or [])
+        ordering = [campo for campo in ordering if isinstance(campo, str) and campo != "?"]
+        if not ordering:
+            return ("-id",)
+
+        campos = {campo.lstrip("-") for campo in ordering}
+        if not campos.intersection({"id", "pk"}):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return tuple(ordering)
+
+    def _get_position_from_instance(self, instance, ordering):
+        campo = ordering[0].lstrip("-")
+        if isinstance(instance, dict):
+            valor = instance[campo]
+        else:
+            valor = instance
+            for parte in campo.split("__"):
+                valor = getattr(valor, parte) if valor is not None else None
+        return str(valor)
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .permissions import IsAdmin
+
+
+logger = logging.getLogger(__name__)
+
+METRICAS = ("total_ms", "db_ms", "consultas", "serializacion_ms", "bytes")
+
+_lock = threading.Lock()
+_mediciones = defaultdict(lambda: deque(maxlen=getattr(settings, "PERF_VENTANA", 500)))
+_excesos = defaultdict(int)
+
+
+class MedicionRequest:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.vista = None
+        self.presupuesto = None
+        self.consultas = 0
+        self.db_ms = 0.0
+        self.serializacion_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.db_ms += (time.perf_counter() - inicio) * 1000
+
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+
+def obtener_medicion(request):
+    request = getattr(request, "_request", request)
+    return getattr(request, "_medicion_perf", None)
+
+
+def medir_serializacion(serializer, medicion):
+    to_representation = serializer.to_representation
+
+    def to_representation_medido(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return to_representation(*args, **kwargs)
+        finally:
+            medicion.serializacion_ms += (time.perf_counter() - inicio) * 1000
+
+    serializer.to_representation = to_representation_medido
+    return serializer
+
+
+def _identificar_vista(view_func, request):
+    clase = getattr(view_func, "cls", None)
+    nombre = clase.__name__ if clase else getattr(view_func, "__name__", "vista")
+    acciones = getattr(view_func, "actions", None) or {}
+    accion = acciones.get(request.method.lower()) or request.method.lower()
+    presupuestos = getattr(clase, "presupuesto_consultas", None) or {}
+    return f"{nombre}.{accion}", presupuestos.get(accion)
+
+
+def registrar_medicion(vista, metricas, excedido=False):
+    with _lock:
+        _mediciones[vista].append(metricas)
+        if excedido:
+            _excesos[vista] += 1
+
+
+def reiniciar_mediciones():
+    with _lock:
+        _mediciones.clear()
+        _excesos.clear()
+
+
+def _percentil(valores, percentil):
+    ordenados = sorted(valores)
+    indice = max(int(round(percentil / 100 * len(ordenados))) - 1, 0)
+    return ordenados[min(indice, len(ordenados) - 1)]
+
+
+def resumen_mediciones():
+    """Percentiles p50/p95/p99 por vista y accion sobre la ventana de mediciones del proceso."""
+    with _lock:
+        copia = {vista: list(filas) for vista, filas in _mediciones.items()}
+        excesos = dict(_excesos)
+
+    resumen = {}
+    for vista, filas in sorted(copia.items()):
+        resumen[vista] = {"muestras": len(filas), "excesos_presupuesto": excesos.get(vista, 0)}
+        for metrica in METRICAS:
+            valores = [fila[metrica] for fila in filas if fila.get(metrica) is not None]
+            if not valores:
+                continue
+            resumen[vista][metrica] = {
+                "p50": round(_percentil(valores, 50), 2),
+                "p95": round(_percentil(valores, 95), 2),
+                "p99": round(_percentil(valores, 99), 2),
+            }
+    return resumen
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide consultas SQL, tiempo de base de datos, serializacion y tamano de
+    respuesta por vista/accion. Solo se activa con PERF_INSTRUMENTACION.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERF_INSTRUMENTACION", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = MedicionRequest()
+        request._medicion_perf = medicion
+        with connection.execute_wrapper(medicion):
+            response = self.get_response(request)
+
+        if medicion.vista is None:
+            return response
+
+        total_ms = medicion.total_ms()
+        tamano = None if getattr(response, "streaming", False) else len(response.content)
+        excedido = medicion.presupuesto is not None and medicion.consultas > medicion.presupuesto
+        if excedido:
+            logger.warning(
+                "%s ejecuto %s consultas (presupuesto %s)",
+                medicion.vista,
+                medicion.consultas,
+                medicion.presupuesto,
+            )
+
+        registrar_medicion(
+            medicion.vista,
+            {
+                "total_ms": total_ms,
+                "db_ms": medicion.db_ms,
+                "consultas": medicion.consultas,
+                "serializacion_ms": medicion.serializacion_ms,
+                "bytes": tamano,
+            },
+            excedido=excedido,
+        )
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={medicion.db_ms:.1f};desc="{medicion.consultas} consultas"',
+                f"serializacion;dur={medicion.serializacion_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            ]
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        medicion = getattr(request, "_medicion_perf", None)
+        if medicion is not None:
+            medicion.vista, medicion.presupuesto = _identificar_vista(view_func, request)
+        return None
+
+
+class PerfResumenView(APIView):
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(
+            {
+                "activo": getattr(settings, "PERF_INSTRUMENTACION", False),
+                "ventana": getattr(settings, "PERF_VENTANA", 500),
+                "vistas": resumen_mediciones(),
+            }
+        )
+
+    def delete(self, request):
+        reiniciar_mediciones()
+        return Response(status=status.HTTP_204_NO_CONTENT)
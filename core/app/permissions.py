@@ -1,3 +1,7 @@
+from contextvars import ContextVar
+
+from django.core.signals import request_finished, request_started
+from django.dispatch import receiver
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 
@@ -6,12 +10,51 @@ from rest_framework.permissions import BasePermission, SAFE_METHODS
 # Utilidades
 # ==========================
 
+# Grupos por usuario durante el request en curso; None fuera de un request.
+_grupos_request = ContextVar("grupos_request", default=None)
+
+
+@receiver(request_started)
+def _iniciar_cache_grupos(**kwargs):
+    _grupos_request.set({})
+
+
+@receiver(request_finished)
+def _liberar_cache_grupos(**kwargs):
+    _grupos_request.set(None)
+
+
+def grupos_usuario(user):
+    """
+    Nombres de los grupos del usuario. Dentro de un request se consultan una
+    sola vez y los comparten permisos, helpers y serializers.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    cache = _grupos_request.get()
+    if cache is not None and user.pk in cache:
+        return cache[user.pk]
+
+    grupos = frozenset(user.groups.values_list("name", flat=True))
+    if cache is not None:
+        cache[user.pk] = grupos
+    return grupos
+
+
+def asignar_grupos_usuario(user, group_names):
+    """Registra los grupos ya conocidos (p. ej. desde el token) para el request en curso."""
+    cache = _grupos_request.get()
+    if cache is not None:
+        cache[user.pk] = frozenset(group_names)
+
+
 def user_in_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    return group_name in grupos_usuario(user)
 
 
 def user_in_any_group(user, group_names):
-    return user.groups.filter(name__in=group_names).exists()
+    return not grupos_usuario(user).isdisjoint(group_names)
 
 
 def can_manage_planned_activities(user):
@@ -71,8 +114,7 @@ class HasRole(BasePermission):
         if not request.user.is_authenticated:
             return False
 
-        user_roles = request.user.groups.values_list("name", flat=True)
-        return any(role in user_roles for role in self.allowed_roles)
+        return user_in_any_group(request.user, self.allowed_roles)
 
 class IsAdmin(BasePermission):
     """
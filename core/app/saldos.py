@@ -0,0 +1,165 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import HistorialConsumible, ItemUnidad, SaldoUbicacion
+
+
+TAMANO_LOTE = 500
+TIPO_POR_VISTA = {
+    "almacen": SaldoUbicacion.TipoUbicacion.ALMACEN,
+    "tecnicos": SaldoUbicacion.TipoUbicacion.TRABAJADOR,
+    "maquinaria": SaldoUbicacion.TipoUbicacion.MAQUINARIA,
+}
+
+
+def _ubicacion(almacen_id, trabajador_id, maquinaria_id):
+    if almacen_id:
+        return SaldoUbicacion.TipoUbicacion.ALMACEN, almacen_id
+    if trabajador_id:
+        return SaldoUbicacion.TipoUbicacion.TRABAJADOR, trabajador_id
+    if maquinaria_id:
+        return SaldoUbicacion.TipoUbicacion.MAQUINARIA, maquinaria_id
+    return None, None
+
+
+def _saldos_consumibles(lote_ids=None):
+    historiales = HistorialConsumible.objects.filter(fecha_fin__isnull=True, cantidad__gt=0)
+    if lote_ids is not None:
+        historiales = historiales.filter(lote_id__in=lote_ids)
+
+    saldos = defaultdict(Decimal)
+    filas = historiales.values_list(
+        "item_id", "lote_id", "almacen_id", "trabajador_id", "maquinaria_id",
+    ).annotate(total=Sum("cantidad"))
+    for item_id, lote_id, almacen_id, trabajador_id, maquinaria_id, total in filas:
+        tipo, ubicacion_id = _ubicacion(almacen_id, trabajador_id, maquinaria_id)
+        if tipo:
+            saldos[(item_id, lote_id, tipo, ubicacion_id)] += total
+    return saldos
+
+
+def _saldos_unidades(item_ids=None):
+    unidades = ItemUnidad.objects.exclude(estado=ItemUnidad.Estado.INOPERATIVO).filter(
+        Q(almacen_actual__isnull=False)
+        | Q(trabajador_actual__isnull=False)
+        | Q(maquinaria_actual__isnull=False)
+    )
+    if item_ids is not None:
+        unidades = unidades.filter(item_id__in=item_ids)
+
+    saldos = defaultdict(Decimal)
+    filas = unidades.values_list(
+        "item_id", "almacen_actual_id", "trabajador_actual_id", "maquinaria_actual_id",
+    ).annotate(total=Count("id"))
+    for item_id, almacen_id, trabajador_id, maquinaria_id, total in filas:
+        tipo, ubicacion_id = _ubicacion(almacen_id, trabajador_id, maquinaria_id)
+        saldos[(item_id, None, tipo, ubicacion_id)] += Decimal(total)
+    return saldos
+
+
+def _guardar(saldos):
+    SaldoUbicacion.objects.bulk_create(
+        [
+            SaldoUbicacion(
+                item_id=item_id,
+                lote_id=lote_id,
+                tipo_ubicacion=tipo,
+                ubicacion_id=ubicacion_id,
+                cantidad=cantidad,
+            )
+            for (item_id, lote_id, tipo, ubicacion_id), cantidad in saldos.items()
+            if cantidad
+        ],
+        batch_size=TAMANO_LOTE,
+    )
+
+
+def refrescar_saldos_lotes(lote_ids):
+    lote_ids = {lote_id for lote_id in lote_ids if lote_id}
+    if not lote_ids:
+        return
+
+    with transaction.atomic():
+        SaldoUbicacion.objects.filter(lote_id__in=lote_ids).delete()
+        _guardar(_saldos_consumibles(lote_ids))
+
+
+def refrescar_saldos_unidades(item_ids):
+    item_ids = {item_id for item_id in item_ids if item_id}
+    if not item_ids:
+        return
+
+    with transaction.atomic():
+        SaldoUbicacion.objects.filter(item_id__in=item_ids, lote__isnull=True).delete()
+        _guardar(_saldos_unidades(item_ids))
+
+
+def saldos_por_item(item_ids, **filtros):
+    """``{item_id: {tipo_ubicacion: cantidad}}`` leidos de la tabla de saldos."""
+    resultado = defaultdict(lambda: defaultdict(Decimal))
+    filas = (
+        SaldoUbicacion.objects
+        .filter(item_id__in=item_ids, **filtros)
+        .values_list("item_id", "tipo_ubicacion")
+        .annotate(total=Sum("cantidad"))
+    )
+    for item_id, tipo, total in filas:
+        resultado[item_id][tipo] += total
+    return resultado
+
+
+def saldo_en_ubicacion(item, tipo_ubicacion, ubicacion_id, **filtros):
+    return (
+        SaldoUbicacion.objects
+        .filter(
+            item=item,
+            tipo_ubicacion=tipo_ubicacion,
+            ubicacion_id=ubicacion_id,
+            **filtros,
+        )
+        .aggregate(total=Sum("cantidad"))
+        .get("total")
+        or Decimal("0")
+    )
+
+
+def conciliar_saldos(corregir=False):
+    """
+    Compara la tabla de saldos con lo calculado desde historiales y unidades.
+    Devuelve las diferencias; con ``corregir`` reescribe los lotes e items afectados.
+    """
+    esperados = _saldos_consumibles()
+    esperados.update(_saldos_unidades())
+    esperados = {clave: cantidad for clave, cantidad in esperados.items() if cantidad}
+    guardados = {
+        (item_id, lote_id, tipo, ubicacion_id): cantidad
+        for item_id, lote_id, tipo, ubicacion_id, cantidad in SaldoUbicacion.objects.values_list(
+            "item_id", "lote_id", "tipo_ubicacion", "ubicacion_id", "cantidad",
+        )
+    }
+
+    diferencias = []
+    for clave in sorted(set(esperados) | set(guardados), key=str):
+        esperado = esperados.get(clave, Decimal("0"))
+        guardado = guardados.get(clave, Decimal("0"))
+        if esperado == guardado:
+            continue
+        item_id, lote_id, tipo, ubicacion_id = clave
+        diferencias.append({
+            "item_id": item_id,
+            "lote_id": lote_id,
+            "tipo_ubicacion": tipo,
+            "ubicacion_id": ubicacion_id,
+            "guardado": guardado,
+            "esperado": esperado,
+        })
+
+    if corregir and diferencias:
+        with transaction.atomic():
+            refrescar_saldos_lotes({d["lote_id"] for d in diferencias if d["lote_id"]})
+            refrescar_saldos_unidades({d["item_id"] for d in diferencias if not d["lote_id"]})
+
+    return diferencias
@@ -4,7 +4,7 @@ from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
 from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
-from django.db.models import Max, Q, Sum
+from django.db.models import Count, Max, Sum
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
@@ -50,6 +50,7 @@ from .models import (
     LoteConsumible,
     SecuenciaControlRiesgo,
     MedidaCorrectiva,
+    TareaAsincrona,
     TareaPorEstandarizar,
     TipoCambioDiario,
     ActividadChecklist,
@@ -60,7 +61,20 @@ from .models import (
     Sistema,
     Evento,
     Asistencia,
+    SaldoUbicacion,
 )
+from .asignacion_lotes import asignar_fifo
+from .horometros import cerrar_horometro_previos
+from .saldos import (
+    TIPO_POR_VISTA,
+    refrescar_saldos_lotes,
+    refrescar_saldos_unidades,
+    saldo_en_ubicacion,
+    saldos_por_item,
+)
+from .tipo_cambio import obtener_resolutor_tipo_cambio
+from .unidades import ConversorUnidades
+from .vida_util import refrescar_vida_util_por_orden
 from .permissions import (
     can_assign_requirement_technician,
     can_manage_planned_activities,
@@ -74,27 +88,9 @@ def obtener_unidad_base(dimension):
     return UnidadMedida.objects.filter(dimension=dimension).order_by("id").first()
 
 
-def obtener_factor_entre_unidades(unidad_origen, unidad_destino, unidad_base=None):
+def obtener_factor_entre_unidades(unidad_origen, unidad_destino, unidad_base=None, conversor=None):
     del unidad_base  # Compatibilidad con llamadas antiguas.
-
-    if unidad_origen.id == unidad_destino.id:
-        return Decimal("1")
-
-    if unidad_origen.dimension_id != unidad_destino.dimension_id:
-        raise ValidationError("Las unidades no pertenecen a la misma dimensión")
-
-    relacion = UnidadRelacion.objects.filter(
-        unidad_base=unidad_origen,
-        unidad_relacionada=unidad_destino,
-    ).first()
-    if not relacion:
-        raise ValidationError(
-            "No existe relación de unidad entre la unidad origen y destino"
-        )
-    if relacion.factor == 0:
-        raise ValidationError("El factor de equivalencia no puede ser cero")
-
-    return Decimal(relacion.factor)
+    return (conversor or ConversorUnidades()).factor(unidad_origen, unidad_destino)
 
 def calcular_stock_item(item):
     if item.tipo_insumo in Item.tipos_con_unidades():
@@ -155,10 +151,10 @@ def actualizar_stock_item(item):
     return stock
 
 
-def convertir_cantidad_a_unidad_item(item, cantidad, unidad_origen):
+def convertir_cantidad_a_unidad_item(item, cantidad, unidad_origen, conversor=None):
     if unidad_origen.id == item.unidad_medida_id:
         return Decimal(cantidad)
-    factor = obtener_factor_entre_unidades(unidad_origen, item.unidad_medida)
+    factor = obtener_factor_entre_unidades(unidad_origen, item.unidad_medida, conversor=conversor)
     return Decimal(cantidad) * factor
 
 
@@ -268,46 +264,103 @@ def obtener_tecnico_contexto_actividad(actividad, request=None, tecnico=None, te
 def calcular_stock_item_por_vista(item, vista="general"):
     vista_normalizada = (vista or "general").lower()
     if vista_normalizada == "general":
-        return actualizar_stock_item(item)
+        return calcular_stock_item(item)
 
-    if item.tipo_insumo in Item.tipos_con_unidades():
-        unidades = (
-            ItemUnidad.objects
-            .filter(
-                item=item,
-                estado__in=[
-                    ItemUnidad.Estado.NUEVO,
-                    ItemUnidad.Estado.USADO,
-                    ItemUnidad.Estado.REPARADO,
-                ],
-            )
-            .exclude(estado=ItemUnidad.Estado.INOPERATIVO)
-        )
+    return calcular_stock_items_por_vista([item], vista_normalizada)[item.id]["stock"]
 
-        if vista_normalizada == "almacen":
-            unidades = unidades.filter(almacen_actual__isnull=False)
-        elif vista_normalizada == "tecnicos":
-            unidades = unidades.filter(trabajador_actual__isnull=False)
-        elif vista_normalizada == "maquinaria":
-            unidades = unidades.filter(maquinaria_actual__isnull=False)
 
-        return Decimal(unidades.values("id").distinct().count())
+def _agrupar_por_item(queryset, **agregados):
+    return {
+        fila["item_id"]: fila
+        for fila in queryset.values("item_id").annotate(**agregados)
+    }
+
 
-    historiales = HistorialConsumible.objects.filter(
-        item=item,
-        fecha_fin__isnull=True,
-        cantidad__gt=0,
+def calcular_stock_items_por_vista(items, vista="general"):
+    """
+    Calcula stock y unidades disponibles de varios items con consultas agrupadas.
+    No escribe en la base de datos; devuelve {item_id: {"stock", "unidades_disponibles"}}.
+    """
+    vista_normalizada = (vista or "general").lower()
+    items = list(items)
+    resultado = {
+        item.id: {"stock": Decimal("0"), "unidades_disponibles": 0}
+        for item in items
+    }
+    if not items:
+        return resultado
+
+    ids_con_unidades = [
+        item.id for item in items if item.tipo_insumo in Item.tipos_con_unidades()
+    ]
+    ids_consumibles = [
+        item.id for item in items if item.tipo_insumo not in Item.tipos_con_unidades()
+    ]
+
+    # Unidades operativas ubicadas y saldos de consumibles por tipo de ubicacion.
+    tipo_vista = TIPO_POR_VISTA.get(vista_normalizada)
+    saldos = saldos_por_item(
+        [item.id for item in items],
+        **({"tipo_ubicacion": tipo_vista} if tipo_vista else {}),
     )
+    for item_id in ids_con_unidades:
+        resultado[item_id]["unidades_disponibles"] = int(sum(saldos[item_id].values()))
+
+    if vista_normalizada == "general":
+        compras = _agrupar_por_item(
+            CompraDetalle.objects.filter(item_id__in=ids_con_unidades),
+            total=Sum("cantidad"),
+        )
+        salidas = {
+            fila["item_unidad__item_id"]: fila["total"]
+            for fila in (
+                MovimientoRepuesto.objects
+                .filter(
+                    item_unidad__item_id__in=ids_con_unidades,
+                    item_unidad__item__tipo_insumo=Item.TipoInsumo.REPUESTO,
+                    actividad__es_planificada=False,
+                )
+                .values("item_unidad__item_id")
+                .annotate(total=Count("id"))
+            )
+        }
+        lotes = _agrupar_por_item(
+            LoteConsumible.objects.filter(item_id__in=ids_consumibles),
+            total=Sum("cantidad_disponible"),
+        )
+
+        for item in items:
+            if item.tipo_insumo in Item.tipos_con_unidades():
+                if (
+                    item.unidad_medida
+                    and item.dimension
+                    and item.unidad_medida.nombre.upper() == "CANTIDAD"
+                    and item.dimension.codigo.upper() == "UNIDAD"
+                ):
+                    stock = saldos[item.id][SaldoUbicacion.TipoUbicacion.ALMACEN]
+                else:
+                    fila = compras.get(item.id)
+                    total_compras = (fila["total"] if fila else 0) or 0
+                    total_salidas = salidas.get(item.id, 0)
+                    stock = max(
+                        Decimal(total_compras) - Decimal(total_salidas),
+                        Decimal("0"),
+                    )
+            elif not item.unidad_medida_id or not item.dimension_id:
+                stock = Decimal("0")
+            else:
+                fila = lotes.get(item.id)
+                total = (fila["total"] if fila else None) or Decimal("0")
+                stock = max(Decimal(total), Decimal("0"))
+            resultado[item.id]["stock"] = stock
+
+        return resultado
 
-    if vista_normalizada == "almacen":
-        historiales = historiales.filter(almacen__isnull=False)
-    elif vista_normalizada == "tecnicos":
-        historiales = historiales.filter(trabajador__isnull=False)
-    elif vista_normalizada == "maquinaria":
-        historiales = historiales.filter(maquinaria__isnull=False)
+    # Fuera de la vista general el stock es el saldo en el tipo de ubicacion.
+    for item_id in ids_con_unidades + ids_consumibles:
+        resultado[item_id]["stock"] = max(sum(saldos[item_id].values(), Decimal("0")), Decimal("0"))
 
-    total = historiales.aggregate(total=Sum("cantidad")).get("total") or Decimal("0")
-    return max(Decimal(total), Decimal("0"))
+    return resultado
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -401,40 +454,25 @@ class ItemSerializer(serializers.ModelSerializer):
 
         return request.GET.get("vista", "general")
 
-    def _get_stock_contextual(self, obj):
-        vista = self._get_vista_contextual()
-        return calcular_stock_item_por_vista(obj, vista=vista)
+    def _get_stock_precalculado(self, obj):
+        stock_por_item = self.context.get("stock_por_item") or {}
+        if obj.id in stock_por_item:
+            return stock_por_item[obj.id]
+
+        if not hasattr(obj, "_stock_por_vista"):
+            obj._stock_por_vista = calcular_stock_items_por_vista(
+                [obj],
+                vista=self._get_vista_contextual(),
+            )[obj.id]
+        return obj._stock_por_vista
 
     def get_unidades_disponibles(self, obj):
         if obj.tipo_insumo not in Item.tipos_con_unidades():
             return 0
-
-        vista = self._get_vista_contextual()
-        vista_normalizada = (vista or "general").lower()
-
-        unidades = (
-            ItemUnidad.objects
-            .filter(item=obj)
-            .exclude(estado=ItemUnidad.Estado.INOPERATIVO)
-        )
-
-        if vista_normalizada == "almacen":
-            unidades = unidades.filter(almacen_actual__isnull=False)
-        elif vista_normalizada == "tecnicos":
-            unidades = unidades.filter(trabajador_actual__isnull=False)
-        elif vista_normalizada == "maquinaria":
-            unidades = unidades.filter(maquinaria_actual__isnull=False)
-        else:
-            unidades = unidades.filter(
-                Q(almacen_actual__isnull=False)
-                | Q(trabajador_actual__isnull=False)
-                | Q(maquinaria_actual__isnull=False)
-            )
-
-        return unidades.distinct().count()
+        return self._get_stock_precalculado(obj)["unidades_disponibles"]
 
     def get_stock(self, obj):
-        return self._get_stock_contextual(obj)
+        return self._get_stock_precalculado(obj)["stock"]
 
     def validate(self, attrs):
         tipo_insumo = attrs.get(
@@ -475,9 +513,13 @@ class ItemSerializer(serializers.ModelSerializer):
 
 class MaquinariaSerializer(serializers.ModelSerializer):
     centro_costos = serializers.SerializerMethodField()
-    horometro_actual = serializers.SerializerMethodField()
+    horometro_actual = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        read_only=True,
+        coerce_to_string=False,
+    )
     horometro_fuente = serializers.SerializerMethodField()
-    fecha_ultimo_horometro = serializers.SerializerMethodField()
 
     class Meta:
         model = Maquinaria
@@ -504,16 +546,10 @@ class MaquinariaSerializer(serializers.ModelSerializer):
         ]
 
     def get_centro_costos(self, obj):
-        return round(obj.calcular_centro_costos(), 2)
-
-    def get_horometro_actual(self, obj):
-        return obj.obtener_horometro_actual()
+        return round(obj.centro_costos_pen, 2)
 
     def get_horometro_fuente(self, obj):
-        return obj.obtener_fuente_horometro_actual()
-
-    def get_fecha_ultimo_horometro(self, obj):
-        return obj.obtener_fecha_ultimo_horometro()
+        return obj.horometro_fuente or None
 
     def create(self, validated_data):
         if validated_data.get("horometro_manual") is not None:
@@ -542,6 +578,10 @@ class CompraCreateItemSerializer(serializers.Serializer):
     monto = serializers.DecimalField(max_digits=12, decimal_places=2)
     moneda = serializers.CharField(max_length=3)
 
+
+TAMANO_LOTE_INGRESO = 500
+
+
 class CompraCreateSerializer(serializers.ModelSerializer):
     items = CompraCreateItemSerializer(many=True, write_only=True)
     IGV_FACTOR = Decimal("1.18")
@@ -551,11 +591,8 @@ class CompraCreateSerializer(serializers.ModelSerializer):
         fields = ["fecha", "proveedor", "tipo_comprobante", "codigo_comprobante", "moneda", "items"]
     
     @staticmethod
-    def _cantidad_en_unidad_item(item, cantidad, unidad_origen):
-        if unidad_origen.id == item.unidad_medida_id:
-            return Decimal(cantidad)
-        factor = obtener_factor_entre_unidades(unidad_origen, item.unidad_medida)
-        return Decimal(cantidad) * factor
+    def _cantidad_en_unidad_item(item, cantidad, unidad_origen, conversor=None):
+        return convertir_cantidad_a_unidad_item(item, cantidad, unidad_origen, conversor)
 
     def create(self, validated_data):
         items_data = validated_data.pop("items")
@@ -565,6 +602,10 @@ class CompraCreateSerializer(serializers.ModelSerializer):
             
             # 2. Obtener almacén por defecto para el ingreso
             almacen_principal, _ = Almacen.objects.get_or_create(nombre="Almacén Central")
+            detalles_con_unidades = []
+            detalles_con_lote = []
+            items_por_actualizar = {}
+            conversor = ConversorUnidades()
 
             for data in items_data:
                 item = normalizar_item_con_unidades(data["item"])
@@ -588,7 +629,11 @@ class CompraCreateSerializer(serializers.ModelSerializer):
                             "La unidad de medida no coincide con la dimensión del item"
                         )
                     if unidad_medida.id != item.unidad_medida_id:
-                        obtener_factor_entre_unidades(unidad_medida, item.unidad_medida)
+                        obtener_factor_entre_unidades(
+                            unidad_medida,
+                            item.unidad_medida,
+                            conversor=conversor,
+                        )
                 elif item.tipo_insumo == Item.TipoInsumo.CONSUMIBLE:
                     unidad_medida = item.unidad_medida
                     if not unidad_medida:
@@ -625,44 +670,102 @@ class CompraCreateSerializer(serializers.ModelSerializer):
                     valor_unitario=valor_unitario.quantize(Decimal("0.01"))
                 )
 
-                # 5. Generar unidades físicas en inventario e historial inicial
                 if item.tipo_insumo in Item.tipos_con_unidades():
-                    for _ in range(cantidad):
-                        unidad = ItemUnidad.objects.create(
-                            item=item,
-                            compra_detalle=detalle,
-                            estado=ItemUnidad.Estado.NUEVO
-                        )
-                        HistorialUbicacionItem.objects.create(
-                            item_unidad=unidad,
-                            almacen=almacen_principal,
-                            estado=unidad.estado,
-                            fecha_inicio=compra.fecha
-                        )
+                    detalles_con_unidades.append(detalle)
                 else:
-                    cantidad_convertida = self._cantidad_en_unidad_item(
-                        item,
-                        cantidad_original,
-                        unidad_medida,
-                    )
-                    lote = LoteConsumible.objects.create(
-                        compra_detalle=detalle,
-                        item=item,
-                        cantidad_inicial=cantidad_convertida,
-                        cantidad_disponible=cantidad_convertida,
-                        unidad_medida=item.unidad_medida,
-                        almacen=almacen_principal,
-                    )
-                    HistorialConsumible.objects.create(
-                        lote=lote,
-                        item=item,
-                        cantidad=cantidad_convertida,
-                        unidad_medida=item.unidad_medida,
-                        almacen=almacen_principal,
+                    detalles_con_lote.append(
+                        (
+                            detalle,
+                            self._cantidad_en_unidad_item(
+                                item,
+                                cantidad_original,
+                                unidad_medida,
+                                conversor,
+                            ),
+                        )
                     )
+                items_por_actualizar[item.pk] = item
+
+            # 5. Generar unidades físicas y lotes con su historial inicial en bloque
+            self._ingresar_unidades(compra, almacen_principal, detalles_con_unidades)
+            self._ingresar_lotes(almacen_principal, detalles_con_lote)
+
+            for item in items_por_actualizar.values():
                 actualizar_stock_item(item)
             return compra
 
+    @staticmethod
+    def _ingresar_unidades(compra, almacen, detalles):
+        unidades = []
+        for detalle in detalles:
+            series = ItemUnidad.reservar_series(detalle.item, int(detalle.cantidad))
+            unidades.extend(
+                ItemUnidad(
+                    item=detalle.item,
+                    compra_detalle=detalle,
+                    serie=serie,
+                    estado=ItemUnidad.Estado.NUEVO,
+                    almacen_actual=almacen,
+                )
+                for serie in series
+            )
+
+        unidades = ItemUnidad.objects.bulk_create(unidades, batch_size=TAMANO_LOTE_INGRESO)
+        HistorialUbicacionItem.objects.bulk_create(
+            [
+                HistorialUbicacionItem(
+                    item_unidad=unidad,
+                    almacen=almacen,
+                    estado=unidad.estado,
+                    fecha_inicio=compra.fecha,
+                )
+                for unidad in unidades
+            ],
+            batch_size=TAMANO_LOTE_INGRESO,
+        )
+        refrescar_saldos_unidades({unidad.item_id for unidad in unidades})
+
+    @staticmethod
+    def _ingresar_lotes(almacen, detalles_con_cantidad):
+        lotes = LoteConsumible.objects.bulk_create(
+            [
+                LoteConsumible(
+                    compra_detalle=detalle,
+                    item=detalle.item,
+                    cantidad_inicial=cantidad,
+                    cantidad_disponible=cantidad,
+                    unidad_medida=detalle.item.unidad_medida,
+                    almacen=almacen,
+                )
+                for detalle, cantidad in detalles_con_cantidad
+            ],
+            batch_size=TAMANO_LOTE_INGRESO,
+        )
+        HistorialConsumible.objects.bulk_create(
+            [
+                HistorialConsumible(
+                    lote=lote,
+                    item=lote.item,
+                    cantidad=lote.cantidad_inicial,
+                    unidad_medida=lote.unidad_medida,
+                    almacen=almacen,
+                )
+                for lote in lotes
+            ],
+            batch_size=TAMANO_LOTE_INGRESO,
+        )
+        refrescar_saldos_lotes([lote.id for lote in lotes])
+
+class CompraDetalleListaSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        detalles = list(data.all() if hasattr(data, "all") else data)
+        self._resolutor_tipo_cambio = obtener_resolutor_tipo_cambio(
+            self.context.get("request")
+        )
+        self._resolutor_tipo_cambio.precargar_detalles(detalles)
+        return super().to_representation(detalles)
+
+
 class CompraDetalleListSerializer(serializers.ModelSerializer):
     compra_id = serializers.IntegerField(source="compra.id", read_only=True)
 
@@ -745,71 +848,38 @@ class CompraDetalleListSerializer(serializers.ModelSerializer):
             "tipo_comprobante",
             "codigo_comprobante",
         ]
+        list_serializer_class = CompraDetalleListaSerializer
 
-    def _obtener_tipo_cambio(self, obj):
-        return TipoCambioDiario.objects.filter(fecha=obj.compra.fecha).first()
-
-    def _a_pen(self, monto, obj):
-        if obj.moneda == Compra.Moneda.PEN:
-            return monto.quantize(Decimal("0.01"))
+    def _get_resolutor_tipo_cambio(self):
+        if not hasattr(self, "_resolutor_tipo_cambio"):
+            self._resolutor_tipo_cambio = (
+                getattr(self.parent, "_resolutor_tipo_cambio", None)
+                or obtener_resolutor_tipo_cambio(self.context.get("request"))
+            )
+        return self._resolutor_tipo_cambio
 
-        tipo_cambio = self._obtener_tipo_cambio(obj)
-        if not tipo_cambio:
+    def _obtener_tipo_cambio(self, obj):
+        return self._get_resolutor_tipo_cambio().obtener(obj.compra.fecha)
+
+    def _convertir(self, monto, obj, moneda_destino):
+        convertido = self._get_resolutor_tipo_cambio().convertir(
+            monto,
+            obj.moneda,
+            moneda_destino,
+            obj.compra.fecha,
+        )
+        if convertido is None:
             return None
+        return convertido.quantize(Decimal("0.01"))
 
-        if obj.moneda == Compra.Moneda.USD:
-            if tipo_cambio.compra_usd <= 0:
-                return None
-            return (monto * tipo_cambio.compra_usd).quantize(Decimal("0.01"))
-
-        if obj.moneda == Compra.Moneda.EUR:
-            if tipo_cambio.compra_eur <= 0:
-                return None
-            return (monto * tipo_cambio.compra_eur).quantize(Decimal("0.01"))
-
-        return None
+    def _a_pen(self, monto, obj):
+        return self._convertir(monto, obj, Compra.Moneda.PEN)
 
     def _a_usd(self, monto, obj):
-        if obj.moneda == Compra.Moneda.USD:
-            return monto.quantize(Decimal("0.01"))
-
-        tipo_cambio = self._obtener_tipo_cambio(obj)
-        if not tipo_cambio:
-            return None
-
-        if obj.moneda == Compra.Moneda.PEN:
-            if tipo_cambio.compra_usd <= 0:
-                return None
-            return (monto / tipo_cambio.compra_usd).quantize(Decimal("0.01"))
-
-        if obj.moneda == Compra.Moneda.EUR:
-            if tipo_cambio.compra_eur <= 0 or tipo_cambio.compra_usd <= 0:
-                return None
-            monto_pen = monto * tipo_cambio.compra_eur
-            return (monto_pen / tipo_cambio.compra_usd).quantize(Decimal("0.01"))
-
-        return None
+        return self._convertir(monto, obj, Compra.Moneda.USD)
 
     def _a_eur(self, monto, obj):
-        if obj.moneda == Compra.Moneda.EUR:
-            return monto.quantize(Decimal("0.01"))
-
-        tipo_cambio = self._obtener_tipo_cambio(obj)
-        if not tipo_cambio:
-            return None
-
-        if obj.moneda == Compra.Moneda.PEN:
-            if tipo_cambio.compra_eur <= 0:
-                return None
-            return (monto / tipo_cambio.compra_eur).quantize(Decimal("0.01"))
-
-        if obj.moneda == Compra.Moneda.USD:
-            if tipo_cambio.compra_usd <= 0 or tipo_cambio.compra_eur <= 0:
-                return None
-            monto_pen = monto * tipo_cambio.compra_usd
-            return (monto_pen / tipo_cambio.compra_eur).quantize(Decimal("0.01"))
-
-        return None
+        return self._convertir(monto, obj, Compra.Moneda.EUR)
 
     def get_valor_total(self, obj):
         return obj.valor_unitario * obj.cantidad
@@ -1561,11 +1631,8 @@ class MovimientoConsumibleSerializer(serializers.ModelSerializer):
         return f"{historial.trabajador.nombres} {historial.trabajador.apellidos}".strip()
 
     @staticmethod
-    def _cantidad_en_unidad_item(item, cantidad, unidad_origen):
-        if unidad_origen.id == item.unidad_medida_id:
-            return Decimal(cantidad)
-        factor = obtener_factor_entre_unidades(unidad_origen, item.unidad_medida)
-        return Decimal(cantidad) * factor
+    def _cantidad_en_unidad_item(item, cantidad, unidad_origen, conversor=None):
+        return convertir_cantidad_a_unidad_item(item, cantidad, unidad_origen, conversor)
 
     def validate(self, data):
         actividad = data["actividad"]
@@ -1627,21 +1694,13 @@ class MovimientoConsumibleSerializer(serializers.ModelSerializer):
                 "La orden debe tener un técnico asignado para registrar consumibles."
             )
 
+        conversor = ConversorUnidades()
         if tecnico_contexto:
-            historiales_tecnico = HistorialConsumible.objects.filter(
-                item=item,
-                trabajador=tecnico_contexto,
-                fecha_fin__isnull=True,
-                cantidad__gt=0,
-            )
-            if proveedor:
-                historiales_tecnico = historiales_tecnico.filter(
-                    lote__compra_detalle__compra__proveedor=proveedor
-                )
-
-            stock_base = (
-                historiales_tecnico.aggregate(total=Sum("cantidad")).get("total")
-                or Decimal("0")
+            stock_base = saldo_en_ubicacion(
+                item,
+                SaldoUbicacion.TipoUbicacion.TRABAJADOR,
+                tecnico_contexto.id,
+                **({"lote__compra_detalle__compra__proveedor": proveedor} if proveedor else {}),
             )
 
             if actividad.es_planificada:
@@ -1655,13 +1714,16 @@ class MovimientoConsumibleSerializer(serializers.ModelSerializer):
                         tecnico=tecnico_contexto,
                     )
                 )
-                for movimiento in movimientos_planificados:
-                    unidad_movimiento = movimiento.unidad_medida or item.unidad_medida
-                    stock_base -= self._cantidad_en_unidad_item(
-                        item,
-                        movimiento.cantidad,
-                        unidad_movimiento,
-                    )
+                stock_base -= sum(
+                    conversor.convertir_cantidades(
+                        [
+                            (movimiento.cantidad, movimiento.unidad_medida or item.unidad_medida)
+                            for movimiento in movimientos_planificados
+                        ],
+                        item.unidad_medida,
+                    ),
+                    Decimal("0"),
+                )
                 stock_base = max(Decimal(stock_base), Decimal("0"))
         else:
             lotes = LoteConsumible.objects.filter(item=item, cantidad_disponible__gt=0)
@@ -1671,7 +1733,11 @@ class MovimientoConsumibleSerializer(serializers.ModelSerializer):
 
         stock_actual = Decimal(stock_base)
         if unidad_medida.id != item.unidad_medida_id:
-            factor = obtener_factor_entre_unidades(item.unidad_medida, unidad_medida)
+            factor = obtener_factor_entre_unidades(
+                item.unidad_medida,
+                unidad_medida,
+                conversor=conversor,
+            )
             stock_actual = Decimal(stock_actual) * factor
 
         if Decimal(cantidad) > Decimal(stock_actual):
@@ -1714,70 +1780,26 @@ class MovimientoConsumibleSerializer(serializers.ModelSerializer):
                 unidad_mov,
             )
 
-            historiales_qs = (
-                HistorialConsumible.objects
-                .select_for_update()
-                .filter(
-                    item=item,
-                    trabajador=tecnico_contexto,
-                    fecha_fin__isnull=True,
-                    cantidad__gt=0,
-                )
-                .order_by("fecha_inicio", "id")
+            historiales_asignados = HistorialConsumible.objects.filter(
+                item=item,
+                trabajador=tecnico_contexto,
+                cantidad__gt=0,
             )
             if proveedor:
-                historiales_qs = historiales_qs.filter(
+                historiales_asignados = historiales_asignados.filter(
                     lote__compra_detalle__compra__proveedor=proveedor
                 )
 
-            historiales_asignados = list(historiales_qs)
-            disponible_total = sum(Decimal(historial.cantidad) for historial in historiales_asignados)
-            if disponible_total < Decimal(cantidad_requerida):
-                raise serializers.ValidationError(
-                    "No hay suficiente cantidad asignada al técnico para registrar este consumible."
-                )
-
-            now = timezone.now()
-            restante_asignado = Decimal(cantidad_requerida)
-
-            for historial in historiales_asignados:
-                if restante_asignado <= 0:
-                    break
-
-                cantidad_historial = Decimal(historial.cantidad)
-                consumido = min(cantidad_historial, restante_asignado)
-
-                historial.cerrar(fecha=now, cantidad=consumido)
-
-                sobrante = cantidad_historial - consumido
-                if sobrante > 0:
-                    historial_restante = HistorialConsumible.objects.create(
-                        lote=historial.lote,
-                        item=historial.item,
-                        cantidad=sobrante,
-                        unidad_medida=historial.unidad_medida,
-                        trabajador=historial.trabajador,
-                        maquinaria=historial.maquinaria,
-                        almacen=historial.almacen,
-                        orden_trabajo=historial.orden_trabajo,
-                        horometro_inicio=historial.horometro_inicio,
-                    )
-                    HistorialConsumible.objects.filter(pk=historial_restante.pk).update(
-                        fecha_inicio=historial.fecha_inicio,
-                        fecha_fin=None,
-                    )
-
-                HistorialConsumible.objects.create(
-                    lote=historial.lote,
-                    item=historial.item,
-                    cantidad=consumido,
-                    unidad_medida=historial.unidad_medida,
-                    maquinaria=actividad.orden.maquinaria,
-                    orden_trabajo=actividad.orden,
-                    horometro_inicio=actividad.orden.horometro,
-                )
-
-                restante_asignado -= consumido
+            asignar_fifo(
+                historiales_asignados,
+                cantidad_requerida,
+                "No hay suficiente cantidad asignada al técnico para registrar este consumible.",
+                destino={
+                    "maquinaria": actividad.orden.maquinaria,
+                    "orden_trabajo": actividad.orden,
+                    "horometro_inicio": actividad.orden.horometro,
+                },
+            )
 
             movimiento = super().create(validated_data)
             actualizar_stock_item(item)
@@ -1786,51 +1808,11 @@ class MovimientoConsumibleSerializer(serializers.ModelSerializer):
         
     @staticmethod
     def _descontar_historial_almacen(item, lote, cantidad):
-        restante = Decimal(cantidad)
-        now = timezone.now()
-
-        while restante > 0:
-            historial_almacen = (
-                HistorialConsumible.objects
-                .select_for_update()
-                .filter(
-                    item=item,
-                    lote=lote,
-                    almacen__isnull=False,
-                    fecha_fin__isnull=True,
-                )
-                .order_by("fecha_inicio", "id")
-                .first()
-            )
-
-            if not historial_almacen:
-                raise serializers.ValidationError(
-                    "No existe historial activo en almacén para asignar este consumible"
-                )
-
-            cantidad_historial = Decimal(historial_almacen.cantidad)
-            descontar = min(cantidad_historial, restante)
-
-            historial_almacen.fecha_fin = now
-            historial_almacen.cantidad = descontar
-            historial_almacen.save(update_fields=["fecha_fin", "cantidad"])
-
-            sobrante = cantidad_historial - descontar
-            if sobrante > 0:
-                historial_restante = HistorialConsumible.objects.create(
-                    lote=historial_almacen.lote,
-                    item=historial_almacen.item,
-                    cantidad=sobrante,
-                    unidad_medida=historial_almacen.unidad_medida,
-                    almacen=historial_almacen.almacen,
-                    orden_trabajo=historial_almacen.orden_trabajo,
-                )
-                HistorialConsumible.objects.filter(pk=historial_restante.pk).update(
-                    fecha_inicio=historial_almacen.fecha_inicio,
-                    fecha_fin=None,
-                )
-
-            restante -= descontar
+        asignar_fifo(
+            HistorialConsumible.objects.filter(item=item, lote=lote, almacen__isnull=False),
+            cantidad,
+            "No existe historial activo en almacén para asignar este consumible",
+        )
 
 
 class ActividadTrabajoEvidenciaSerializer(serializers.ModelSerializer):
@@ -1923,8 +1905,13 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
     def sincronizar_horometros_relacionados(cls, orden):
         serializer = cls()
         serializer._autocompletar_horometro_inicio_historiales(orden)
-        serializer._autocompletar_horometro_fin_historiales_previos(orden)
-        serializer._autocompletar_horometro_fin_consumibles_previos(orden)
+        item_unidad_ids = serializer._autocompletar_horometro_fin_historiales_previos(orden)
+        lote_ids = serializer._autocompletar_horometro_fin_consumibles_previos(orden)
+        refrescar_vida_util_por_orden(
+            orden,
+            item_unidad_ids=item_unidad_ids,
+            lote_ids=lote_ids,
+        )
 
     def _autocompletar_horometro_inicio_historiales(self, orden):
         if orden.horometro is None:
@@ -1948,93 +1935,23 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
 
     def _autocompletar_horometro_fin_historiales_previos(self, orden):
         if orden.horometro is None or not orden.maquinaria_id:
-            return
-
-        item_ids = self._get_items_repuestos_registrados(orden)
-
-        for item_id in item_ids:
-            historial_previo = (
-                HistorialUbicacionItem.objects
-                .filter(
-                    item_unidad__item_id=item_id,
-                    orden_trabajo__isnull=False,
-                    maquinaria=orden.maquinaria,
-                    trabajador__isnull=True,
-                    almacen__isnull=True,
-                    estado=ItemUnidad.Estado.USADO,
-                    horometro_inicio__isnull=False,
-                    horometro_fin__isnull=True,
-                )
-                .exclude(
-                    Q(orden_trabajo=orden)
-                )
-                .filter(
-                    Q(orden_trabajo__fecha__lt=orden.fecha)
-                    | Q(
-                        orden_trabajo__fecha=orden.fecha,
-                        orden_trabajo_id__lt=orden.id,
-                    )
-                )
-                .order_by("-orden_trabajo__fecha", "-orden_trabajo_id", "-id")
-                .first()
-            )
+            return set()
 
-            if not historial_previo or not historial_previo.orden_trabajo_id:
-                continue
-
-            HistorialUbicacionItem.objects.filter(
-                item_unidad__item_id=item_id,
-                orden_trabajo_id=historial_previo.orden_trabajo_id,
-                maquinaria=orden.maquinaria,
-                trabajador__isnull=True,
-                almacen__isnull=True,
-                estado=ItemUnidad.Estado.USADO,
-                horometro_fin__isnull=True,
-            ).update(horometro_fin=orden.horometro)
+        return cerrar_horometro_previos(
+            HistorialUbicacionItem,
+            orden,
+            self._get_items_repuestos_registrados(orden),
+        )
 
     def _autocompletar_horometro_fin_consumibles_previos(self, orden):
         if orden.horometro is None or not orden.maquinaria_id:
-            return
-
-        item_ids = self._get_items_consumibles_registrados(orden)
+            return set()
 
-        for item_id in item_ids:
-            historial_previo = (
-                HistorialConsumible.objects
-                .filter(
-                    item_id=item_id,
-                    orden_trabajo__isnull=False,
-                    maquinaria=orden.maquinaria,
-                    trabajador__isnull=True,
-                    almacen__isnull=True,
-                    horometro_inicio__isnull=False,
-                    horometro_fin__isnull=True,
-                )
-                .exclude(
-                    Q(orden_trabajo=orden)
-                )
-                .filter(
-                    Q(orden_trabajo__fecha__lt=orden.fecha)
-                    | Q(
-                        orden_trabajo__fecha=orden.fecha,
-                        orden_trabajo_id__lt=orden.id,
-                    )
-                )
-                .order_by("-orden_trabajo__fecha", "-orden_trabajo_id", "-id")
-                .first()
-            )
-
-            if not historial_previo or not historial_previo.orden_trabajo_id:
-                continue
-
-            HistorialConsumible.objects.filter(
-                item_id=item_id,
-                orden_trabajo_id=historial_previo.orden_trabajo_id,
-                maquinaria=orden.maquinaria,
-                trabajador__isnull=True,
-                almacen__isnull=True,
-                horometro_fin__isnull=True,
-            ).update(horometro_fin=orden.horometro)
+        return cerrar_horometro_previos(
+            HistorialConsumible,
+            orden,
+            self._get_items_consumibles_registrados(orden),
+        )
 
     def create(self, validated_data):
         tecnicos = validated_data.pop("tecnicos", None)
@@ -2510,7 +2427,7 @@ class ItemDetalleSerializer(serializers.ModelSerializer):
         return data
     
     def get_stock(self, obj):
-        return actualizar_stock_item(obj)
+        return calcular_stock_item(obj)
 
 class KardexUnidadSerializer(serializers.ModelSerializer):
     item = serializers.CharField(source="item_unidad.item.nombre")
@@ -3788,7 +3705,17 @@ class KardexContableSerializer(serializers.Serializer):
     costo_unitario = serializers.DecimalField(max_digits=12, decimal_places=2)
     inventario_final_cantidad = serializers.IntegerField()
     inventario_final_costo = serializers.DecimalField(max_digits=14, decimal_places=2)
-    maquinaria = serializers.DictField(required=False, allow_null=True)
+    maquinaria = serializers.SerializerMethodField()
+
+    def get_maquinaria(self, obj):
+        maquinaria = obj.maquinaria
+        if maquinaria is None:
+            return None
+        return {
+            "id": maquinaria.id,
+            "codigo": maquinaria.codigo_maquina,
+            "nombre": maquinaria.nombre,
+        }
 
 class ItemGrupoDetalleSerializer(serializers.ModelSerializer):
     item_nombre = serializers.CharField(source="item.nombre", read_only=True)
@@ -3884,3 +3811,22 @@ class ItemGrupoSerializer(serializers.ModelSerializer):
                 ItemGrupoDetalle.objects.bulk_create(detalles)
 
         return instance
+
+
+class TareaAsincronaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TareaAsincrona
+        fields = [
+            "id",
+            "tipo",
+            "estado",
+            "progreso",
+            "mensaje",
+            "codigo_respuesta",
+            "resultado",
+            "error",
+            "created_at",
+            "iniciado_en",
+            "finalizado_en",
+        ]
+        read_only_fields = fields
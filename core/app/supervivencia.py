@@ -0,0 +1,284 @@
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Item, VidaUtilRegistro
+
+
+CACHE_VERSION_KEY = "supervivencia:version"
+CACHE_TIMEOUT = 60 * 60
+# z de la banda de confianza del 95 %.
+Z_CONFIANZA = 1.959963984540054
+
+
+def _version_cache():
+    return cache.get_or_set(CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def _clave_version_item(item_id):
+    return f"supervivencia:item:{item_id}"
+
+
+def _cache_key(version, item_id, version_item):
+    return f"supervivencia:{version}:{item_id}:{version_item}"
+
+
+def invalidar_cache_supervivencia(item_ids=None):
+    """Sin ``item_ids`` invalida todas las curvas; con ids, solo las de esos items."""
+    if item_ids is None:
+        claves = [CACHE_VERSION_KEY]
+    else:
+        claves = [_clave_version_item(item_id) for item_id in set(item_ids) if item_id]
+    for clave in claves:
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 2, timeout=None)
+
+
+def registros_supervivencia():
+    """
+    Instalaciones de repuestos en maquinaria con vida util medible: las que
+    ya salieron (falla observada) y las que siguen montadas, censuradas en el
+    horometro actual de la maquinaria.
+    """
+    return VidaUtilRegistro.objects.filter(
+        Q(horometro_fin__gt=F("horometro_inicio"))
+        | Q(
+            horometro_fin__isnull=True,
+            maquinaria__horometro_actual__gt=F("horometro_inicio"),
+        ),
+        origen=VidaUtilRegistro.Origen.REPUESTO,
+        item__tipo_insumo=Item.TipoInsumo.REPUESTO,
+        maquinaria__isnull=False,
+        orden_trabajo__isnull=False,
+        horometro_inicio__isnull=False,
+    )
+
+
+def _suma_por_grupo(valores, inicios, grupos):
+    """Suma acumulada que reinicia en cada grupo (filas ordenadas por grupo)."""
+    acumulado = np.cumsum(valores)
+    base = acumulado[inicios] - valores[inicios]
+    return acumulado - base[grupos]
+
+
+def kaplan_meier(grupos, duraciones, eventos, z=Z_CONFIANZA):
+    """
+    Kaplan-Meier con censura a derecha para todos los grupos en una pasada.
+
+    ``grupos`` (enteros), ``duraciones`` (horas) y ``eventos`` (True = falla
+    observada, False = censurado) son arrays de igual largo. Devuelve arrays
+    alineados por (grupo, tiempo de falla): grupo, tiempo, fallas, en_riesgo,
+    supervivencia y banda de confianza (Greenwood con transformacion log-log),
+    mas ``{grupo: vida_mediana}`` para los grupos que bajan de 0.5.
+    """
+    grupos = np.asarray(grupos, dtype=np.int64)
+    duraciones = np.asarray(duraciones, dtype=float)
+    eventos = np.asarray(eventos, dtype=bool)
+
+    orden = np.lexsort((duraciones, grupos))
+    grupos, duraciones, eventos = grupos[orden], duraciones[orden], eventos[orden]
+    total = len(grupos)
+    if not total:
+        vacio = np.array([], dtype=float)
+        return {
+            "grupo": np.array([], dtype=np.int64),
+            "tiempo": vacio,
+            "fallas": vacio,
+            "en_riesgo": vacio,
+            "supervivencia": vacio,
+            "ic_inferior": vacio,
+            "ic_superior": vacio,
+        }, {}
+
+    nuevo_grupo = np.r_[True, grupos[1:] != grupos[:-1]]
+    fin_grupo = np.r_[np.flatnonzero(nuevo_grupo)[1:], total]
+    indice_grupo = np.cumsum(nuevo_grupo) - 1
+
+    # Un punto por (grupo, tiempo): en riesgo son las filas del grupo desde ahi.
+    nuevo_punto = nuevo_grupo | np.r_[True, duraciones[1:] != duraciones[:-1]]
+    inicio_punto = np.flatnonzero(nuevo_punto)
+    fallas = np.add.reduceat(eventos.astype(float), inicio_punto)
+    en_riesgo = (fin_grupo[indice_grupo[inicio_punto]] - inicio_punto).astype(float)
+
+    con_falla = fallas > 0
+    grupo = grupos[inicio_punto][con_falla]
+    tiempo = duraciones[inicio_punto][con_falla]
+    fallas = fallas[con_falla]
+    en_riesgo = en_riesgo[con_falla]
+    if not len(grupo):
+        return kaplan_meier([], [], [])
+
+    nuevo = np.r_[True, grupo[1:] != grupo[:-1]]
+    inicios = np.flatnonzero(nuevo)
+    indice = np.cumsum(nuevo) - 1
+
+    factor = 1 - fallas / en_riesgo
+    agotado = factor == 0
+    log_factor = np.log(np.where(agotado, 1.0, factor))
+    supervivencia = np.exp(_suma_por_grupo(log_factor, inicios, indice))
+    supervivencia[_suma_por_grupo(agotado.astype(float), inicios, indice) > 0] = 0.0
+
+    # Greenwood; el punto donde fallan todos los que quedan no aporta varianza.
+    restantes = en_riesgo - fallas
+    greenwood = _suma_por_grupo(
+        np.divide(fallas, en_riesgo * restantes, out=np.zeros_like(fallas), where=restantes > 0),
+        inicios,
+        indice,
+    )
+    intermedio = (supervivencia > 0) & (supervivencia < 1)
+    log_s = np.log(np.where(intermedio, supervivencia, 0.5))
+    error = np.where(intermedio, np.sqrt(greenwood) / np.abs(log_s), 0.0)
+    ic_inferior = np.where(intermedio, supervivencia ** np.exp(z * error), supervivencia)
+    ic_superior = np.where(intermedio, supervivencia ** np.exp(-z * error), supervivencia)
+
+    bajo_mediana = np.flatnonzero(supervivencia <= 0.5)
+    grupos_mediana, primero = np.unique(grupo[bajo_mediana], return_index=True)
+    medianas = dict(zip(grupos_mediana.tolist(), tiempo[bajo_mediana[primero]].tolist()))
+
+    return {
+        "grupo": grupo,
+        "tiempo": tiempo,
+        "fallas": fallas,
+        "en_riesgo": en_riesgo,
+        "supervivencia": supervivencia,
+        "ic_inferior": ic_inferior,
+        "ic_superior": ic_superior,
+    }, medianas
+
+
+def _porcentaje(valor):
+    return float(round(valor * 100, 2))
+
+
+def _curvas_por_grupo(puntos, medianas, conteos):
+    curvas = {
+        grupo: {
+            "curve": [],
+            "vida_mediana": round(medianas[grupo], 2) if grupo in medianas else None,
+            "total_registros": int(total),
+            "fallas": int(fallas),
+            "censurados": int(total - fallas),
+        }
+        for grupo, (total, fallas) in conteos.items()
+    }
+    for grupo, tiempo, fallas, en_riesgo, supervivencia, inferior, superior in zip(
+        puntos["grupo"].tolist(),
+        puntos["tiempo"].tolist(),
+        puntos["fallas"].tolist(),
+        puntos["en_riesgo"].tolist(),
+        puntos["supervivencia"].tolist(),
+        puntos["ic_inferior"].tolist(),
+        puntos["ic_superior"].tolist(),
+    ):
+        curvas[grupo]["curve"].append(
+            {
+                # Horas de uso desde la instalacion hasta la falla.
+                "horometro": round(tiempo, 2),
+                "fallas": int(fallas),
+                "en_riesgo": int(en_riesgo),
+                "cantidad_restante": int(en_riesgo - fallas),
+                "porcentaje_supervivencia": _porcentaje(supervivencia),
+                "ic_inferior": _porcentaje(inferior),
+                "ic_superior": _porcentaje(superior),
+            }
+        )
+    return curvas
+
+
+def calcular_curvas(item_ids=None):
+    """
+    Curvas de los items indicados (o de todos) en una sola pasada vectorizada:
+    ``{item_id: {"general": curva, "por_maquinaria": {maquinaria_id: curva}}}``.
+    """
+    registros = registros_supervivencia()
+    if item_ids is not None:
+        registros = registros.filter(item_id__in=item_ids)
+    filas = list(
+        registros.values_list(
+            "item_id",
+            "maquinaria_id",
+            "horometro_inicio",
+            "horometro_fin",
+            "maquinaria__horometro_actual",
+        )
+    )
+    if not filas:
+        return {}
+
+    items, maquinarias, inicio, fin, actual = zip(*filas)
+    items = np.array(items, dtype=np.int64)
+    maquinarias = np.array(maquinarias, dtype=np.int64)
+    inicio = np.array(inicio, dtype=float)
+    fin = np.array(fin, dtype=float)
+    actual = np.array(actual, dtype=float)
+    eventos = ~np.isnan(fin)
+    duraciones = np.where(eventos, fin, actual) - inicio
+
+    # Grupos: primero el item completo y despues cada par item x maquinaria.
+    claves_item, grupo_item = np.unique(items, return_inverse=True)
+    pares, grupo_par = np.unique(
+        np.stack([items, maquinarias], axis=1),
+        axis=0,
+        return_inverse=True,
+    )
+    grupos = np.concatenate([grupo_item, grupo_par.ravel() + len(claves_item)])
+    eventos_dobles = np.concatenate([eventos, eventos])
+    puntos, medianas = kaplan_meier(grupos, np.concatenate([duraciones, duraciones]), eventos_dobles)
+
+    totales = np.bincount(grupos)
+    fallas = np.bincount(grupos, weights=eventos_dobles)
+    conteos = {grupo: (totales[grupo], fallas[grupo]) for grupo in range(len(totales))}
+    curvas = _curvas_por_grupo(puntos, medianas, conteos)
+
+    resultado = {
+        int(item_id): {"general": curvas[grupo], "por_maquinaria": {}}
+        for grupo, item_id in enumerate(claves_item.tolist())
+    }
+    for grupo, (item_id, maquinaria_id) in enumerate(pares.tolist(), start=len(claves_item)):
+        resultado[item_id]["por_maquinaria"][maquinaria_id] = curvas[grupo]
+    return resultado
+
+
+def curvas_supervivencia(item_ids):
+    """
+    Curvas cacheadas por item; las que faltan se calculan juntas. Cada item
+    se invalida cuando se refresca la vida util de sus unidades.
+    """
+    item_ids = {int(item_id) for item_id in item_ids}
+    if not item_ids:
+        return {}
+
+    version = _version_cache()
+    versiones = cache.get_many([_clave_version_item(item_id) for item_id in item_ids])
+    claves = {
+        item_id: _cache_key(version, item_id, versiones.get(_clave_version_item(item_id), 1))
+        for item_id in item_ids
+    }
+    guardadas = cache.get_many(list(claves.values()))
+    resultado = {
+        item_id: guardadas[clave]
+        for item_id, clave in claves.items()
+        if clave in guardadas
+    }
+
+    faltantes = item_ids - set(resultado)
+    if faltantes:
+        calculadas = calcular_curvas(faltantes)
+        # Los items sin registros tambien se cachean para no volver a consultarlos.
+        nuevas = {
+            item_id: calculadas.get(item_id) or {"general": None, "por_maquinaria": {}}
+            for item_id in faltantes
+        }
+        resultado.update(nuevas)
+        # Lo leido dentro de una transaccion podria revertirse; solo se
+        # comparte con otros requests lo confirmado.
+        if not transaction.get_connection().in_atomic_block:
+            cache.set_many(
+                {claves[item_id]: entrada for item_id, entrada in nuevas.items()},
+                timeout=CACHE_TIMEOUT,
+            )
+
+    return resultado
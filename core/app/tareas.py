@@ -0,0 +1,283 @@
+import json
+import logging
+from contextvars import ContextVar
+from datetime import timedelta
+from io import StringIO
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import TareaAsincrona
+
+
+logger = logging.getLogger(__name__)
+
+PARAMETRO_ASINCRONO = "async"
+# Comandos de gestion que se pueden encolar (ver crear_datos_masivos --encolar).
+COMANDOS_ENCOLABLES = {"crear_datos_masivos"}
+# Archivos subidos que esperan al worker; se eliminan al terminar la tarea.
+CARPETA_ARCHIVOS = "tareas"
+# Una tarea EN_PROCESO mas antigua que esto se da por perdida (worker caido).
+TIEMPO_LIMITE = timedelta(hours=1)
+
+TAREAS = {}
+# Tarea que el worker esta ejecutando; None fuera del worker.
+_tarea_actual = ContextVar("tarea_actual", default=None)
+
+
+def registrar_tarea(tipo):
+    """Registra ``funcion(tarea) -> (codigo_respuesta, resultado)`` para el tipo indicado."""
+
+    def decorador(funcion):
+        TAREAS[tipo] = funcion
+        return funcion
+
+    return decorador
+
+
+def _json(valor):
+    return json.loads(json.dumps(valor, cls=DjangoJSONEncoder))
+
+
+def encolar(tipo, parametros=None, usuario=None):
+    if tipo not in TAREAS:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+    return TareaAsincrona.objects.create(
+        tipo=tipo,
+        parametros=_json(parametros or {}),
+        creado_por=usuario if usuario and usuario.is_authenticated else None,
+    )
+
+
+def guardar_archivo_tarea(archivo):
+    """Guarda un archivo subido para la tarea; devuelve la ruta en el storage."""
+    return default_storage.save(f"{CARPETA_ARCHIVOS}/{uuid4().hex}_{archivo.name}", archivo)
+
+
+def _eliminar_archivo_tarea(tarea):
+    ruta = (tarea.parametros or {}).get("archivo")
+    if not ruta:
+        return
+    try:
+        default_storage.delete(ruta)
+    except Exception:
+        logger.exception("No se pudo eliminar el archivo de la tarea %s", tarea.pk)
+
+
+def solicita_asincrono(request):
+    return str(request.query_params.get(PARAMETRO_ASINCRONO, "")).lower() in {"1", "true", "yes", "si"}
+
+
+def respuesta_encolada(request, tarea):
+    url = request.build_absolute_uri(reverse("tareaasincrona-detail", args=[tarea.pk]))
+    return Response(
+        {"job": tarea.pk, "estado": tarea.estado, "url": url},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": url},
+    )
+
+
+def encolar_solicitud(request):
+    """
+    Encola la misma solicitud sin ``?async`` para que el worker la ejecute como
+    el usuario del request; responde 202 con el id de la tarea.
+    """
+    consulta = request.query_params.copy()
+    consulta.pop(PARAMETRO_ASINCRONO, None)
+    datos = None
+    if request.method not in SAFE_METHODS:
+        datos = request.data.dict() if hasattr(request.data, "dict") else request.data
+
+    tarea = encolar(
+        "solicitud",
+        {
+            "metodo": request.method,
+            "ruta": request.path,
+            "consulta": consulta.urlencode(),
+            "datos": datos,
+            "host": request.get_host(),
+            "seguro": request.is_secure(),
+        },
+        usuario=request.user,
+    )
+    return respuesta_encolada(request, tarea)
+
+
+def reportar_progreso(progreso, mensaje=""):
+    """
+    Actualiza el progreso de la tarea en curso; fuera del worker no hace nada.
+    Dentro de una transaccion el avance solo se ve al confirmarla.
+    """
+    tarea = _tarea_actual.get()
+    if tarea is None:
+        return
+    tarea.progreso = max(0, min(int(progreso), 100))
+    tarea.mensaje = str(mensaje)[:255]
+    TareaAsincrona.objects.filter(pk=tarea.pk).update(
+        progreso=tarea.progreso,
+        mensaje=tarea.mensaje,
+    )
+
+
+def tomar_siguiente():
+    """Reserva la tarea pendiente mas antigua; None si la cola esta vacia."""
+    while True:
+        with transaction.atomic():
+            tarea = (
+                TareaAsincrona.objects
+                .select_for_update(skip_locked=True)
+                .filter(estado=TareaAsincrona.Estado.PENDIENTE)
+                .order_by("id")
+                .first()
+            )
+            if tarea is None:
+                return None
+
+            # La actualizacion condicional evita que dos workers tomen la
+            # misma tarea en motores sin SELECT ... FOR UPDATE (SQLite).
+            inicio = timezone.now()
+            reservada = TareaAsincrona.objects.filter(
+                pk=tarea.pk,
+                estado=TareaAsincrona.Estado.PENDIENTE,
+            ).update(estado=TareaAsincrona.Estado.EN_PROCESO, iniciado_en=inicio)
+            if reservada:
+                tarea.estado = TareaAsincrona.Estado.EN_PROCESO
+                tarea.iniciado_en = inicio
+                return tarea
+
+
+def recuperar_tareas_vencidas(tiempo_limite=TIEMPO_LIMITE):
+    """
+    Marca como fallidas las tareas EN_PROCESO iniciadas hace mas de
+    ``tiempo_limite``: su worker se detuvo sin registrar el resultado. No se
+    reencolan porque una importacion a medias no siempre se puede repetir.
+    """
+    vencidas = list(
+        TareaAsincrona.objects.filter(
+            estado=TareaAsincrona.Estado.EN_PROCESO,
+            iniciado_en__lt=timezone.now() - tiempo_limite,
+        )
+    )
+    recuperadas = 0
+    for tarea in vencidas:
+        recuperadas += TareaAsincrona.objects.filter(
+            pk=tarea.pk,
+            estado=TareaAsincrona.Estado.EN_PROCESO,
+        ).update(
+            estado=TareaAsincrona.Estado.FALLIDA,
+            codigo_respuesta=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error=f"La tarea supero el tiempo limite de {tiempo_limite} sin terminar.",
+            finalizado_en=timezone.now(),
+        )
+        _eliminar_archivo_tarea(tarea)
+    return recuperadas
+
+
+def ejecutar(tarea):
+    funcion = TAREAS.get(tarea.tipo)
+    token = _tarea_actual.set(tarea)
+    try:
+        if funcion is None:
+            raise ValueError(f"Tipo de tarea desconocido: {tarea.tipo}")
+        codigo, resultado = funcion(tarea)
+    except APIException as exc:
+        # Mismo cuerpo y codigo que habria devuelto la vista sincrona.
+        codigo, resultado = exc.status_code, exc.detail
+    except Exception as exc:
+        logger.exception("Fallo la tarea %s", tarea.pk)
+        tarea.estado = TareaAsincrona.Estado.FALLIDA
+        tarea.codigo_respuesta = status.HTTP_500_INTERNAL_SERVER_ERROR
+        tarea.error = f"{type(exc).__name__}: {exc}"
+        codigo = None
+    finally:
+        _tarea_actual.reset(token)
+
+    if codigo is not None:
+        exitosa = status.is_success(codigo)
+        tarea.estado = TareaAsincrona.Estado.COMPLETADA if exitosa else TareaAsincrona.Estado.FALLIDA
+        tarea.codigo_respuesta = codigo
+        tarea.resultado = _json(resultado)
+        if exitosa:
+            tarea.progreso = 100
+
+    tarea.finalizado_en = timezone.now()
+    tarea.save(
+        update_fields=[
+            "estado",
+            "progreso",
+            "mensaje",
+            "codigo_respuesta",
+            "resultado",
+            "error",
+            "finalizado_en",
+        ]
+    )
+    _eliminar_archivo_tarea(tarea)
+    return tarea
+
+
+@registrar_tarea("solicitud")
+def _ejecutar_solicitud(tarea):
+    parametros = tarea.parametros
+    if tarea.creado_por_id is None:
+        raise ValueError("La solicitud encolada no tiene usuario.")
+
+    ruta = parametros["ruta"]
+    if parametros.get("consulta"):
+        ruta = f"{ruta}?{parametros['consulta']}"
+    construir = getattr(APIRequestFactory(), parametros["metodo"].lower())
+    extra = {
+        "HTTP_HOST": parametros.get("host") or "localhost",
+        "secure": parametros.get("seguro", False),
+    }
+    if parametros.get("datos") is None:
+        solicitud = construir(ruta, **extra)
+    else:
+        solicitud = construir(ruta, parametros["datos"], format="json", **extra)
+    force_authenticate(solicitud, user=User.objects.get(pk=tarea.creado_por_id))
+
+    reportar_progreso(0, "Procesando solicitud")
+    coincidencia = resolve(parametros["ruta"])
+    respuesta = coincidencia.func(solicitud, *coincidencia.args, **coincidencia.kwargs)
+    return respuesta.status_code, getattr(respuesta, "data", None)
+
+
+@registrar_tarea("importar_catalogo")
+def _importar_catalogo(tarea):
+    from .catalog_sync import CatalogoSyncView
+
+    vista = CatalogoSyncView()
+    parametros = tarea.parametros
+    dry_run = parametros.get("dry_run", False)
+    reportar_progreso(0, "Importando tablas")
+    if not parametros.get("archivo"):
+        summary, diff = vista._import_tables(parametros["tables"], dry_run=dry_run)
+        return status.HTTP_200_OK, vista._import_response(summary, diff, dry_run)
+
+    # Las filas se leen del archivo mientras se importan.
+    with default_storage.open(parametros["archivo"], "rb") as archivo:
+        tables = vista._parse_tables_file(archivo, parametros.get("table"))
+        summary, diff = vista._import_tables(tables, dry_run=dry_run)
+    return status.HTTP_200_OK, vista._import_response(summary, diff, dry_run)
+
+
+@registrar_tarea("comando")
+def _ejecutar_comando(tarea):
+    nombre = tarea.parametros["nombre"]
+    if nombre not in COMANDOS_ENCOLABLES:
+        raise ValueError(f"El comando {nombre} no se puede encolar.")
+
+    salida = StringIO()
+    call_command(nombre, *tarea.parametros.get("args", []), stdout=salida, **tarea.parametros.get("opciones", {}))
+    return status.HTTP_200_OK, {"salida": salida.getvalue()}
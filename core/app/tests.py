@@ -1,16 +1,27 @@
 import csv
 import json
-from datetime import date, datetime
+import tempfile
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
 
 from django.contrib.auth.models import Group, User
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.db.models import Sum
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from openpyxl import Workbook, load_workbook
-from rest_framework.test import APITestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
 from .models import (
     ActividadTrabajo,
@@ -29,11 +40,13 @@ from .models import (
     IPERC,
     Item,
     ItemUnidad,
+    KardexMovimiento,
     LoteConsumible,
     Maquinaria,
     MovimientoConsumible,
     MovimientoRepuesto,
     EncabezadoDocumentoEstandarizacion,
+    OrdenCompra,
     OrdenRequerimiento,
     OrdenRequerimientoDetalle,
     OrdenTrabajo,
@@ -41,7 +54,12 @@ from .models import (
     Proveedor,
     ReporteOrden,
     ReporteIPERC,
+    SaldoUbicacion,
+    TareaAsincrona,
+    SecuenciaCodigo,
     SecuenciaControlRiesgo,
+    TipoCambioDiario,
+    VidaUtilRegistro,
     Sistema,
     ActividadChecklist,
     Checklist,
@@ -52,9 +70,20 @@ from .models import (
     Trabajador,
     UbicacionCliente,
     UnidadMedida,
+    UnidadRelacion,
     current_local_date,
 )
+from .asignacion_lotes import asignar_fifo
+from .benchmark import comparar_con_base, medir_llamada
+from .catalog_sync import CatalogoSyncView
+from .catalogos import CACHE_VERSION_KEY as CACHE_VERSION_CATALOGOS
+from .maquinaria_resumen import calcular_centros_costos, refrescar_horometros
+from .perf import reiniciar_mediciones
 from .serializers import OrdenTrabajoSerializer
+from .saldos import saldo_en_ubicacion
+from .supervivencia import CACHE_VERSION_KEY as CACHE_VERSION_SUPERVIVENCIA
+from .unidades import ConversorUnidades
+from .views import ItemViewSet, MaquinariaViewSet
 
 
 class TimezoneConfigurationTests(APITestCase):
@@ -94,6 +123,125 @@ class EstandarizacionModelsTests(APITestCase):
         self.assertEqual(encabezado.revision_id, trabajador.id)
 
 
+class SecuenciaCodigoTests(APITestCase):
+    def test_codigos_continuan_la_numeracion_existente_desde_el_contador(self):
+        OrdenCompra.objects.create(codigo="OC-2025-12-0007")
+
+        primera = OrdenCompra.objects.create()
+        segunda = OrdenCompra.objects.create()
+
+        self.assertTrue(primera.codigo.endswith("-0008"))
+        self.assertTrue(segunda.codigo.endswith("-0009"))
+        self.assertEqual(
+            SecuenciaCodigo.objects.get(prefijo="OC", periodo="").ultimo_valor,
+            9,
+        )
+
+        reporte_iperc = ReporteIPERC.objects.create(fecha=date(2026, 5, 20))
+        self.assertEqual(reporte_iperc.codigo, "RIPERC-2026-00001")
+        self.assertEqual(
+            ReporteIPERC.objects.create(fecha=date(2026, 6, 1)).codigo,
+            "RIPERC-2026-00002",
+        )
+
+
+    def _crear_orden_trabajo(self, **extra):
+        maquinaria, _ = Maquinaria.objects.get_or_create(
+            codigo_maquina="MQ-SEC-01",
+            defaults={"nombre": "Grua", "descripcion": "", "observacion": "", "gasto": "0.00"},
+        )
+        return OrdenTrabajo.objects.create(
+            maquinaria=maquinaria,
+            prioridad="REGULAR",
+            lugar=OrdenTrabajo.Lugar.TALLER,
+            observaciones="",
+            **extra,
+        )
+
+    def test_codigo_escrito_a_mano_adelanta_el_contador(self):
+        primera = self._crear_orden_trabajo()
+        prefijo = primera.codigo_orden.rsplit("-", 1)[0]
+        self._crear_orden_trabajo(codigo_orden=f"{prefijo}-0002")
+
+        siguiente = self._crear_orden_trabajo()
+
+        self.assertEqual(siguiente.codigo_orden, f"{prefijo}-0003")
+        reporte = ReporteIPERC.objects.create(fecha=date(2026, 5, 20), codigo="RIPERC-2026-00004")
+        ReporteIPERC.objects.create(fecha=date(2026, 5, 21))
+        self.assertEqual(
+            ReporteIPERC.objects.create(fecha=date(2026, 5, 22)).codigo,
+            "RIPERC-2026-00006",
+        )
+        self.assertEqual(reporte.codigo, "RIPERC-2026-00004")
+
+    def test_importar_codigo_de_catalogo_adelanta_el_contador(self):
+        orden = self._crear_orden_trabajo()
+        prefijo = orden.codigo_orden.rsplit("-", 1)[0]
+
+        CatalogoSyncView()._import_tables(
+            {
+                "ordenes_trabajo": [
+                    {
+                        "id": orden.id,
+                        "codigo_orden": f"{prefijo}-0009",
+                        "maquinaria": orden.maquinaria_id,
+                        "fecha": orden.fecha.isoformat(),
+                        "prioridad": orden.prioridad,
+                        "lugar": orden.lugar,
+                        "observaciones": "",
+                    }
+                ]
+            }
+        )
+
+        self.assertEqual(self._crear_orden_trabajo().codigo_orden, f"{prefijo}-0010")
+
+
+class BenchmarkComparacionTests(APITestCase):
+    def test_comparar_con_base_detecta_regresiones_de_tiempo_consultas_y_memoria(self):
+        def reporte(mediana_ms, consultas, memoria_kb, caliente_ms=10):
+            return {
+                "escalas": {
+                    "1x": {
+                        "llamadas": {
+                            "ordenes_trabajo": {
+                                "status": 200,
+                                "mediana_ms": mediana_ms,
+                                "caliente_ms": caliente_ms,
+                                "consultas": consultas,
+                                "pico_memoria_kb": memoria_kb,
+                            }
+                        }
+                    }
+                }
+            }
+
+        base = reporte(100, 10, 1000)
+
+        self.assertEqual(comparar_con_base(reporte(110, 10, 1100), base), [])
+        regresiones = comparar_con_base(reporte(150, 12, 1500), base)
+        self.assertEqual(len(regresiones), 3)
+        self.assertTrue(all(r.startswith("[1x] ordenes_trabajo") for r in regresiones))
+        # Con cache caliente el tiempo frio no cambia, pero la lectura cacheada si.
+        regresiones = comparar_con_base(reporte(100, 10, 1000, caliente_ms=40), base)
+        self.assertEqual(regresiones, ["[1x] ordenes_trabajo: 10 ms -> 40 ms en caliente"])
+
+    def test_medir_llamada_vacia_la_cache_antes_de_cada_medicion_en_frio(self):
+        lecturas = []
+
+        def ejecutar(client, llamada, datos):
+            lecturas.append(cache.get("benchmark:marca"))
+            cache.set("benchmark:marca", True)
+            return SimpleNamespace(status_code=200), b""
+
+        with patch("app.benchmark._ejecutar", ejecutar):
+            medicion = medir_llamada(self.client, {"nombre": "prueba", "ruta": "/api/prueba/"}, repeticiones=2)
+
+        # Ejecucion contada + 2 en frio sin marca; luego 2 en caliente con ella.
+        self.assertEqual(lecturas, [None, None, None, True, True])
+        self.assertIn("caliente_ms", medicion)
+
+
 class TareaPorEstandarizarViewSetTests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -660,8 +808,8 @@ class ChecklistViewSetTests(APITestCase):
         self.assertEqual(response.data[0]["maquinaria_nombre"], "MQ-CHK-01 - Compresor principal")
         self.assertEqual(response.data[0]["lugar_nombre"], "Patio norte")
         self.assertEqual(respuestas_response.status_code, 200, respuestas_response.data)
-        self.assertEqual(len(respuestas_response.data), 1)
-        self.assertTrue(respuestas_response.data[0]["vb"])
+        self.assertEqual(len(respuestas_response.data["results"]), 1)
+        self.assertTrue(respuestas_response.data["results"][0]["vb"])
 
 
 class ReporteIPERCViewSetTests(APITestCase):
@@ -945,7 +1093,8 @@ class CatalogoSyncViewTests(APITestCase):
         response = self.client.get("/api/catalogo-sync/")
 
         self.assertEqual(response.status_code, 200)
-        payload = response.json()
+        self.assertTrue(response.streaming)
+        payload = json.loads(response.getvalue())
 
         self.assertEqual(payload["meta"]["record_counts"]["maquinarias"], 1)
         self.assertEqual(payload["tables"]["maquinarias"][0]["id"], self.maquinaria.id)
@@ -953,6 +1102,19 @@ class CatalogoSyncViewTests(APITestCase):
         self.assertEqual(payload["tables"]["items"][0]["dimension"], self.dimension.id)
         self.assertEqual(payload["tables"]["items"][0]["unidad_medida"], self.unidad.id)
 
+    def test_export_specific_table_in_json_streams_rows(self):
+        response = self.client.get(
+            "/api/catalogo-sync/",
+            {"table": "clientes", "file_format": "json"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        payload = json.loads(response.getvalue())
+        self.assertEqual(payload["table"], "clientes")
+        self.assertEqual(payload["fields"], ["id", "nombre", "ruc"])
+        self.assertEqual(payload["rows"][0]["nombre"], "Cliente Uno")
+
     def test_export_specific_table_in_csv_and_xlsx(self):
         csv_response = self.client.get(
             "/api/catalogo-sync/",
@@ -960,7 +1122,7 @@ class CatalogoSyncViewTests(APITestCase):
         )
 
         self.assertEqual(csv_response.status_code, 200)
-        csv_text = csv_response.content.decode("utf-8-sig")
+        csv_text = csv_response.getvalue().decode("utf-8-sig")
         csv_rows = list(csv.DictReader(StringIO(csv_text)))
         self.assertEqual(csv_rows[0]["codigo_maquina"], "MQ-01")
         self.assertEqual(csv_rows[0]["nombre"], "Excavadora")
@@ -971,7 +1133,7 @@ class CatalogoSyncViewTests(APITestCase):
         )
 
         self.assertEqual(xlsx_response.status_code, 200)
-        workbook = load_workbook(filename=BytesIO(xlsx_response.content))
+        workbook = load_workbook(filename=BytesIO(xlsx_response.getvalue()))
         worksheet = workbook.active
 
         self.assertEqual(worksheet["A1"].value, "id")
@@ -1130,6 +1292,48 @@ class CatalogoSyncViewTests(APITestCase):
         self.assertTrue(UnidadMedida.objects.filter(pk=2).exists())
         self.assertTrue(Item.objects.filter(pk=2).exists())
 
+    def test_import_items_in_bulk_with_constant_queries_and_row_errors(self):
+        def items_payload(cantidad):
+            return {
+                "tables": {
+                    "items": [
+                        {
+                            "id": indice,
+                            "codigo": f"ITM-{indice:03d}",
+                            "nombre": f"Item {indice}",
+                            "tipo_insumo": "CONSUMIBLE",
+                            "dimension": 1,
+                            "unidad_medida": 1,
+                        }
+                        for indice in range(1, cantidad + 1)
+                    ]
+                }
+            }
+
+        self.client.post("/api/catalogo-sync/", items_payload(1), format="json")
+        with CaptureQueriesContext(connection) as pocas:
+            response = self.client.post("/api/catalogo-sync/", items_payload(5), format="json")
+        self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as muchas:
+            response = self.client.post("/api/catalogo-sync/", items_payload(60), format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["summary"]["created"], 55)
+        self.assertEqual(response.data["summary"]["unchanged"], 5)
+        self.assertEqual(len(muchas), len(pocas))
+        self.assertEqual(Item.objects.count(), 60)
+
+        payload = items_payload(2)
+        payload["tables"]["items"][1]["codigo"] = "ITM-001"
+        response = self.client.post("/api/catalogo-sync/", payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["row"], "2")
+        self.assertEqual(response.json()["id"], "2")
+        self.assertIn("codigo", response.json()["errors"])
+        self.assertEqual(Item.objects.get(pk=2).codigo, "ITM-002")
+
     def test_import_selected_table_from_csv(self):
         csv_content = (
             "id,codigo_maquina,nombre,descripcion,observacion,gasto\n"
@@ -1159,6 +1363,129 @@ class CatalogoSyncViewTests(APITestCase):
         self.assertEqual(str(self.maquinaria.gasto), "22.50")
         self.assertTrue(Maquinaria.objects.filter(pk=2).exists())
 
+    def test_import_dry_run_returns_diff_without_writing(self):
+        csv_content = (
+            "id,codigo_maquina,nombre,descripcion,observacion,gasto\n"
+            "1,MQ-01,Excavadora 320,Actualizada,Operativa,22.50\n"
+            + "".join(
+                f"{indice},MQ-{indice:02d},Equipo {indice},,,0.00\n"
+                for indice in range(2, 6)
+            )
+        )
+        upload = SimpleUploadedFile(
+            "maquinarias.csv",
+            csv_content.encode("utf-8"),
+            content_type="text/csv",
+        )
+
+        response = self.client.post(
+            "/api/catalogo-sync/?dry_run=1",
+            {"table": "maquinarias", "file": upload},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["dry_run"])
+        self.assertEqual(response.data["summary"]["created"], 4)
+        self.assertEqual(
+            response.data["diff"]["maquinarias"],
+            {"created": [[2, 5]], "updated": [1], "unchanged": []},
+        )
+
+        self.maquinaria.refresh_from_db()
+        self.assertEqual(self.maquinaria.nombre, "Excavadora")
+        self.assertEqual(Maquinaria.objects.count(), 1)
+
+    def test_import_asincrono_guarda_el_archivo_y_el_worker_lo_lee(self):
+        csv_content = (
+            "id,codigo_maquina,nombre,descripcion,observacion,gasto\n"
+            "1,MQ-01,Excavadora 320,Actualizada,Operativa,22.50\n"
+            "2,MQ-02,Motoniveladora,,,0.00\n"
+        )
+        upload = SimpleUploadedFile("maquinarias.csv", csv_content.encode("utf-8"), content_type="text/csv")
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            response = self.client.post(
+                "/api/catalogo-sync/?async=1",
+                {"table": "maquinarias", "file": upload},
+                format="multipart",
+            )
+            self.assertEqual(response.status_code, 202, response.data)
+            tarea = TareaAsincrona.objects.get(pk=response.data["job"])
+            self.assertNotIn("tables", tarea.parametros)
+            self.assertTrue(default_storage.exists(tarea.parametros["archivo"]))
+
+            call_command("procesar_tareas", "--una-vez", stdout=StringIO())
+
+            tarea.refresh_from_db()
+            self.assertEqual(tarea.estado, TareaAsincrona.Estado.COMPLETADA, tarea.error)
+            self.assertEqual(tarea.resultado["summary"]["created"], 1)
+            self.assertEqual(tarea.resultado["summary"]["updated"], 1)
+            self.assertFalse(default_storage.exists(tarea.parametros["archivo"]))
+
+        self.maquinaria.refresh_from_db()
+        self.assertEqual(self.maquinaria.nombre, "Excavadora 320")
+
+    def test_worker_marca_fallidas_las_tareas_en_proceso_vencidas(self):
+        vencida = TareaAsincrona.objects.create(
+            tipo="importar_catalogo",
+            estado=TareaAsincrona.Estado.EN_PROCESO,
+            iniciado_en=timezone.now() - timedelta(hours=2),
+        )
+        reciente = TareaAsincrona.objects.create(
+            tipo="importar_catalogo",
+            estado=TareaAsincrona.Estado.EN_PROCESO,
+            iniciado_en=timezone.now() - timedelta(minutes=5),
+        )
+
+        salida = StringIO()
+        call_command("procesar_tareas", "--una-vez", "--tiempo-limite", "60", stdout=salida)
+
+        self.assertIn("Tareas vencidas marcadas como fallidas: 1.", salida.getvalue())
+        vencida.refresh_from_db()
+        reciente.refresh_from_db()
+        self.assertEqual(vencida.estado, TareaAsincrona.Estado.FALLIDA)
+        self.assertEqual(vencida.codigo_respuesta, 500)
+        self.assertIsNotNone(vencida.finalizado_en)
+        self.assertEqual(reciente.estado, TareaAsincrona.Estado.EN_PROCESO)
+
+    def test_catalogos_responde_304_y_se_invalida_al_importar(self):
+        response = self.client.get("/api/catalogos/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        response = self.client.get("/api/catalogos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        version = cache.get(CACHE_VERSION_CATALOGOS)
+        upload = SimpleUploadedFile(
+            "dimensiones.csv",
+            b"id,codigo,nombre,descripcion,activo\n1,LONG,Longitud lineal,Base,1\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(
+            "/api/catalogo-sync/",
+            {"table": "dimensiones", "file": upload},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertGreater(cache.get(CACHE_VERSION_CATALOGOS), version)
+
+        response = self.client.get("/api/catalogos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["dimensiones"][0]["nombre"], "Longitud lineal")
+
+        response = self.client.get("/api/dimensiones/")
+        etag = response["ETag"]
+        self.assertEqual(self.client.get("/api/dimensiones/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Dimension.objects.create(codigo="MASA", nombre="Masa", descripcion="", activo=True)
+        response = self.client.get("/api/dimensiones/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
     def test_import_selected_table_from_xlsx(self):
         workbook = Workbook()
         worksheet = workbook.active
@@ -1216,6 +1543,108 @@ class ItemYCompraLegacyTests(APITestCase):
             activo=True,
         )
 
+    def test_centro_costos_sigue_a_aperturas_cierres_bajas_y_reversion_de_compra(self):
+        item = Item.objects.create(
+            codigo="REP-CECO-1",
+            nombre="Alternador",
+            tipo_insumo=Item.TipoInsumo.REPUESTO,
+            dimension=self.dimension_unidad,
+            unidad_medida=self.unidad_cantidad,
+        )
+        response = self.client.post(
+            "/api/compras/batch/",
+            {
+                "fecha": "2026-05-11",
+                "moneda": "PEN",
+                "items": [
+                    {
+                        "item": item.id,
+                        "cantidad": 2,
+                        "unidad_medida": self.unidad_cantidad.id,
+                        "tipo_registro": "VALOR_UNITARIO",
+                        "monto": "100.00",
+                        "moneda": "PEN",
+                    }
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        maquinaria = Maquinaria.objects.create(
+            codigo_maquina="MQ-CECO-01",
+            nombre="Volquete",
+            descripcion="",
+            observacion="",
+            gasto="0.00",
+        )
+        primera, segunda = ItemUnidad.objects.filter(item=item).order_by("id")
+        almacen = segunda.almacen_actual
+
+        def centro_costos():
+            guardado = Maquinaria.objects.get(pk=maquinaria.pk).centro_costos_pen
+            self.assertEqual(guardado, calcular_centros_costos([maquinaria.id])[maquinaria.id])
+            return guardado
+
+        montado = HistorialUbicacionItem.objects.create(
+            item_unidad=primera, maquinaria=maquinaria, estado=ItemUnidad.Estado.USADO
+        )
+        costo_unidad = centro_costos()
+        self.assertGreater(costo_unidad, 0)
+
+        HistorialUbicacionItem.objects.create(item_unidad=segunda, maquinaria=maquinaria, estado=ItemUnidad.Estado.USADO)
+        self.assertEqual(centro_costos(), costo_unidad * 2)
+        HistorialUbicacionItem.objects.create(item_unidad=segunda, almacen=almacen, estado=ItemUnidad.Estado.USADO)
+        self.assertEqual(centro_costos(), costo_unidad)
+
+        montado.delete()
+        self.assertEqual(centro_costos(), 0)
+
+        HistorialUbicacionItem.objects.create(item_unidad=primera, maquinaria=maquinaria, estado=ItemUnidad.Estado.USADO)
+        self.assertEqual(centro_costos(), costo_unidad)
+        response = self.client.post(
+            "/api/compras/eliminar-registro/",
+            {"compra_id": Compra.objects.get(detalles__item=item).id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(centro_costos(), 0)
+
+    def test_conversor_unidades_compone_factores_y_convierte_en_bloque(self):
+        volumen = Dimension.objects.create(codigo="VOL-CONV", nombre="Volumen")
+        galon, litro, mililitro = (
+            UnidadMedida.objects.create(nombre=nombre, dimension=volumen)
+            for nombre in ("GALON", "LITRO", "MILILITRO")
+        )
+        UnidadRelacion.objects.create(
+            dimension=volumen,
+            unidad_base=galon,
+            unidad_relacionada=litro,
+            factor=Decimal("3.785411784"),
+        )
+        relacion_ml = UnidadRelacion.objects.create(
+            dimension=volumen,
+            unidad_base=litro,
+            unidad_relacionada=mililitro,
+            factor=Decimal("1000"),
+        )
+
+        conversor = ConversorUnidades()
+        with self.assertNumQueries(1):
+            self.assertEqual(conversor.factor(galon, mililitro), Decimal("3785.411784"))
+            self.assertEqual(
+                conversor.convertir_cantidades(
+                    [(Decimal("2"), galon), (Decimal("500"), mililitro), (Decimal("1.5"), litro)],
+                    litro,
+                ),
+                [Decimal("7.570823568"), Decimal("0.500000"), Decimal("1.5")],
+            )
+        with self.assertRaises(ValidationError):
+            conversor.factor(galon, self.unidad_cantidad)
+
+        relacion_ml.factor = Decimal("100")
+        relacion_ml.save()
+        self.assertEqual(ConversorUnidades().factor(galon, mililitro), Decimal("378.5411784"))
+
     def test_crear_herramienta_asigna_unidad_por_defecto(self):
         response = self.client.post(
             "/api/items/",
@@ -1268,6 +1697,285 @@ class ItemYCompraLegacyTests(APITestCase):
         self.assertEqual(item.unidad_medida_id, self.unidad_cantidad.id)
         self.assertEqual(item.unidades.count(), 2)
 
+    def test_compra_batch_ingresa_unidades_y_lotes_en_bloque(self):
+        repuesto = Item.objects.create(
+            codigo="REP-BLK-001",
+            nombre="Filtro de aceite",
+            tipo_insumo=Item.TipoInsumo.REPUESTO,
+            dimension=self.dimension_unidad,
+            unidad_medida=self.unidad_cantidad,
+            ultimo_correlativo=4,
+        )
+        consumible = Item.objects.create(
+            codigo="CON-BLK-001",
+            nombre="Grasa",
+            tipo_insumo=Item.TipoInsumo.CONSUMIBLE,
+            dimension=self.dimension_unidad,
+            unidad_medida=self.unidad_cantidad,
+        )
+
+        def registrar_compra(cantidad):
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.post(
+                    "/api/compras/batch/",
+                    {
+                        "fecha": "2026-05-11",
+                        "moneda": "PEN",
+                        "items": [
+                            {
+                                "item": item.id,
+                                "cantidad": cantidad,
+                                "unidad_medida": self.unidad_cantidad.id,
+                                "tipo_registro": "VALOR_UNITARIO",
+                                "monto": "10.00",
+                                "moneda": "PEN",
+                            }
+                            for item in (repuesto, consumible)
+                        ],
+                    },
+                    format="json",
+                )
+            self.assertEqual(response.status_code, 201, response.data)
+            return len(consultas)
+
+        registrar_compra(1)
+        consultas_pocas_unidades = registrar_compra(3)
+        consultas_muchas_unidades = registrar_compra(40)
+
+        self.assertEqual(consultas_pocas_unidades, consultas_muchas_unidades)
+        repuesto.refresh_from_db()
+        consumible.refresh_from_db()
+        self.assertEqual(repuesto.ultimo_correlativo, 48)
+        self.assertEqual(repuesto.stock, Decimal("44"))
+        self.assertEqual(consumible.stock, Decimal("44"))
+        series = list(repuesto.unidades.order_by("serie").values_list("serie", flat=True))
+        self.assertEqual(series[0], "REP-BLK-001-00005")
+        self.assertEqual(series[-1], "REP-BLK-001-00048")
+        self.assertFalse(repuesto.unidades.filter(almacen_actual__isnull=True).exists())
+        self.assertEqual(
+            HistorialUbicacionItem.objects.filter(item_unidad__item=repuesto).count(),
+            44,
+        )
+        self.assertEqual(HistorialConsumible.objects.filter(item=consumible).count(), 3)
+
+    @override_settings(PERF_INSTRUMENTACION=True)
+    def test_presupuesto_consultas_y_resumen_de_rendimiento(self):
+        reiniciar_mediciones()
+        items = [
+            Item.objects.create(
+                codigo=f"REP-PERF-{indice}",
+                nombre=f"Repuesto {indice}",
+                tipo_insumo=Item.TipoInsumo.REPUESTO,
+                dimension=self.dimension_unidad,
+                unidad_medida=self.unidad_cantidad,
+            )
+            for indice in range(1, 6)
+        ]
+        response = self.client.post(
+            "/api/compras/batch/",
+            {
+                "fecha": "2026-05-11",
+                "moneda": "PEN",
+                "items": [
+                    {
+                        "item": item.id,
+                        "cantidad": 3,
+                        "unidad_medida": self.unidad_cantidad.id,
+                        "tipo_registro": "VALOR_UNITARIO",
+                        "monto": "10.00",
+                        "moneda": "PEN",
+                    }
+                    for item in items
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+        for vista in ("general", "almacen", "tecnicos", "maquinaria"):
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get("/api/items/", {"vista": vista})
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertLessEqual(len(consultas), ItemViewSet.presupuesto_consultas["list"])
+            self.assertIn("db;dur=", response["Server-Timing"])
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get("/api/maquinarias/gestion-matriz/")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertLessEqual(
+            len(consultas),
+            MaquinariaViewSet.presupuesto_consultas["gestion_matriz"],
+        )
+
+        resumen = self.client.get("/api/_perf/")
+        self.assertEqual(resumen.status_code, 200, resumen.data)
+        listado = resumen.data["vistas"]["ItemViewSet.list"]
+        self.assertEqual(listado["muestras"], 4)
+        self.assertEqual(listado["excesos_presupuesto"], 0)
+        self.assertIn("p95", listado["consultas"])
+        self.assertGreater(listado["serializacion_ms"]["p99"], 0)
+
+    def test_listado_items_calcula_stock_sin_escribir_en_item(self):
+        items = [
+            Item.objects.create(
+                codigo=f"TOOL-STK-{indice}",
+                nombre=f"Herramienta {indice}",
+                tipo_insumo=Item.TipoInsumo.HERRAMIENTA,
+                dimension=self.dimension_unidad,
+                unidad_medida=self.unidad_cantidad,
+            )
+            for indice in range(1, 4)
+        ]
+        response = self.client.post(
+            "/api/compras/batch/",
+            {
+                "fecha": "2026-05-11",
+                "moneda": "PEN",
+                "items": [
+                    {
+                        "item": item.id,
+                        "cantidad": indice,
+                        "unidad_medida": self.unidad_cantidad.id,
+                        "tipo_registro": "VALOR_UNITARIO",
+                        "monto": "10.00",
+                        "moneda": "PEN",
+                    }
+                    for indice, item in enumerate(items, start=1)
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        Item.objects.update(stock=Decimal("99"))
+
+        for vista in ("general", "almacen", "tecnicos"):
+            response = self.client.get("/api/items/", {"vista": vista})
+            self.assertEqual(response.status_code, 200, response.data)
+
+            stock_por_codigo = {
+                fila["codigo"]: (Decimal(str(fila["stock"])), fila["unidades_disponibles"])
+                for fila in response.data["results"]
+            }
+            for indice, item in enumerate(items, start=1):
+                esperado = indice if vista != "tecnicos" else 0
+                self.assertEqual(
+                    stock_por_codigo.get(item.codigo, (Decimal("0"), 0)),
+                    (Decimal(esperado), esperado),
+                )
+
+        self.assertFalse(Item.objects.exclude(stock=Decimal("99")).exists())
+
+    def test_listado_compras_convierte_con_tipo_cambio_actualizado(self):
+        tipo_cambio = TipoCambioDiario.objects.create(
+            fecha=date(2026, 5, 11),
+            compra_usd=Decimal("3.5000"),
+            venta_usd=Decimal("3.6000"),
+            compra_eur=Decimal("4.0000"),
+            venta_eur=Decimal("4.1000"),
+        )
+        compra = Compra.objects.create(fecha=date(2026, 5, 11), moneda="USD")
+        for indice, valor_unitario in enumerate(("10.00", "20.00"), start=1):
+            item = Item.objects.create(
+                codigo=f"TOOL-USD-{indice}",
+                nombre=f"Torquimetro {indice}",
+                tipo_insumo=Item.TipoInsumo.HERRAMIENTA,
+                dimension=self.dimension_unidad,
+                unidad_medida=self.unidad_cantidad,
+            )
+            CompraDetalle.objects.create(
+                compra=compra,
+                item=item,
+                cantidad=1,
+                unidad_medida=self.unidad_cantidad,
+                moneda="USD",
+                valor_unitario=Decimal(valor_unitario),
+            )
+
+        response = self.client.get("/api/compras/")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            sorted(Decimal(str(fila["valor_unitario_eur"])) for fila in response.data["results"]),
+            [Decimal("8.75"), Decimal("17.50")],
+        )
+
+        tipo_cambio.compra_usd = Decimal("4.0000")
+        tipo_cambio.save()
+
+        response = self.client.get("/api/compras/")
+        self.assertEqual(
+            sorted(Decimal(str(fila["valor_unitario_eur"])) for fila in response.data["results"]),
+            [Decimal("10.00"), Decimal("20.00")],
+        )
+
+    def test_kardex_persistido_recalcula_desde_compra_retroactiva(self):
+        item = Item.objects.create(
+            codigo="TOOL-KDX-001",
+            nombre="Gata hidraulica",
+            tipo_insumo=Item.TipoInsumo.HERRAMIENTA,
+            dimension=self.dimension_unidad,
+            unidad_medida=self.unidad_cantidad,
+        )
+
+        def comprar(fecha, codigo, cantidad, valor_unitario):
+            compra = Compra.objects.create(
+                fecha=fecha,
+                tipo_comprobante="FACTURA",
+                codigo_comprobante=codigo,
+            )
+            CompraDetalle.objects.create(
+                compra=compra,
+                item=item,
+                cantidad=cantidad,
+                unidad_medida=self.unidad_cantidad,
+                valor_unitario=Decimal(valor_unitario),
+            )
+
+        comprar(date(2026, 5, 10), "F-10", 2, "10.00")
+        comprar(date(2026, 5, 20), "F-20", 2, "20.00")
+        primera = KardexMovimiento.objects.get(item=item, posicion=1)
+
+        comprar(date(2026, 5, 15), "F-15", 1, "40.00")
+
+        filas = list(KardexMovimiento.objects.filter(item=item).order_by("posicion"))
+        self.assertEqual([fila.registro for fila in filas], ["FACTURA F-10", "FACTURA F-15", "FACTURA F-20"])
+        self.assertEqual(filas[0].pk, primera.pk)
+        self.assertEqual(filas[2].inventario_inicial, Decimal("3"))
+        self.assertEqual(filas[2].inventario_final_cantidad, Decimal("5"))
+        self.assertEqual(filas[2].inventario_final_costo, Decimal("118.000000"))
+
+        response = self.client.get(
+            f"/api/items/{item.id}/kardex_contable/",
+            {"fecha_desde": "2026-05-12", "page_size": 1},
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["results"][0]["registro"], "FACTURA F-15")
+        self.assertEqual(response.data["results"][0]["inventario_inicial"], 2)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"][0]["registro"], "FACTURA F-20")
+        self.assertEqual(response.data["results"][0]["inventario_final_costo"], "118.00")
+        self.assertIsNone(response.data["next"])
+
+        otro_item = Item.objects.create(
+            codigo="TOOL-KDX-002",
+            nombre="Torquimetro",
+            tipo_insumo=Item.TipoInsumo.HERRAMIENTA,
+            dimension=self.dimension_unidad,
+            unidad_medida=self.unidad_cantidad,
+        )
+        detalle = CompraDetalle.objects.get(compra__codigo_comprobante="F-15")
+        detalle.item = otro_item
+        detalle.save()
+
+        self.assertEqual(
+            list(KardexMovimiento.objects.filter(item=item).order_by("posicion").values_list("registro", flat=True)),
+            ["FACTURA F-10", "FACTURA F-20"],
+        )
+        self.assertEqual(
+            list(KardexMovimiento.objects.filter(item=otro_item).values_list("registro", flat=True)),
+            ["FACTURA F-15"],
+        )
+
 
 class MaquinariaHorometroActualTests(APITestCase):
     def setUp(self):
@@ -1354,6 +2062,84 @@ class MaquinariaHorometroActualTests(APITestCase):
         self.assertEqual(Decimal(str(response.data["horometro_actual"])), Decimal("222.25"))
         self.assertEqual(response.data["horometro_fuente"], "MANUAL")
 
+    def test_resumen_horometro_persistido_y_listado_con_consultas_constantes(self):
+        orden = self._crear_orden(fecha=date(2026, 5, 10), horometro=Decimal("120.00"))
+        self.maquinaria.refresh_from_db()
+        self.assertEqual(self.maquinaria.horometro_actual, Decimal("120.00"))
+        self.assertEqual(self.maquinaria.horometro_fuente, "ORDEN_TRABAJO")
+        self.assertEqual(self.maquinaria.fecha_ultimo_horometro, date(2026, 5, 10))
+
+        orden.delete()
+        self.maquinaria.refresh_from_db()
+        self.assertIsNone(self.maquinaria.horometro_actual)
+        salida = StringIO()
+        call_command("verificar_resumen_maquinaria", stdout=salida)
+        self.assertIn("consistente", salida.getvalue())
+
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get("/api/maquinarias/")
+        for indice in range(5):
+            maquinaria = Maquinaria.objects.create(
+                codigo_maquina=f"MQ-HM-EXTRA-{indice}",
+                nombre="Extra",
+                descripcion="",
+                observacion="",
+                gasto="0.00",
+            )
+            OrdenTrabajo.objects.create(
+                maquinaria=maquinaria,
+                fecha=date(2026, 5, 1 + indice),
+                horometro=Decimal("10.00"),
+                prioridad="REGULAR",
+                lugar=OrdenTrabajo.Lugar.TALLER,
+                observaciones="",
+            )
+        with CaptureQueriesContext(connection) as muchas:
+            response = self.client.get("/api/maquinarias/")
+
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(len(pocas), len(muchas))
+
+    def test_listado_ordenes_pagina_por_cursor_y_omite_campos(self):
+        ordenes = [
+            self._crear_orden(fecha=date(2026, 5, dia), horometro=Decimal(dia * 10))
+            for dia in (10, 11, 12)
+        ]
+
+        response = self.client.get("/api/trabajos/", {"page_size": 2, "omit": "actividades"})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertNotIn("actividades", response.data["results"][0])
+        self.assertIsNotNone(response.data["next"])
+
+        siguiente = self.client.get(response.data["next"])
+        self.assertEqual(siguiente.status_code, 200, siguiente.data)
+        ids = [orden["id"] for orden in response.data["results"] + siguiente.data["results"]]
+        self.assertCountEqual(ids, [orden.id for orden in ordenes])
+        self.assertIsNone(siguiente.data["next"])
+
+        # Sin cursor ni page_size el listado igual se pagina (paginacion_obligatoria).
+        sin_parametros = self.client.get("/api/trabajos/")
+        self.assertEqual(len(sin_parametros.data["results"]), 3)
+        self.assertIsNone(sin_parametros.data["next"])
+        self.assertIn("actividades", sin_parametros.data["results"][0])
+
+        ActividadTrabajo.objects.create(
+            orden=ordenes[0],
+            tipo_actividad=ActividadTrabajo.TipoActividad.REVISION,
+            descripcion="Revision",
+            es_planificada=False,
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get("/api/trabajos/", {"omit": "actividades.evidencias"})
+        actividad = next(
+            orden for orden in response.data["results"] if orden["id"] == ordenes[0].id
+        )["actividades"][0]
+        self.assertEqual(actividad["tipo_actividad"], ActividadTrabajo.TipoActividad.REVISION)
+        self.assertNotIn("evidencias", actividad)
+        self.assertFalse(any("evidencia" in consulta["sql"] for consulta in consultas.captured_queries))
+
 
 class OrdenTrabajoHistorialConsumibleHorometroTests(APITestCase):
     def setUp(self):
@@ -1835,6 +2621,310 @@ class OrdenTrabajoHistorialRepuestoHorometroTests(APITestCase):
         self.assertEqual(historial_anterior.horometro_fin, Decimal("260.00"))
         self.assertEqual(historial_actual.horometro_inicio, Decimal("260.00"))
 
+    def test_recalcular_horometros_reencadena_ot_retroactiva(self):
+        historiales = {}
+        # La OT del dia 7 se registra al final, con fecha anterior a la del dia 10.
+        for dia, horometro in ((5, "100.00"), (10, "300.00"), (7, "200.00")):
+            orden = self._crear_orden(date(2026, 5, dia), horometro=Decimal(horometro))
+            unidad = self._crear_unidad_asignada_a_tecnico()
+            response = self.client.post(
+                "/api/movimientos-repuesto/",
+                {
+                    "actividad": self._crear_actividad_registrada(orden).id,
+                    "item_unidad": unidad.id,
+                    "tecnico": self.trabajador.id,
+                },
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+            historiales[dia] = HistorialUbicacionItem.objects.get(
+                orden_trabajo=orden,
+                item_unidad=unidad,
+            )
+
+        historiales[5].refresh_from_db()
+        self.assertEqual(historiales[5].horometro_fin, Decimal("300.00"))
+
+        call_command(
+            "recalcular_horometros",
+            "--maquinaria",
+            str(self.maquinaria.id),
+            stdout=StringIO(),
+        )
+
+        for historial in historiales.values():
+            historial.refresh_from_db()
+        self.assertEqual(historiales[5].horometro_fin, Decimal("200.00"))
+        self.assertEqual(historiales[7].horometro_fin, Decimal("300.00"))
+        self.assertIsNone(historiales[10].horometro_fin)
+
+    def test_tableros_de_gestion_usan_vida_util_materializada(self):
+        unidad_anterior = self._crear_unidad_asignada_a_tecnico()
+        unidad_actual = self._crear_unidad_asignada_a_tecnico()
+
+        orden_anterior = self._crear_orden(date(2026, 5, 10), horometro=Decimal("200.00"))
+        orden_actual = self._crear_orden(date(2026, 5, 11))
+        for orden, unidad in ((orden_anterior, unidad_anterior), (orden_actual, unidad_actual)):
+            response = self.client.post(
+                "/api/movimientos-repuesto/",
+                {
+                    "actividad": self._crear_actividad_registrada(orden).id,
+                    "item_unidad": unidad.id,
+                    "tecnico": self.trabajador.id,
+                },
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+
+        response = self.client.get("/api/maquinarias/gestion-bubble-repuestos/")
+        self.assertEqual(response.data["rows"], [])
+
+        self._actualizar_horometro(orden_actual, Decimal("260.00"))
+
+        response_bubble = self.client.get("/api/maquinarias/gestion-bubble-repuestos/")
+        self.assertEqual(response_bubble.status_code, 200, response_bubble.data)
+        self.assertEqual(len(response_bubble.data["rows"]), 1)
+        self.assertEqual(response_bubble.data["rows"][0]["vida_util_promedio"], 60.0)
+        self.assertEqual(response_bubble.data["rows"][0]["muestras"], 1)
+
+        response_matriz = self.client.get("/api/maquinarias/gestion-matriz/")
+        self.assertEqual(response_matriz.status_code, 200, response_matriz.data)
+        celda = response_matriz.data["rows"][0]["values"][str(self.maquinaria.id)]
+        self.assertEqual(celda["promedio_vida"], 60.0)
+
+        call_command("reconstruir_vida_util", stdout=StringIO())
+
+        self.assertEqual(
+            self.client.get("/api/maquinarias/gestion-bubble-repuestos/").data,
+            response_bubble.data,
+        )
+        self.assertEqual(
+            self.client.get("/api/maquinarias/gestion-matriz/").data,
+            response_matriz.data,
+        )
+
+    def test_matrices_de_gestion_en_formato_columnar_solo_envian_celdas_con_muestras(self):
+        otra_maquinaria = Maquinaria.objects.create(
+            codigo_maquina="MQ-HT-REP-00",
+            nombre="Cargador",
+            descripcion="Prueba",
+            observacion="",
+            gasto="0.00",
+        )
+        OrdenTrabajo.objects.create(
+            maquinaria=otra_maquinaria,
+            fecha=date(2026, 5, 9),
+            prioridad="REGULAR",
+            lugar=OrdenTrabajo.Lugar.TALLER,
+            observaciones="",
+        )
+        orden = self._crear_orden(date(2026, 5, 10))
+        for vida in (Decimal("40.00"), Decimal("80.00")):
+            VidaUtilRegistro.objects.create(
+                origen=VidaUtilRegistro.Origen.REPUESTO,
+                item=self.item,
+                maquinaria=self.maquinaria,
+                orden_trabajo=orden,
+                vida_util_matriz=vida,
+                costo_total_pen=Decimal("10.00"),
+            )
+        Item.objects.create(codigo="REP-HT-002", nombre="Sin muestras", tipo_insumo=Item.TipoInsumo.REPUESTO)
+
+        filas = self.client.get("/api/maquinarias/gestion-matriz/").data
+        columnar = self.client.get("/api/maquinarias/gestion-matriz/", {"formato": "columnar"}).data
+
+        self.assertEqual([maquinaria["id"] for maquinaria in columnar["maquinarias"]], [otra_maquinaria.id, self.maquinaria.id])
+        self.assertIsNone(filas["rows"][0]["values"][str(otra_maquinaria.id)])
+        self.assertEqual(columnar["rows"]["item_id"], [self.item.id])
+        self.assertEqual(columnar["rows"]["muestras"], [2])
+        self.assertEqual(
+            columnar["cells"],
+            {"row": [0], "column": [1], "promedio_vida": [60.0], "costo_total": [20.0], "muestras": [2]},
+        )
+        self.assertEqual(columnar["meta"], filas["meta"])
+
+        proveedores = self.client.get("/api/maquinarias/gestion-matriz-proveedores-repuestos/").data
+        self.assertEqual((proveedores["rows"], proveedores["meta"]["total_items"]), ([], 0))
+        self.assertEqual(
+            self.client.get("/api/maquinarias/gestion-matriz/", {"formato": "xml"}).status_code,
+            400,
+        )
+
+    def test_tablero_de_gestion_asincrono_se_consulta_en_jobs(self):
+        orden = self._crear_orden(date(2026, 5, 10), horometro=Decimal("200.00"))
+        response = self.client.post(
+            "/api/movimientos-repuesto/",
+            {
+                "actividad": self._crear_actividad_registrada(orden).id,
+                "item_unidad": self._crear_unidad_asignada_a_tecnico().id,
+                "tecnico": self.trabajador.id,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        sincrono = self.client.get("/api/maquinarias/gestion-matriz/")
+
+        response = self.client.get("/api/maquinarias/gestion-matriz/?async=1")
+        self.assertEqual(response.status_code, 202, response.data)
+        url_job = response["Location"]
+        self.assertEqual(self.client.get(url_job).data["estado"], TareaAsincrona.Estado.PENDIENTE)
+
+        otro = User.objects.create_user(username="otro-job", password="secret123")
+        self.client.force_authenticate(user=otro)
+        self.assertEqual(self.client.get(url_job).status_code, 404)
+        self.client.force_authenticate(user=self.user)
+
+        salida = StringIO()
+        call_command("procesar_tareas", "--una-vez", stdout=salida)
+        self.assertIn("Tareas procesadas: 1.", salida.getvalue())
+
+        job = self.client.get(url_job).data
+        self.assertEqual(job["estado"], TareaAsincrona.Estado.COMPLETADA)
+        self.assertEqual(job["codigo_respuesta"], 200)
+        self.assertEqual(job["progreso"], 100)
+        self.assertEqual(job["resultado"], json.loads(json.dumps(sincrono.data)))
+
+    def test_indicadores_maquinaria_filtran_periodo_y_prioridad_con_tendencia_mensual(self):
+        for fecha, hora_inicio, hora_fin, prioridad in (
+            (date(2026, 5, 1), "08:00", "10:00", "REGULAR"),
+            (date(2026, 5, 11), "08:00", "09:00", "URGENTE"),
+            (date(2026, 6, 1), None, None, "URGENTE"),
+        ):
+            orden = self._crear_orden(fecha)
+            OrdenTrabajo.objects.filter(pk=orden.pk).update(
+                hora_inicio=hora_inicio,
+                hora_fin=hora_fin,
+                prioridad=prioridad,
+            )
+        url = "/api/maquinarias/gestion-indicadores-maquinaria/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        row = response.data["rows"][0]
+        self.assertEqual((row["total_ordenes"], row["mtbf_dias"], row["mttr_horas"]), (3, 15.5, 1.5))
+        self.assertEqual(
+            [(mes["mes"], mes["total_ordenes"], mes["mtbf_dias"], mes["mttr_horas"]) for mes in response.data["tendencia"]],
+            [("2026-05", 2, 10.0, 1.5), ("2026-06", 1, 21.0, None)],
+        )
+
+        row = self.client.get(url, {"prioridad": "URGENTE"}).data["rows"][0]
+        self.assertEqual((row["total_ordenes"], row["mtbf_dias"], row["mttr_horas"]), (2, 21.0, 1.0))
+
+        row = self.client.get(url, {"fecha_hasta": "2026-05-31"}).data["rows"][0]
+        self.assertEqual((row["total_ordenes"], row["mtbf_dias"]), (2, 10.0))
+
+        row = self.client.get(url, {"tipo_mantenimiento": "CORRECTIVO"}).data["rows"][0]
+        self.assertEqual((row["total_ordenes"], row["mtbf_dias"], row["mttr_horas"]), (0, None, None))
+        self.assertEqual(self.client.get(url, {"prioridad": "OTRA"}).status_code, 400)
+
+    def test_supervivencia_censura_unidades_instaladas_y_compara_maquinarias(self):
+        otra_maquinaria = Maquinaria.objects.create(
+            codigo_maquina="MQ-HT-REP-02",
+            nombre="Cargador",
+            descripcion="Prueba",
+            observacion="",
+            gasto="0.00",
+        )
+        orden = self._crear_orden(date(2026, 5, 10))
+        registros = [
+            (self.maquinaria, Decimal("100.00")),
+            (self.maquinaria, Decimal("200.00")),
+            (self.maquinaria, Decimal("300.00")),
+            # Sigue montada: se censura en el horometro actual (150).
+            (self.maquinaria, None),
+            (otra_maquinaria, Decimal("50.00")),
+        ]
+        for maquinaria, horometro_fin in registros:
+            VidaUtilRegistro.objects.create(
+                origen=VidaUtilRegistro.Origen.REPUESTO,
+                item=self.item,
+                maquinaria=maquinaria,
+                orden_trabajo=orden,
+                horometro_inicio=Decimal("0.00"),
+                horometro_fin=horometro_fin,
+            )
+        Maquinaria.objects.filter(pk=self.maquinaria.pk).update(horometro_actual=Decimal("150.00"))
+
+        response = self.client.get(
+            "/api/maquinarias/gestion-supervivencia-repuestos/",
+            {"maquinaria_ids": f"{self.maquinaria.id},{otra_maquinaria.id}"},
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["meta"]["total_registros"], 5)
+        self.assertEqual(response.data["meta"]["censurados"], 1)
+        self.assertEqual(response.data["meta"]["vida_mediana"], 200.0)
+        self.assertEqual(
+            [(punto["horometro"], punto["en_riesgo"], punto["porcentaje_supervivencia"]) for punto in response.data["curve"]],
+            [(50.0, 5, 80.0), (100.0, 4, 60.0), (200.0, 2, 30.0), (300.0, 1, 0.0)],
+        )
+
+        propia, otra = response.data["comparacion"]
+        self.assertEqual((propia["maquinaria_id"], otra["maquinaria_id"]), (self.maquinaria.id, otra_maquinaria.id))
+        self.assertEqual([punto["porcentaje_supervivencia"] for punto in propia["curve"]], [75.0, 37.5, 0.0])
+        self.assertAlmostEqual(propia["curve"][0]["ic_inferior"], 12.8, delta=0.05)
+        self.assertAlmostEqual(propia["curve"][0]["ic_superior"], 96.06, delta=0.05)
+        self.assertEqual(otra["vida_mediana"], 50.0)
+
+        response = self.client.get(
+            "/api/maquinarias/gestion-supervivencia-repuestos/",
+            {"item_ids": "abc"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+        # Un horometro nuevo solo invalida las curvas de los items aun montados en esa maquinaria.
+        clave_item = f"supervivencia:item:{self.item.id}"
+        version_global = cache.get(CACHE_VERSION_SUPERVIVENCIA)
+        version_item = cache.get(clave_item)
+        refrescar_horometros([otra_maquinaria.id])
+        self.assertEqual(cache.get(clave_item), version_item)
+        refrescar_horometros([self.maquinaria.id])
+        self.assertNotEqual(cache.get(clave_item), version_item)
+        self.assertEqual(cache.get(CACHE_VERSION_SUPERVIVENCIA), version_global)
+
+
+class GestionCacheTests(APITransactionTestCase):
+    # Fuera de una transaccion de prueba: la cache solo se llena con lo confirmado.
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="admin-gestion-cache", password="secret123", is_staff=True)
+        self.client.force_authenticate(user=self.user)
+        self.maquinaria = Maquinaria.objects.create(
+            codigo_maquina="MQ-CACHE-01",
+            nombre="Excavadora",
+            descripcion="Prueba",
+            observacion="",
+            gasto="0.00",
+        )
+
+    def _crear_orden(self, fecha):
+        return OrdenTrabajo.objects.create(
+            maquinaria=self.maquinaria,
+            fecha=fecha,
+            prioridad="REGULAR",
+            lugar=OrdenTrabajo.Lugar.TALLER,
+            observaciones="",
+        )
+
+    def test_tablero_repetido_se_responde_de_cache_hasta_que_cambian_los_datos(self):
+        self._crear_orden(date(2026, 5, 1))
+        self._crear_orden(date(2026, 5, 5))
+        url = "/api/maquinarias/gestion-indicadores-maquinaria/"
+
+        primera = self.client.get(url, {"prioridad": "REGULAR", "fecha_desde": "2026-05-01"})
+        self.assertEqual(primera.data["rows"][0]["mtbf_dias"], 4.0)
+        with self.assertNumQueries(0):
+            repetida = self.client.get(url, {"fecha_desde": "2026-05-01", "prioridad": "REGULAR"})
+        self.assertEqual(repetida.data, primera.data)
+
+        self._crear_orden(date(2026, 5, 11))
+        actualizada = self.client.get(url, {"prioridad": "REGULAR", "fecha_desde": "2026-05-01"})
+        self.assertEqual(actualizada.data["rows"][0]["mtbf_dias"], 5.0)
+
+        otro = User.objects.create_user(username="sin-gestion", password="secret123")
+        self.client.force_authenticate(user=otro)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
 
 class MovimientoConsumiblePlanificadoTests(APITestCase):
     def setUp(self):
@@ -1949,6 +3039,92 @@ class MovimientoConsumiblePlanificadoTests(APITestCase):
         self.assertEqual(response.data["tecnico"], self.tecnico.id)
         self.assertEqual(response.data["tecnico_nombre"], "Luis Ramos")
 
+    def test_saldos_por_ubicacion_siguen_a_los_historiales(self):
+        almacen = HistorialConsumible.objects.create(
+            lote=self.lote,
+            item=self.item,
+            cantidad=Decimal("50.000000"),
+            unidad_medida=self.unidad,
+            almacen=self.almacen,
+        )
+        almacen.cerrar(cantidad=Decimal("10.000000"))
+        HistorialConsumible.objects.create(
+            lote=self.lote,
+            item=self.item,
+            cantidad=Decimal("40.000000"),
+            unidad_medida=self.unidad,
+            almacen=self.almacen,
+        )
+        HistorialConsumible.objects.create(
+            lote=self.lote,
+            item=self.item,
+            cantidad=Decimal("10.000000"),
+            unidad_medida=self.unidad,
+            trabajador=self.tecnico,
+        )
+
+        saldos = dict(
+            SaldoUbicacion.objects
+            .filter(lote=self.lote)
+            .values_list("tipo_ubicacion", "cantidad")
+        )
+        self.assertEqual(
+            saldos,
+            {
+                SaldoUbicacion.TipoUbicacion.ALMACEN: Decimal("40.000000"),
+                SaldoUbicacion.TipoUbicacion.TRABAJADOR: Decimal("10.000000"),
+            },
+        )
+
+        response = self.client.get(f"/api/items/{self.item.id}/lotes_disponibles/", {"actividad": self.actividad.id})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(Decimal(str(response.data["cantidad_disponible"])), Decimal("10"))
+
+        SaldoUbicacion.objects.filter(lote=self.lote).delete()
+        salida = StringIO()
+        call_command("conciliar_saldos", "--corregir", stdout=salida)
+        self.assertIn("Se corrigieron 2 saldos", salida.getvalue())
+        self.assertEqual(SaldoUbicacion.objects.filter(lote=self.lote).count(), 2)
+
+    def test_asignacion_fifo_escribe_en_bloque_y_conserva_fecha_del_sobrante(self):
+        fechas = [datetime(2026, 5, dia, 8, 0) for dia in range(1, 6)]
+        historiales = []
+        for fecha in fechas:
+            historial = HistorialConsumible.objects.create(
+                lote=self.lote,
+                item=self.item,
+                cantidad=Decimal("10.000000"),
+                unidad_medida=self.unidad,
+                almacen=self.almacen,
+            )
+            HistorialConsumible.objects.filter(pk=historial.pk).update(fecha_inicio=fecha)
+            historiales.append(historial)
+        en_almacen = HistorialConsumible.objects.filter(item=self.item, almacen__isnull=False)
+
+        with CaptureQueriesContext(connection) as pocas:
+            asignar_fifo(en_almacen, Decimal("5"), "Sin stock", destino={"trabajador": self.tecnico})
+        with CaptureQueriesContext(connection) as muchas:
+            destinos = asignar_fifo(
+                en_almacen, Decimal("32"), "Sin stock", destino={"trabajador": self.tecnico}
+            )
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertEqual([destino.cantidad for destino in destinos], [Decimal("5"), Decimal("10"), Decimal("10"), Decimal("7")])
+
+        abiertos = list(
+            HistorialConsumible.objects
+            .filter(almacen=self.almacen, fecha_fin__isnull=True)
+            .order_by("fecha_inicio")
+            .values_list("fecha_inicio", "cantidad")
+        )
+        self.assertEqual(abiertos, [(fechas[3], Decimal("3.000000")), (fechas[4], Decimal("10.000000"))])
+        self.assertEqual(
+            saldo_en_ubicacion(self.item, SaldoUbicacion.TipoUbicacion.TRABAJADOR, self.tecnico.id),
+            Decimal("37.000000"),
+        )
+
+        with self.assertRaises(ValidationError):
+            asignar_fifo(en_almacen, Decimal("100"), "Sin stock")
+
 
 class MovimientoRepuestoPlanificadoTests(APITestCase):
     def setUp(self):
@@ -2270,9 +3446,51 @@ class OrdenRequerimientoPermisosTests(APITestCase):
         response = self.client.get("/api/items/")
 
         self.assertEqual(response.status_code, 200, response.data)
-        item_ids = [row["id"] for row in response.data]
+        item_ids = [row["id"] for row in response.data["results"]]
         self.assertIn(self.item.id, item_ids)
 
+    def test_grupos_del_usuario_se_consultan_una_vez_por_request(self):
+        for _ in range(3):
+            self._crear_requerimiento(tecnico_asignado=self.tecnico)
+
+        def consultas_grupos(consultas):
+            return [q for q in consultas.captured_queries if "auth_user_groups" in q["sql"]]
+
+        self.client.force_authenticate(user=self.jefe_tecnicos_user)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get("/api/ordenes-requerimiento/")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(consultas_grupos(consultas)), 1)
+
+        self.client.force_authenticate(user=None)
+        with override_settings(JWT_ROLES_EN_TOKEN=True):
+            tokens = self.client.post(
+                "/api/token/",
+                {"username": "jefe-tecnicos", "password": "secret123"},
+                format="json",
+            ).data
+            self.assertEqual(AccessToken(tokens["access"])["roles"], ["Jefe de Tecnicos"])
+
+            self.jefe_tecnicos_user.groups.add(self.jefe_almacen_group)
+            token = self.client.post(
+                "/api/token/refresh/",
+                {"refresh": tokens["refresh"]},
+                format="json",
+            ).data["access"]
+            self.assertEqual(
+                AccessToken(token)["roles"],
+                ["Jefe de Almaceneros", "Jefe de Tecnicos"],
+            )
+
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(
+                    "/api/ordenes-requerimiento/",
+                    HTTP_AUTHORIZATION=f"Bearer {token}",
+                )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(consultas_grupos(consultas), [])
+
     def test_jefe_tecnicos_puede_registrar_movimiento_consumible(self):
         actividad = ActividadTrabajo.objects.create(
             orden=self.orden_trabajo,
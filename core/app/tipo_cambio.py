@@ -0,0 +1,140 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Compra, TipoCambioDiario
+
+
+CACHE_VERSION_KEY = "tipo_cambio:version"
+CACHE_TIMEOUT = 60 * 5
+SIN_TIPO_CAMBIO = "sin-tipo-cambio"
+
+
+def _version_cache():
+    return cache.get_or_set(CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def _cache_key(fecha, version):
+    return f"tipo_cambio:{version}:{fecha.isoformat()}"
+
+
+def invalidar_cache_tipo_cambio():
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, 2, timeout=None)
+
+
+class ResolutorTipoCambio:
+    """
+    Resuelve tipos de cambio por fecha con una cache por instancia (por request)
+    y una cache de proceso versionada que se invalida al guardar o eliminar
+    un TipoCambioDiario.
+    """
+
+    def __init__(self):
+        self._por_fecha = {}
+
+    def precargar(self, fechas):
+        pendientes = {
+            fecha for fecha in fechas
+            if fecha is not None and fecha not in self._por_fecha
+        }
+        if not pendientes:
+            return
+
+        version = _version_cache()
+        claves = {_cache_key(fecha, version): fecha for fecha in pendientes}
+        for clave, valor in cache.get_many(list(claves)).items():
+            fecha = claves[clave]
+            self._por_fecha[fecha] = None if valor == SIN_TIPO_CAMBIO else valor
+            pendientes.discard(fecha)
+
+        if not pendientes:
+            return
+
+        encontrados = {
+            tipo_cambio.fecha: tipo_cambio
+            for tipo_cambio in TipoCambioDiario.objects.filter(fecha__in=pendientes)
+        }
+        for fecha in pendientes:
+            self._por_fecha[fecha] = encontrados.get(fecha)
+
+        # Lo leido dentro de una transaccion podria revertirse; solo se
+        # comparte con otros requests lo confirmado.
+        if not transaction.get_connection().in_atomic_block:
+            cache.set_many(
+                {
+                    _cache_key(fecha, version): encontrados.get(fecha, SIN_TIPO_CAMBIO)
+                    for fecha in pendientes
+                },
+                timeout=CACHE_TIMEOUT,
+            )
+
+    def precargar_detalles(self, detalles):
+        self.precargar(
+            detalle.compra.fecha
+            for detalle in detalles
+            if detalle is not None and detalle.moneda != Compra.Moneda.PEN
+        )
+
+    def obtener(self, fecha):
+        if fecha not in self._por_fecha:
+            self.precargar([fecha])
+        return self._por_fecha.get(fecha)
+
+    def convertir(self, monto, moneda_origen, moneda_destino, fecha):
+        """Convierte usando la tasa compra del dia; None si no hay tasa valida."""
+        monto = Decimal(monto)
+        if moneda_origen == moneda_destino:
+            return monto
+
+        tipo_cambio = self.obtener(fecha)
+        if not tipo_cambio:
+            return None
+
+        tasas = {
+            Compra.Moneda.PEN: Decimal("1"),
+            Compra.Moneda.USD: Decimal(tipo_cambio.compra_usd),
+            Compra.Moneda.EUR: Decimal(tipo_cambio.compra_eur),
+        }
+        tasa_origen = tasas.get(moneda_origen)
+        tasa_destino = tasas.get(moneda_destino)
+        if not tasa_origen or not tasa_destino or tasa_origen <= 0 or tasa_destino <= 0:
+            return None
+
+        monto_pen = monto * tasa_origen
+        if moneda_destino == Compra.Moneda.PEN:
+            return monto_pen
+        return monto_pen / tasa_destino
+
+    def a_pen(self, monto, moneda, fecha):
+        return self.convertir(monto, moneda, Compra.Moneda.PEN, fecha)
+
+    def monto_pen_por_detalle(self, monto, detalle):
+        if not detalle:
+            return None
+        return self.a_pen(monto, detalle.moneda, detalle.compra.fecha)
+
+    def montos_pen_por_detalles(self, detalles, campo="costo_unitario"):
+        """Convierte a PEN el campo indicado de varios CompraDetalle: {detalle_id: monto}."""
+        detalles = [detalle for detalle in detalles if detalle is not None]
+        self.precargar_detalles(detalles)
+        return {
+            detalle.id: self.monto_pen_por_detalle(getattr(detalle, campo), detalle)
+            for detalle in detalles
+        }
+
+
+def obtener_resolutor_tipo_cambio(request=None):
+    if request is None:
+        return ResolutorTipoCambio()
+
+    # DRF envuelve el HttpRequest; la cache se comparte con el request original.
+    request = getattr(request, "_request", request)
+    resolutor = getattr(request, "_resolutor_tipo_cambio", None)
+    if resolutor is None:
+        resolutor = ResolutorTipoCambio()
+        request._resolutor_tipo_cambio = resolutor
+    return resolutor
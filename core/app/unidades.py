@@ -0,0 +1,125 @@
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import UnidadRelacion
+
+
+CACHE_VERSION_KEY = "unidades:version"
+CACHE_TIMEOUT = 60 * 60
+
+
+def _version_cache():
+    return cache.get_or_set(CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def _cache_key(dimension_id, version):
+    return f"unidades:{version}:{dimension_id}"
+
+
+def invalidar_cache_unidades():
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def construir_grafo(dimension_id):
+    """
+    Factores entre todas las unidades conectadas de la dimension:
+    ``{origen_id: {destino_id: factor}}``. Las relaciones directas tienen
+    prioridad; el resto se deriva componiendo el camino mas corto.
+    """
+    aristas = defaultdict(dict)
+    relaciones = UnidadRelacion.objects.filter(
+        unidad_base__dimension_id=dimension_id,
+    ).values_list("unidad_base_id", "unidad_relacionada_id", "factor")
+    for origen_id, destino_id, factor in relaciones:
+        aristas[origen_id][destino_id] = Decimal(factor)
+
+    grafo = {}
+    for origen_id, directas in aristas.items():
+        factores = {}
+        visitadas = {origen_id}
+        pendientes = deque([(origen_id, Decimal("1"))])
+        while pendientes:
+            actual_id, acumulado = pendientes.popleft()
+            for destino_id, factor in aristas.get(actual_id, {}).items():
+                if destino_id in visitadas or factor == 0:
+                    continue
+                visitadas.add(destino_id)
+                factores[destino_id] = acumulado * factor
+                pendientes.append((destino_id, factores[destino_id]))
+
+        # Un factor directo en cero se conserva para reportarlo como tal.
+        for destino_id, factor in directas.items():
+            if factor == 0:
+                factores.setdefault(destino_id, factor)
+        grafo[origen_id] = factores
+
+    return grafo
+
+
+class ConversorUnidades:
+    """
+    Convierte cantidades entre unidades de una misma dimension. El grafo de
+    cada dimension se arma una vez por instancia (por request) y se comparte
+    entre procesos con una cache versionada que se invalida al guardar o
+    eliminar un UnidadRelacion.
+    """
+
+    def __init__(self):
+        self._grafos = {}
+
+    def _grafo(self, dimension_id):
+        if dimension_id in self._grafos:
+            return self._grafos[dimension_id]
+
+        clave = _cache_key(dimension_id, _version_cache())
+        grafo = cache.get(clave)
+        if grafo is None:
+            grafo = construir_grafo(dimension_id)
+            # Lo leido dentro de una transaccion podria revertirse; solo se
+            # comparte con otros requests lo confirmado.
+            if not transaction.get_connection().in_atomic_block:
+                cache.set(clave, grafo, timeout=CACHE_TIMEOUT)
+
+        self._grafos[dimension_id] = grafo
+        return grafo
+
+    def factor(self, unidad_origen, unidad_destino):
+        if unidad_origen.id == unidad_destino.id:
+            return Decimal("1")
+
+        if unidad_origen.dimension_id != unidad_destino.dimension_id:
+            raise ValidationError("Las unidades no pertenecen a la misma dimensión")
+
+        factor = (
+            self._grafo(unidad_origen.dimension_id)
+            .get(unidad_origen.id, {})
+            .get(unidad_destino.id)
+        )
+        if factor is None:
+            raise ValidationError(
+                "No existe relación de unidad entre la unidad origen y destino"
+            )
+        if factor == 0:
+            raise ValidationError("El factor de equivalencia no puede ser cero")
+
+        return factor
+
+    def convertir(self, cantidad, unidad_origen, unidad_destino):
+        return Decimal(cantidad) * self.factor(unidad_origen, unidad_destino)
+
+    def convertir_cantidades(self, filas, unidad_destino):
+        """Convierte ``[(cantidad, unidad_origen), ...]`` a la unidad destino, un factor por unidad."""
+        factores = {}
+        convertidas = []
+        for cantidad, unidad_origen in filas:
+            if unidad_origen.id not in factores:
+                factores[unidad_origen.id] = self.factor(unidad_origen, unidad_destino)
+            convertidas.append(Decimal(cantidad) * factores[unidad_origen.id])
+        return convertidas
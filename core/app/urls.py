@@ -2,6 +2,7 @@ from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 
 from .catalog_sync import CatalogoSyncView
+from .perf import PerfResumenView
 from .views import (
     UserViewSet,
     ItemViewSet,
@@ -46,6 +47,7 @@ from .views import (
     UnidadRelacionViewSet,
     ItemGrupoViewSet,
     TipoCambioDiarioViewSet,
+    TareaAsincronaViewSet,
 )
 
 router = DefaultRouter()
@@ -89,6 +91,7 @@ router.register(r"dimensiones", DimensionViewSet)
 router.register(r"unidades-medida", UnidadMedidaViewSet)
 router.register(r"relaciones-unidad", UnidadRelacionViewSet)
 router.register(r"item-grupos", ItemGrupoViewSet)
+router.register(r"jobs", TareaAsincronaViewSet)
 
 urlpatterns = [
     path("api/", include(router.urls)),
@@ -96,4 +99,5 @@ urlpatterns = [
     path("api/me/", MeView.as_view(), name="me"),
     path("api/catalogos/", CatalogosView.as_view()),
     path("api/catalogo-sync/", CatalogoSyncView.as_view(), name="catalogo-sync"),
+    path("api/_perf/", PerfResumenView.as_view(), name="perf-resumen"),
 ]
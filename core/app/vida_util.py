@@ -0,0 +1,350 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import (
+    HistorialConsumible,
+    HistorialUbicacionItem,
+    ItemUnidad,
+    LoteConsumible,
+    VidaUtilRegistro,
+)
+from .gestion_cache import invalidar_cache_gestion_al_confirmar
+from .supervivencia import invalidar_cache_supervivencia
+from .tipo_cambio import ResolutorTipoCambio
+
+
+TAMANO_LOTE = 500
+
+
+def resolver_vida_util(inicio, siguiente_inicio=None, fin=None):
+    if inicio is None:
+        return None
+
+    inicio = Decimal(inicio)
+    fin_candidato = None
+
+    if siguiente_inicio is not None:
+        siguiente_inicio = Decimal(siguiente_inicio)
+        if siguiente_inicio > inicio:
+            fin_candidato = siguiente_inicio
+
+    if fin_candidato is None and fin is not None:
+        fin = Decimal(fin)
+        if fin > inicio:
+            fin_candidato = fin
+
+    if fin_candidato is None:
+        return None
+
+    return fin_candidato - inicio
+
+
+def duracion_horas_orden(hora_inicio, hora_fin):
+    if not hora_inicio or not hora_fin:
+        return None
+
+    minutos_inicio = hora_inicio.hour * 60 + hora_inicio.minute
+    minutos_fin = hora_fin.hour * 60 + hora_fin.minute
+    diferencia_minutos = minutos_fin - minutos_inicio
+
+    if diferencia_minutos <= 0:
+        return None
+
+    return Decimal(diferencia_minutos) / Decimal("60")
+
+
+def _es_relevante(historial):
+    return bool(
+        historial.maquinaria_id
+        or historial.orden_trabajo_id
+        or historial.horometro_inicio is not None
+        or historial.horometro_fin is not None
+    )
+
+
+def _montos_pen(detalle, resolutor):
+    if not detalle:
+        return Decimal("0"), Decimal("0"), Decimal("0")
+
+    def a_pen(monto):
+        convertido = resolutor.monto_pen_por_detalle(monto, detalle)
+        return convertido if convertido is not None else Decimal("0")
+
+    costo_total = a_pen(detalle.costo_total)
+    costo_por_unidad = (
+        costo_total / Decimal(detalle.cantidad)
+        if detalle.cantidad
+        else Decimal("0")
+    )
+    return a_pen(detalle.costo_unitario), a_pen(detalle.valor_unitario), costo_por_unidad
+
+
+def _duracion_orden(orden):
+    if not orden:
+        return None
+    return duracion_horas_orden(orden.hora_inicio, orden.hora_fin)
+
+
+def _redondear(valor):
+    if valor is None:
+        return None
+    return valor.quantize(Decimal("0.01"))
+
+
+def _construir_registros_unidades(historiales, resolutor):
+    resolutor.precargar_detalles(h.item_unidad.compra_detalle for h in historiales)
+    registros = []
+
+    por_unidad = {}
+    for historial in historiales:
+        por_unidad.setdefault(historial.item_unidad_id, []).append(historial)
+
+    for grupo in por_unidad.values():
+        usados_en_maquinaria = [
+            historial for historial in grupo
+            if historial.maquinaria_id and historial.estado == ItemUnidad.Estado.USADO
+        ]
+        vida_matriz = {}
+        for index, actual in enumerate(usados_en_maquinaria):
+            siguiente = (
+                usados_en_maquinaria[index + 1]
+                if index + 1 < len(usados_en_maquinaria)
+                else None
+            )
+            vida_matriz[actual.id] = resolver_vida_util(
+                actual.horometro_inicio,
+                siguiente_inicio=getattr(siguiente, "horometro_inicio", None),
+                fin=actual.horometro_fin,
+            )
+
+        for historial in grupo:
+            if not _es_relevante(historial):
+                continue
+
+            unidad = historial.item_unidad
+            detalle = unidad.compra_detalle
+            costo_unitario, valor_unitario, costo_por_unidad = _montos_pen(detalle, resolutor)
+            registros.append(
+                VidaUtilRegistro(
+                    origen=VidaUtilRegistro.Origen.REPUESTO,
+                    historial_item=historial,
+                    item_id=unidad.item_id,
+                    item_unidad_id=unidad.id,
+                    maquinaria_id=historial.maquinaria_id,
+                    proveedor_id=detalle.compra.proveedor_id if detalle else None,
+                    orden_trabajo_id=historial.orden_trabajo_id,
+                    compra_detalle_id=detalle.id if detalle else None,
+                    estado=historial.estado,
+                    cantidad=Decimal("1"),
+                    horometro_inicio=historial.horometro_inicio,
+                    horometro_fin=historial.horometro_fin,
+                    vida_util=_redondear(
+                        resolver_vida_util(historial.horometro_inicio, fin=historial.horometro_fin)
+                    ),
+                    vida_util_matriz=_redondear(vida_matriz.get(historial.id)),
+                    costo_unitario_pen=costo_unitario,
+                    valor_unitario_pen=valor_unitario,
+                    costo_total_pen=costo_por_unidad,
+                    duracion_ot_horas=_redondear(_duracion_orden(historial.orden_trabajo)),
+                )
+            )
+
+    return registros
+
+
+def _construir_registros_lotes(historiales, resolutor):
+    resolutor.precargar_detalles(h.lote.compra_detalle for h in historiales)
+    registros = []
+
+    for historial in historiales:
+        if not _es_relevante(historial):
+            continue
+
+        detalle = historial.lote.compra_detalle
+        costo_unitario, valor_unitario, _ = _montos_pen(detalle, resolutor)
+        cantidad = Decimal(historial.cantidad or 0)
+        vida_util = resolver_vida_util(historial.horometro_inicio, fin=historial.horometro_fin)
+        registros.append(
+            VidaUtilRegistro(
+                origen=VidaUtilRegistro.Origen.CONSUMIBLE,
+                historial_consumible=historial,
+                item_id=historial.item_id,
+                lote_id=historial.lote_id,
+                maquinaria_id=historial.maquinaria_id,
+                proveedor_id=detalle.compra.proveedor_id if detalle else None,
+                orden_trabajo_id=historial.orden_trabajo_id,
+                compra_detalle_id=detalle.id if detalle else None,
+                cantidad=cantidad,
+                horometro_inicio=historial.horometro_inicio,
+                horometro_fin=historial.horometro_fin,
+                vida_util=_redondear(vida_util),
+                vida_util_matriz=_redondear(vida_util) if historial.maquinaria_id else None,
+                costo_unitario_pen=costo_unitario,
+                valor_unitario_pen=valor_unitario,
+                costo_total_pen=cantidad * costo_unitario,
+                duracion_ot_horas=_redondear(_duracion_orden(historial.orden_trabajo)),
+            )
+        )
+
+    return registros
+
+
+def refrescar_vida_util_unidades(item_unidad_ids, resolutor=None):
+    """Recalcula los hechos de vida util de las unidades indicadas."""
+    item_unidad_ids = {item_unidad_id for item_unidad_id in item_unidad_ids if item_unidad_id}
+    if not item_unidad_ids:
+        return
+
+    historiales = list(
+        HistorialUbicacionItem.objects
+        .select_related(
+            "item_unidad__compra_detalle__compra",
+            "orden_trabajo",
+        )
+        .filter(item_unidad_id__in=item_unidad_ids)
+        .order_by("item_unidad_id", "fecha_inicio", "id")
+    )
+    registros = _construir_registros_unidades(historiales, resolutor or ResolutorTipoCambio())
+    item_ids = {historial.item_unidad.item_id for historial in historiales}
+
+    with transaction.atomic():
+        anteriores = VidaUtilRegistro.objects.filter(item_unidad_id__in=item_unidad_ids)
+        item_ids.update(anteriores.values_list("item_id", flat=True).distinct())
+        anteriores.delete()
+        VidaUtilRegistro.objects.bulk_create(registros, batch_size=TAMANO_LOTE)
+
+    invalidar_cache_supervivencia(item_ids)
+    transaction.on_commit(lambda: invalidar_cache_supervivencia(item_ids))
+    invalidar_cache_gestion_al_confirmar()
+
+
+def refrescar_vida_util_lotes(lote_ids, resolutor=None):
+    """Recalcula los hechos de vida util de los lotes de consumible indicados."""
+    lote_ids = {lote_id for lote_id in lote_ids if lote_id}
+    if not lote_ids:
+        return
+
+    historiales = list(
+        HistorialConsumible.objects
+        .select_related(
+            "lote__compra_detalle__compra",
+            "orden_trabajo",
+        )
+        .filter(lote_id__in=lote_ids)
+        .order_by("lote_id", "fecha_inicio", "id")
+    )
+    registros = _construir_registros_lotes(historiales, resolutor or ResolutorTipoCambio())
+
+    with transaction.atomic():
+        VidaUtilRegistro.objects.filter(lote_id__in=lote_ids).delete()
+        VidaUtilRegistro.objects.bulk_create(registros, batch_size=TAMANO_LOTE)
+
+    invalidar_cache_gestion_al_confirmar()
+
+
+def refrescar_vida_util_por_compra_detalles(compra_detalle_ids):
+    compra_detalle_ids = list(compra_detalle_ids)
+    if not compra_detalle_ids:
+        return
+
+    resolutor = ResolutorTipoCambio()
+    refrescar_vida_util_unidades(
+        ItemUnidad.objects
+        .filter(compra_detalle_id__in=compra_detalle_ids)
+        .values_list("id", flat=True),
+        resolutor=resolutor,
+    )
+    refrescar_vida_util_lotes(
+        LoteConsumible.objects
+        .filter(compra_detalle_id__in=compra_detalle_ids)
+        .values_list("id", flat=True),
+        resolutor=resolutor,
+    )
+
+
+def refrescar_vida_util_por_fecha_compra(fecha):
+    resolutor = ResolutorTipoCambio()
+    registros = VidaUtilRegistro.objects.filter(compra_detalle__compra__fecha=fecha)
+    refrescar_vida_util_unidades(
+        registros.filter(item_unidad__isnull=False).values_list("item_unidad_id", flat=True),
+        resolutor=resolutor,
+    )
+    refrescar_vida_util_lotes(
+        registros.filter(lote__isnull=False).values_list("lote_id", flat=True),
+        resolutor=resolutor,
+    )
+
+
+def refrescar_vida_util_por_orden(orden, item_unidad_ids=(), lote_ids=()):
+    """Refresca las unidades y lotes con historial en la orden, mas los indicados."""
+    filtro_orden = Q(orden_trabajo=orden)
+    resolutor = ResolutorTipoCambio()
+    refrescar_vida_util_unidades(
+        set(item_unidad_ids).union(
+            HistorialUbicacionItem.objects
+            .filter(filtro_orden)
+            .values_list("item_unidad_id", flat=True)
+        ),
+        resolutor=resolutor,
+    )
+    refrescar_vida_util_lotes(
+        set(lote_ids).union(
+            HistorialConsumible.objects
+            .filter(filtro_orden)
+            .values_list("lote_id", flat=True)
+        ),
+        resolutor=resolutor,
+    )
+
+
+def reconstruir_vida_util(tamano_lote=TAMANO_LOTE):
+    """Reconstruye la tabla completa; devuelve (registros_repuesto, registros_consumible)."""
+    resolutor = ResolutorTipoCambio()
+    total_repuestos = 0
+    total_consumibles = 0
+
+    with transaction.atomic():
+        VidaUtilRegistro.objects.all().delete()
+
+        unidad_ids = list(
+            HistorialUbicacionItem.objects
+            .values_list("item_unidad_id", flat=True)
+            .distinct()
+            .order_by("item_unidad_id")
+        )
+        for inicio in range(0, len(unidad_ids), tamano_lote):
+            bloque = unidad_ids[inicio:inicio + tamano_lote]
+            historiales = list(
+                HistorialUbicacionItem.objects
+                .select_related("item_unidad__compra_detalle__compra", "orden_trabajo")
+                .filter(item_unidad_id__in=bloque)
+                .order_by("item_unidad_id", "fecha_inicio", "id")
+            )
+            registros = _construir_registros_unidades(historiales, resolutor)
+            VidaUtilRegistro.objects.bulk_create(registros, batch_size=tamano_lote)
+            total_repuestos += len(registros)
+
+        lote_ids = list(
+            HistorialConsumible.objects
+            .values_list("lote_id", flat=True)
+            .distinct()
+            .order_by("lote_id")
+        )
+        for inicio in range(0, len(lote_ids), tamano_lote):
+            bloque = lote_ids[inicio:inicio + tamano_lote]
+            historiales = list(
+                HistorialConsumible.objects
+                .select_related("lote__compra_detalle__compra", "orden_trabajo")
+                .filter(lote_id__in=bloque)
+                .order_by("lote_id", "fecha_inicio", "id")
+            )
+            registros = _construir_registros_lotes(historiales, resolutor)
+            VidaUtilRegistro.objects.bulk_create(registros, batch_size=tamano_lote)
+            total_consumibles += len(registros)
+
+    invalidar_cache_supervivencia()
+    transaction.on_commit(invalidar_cache_supervivencia)
+    invalidar_cache_gestion_al_confirmar()
+    return total_repuestos, total_consumibles
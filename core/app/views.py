@@ -11,16 +11,17 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
 from .permissions import IsAdmin
-from django.db.models import Avg, Count, Max, Prefetch, Sum
+from django.db.models import Avg, Count, Max, Prefetch, Q, Sum
 from decimal import Decimal
 from collections import defaultdict
 from itertools import chain
-from datetime import datetime, time
+from datetime import datetime
 from django.db import transaction
 
 
 from .models import (
     Item,
+    KardexMovimiento,
     Maquinaria,
     Compra,
     CompraDetalle,
@@ -59,6 +60,7 @@ from .models import (
     UnidadRelacion,
     ItemGrupo,
     LoteConsumible,
+    TareaAsincrona,
     TareaPorEstandarizar,
     TipoCambioDiario,
     ActividadChecklist,
@@ -69,6 +71,8 @@ from .models import (
     Sistema,
     Evento,
     Asistencia,
+    VidaUtilRegistro,
+    SaldoUbicacion,
 )
 from .serializers import (
     UserSerializer,
@@ -108,6 +112,7 @@ from .serializers import (
     ReporteOrdenSerializer,
     ReporteIPERCSerializer,
     ReporteIPERCSerializer as _ReporteIPERCSerializer,
+    TareaAsincronaSerializer,
     TareaPorEstandarizarSerializer,
     DimensionSerializer,
     UnidadMedidaSerializer,
@@ -122,9 +127,23 @@ from .serializers import (
     ChecklistRespuestaSerializer,
     EventoSerializer,
     AsistenciaSerializer,
-    convertir_cantidad_a_unidad_item,
     obtener_tecnico_responsable_planificado,
+    calcular_stock_items_por_vista,
 )
+from .catalogos import respuesta_catalogo
+from .gestion_cache import cachear_resultado_gestion
+from .indicadores import indicadores_maquinaria, ordenes_filtradas
+from .matrices import FORMATO_COLUMNAR, filas_con_valores, formato_matriz, matriz_columnar
+from .mixins import CamposDinamicosMixin, CatalogoCacheadoMixin, InstrumentacionMixin
+from .kardex import fecha_kardex_compra
+from .maquinaria_resumen import maquinarias_con_compra_detalles, refrescar_centro_costos
+from .asignacion_lotes import asignar_fifo
+from .saldos import refrescar_saldos_unidades, saldo_en_ubicacion
+from .supervivencia import curvas_supervivencia, registros_supervivencia
+from .tareas import encolar_solicitud, solicita_asincrono
+from .tipo_cambio import obtener_resolutor_tipo_cambio
+from .unidades import ConversorUnidades
+from .vida_util import duracion_horas_orden
 from .permissions import (
     IsAdmin,
     ItemPermission,
@@ -143,9 +162,23 @@ from .permissions import (
     is_maintenance_boss,
     is_storage_user,
     is_tecnico_user,
+    user_in_group,
 )
 
-class UserViewSet(viewsets.ModelViewSet):
+
+def parse_fecha_param(value, field_name):
+    if not value:
+        return None
+
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError as exc:
+        raise ValidationError(
+            {field_name: "La fecha debe tener formato YYYY-MM-DD."}
+        ) from exc
+
+
+class UserViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("username")
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
@@ -168,10 +201,16 @@ class UserViewSet(viewsets.ModelViewSet):
             "roles": roles
         })
 
-class ItemViewSet(viewsets.ModelViewSet):
-    queryset = Item.objects.select_related("dimension", "unidad_medida").all().order_by("nombre")
+class ItemViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
+    queryset = Item.objects.select_related(
+        "dimension",
+        "unidad_medida",
+        "unidad_medida__dimension",
+    ).all().order_by("nombre")
     serializer_class = ItemSerializer
     permission_classes = [ItemPermission]
+    presupuesto_consultas = {"list": 8}
+    paginacion_obligatoria = True
 
     @staticmethod
     def _estados_disponibles_unidad():
@@ -344,6 +383,22 @@ class ItemViewSet(viewsets.ModelViewSet):
             return ItemDetalleSerializer
         return ItemSerializer
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        items = list(page if page is not None else queryset)
+
+        context = self.get_serializer_context()
+        context["stock_por_item"] = calcular_stock_items_por_vista(
+            items,
+            vista=request.query_params.get("vista"),
+        )
+        serializer = self.get_serializer(items, many=True, context=context)
+
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     # 📜 HISTORIAL REAL
     @action(detail=True, methods=["get"])
     def historial(self, request, pk=None):
@@ -525,11 +580,18 @@ class ItemViewSet(viewsets.ModelViewSet):
         if not maquinaria_id:
             return Response([])
 
-        items = Item.objects.filter(
-            unidades__maquinaria_actual_id=maquinaria_id,
-        ).distinct()
+        items = list(
+            Item.objects
+            .select_related("dimension", "unidad_medida", "unidad_medida__dimension")
+            .filter(unidades__maquinaria_actual_id=maquinaria_id)
+            .distinct()
+        )
 
-        serializer = ItemSerializer(items, many=True)
+        serializer = ItemSerializer(
+            items,
+            many=True,
+            context={"stock_por_item": calcular_stock_items_por_vista(items)},
+        )
         return Response(serializer.data)
     
     @action(detail=True, methods=["get"])
@@ -614,17 +676,10 @@ class ItemViewSet(viewsets.ModelViewSet):
                     "unidad_medida": item.unidad_medida.nombre if item.unidad_medida else "",
                 })
 
-            total_asignado = (
-                HistorialConsumible.objects
-                .filter(
-                    item=item,
-                    trabajador=tecnico,
-                    fecha_fin__isnull=True,
-                    cantidad__gt=0,
-                )
-                .aggregate(total=Sum("cantidad"))
-                .get("total")
-                or Decimal("0")
+            total_asignado = saldo_en_ubicacion(
+                item,
+                SaldoUbicacion.TipoUbicacion.TRABAJADOR,
+                tecnico.id,
             )
 
             cantidad_planificada = Decimal("0")
@@ -639,13 +694,16 @@ class ItemViewSet(viewsets.ModelViewSet):
                         tecnico=tecnico,
                     )
                 )
-                for movimiento in movimientos_planificados:
-                    unidad_movimiento = movimiento.unidad_medida or item.unidad_medida
-                    cantidad_planificada += convertir_cantidad_a_unidad_item(
-                        item,
-                        movimiento.cantidad,
-                        unidad_movimiento,
-                    )
+                cantidad_planificada = sum(
+                    ConversorUnidades().convertir_cantidades(
+                        [
+                            (movimiento.cantidad, movimiento.unidad_medida or item.unidad_medida)
+                            for movimiento in movimientos_planificados
+                        ],
+                        item.unidad_medida,
+                    ),
+                    Decimal("0"),
+                )
 
             return Response({
                 "cantidad_disponible": max(Decimal(total_asignado) - cantidad_planificada, Decimal("0")),
@@ -662,179 +720,39 @@ class ItemViewSet(viewsets.ModelViewSet):
             "unidad_medida": item.unidad_medida.nombre if item.unidad_medida else "",
         })
 
-    @staticmethod
-    def _costo_unitario_pen(detalle):
-        costo_unitario = detalle.costo_unitario
-        moneda = detalle.moneda
-
-        if moneda == Compra.Moneda.PEN:
-            return costo_unitario
-
-        tipo_cambio = TipoCambioDiario.objects.filter(fecha=detalle.compra.fecha).first()
-        if not tipo_cambio:
-            return None
-
-        if moneda == Compra.Moneda.USD:
-            if tipo_cambio.compra_usd <= 0:
-                return None
-            return costo_unitario * tipo_cambio.compra_usd
-
-        if moneda == Compra.Moneda.EUR:
-            if tipo_cambio.compra_eur <= 0:
-                return None
-            return costo_unitario * tipo_cambio.compra_eur
-
-        return None
-    
     @action(detail=True, methods=["get"])
     def kardex_contable(self, request, pk=None):
+        """
+        Lee el kardex persistido (ver app/kardex.py). Acepta fecha_desde y
+        fecha_hasta (YYYY-MM-DD) y paginacion por cursor con page_size/cursor.
+        """
         item = self.get_object()
 
-        # 📥 Compras
-        compras = (
-            CompraDetalle.objects
-            .filter(item=item)
-            .select_related("compra")
-            .order_by("compra__fecha")
-        )
-
-        # 📤 Salidas
-        salidas = (
-            MovimientoRepuesto.objects
-            .filter(item_unidad__item=item)
-            .filter(actividad__es_planificada=False)
-            .select_related("actividad__orden")
-            .order_by("fecha")
-        )
+        fecha_desde = parse_fecha_param(request.query_params.get("fecha_desde"), "fecha_desde")
+        fecha_hasta = parse_fecha_param(request.query_params.get("fecha_hasta"), "fecha_hasta")
+        if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+            raise ValidationError(
+                {"fecha_hasta": "La fecha hasta debe ser posterior o igual a la fecha desde."}
+            )
 
-        salidas_consumible = (
-            MovimientoConsumible.objects
-            .filter(item=item, actividad__es_planificada=False)
-            .select_related("actividad__orden")
-            .order_by("fecha")
+        movimientos = (
+            KardexMovimiento.objects
+            .filter(item=item)
+            .select_related("maquinaria")
+            .order_by("posicion")
         )
+        if fecha_desde:
+            movimientos = movimientos.filter(fecha__gte=fecha_kardex_compra(fecha_desde))
+        if fecha_hasta:
+            movimientos = movimientos.filter(
+                fecha__lt=fecha_kardex_compra(fecha_hasta + timedelta(days=1))
+            )
 
-        eventos = []
-
-        # ===== COMPRAS =====
-        for c in compras:
-            costo_unitario_pen = self._costo_unitario_pen(c)
-            if costo_unitario_pen is None:
-                continue
-
-            fecha_compra = datetime.combine(c.compra.fecha, time.min)
-            if timezone.is_aware(timezone.now()):
-                fecha_compra = timezone.make_aware(
-                    fecha_compra,
-                    timezone.get_current_timezone()
-                )
-
-            eventos.append({
-                "fecha": fecha_compra,
-                "tipo": "COMPRA",
-                "cantidad": c.cantidad,
-                "costo_unitario": costo_unitario_pen,
-                "registro": f"{c.compra.tipo_comprobante} {c.compra.codigo_comprobante}",
-            })
-
-        # ===== SALIDAS =====
-        for s in salidas:
-            unidad = s.item_unidad
-            detalle = unidad.compra_detalle
-            orden = s.actividad.orden if s.actividad else None
-            maquinaria = orden.maquinaria if orden else None
-
-            costo_unitario = self._costo_unitario_pen(detalle) if detalle else Decimal("0.00")
-            if costo_unitario is None:
-                continue
-
-            eventos.append({
-                "fecha": s.fecha,
-                "tipo": "SALIDA_REPUESTO",
-                "cantidad": 1,
-                "costo_unitario": costo_unitario,
-                "registro": orden.codigo_orden if orden else "OT",
-                "maquinaria": (
-                    {
-                        "id": maquinaria.id,
-                        "codigo": maquinaria.codigo_maquina,
-                        "nombre": maquinaria.nombre,
-                    }
-                    if maquinaria else None
-                ),
-            })
-        
-        for s in salidas_consumible:
-            orden = s.actividad.orden if s.actividad else None
-            maquinaria = orden.maquinaria if orden else None
-
-            eventos.append({
-                "fecha": s.fecha,
-                "tipo": "SALIDA_CONSUMIBLE",
-                "cantidad": s.cantidad,
-                "costo_unitario": None,
-                "registro": orden.codigo_orden if orden else "OT",
-                "maquinaria": (
-                    {
-                        "id": maquinaria.id,
-                        "codigo": maquinaria.codigo_maquina,
-                        "nombre": maquinaria.nombre,
-                    }
-                    if maquinaria else None
-                ),
-            })
-
-        # ===== ORDEN CRONOLÓGICO =====
-        eventos.sort(key=lambda x: x["fecha"])
-
-        kardex = []
-        stock = 0
-        costo_total = Decimal("0.00")
-        costo_promedio = Decimal("0.00")
-
-        for e in eventos:
-            inv_inicial = stock
-
-            if e["tipo"] == "COMPRA":
-                entrada = e["cantidad"]
-                salida = 0
-
-                total_entrada = e["cantidad"] * e["costo_unitario"]
-                costo_total += total_entrada
-                stock += entrada
-                costo_promedio = costo_total / stock if stock > 0 else Decimal("0.00")
-
-            else:
-                entrada = 0
-                salida = e["cantidad"]
-                costo_salida = (
-                    e["costo_unitario"]
-                    if e["costo_unitario"] is not None
-                    else costo_promedio
-                )
-
-                costo_total -= costo_salida * salida
-                stock -= salida
-
-            kardex.append({
-                "fecha": e["fecha"],
-                "registro": e["registro"],
-                "inventario_inicial": inv_inicial,
-                "entrada": entrada,
-                "salida": salida,
-                "costo_unitario": round(
-                    e["costo_unitario"]
-                    if e["tipo"] == "SALIDA_REPUESTO"
-                    else costo_promedio,
-                    2
-                ),
-                "inventario_final_cantidad": stock,
-                "inventario_final_costo": round(costo_total, 2),
-                "maquinaria": e.get("maquinaria"),
-            })
+        page = self.paginate_queryset(movimientos)
+        if page is not None:
+            return self.get_paginated_response(KardexContableSerializer(page, many=True).data)
+        return Response(KardexContableSerializer(movimientos, many=True).data)
 
-        return Response(KardexContableSerializer(kardex, many=True).data)
-    
     @action(detail=True, methods=["post"], permission_classes=[CambioEquipoPermission])
     def cambiar_estado_unidad(self, request, pk=None):
         """
@@ -927,120 +845,41 @@ class ItemViewSet(viewsets.ModelViewSet):
     
 
 
-class MaquinariaViewSet(viewsets.ModelViewSet):
+class MaquinariaViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Maquinaria.objects.all()
     serializer_class = MaquinariaSerializer
     permission_classes = [CatalogoPermission]
+    presupuesto_consultas = {"gestion_matriz": 4}
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return MaquinariaDetalleSerializer
         return MaquinariaSerializer
 
-    @staticmethod
-    def _resolver_vida_util(inicio, siguiente_inicio=None, fin=None):
-        if inicio is None:
-            return None
-
-        inicio = Decimal(inicio)
-        fin_candidato = None
-
-        if siguiente_inicio is not None:
-            siguiente_inicio = Decimal(siguiente_inicio)
-            if siguiente_inicio > inicio:
-                fin_candidato = siguiente_inicio
-
-        if fin_candidato is None and fin is not None:
-            fin = Decimal(fin)
-            if fin > inicio:
-                fin_candidato = fin
-
-        if fin_candidato is None:
-            return None
-
-        return fin_candidato - inicio
-
-    @staticmethod
-    def _registrar_vida_matriz(
-        matriz,
-        item_id,
-        item_codigo,
-        item_nombre,
-        tipo_insumo,
-        maquinaria_id,
-        vida_util,
-        costo_total=Decimal("0.00"),
-    ):
-        if vida_util is None or vida_util <= 0:
-            return
-
-        fila = matriz.setdefault(
-            item_id,
-            {
-                "item_id": item_id,
-                "item_codigo": item_codigo,
-                "item_nombre": item_nombre,
-                "tipo_insumo": tipo_insumo,
-                "values": {},
-            },
-        )
-
-        llave_maquinaria = str(maquinaria_id)
-        celda = fila["values"].setdefault(
-            llave_maquinaria,
-            {
-                "sum": Decimal("0.00"),
-                "cost_sum": Decimal("0.00"),
-                "count": 0,
-            },
-        )
-        celda["sum"] += vida_util
-        celda["cost_sum"] += Decimal(costo_total or 0)
-        celda["count"] += 1
-
     @staticmethod
     def _puede_ver_gestion(user):
         return (
             user.is_staff
             or is_maintenance_boss(user)
             or is_compras_user(user)
-            or user.groups.filter(name="Jefe de Almaceneros").exists()
+            or user_in_group(user, "Jefe de Almaceneros")
         )
 
-    @staticmethod
-    def _parse_fecha_param(value, field_name):
-        if not value:
-            return None
-
-        try:
-            return datetime.strptime(value, "%Y-%m-%d").date()
-        except ValueError as exc:
-            raise ValidationError(
-                {field_name: "La fecha debe tener formato YYYY-MM-DD."}
-            ) from exc
-
     @staticmethod
     def _duracion_horas_orden(orden):
-        hora_inicio = orden.get("hora_inicio")
-        hora_fin = orden.get("hora_fin")
-
-        if not hora_inicio or not hora_fin:
-            return None
-
-        minutos_inicio = hora_inicio.hour * 60 + hora_inicio.minute
-        minutos_fin = hora_fin.hour * 60 + hora_fin.minute
-        diferencia_minutos = minutos_fin - minutos_inicio
-
-        if diferencia_minutos <= 0:
-            return None
-
-        return Decimal(diferencia_minutos) / Decimal("60")
+        return duracion_horas_orden(orden.get("hora_inicio"), orden.get("hora_fin"))
 
     @action(detail=False, methods=["get"], url_path="gestion-matriz", permission_classes=[IsAuthenticated])
+    @cachear_resultado_gestion
     def gestion_matriz(self, request):
         if not self._puede_ver_gestion(request.user):
             raise PermissionDenied("No tienes permisos para visualizar la matriz de gestion.")
 
+        if solicita_asincrono(request):
+            return encolar_solicitud(request)
+
+        formato = formato_matriz(request)
+
         maquinarias_ot = (
             OrdenTrabajo.objects
             .filter(maquinaria__isnull=False)
@@ -1068,152 +907,57 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
 
         matriz = {}
 
-        historiales_repuesto = list(
-            HistorialUbicacionItem.objects
-            .select_related(
-                "item_unidad__item",
-                "item_unidad__compra_detalle",
-                "item_unidad__compra_detalle__compra",
+        celdas = (
+            VidaUtilRegistro.objects
+            .filter(maquinaria__isnull=False, vida_util_matriz__gt=0)
+            .values(
+                "item_id",
+                "item__codigo",
+                "item__nombre",
+                "item__tipo_insumo",
+                "maquinaria_id",
             )
-            .filter(
-                maquinaria__isnull=False,
-                estado=ItemUnidad.Estado.USADO,
+            .annotate(
+                suma_vida=Sum("vida_util_matriz"),
+                suma_costo=Sum("costo_total_pen"),
+                muestras=Count("id"),
             )
-            .order_by("item_unidad_id", "fecha_inicio", "id")
+            .order_by()
         )
 
-        grupo_repuesto = []
-        unidad_actual = None
-        for historial in historiales_repuesto:
-            if unidad_actual is None:
-                unidad_actual = historial.item_unidad_id
-
-            if historial.item_unidad_id != unidad_actual:
-                for index, actual in enumerate(grupo_repuesto):
-                    siguiente = grupo_repuesto[index + 1] if index + 1 < len(grupo_repuesto) else None
-                    vida_util = self._resolver_vida_util(
-                        actual.horometro_inicio,
-                        siguiente_inicio=getattr(siguiente, "horometro_inicio", None),
-                        fin=actual.horometro_fin,
-                    )
-                    self._registrar_vida_matriz(
-                        matriz=matriz,
-                        item_id=actual.item_unidad.item_id,
-                        item_codigo=actual.item_unidad.item.codigo,
-                        item_nombre=actual.item_unidad.item.nombre,
-                        tipo_insumo=actual.item_unidad.item.tipo_insumo,
-                        maquinaria_id=actual.maquinaria_id,
-                        vida_util=vida_util,
-                        costo_total=self._costo_total_pen_asociado_a_unidad(
-                            actual.item_unidad.compra_detalle
-                        ),
-                    )
-
-                grupo_repuesto = []
-                unidad_actual = historial.item_unidad_id
-
-            grupo_repuesto.append(historial)
-
-        if grupo_repuesto:
-            for index, actual in enumerate(grupo_repuesto):
-                siguiente = grupo_repuesto[index + 1] if index + 1 < len(grupo_repuesto) else None
-                vida_util = self._resolver_vida_util(
-                    actual.horometro_inicio,
-                    siguiente_inicio=getattr(siguiente, "horometro_inicio", None),
-                    fin=actual.horometro_fin,
-                )
-                self._registrar_vida_matriz(
-                    matriz=matriz,
-                    item_id=actual.item_unidad.item_id,
-                    item_codigo=actual.item_unidad.item.codigo,
-                    item_nombre=actual.item_unidad.item.nombre,
-                    tipo_insumo=actual.item_unidad.item.tipo_insumo,
-                    maquinaria_id=actual.maquinaria_id,
-                    vida_util=vida_util,
-                    costo_total=self._costo_total_pen_asociado_a_unidad(
-                        actual.item_unidad.compra_detalle
-                    ),
-                )
-
-        historiales_consumible = list(
-            HistorialConsumible.objects
-            .select_related(
-                "item",
-                "lote__compra_detalle",
-                "lote__compra_detalle__compra",
+        for celda in celdas:
+            fila = matriz.setdefault(
+                celda["item_id"],
+                {
+                    "item_id": celda["item_id"],
+                    "item_codigo": celda["item__codigo"],
+                    "item_nombre": celda["item__nombre"],
+                    "tipo_insumo": celda["item__tipo_insumo"],
+                    "values": {},
+                },
             )
-            .filter(maquinaria__isnull=False)
-            .order_by("lote_id", "fecha_inicio", "id")
-        )
-
-        grupo_consumible = []
-        lote_actual = None
-        for historial in historiales_consumible:
-            if lote_actual is None:
-                lote_actual = historial.lote_id
-
-            if historial.lote_id != lote_actual:
-                for actual in grupo_consumible:
-                    vida_util = self._resolver_vida_util(
-                        actual.horometro_inicio,
-                        fin=actual.horometro_fin,
-                    )
-                    self._registrar_vida_matriz(
-                        matriz=matriz,
-                        item_id=actual.item_id,
-                        item_codigo=actual.item.codigo,
-                        item_nombre=actual.item.nombre,
-                        tipo_insumo=actual.item.tipo_insumo,
-                        maquinaria_id=actual.maquinaria_id,
-                        vida_util=vida_util,
-                        costo_total=Decimal(actual.cantidad or 0)
-                        * self._costo_unitario_pen_por_detalle(
-                            actual.lote.compra_detalle if actual.lote_id else None
-                        ),
-                    )
-
-                grupo_consumible = []
-                lote_actual = historial.lote_id
-
-            grupo_consumible.append(historial)
-
-        if grupo_consumible:
-            for actual in grupo_consumible:
-                vida_util = self._resolver_vida_util(
-                    actual.horometro_inicio,
-                    fin=actual.horometro_fin,
-                )
-                self._registrar_vida_matriz(
-                    matriz=matriz,
-                    item_id=actual.item_id,
-                    item_codigo=actual.item.codigo,
-                    item_nombre=actual.item.nombre,
-                    tipo_insumo=actual.item.tipo_insumo,
-                    maquinaria_id=actual.maquinaria_id,
-                    vida_util=vida_util,
-                    costo_total=Decimal(actual.cantidad or 0)
-                    * self._costo_unitario_pen_por_detalle(
-                        actual.lote.compra_detalle if actual.lote_id else None
-                    ),
-                )
+            fila["values"][celda["maquinaria_id"]] = {
+                "sum": Decimal(celda["suma_vida"]),
+                "cost_sum": Decimal(celda["suma_costo"] or 0),
+                "count": celda["muestras"],
+            }
 
+        maquinaria_ids = [maquinaria["id"] for maquinaria in maquinarias]
+        maquinarias_listadas = set(maquinaria_ids)
         filas = []
+        celdas_matriz = {}
         total_muestras = 0
 
         for fila in sorted(matriz.values(), key=lambda row: (row["item_codigo"], row["item_nombre"])):
-            valores = {}
+            celdas_fila = {}
             muestras_fila = 0
 
-            for maquinaria in maquinarias:
-                llave_maquinaria = str(maquinaria["id"])
-                celda = fila["values"].get(llave_maquinaria)
-
-                if not celda or not celda["count"]:
-                    valores[llave_maquinaria] = None
+            for maquinaria_id, celda in fila["values"].items():
+                if maquinaria_id not in maquinarias_listadas or not celda["count"]:
                     continue
 
                 promedio = round(celda["sum"] / Decimal(celda["count"]), 2)
-                valores[llave_maquinaria] = {
+                celdas_fila[maquinaria_id] = {
                     "promedio_vida": float(promedio),
                     "costo_total": float(round(celda["cost_sum"], 2)),
                     "muestras": celda["count"],
@@ -1221,6 +965,7 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
                 muestras_fila += celda["count"]
 
             total_muestras += muestras_fila
+            celdas_matriz[fila["item_id"]] = celdas_fila
             filas.append(
                 {
                     "item_id": fila["item_id"],
@@ -1228,10 +973,14 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
                     "item_nombre": fila["item_nombre"],
                     "tipo_insumo": fila["tipo_insumo"],
                     "muestras": muestras_fila,
-                    "values": valores,
                 }
             )
 
+        if formato == FORMATO_COLUMNAR:
+            cuerpo = matriz_columnar(filas, maquinaria_ids, celdas_matriz, ("promedio_vida", "costo_total", "muestras"))
+        else:
+            cuerpo = {"rows": filas_con_valores(filas, maquinaria_ids, celdas_matriz)}
+
         return Response(
             {
                 "maquinarias": [
@@ -1242,7 +991,7 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
                     }
                     for maquinaria in maquinarias
                 ],
-                "rows": filas,
+                **cuerpo,
                 "meta": {
                     "total_items": len(filas),
                     "total_maquinarias": len(maquinarias),
@@ -1257,10 +1006,16 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
         url_path="gestion-matriz-proveedores-repuestos",
         permission_classes=[IsAuthenticated],
     )
+    @cachear_resultado_gestion
     def gestion_matriz_proveedores_repuestos(self, request):
         if not self._puede_ver_gestion(request.user):
             raise PermissionDenied("No tienes permisos para visualizar la matriz de proveedores por repuesto.")
 
+        if solicita_asincrono(request):
+            return encolar_solicitud(request)
+
+        formato = formato_matriz(request)
+
         proveedores_qs = (
             Proveedor.objects
             .filter(compras__detalles__item__isnull=False)
@@ -1277,190 +1032,89 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
             for proveedor in proveedores_qs
         ]
 
-        matriz = {}
+        proveedor_ids = [proveedor["id"] for proveedor in proveedores]
+        proveedores_listados = set(proveedor_ids)
 
-        historiales_repuesto = (
-            HistorialUbicacionItem.objects
-            .select_related(
-                "item_unidad__item",
-                "item_unidad__item__unidad_medida",
-                "item_unidad__compra_detalle",
-                "item_unidad__compra_detalle__compra",
-                "item_unidad__compra_detalle__compra__proveedor",
-            )
+        # Solo los items con muestras: el catalogo completo no se recorre.
+        celdas = (
+            VidaUtilRegistro.objects
             .filter(
-                item_unidad__item__tipo_insumo=Item.TipoInsumo.REPUESTO,
-                item_unidad__compra_detalle__compra__proveedor__isnull=False,
-                horometro_inicio__isnull=False,
-                horometro_fin__isnull=False,
-            )
-            .order_by("item_unidad__item__codigo", "item_unidad__item__nombre", "id")
-        )
-
-        for historial in historiales_repuesto:
-            vida_util = self._resolver_vida_util(
-                historial.horometro_inicio,
-                fin=historial.horometro_fin,
-            )
-            if vida_util is None or vida_util <= 0:
-                continue
-
-            detalle = historial.item_unidad.compra_detalle
-            proveedor = detalle.compra.proveedor if detalle and detalle.compra_id else None
-            if not proveedor:
-                continue
-
-            valor_unitario = self._valor_unitario_pen_por_detalle(detalle)
-            item = historial.item_unidad.item
-
-            fila = matriz.setdefault(
-                item.id,
-                {
-                    "item_id": item.id,
-                    "item_codigo": item.codigo,
-                    "item_nombre": item.nombre,
-                    "tipo_insumo": item.tipo_insumo,
-                    "unidad_simbolo": item.unidad_medida.simbolo if item.unidad_medida_id else "",
-                    "values": {},
-                },
-            )
-
-            llave_proveedor = str(proveedor.id)
-            celda = fila["values"].setdefault(
-                llave_proveedor,
-                {
-                    "sum_valor_unitario": Decimal("0.00"),
-                    "sum_vida_util": Decimal("0.00"),
-                    "count": 0,
-                },
+                Q(
+                    origen=VidaUtilRegistro.Origen.REPUESTO,
+                    item__tipo_insumo=Item.TipoInsumo.REPUESTO,
+                )
+                | Q(
+                    origen=VidaUtilRegistro.Origen.CONSUMIBLE,
+                    item__tipo_insumo=Item.TipoInsumo.CONSUMIBLE,
+                    orden_trabajo__isnull=False,
+                ),
+                proveedor__isnull=False,
+                vida_util__gt=0,
             )
-            celda["sum_valor_unitario"] += valor_unitario
-            celda["sum_vida_util"] += vida_util
-            celda["count"] += 1
-
-        historiales_consumible = (
-            HistorialConsumible.objects
-            .select_related(
-                "item",
-                "item__unidad_medida",
-                "lote__compra_detalle",
-                "lote__compra_detalle__compra",
-                "lote__compra_detalle__compra__proveedor",
+            .values(
+                "item_id",
+                "item__codigo",
+                "item__nombre",
+                "item__tipo_insumo",
+                "item__unidad_medida__simbolo",
+                "proveedor_id",
             )
-            .filter(
-                item__tipo_insumo=Item.TipoInsumo.CONSUMIBLE,
-                orden_trabajo__isnull=False,
-                lote__compra_detalle__compra__proveedor__isnull=False,
-                horometro_inicio__isnull=False,
-                horometro_fin__isnull=False,
+            .annotate(
+                suma_valor_unitario=Sum("valor_unitario_pen"),
+                suma_vida_util=Sum("vida_util"),
+                muestras=Count("id"),
             )
-            .order_by("item__codigo", "item__nombre", "id")
+            .order_by("item__codigo", "item__nombre", "item_id")
         )
 
-        for historial in historiales_consumible:
-            vida_util = self._resolver_vida_util(
-                historial.horometro_inicio,
-                fin=historial.horometro_fin,
-            )
-            if vida_util is None or vida_util <= 0:
-                continue
-
-            detalle = historial.lote.compra_detalle if historial.lote_id else None
-            proveedor = detalle.compra.proveedor if detalle and detalle.compra_id else None
-            if not proveedor:
+        filas_por_item = {}
+        celdas_matriz = {}
+        for celda in celdas:
+            if celda["proveedor_id"] not in proveedores_listados:
                 continue
 
-            valor_unitario = self._valor_unitario_pen_por_detalle(detalle)
-            item = historial.item
-
-            fila = matriz.setdefault(
-                item.id,
-                {
-                    "item_id": item.id,
-                    "item_codigo": item.codigo,
-                    "item_nombre": item.nombre,
-                    "tipo_insumo": item.tipo_insumo,
-                    "unidad_simbolo": item.unidad_medida.simbolo if item.unidad_medida_id else "",
-                    "values": {},
-                },
-            )
+            fila = filas_por_item.get(celda["item_id"])
+            if fila is None:
+                fila = filas_por_item[celda["item_id"]] = {
+                    "item_id": celda["item_id"],
+                    "item_codigo": celda["item__codigo"],
+                    "item_nombre": celda["item__nombre"],
+                    "tipo_insumo": celda["item__tipo_insumo"],
+                    "unidad_simbolo": celda["item__unidad_medida__simbolo"] or "",
+                    "muestras": 0,
+                }
 
-            llave_proveedor = str(proveedor.id)
-            celda = fila["values"].setdefault(
-                llave_proveedor,
-                {
-                    "sum_valor_unitario": Decimal("0.00"),
-                    "sum_vida_util": Decimal("0.00"),
-                    "count": 0,
-                },
+            promedio_valor_unitario = round(
+                Decimal(celda["suma_valor_unitario"] or 0) / Decimal(celda["muestras"]),
+                2,
             )
-            celda["sum_valor_unitario"] += valor_unitario
-            celda["sum_vida_util"] += vida_util
-            celda["count"] += 1
-
-        filas = []
-        total_muestras = 0
-        items = (
-            Item.objects
-            .select_related("unidad_medida")
-            .order_by("codigo", "nombre", "id")
-        )
-
-        for item in items:
-            fila = matriz.get(
-                item.id,
-                {
-                    "item_id": item.id,
-                    "item_codigo": item.codigo,
-                    "item_nombre": item.nombre,
-                    "tipo_insumo": item.tipo_insumo,
-                    "unidad_simbolo": item.unidad_medida.simbolo if item.unidad_medida_id else "",
-                    "values": {},
-                },
+            promedio_vida_util = round(
+                Decimal(celda["suma_vida_util"]) / Decimal(celda["muestras"]),
+                2,
             )
-            muestras_fila = 0
-            valores = {}
-
-            for proveedor in proveedores:
-                llave_proveedor = str(proveedor["id"])
-                celda = fila["values"].get(llave_proveedor)
-
-                if not celda or not celda["count"]:
-                    valores[llave_proveedor] = None
-                    continue
-
-                promedio_valor_unitario = round(
-                    celda["sum_valor_unitario"] / Decimal(celda["count"]),
-                    2,
-                )
-                promedio_vida_util = round(
-                    celda["sum_vida_util"] / Decimal(celda["count"]),
-                    2,
-                )
-                valores[llave_proveedor] = {
-                    "promedio_valor_unitario": float(promedio_valor_unitario),
-                    "promedio_vida_util": float(promedio_vida_util),
-                    "muestras": celda["count"],
-                }
-                muestras_fila += celda["count"]
+            celdas_matriz.setdefault(celda["item_id"], {})[celda["proveedor_id"]] = {
+                "promedio_valor_unitario": float(promedio_valor_unitario),
+                "promedio_vida_util": float(promedio_vida_util),
+                "muestras": celda["muestras"],
+            }
+            fila["muestras"] += celda["muestras"]
 
-            total_muestras += muestras_fila
-            filas.append(
-                {
-                    "item_id": fila["item_id"],
-                    "item_codigo": fila["item_codigo"],
-                    "item_nombre": fila["item_nombre"],
-                    "tipo_insumo": fila["tipo_insumo"],
-                    "unidad_simbolo": fila["unidad_simbolo"],
-                    "muestras": muestras_fila,
-                    "values": valores,
-                }
+        filas = list(filas_por_item.values())
+        total_muestras = sum(fila["muestras"] for fila in filas)
+        if formato == FORMATO_COLUMNAR:
+            cuerpo = matriz_columnar(
+                filas,
+                proveedor_ids,
+                celdas_matriz,
+                ("promedio_valor_unitario", "promedio_vida_util", "muestras"),
             )
+        else:
+            cuerpo = {"rows": filas_con_valores(filas, proveedor_ids, celdas_matriz)}
 
         return Response(
             {
                 "proveedores": proveedores,
-                "rows": filas,
+                **cuerpo,
                 "meta": {
                     "total_items": len(filas),
                     "total_proveedores": len(proveedores),
@@ -1470,15 +1124,19 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=["get"], url_path="gestion-historial-items", permission_classes=[IsAuthenticated])
+    @cachear_resultado_gestion
     def gestion_historial_items(self, request):
         if not self._puede_ver_gestion(request.user):
             raise PermissionDenied("No tienes permisos para visualizar el resumen de gestion.")
 
-        fecha_desde = self._parse_fecha_param(
+        if solicita_asincrono(request):
+            return encolar_solicitud(request)
+
+        fecha_desde = parse_fecha_param(
             request.query_params.get("fecha_desde"),
             "fecha_desde",
         )
-        fecha_hasta = self._parse_fecha_param(
+        fecha_hasta = parse_fecha_param(
             request.query_params.get("fecha_hasta"),
             "fecha_hasta",
         )
@@ -1488,74 +1146,50 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
                 {"fecha_hasta": "La fecha hasta debe ser posterior o igual a la fecha desde."}
             )
 
-        repuestos_qs = HistorialUbicacionItem.objects.filter(
-            item_unidad__item__isnull=False,
-            orden_trabajo__isnull=False,
-            horometro_fin__isnull=False,
-        )
-        consumibles_qs = HistorialConsumible.objects.filter(
-            item__isnull=False,
+        registros = VidaUtilRegistro.objects.filter(
             orden_trabajo__isnull=False,
             horometro_fin__isnull=False,
         )
 
         if fecha_desde:
-            repuestos_qs = repuestos_qs.filter(orden_trabajo__fecha__gte=fecha_desde)
-            consumibles_qs = consumibles_qs.filter(orden_trabajo__fecha__gte=fecha_desde)
+            registros = registros.filter(orden_trabajo__fecha__gte=fecha_desde)
 
         if fecha_hasta:
-            repuestos_qs = repuestos_qs.filter(orden_trabajo__fecha__lte=fecha_hasta)
-            consumibles_qs = consumibles_qs.filter(orden_trabajo__fecha__lte=fecha_hasta)
+            registros = registros.filter(orden_trabajo__fecha__lte=fecha_hasta)
 
         repuestos_cerrados = {}
         repuestos_valorizados = {}
         repuestos_duracion_horas = {}
-        for historial in repuestos_qs.select_related(
-            "item_unidad__item",
-            "item_unidad__compra_detalle",
-            "item_unidad__compra_detalle__compra",
-            "orden_trabajo",
-        ):
-            item_id = historial.item_unidad.item_id
-            repuestos_cerrados[item_id] = repuestos_cerrados.get(item_id, 0) + 1
-            repuestos_valorizados[item_id] = repuestos_valorizados.get(
-                item_id,
-                Decimal("0.00"),
-            ) + Decimal(
-                self._costo_unitario_pen_por_detalle(historial.item_unidad.compra_detalle)
-            )
-            duracion_horas = self._duracion_horas_orden(
-                {
-                    "hora_inicio": historial.orden_trabajo.hora_inicio,
-                    "hora_fin": historial.orden_trabajo.hora_fin,
-                }
+        for fila in (
+            registros
+            .filter(origen=VidaUtilRegistro.Origen.REPUESTO)
+            .values("item_id")
+            .annotate(
+                cerrados=Count("id"),
+                valorizado=Sum("costo_unitario_pen"),
+                duracion=Sum("duracion_ot_horas"),
             )
-            if duracion_horas is not None:
-                repuestos_duracion_horas[item_id] = repuestos_duracion_horas.get(
-                    item_id,
-                    Decimal("0.00"),
-                ) + Decimal(duracion_horas)
+            .order_by()
+        ):
+            repuestos_cerrados[fila["item_id"]] = fila["cerrados"]
+            repuestos_valorizados[fila["item_id"]] = Decimal(fila["valorizado"] or 0)
+            if fila["duracion"] is not None:
+                repuestos_duracion_horas[fila["item_id"]] = Decimal(fila["duracion"])
 
         consumibles_cerrados = {}
         consumibles_valorizados = {}
-        for historial in consumibles_qs.select_related(
-            "item",
-            "lote__compra_detalle",
-            "lote__compra_detalle__compra",
+        for fila in (
+            registros
+            .filter(origen=VidaUtilRegistro.Origen.CONSUMIBLE)
+            .values("item_id")
+            .annotate(
+                cantidad_total=Sum("cantidad"),
+                valorizado=Sum("costo_total_pen"),
+            )
+            .order_by()
         ):
-            item_id = historial.item_id
-            cantidad = Decimal(historial.cantidad or 0)
-            consumibles_cerrados[item_id] = consumibles_cerrados.get(
-                item_id,
-                Decimal("0"),
-            ) + cantidad
-            costo_unitario = self._costo_unitario_pen_por_detalle(
-                historial.lote.compra_detalle if historial.lote else None
-            )
-            consumibles_valorizados[item_id] = consumibles_valorizados.get(
-                item_id,
-                Decimal("0.00"),
-            ) + (cantidad * Decimal(costo_unitario))
+            consumibles_cerrados[fila["item_id"]] = Decimal(fila["cantidad_total"] or 0)
+            consumibles_valorizados[fila["item_id"]] = Decimal(fila["valorizado"] or 0)
 
         filas = []
         items_con_historial = 0
@@ -1621,69 +1255,45 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=["get"], url_path="gestion-bubble-repuestos", permission_classes=[IsAuthenticated])
+    @cachear_resultado_gestion
     def gestion_bubble_repuestos(self, request):
         if not self._puede_ver_gestion(request.user):
             raise PermissionDenied("No tienes permisos para visualizar el bubble chart de repuestos.")
 
+        if solicita_asincrono(request):
+            return encolar_solicitud(request)
+
         buckets = {}
 
-        historiales = (
-            HistorialUbicacionItem.objects
-            .select_related(
-                "item_unidad__item",
-                "item_unidad__compra_detalle",
-                "item_unidad__compra_detalle__compra",
-                "orden_trabajo",
-            )
+        agregados = (
+            VidaUtilRegistro.objects
             .filter(
-                item_unidad__item__tipo_insumo=Item.TipoInsumo.REPUESTO,
-                horometro_inicio__isnull=False,
-                horometro_fin__isnull=False,
-            )
-            .order_by("item_unidad__item__codigo", "item_unidad__item__nombre", "id")
-        )
-
-        for historial in historiales:
-            vida_util = self._resolver_vida_util(
-                historial.horometro_inicio,
-                fin=historial.horometro_fin,
-            )
-            if vida_util is None or vida_util <= 0:
-                continue
-
-            item = historial.item_unidad.item
-            bucket = buckets.setdefault(
-                item.id,
-                {
-                    "item_id": item.id,
-                    "item_codigo": item.codigo,
-                    "item_nombre": item.nombre,
-                    "sum_vida_util": Decimal("0.00"),
-                    "sum_costo_total_compra": Decimal("0.00"),
-                    "sum_duracion_ot": Decimal("0.00"),
-                    "muestras": 0,
-                    "muestras_con_duracion": 0,
-                },
-            )
-
-            bucket["sum_vida_util"] += vida_util
-            bucket["sum_costo_total_compra"] += self._costo_total_pen_asociado_a_unidad(
-                historial.item_unidad.compra_detalle
+                origen=VidaUtilRegistro.Origen.REPUESTO,
+                item__tipo_insumo=Item.TipoInsumo.REPUESTO,
+                vida_util__gt=0,
             )
-            bucket["muestras"] += 1
-
-            duracion_ot = None
-            if historial.orden_trabajo_id:
-                duracion_ot = self._duracion_horas_orden(
-                    {
-                        "hora_inicio": historial.orden_trabajo.hora_inicio,
-                        "hora_fin": historial.orden_trabajo.hora_fin,
-                    }
-                )
-
-            if duracion_ot is not None and duracion_ot > 0:
-                bucket["sum_duracion_ot"] += duracion_ot
-                bucket["muestras_con_duracion"] += 1
+            .values("item_id", "item__codigo", "item__nombre")
+            .annotate(
+                suma_vida_util=Sum("vida_util"),
+                suma_costo=Sum("costo_total_pen"),
+                suma_duracion=Sum("duracion_ot_horas", filter=Q(duracion_ot_horas__gt=0)),
+                muestras=Count("id"),
+                muestras_con_duracion=Count("id", filter=Q(duracion_ot_horas__gt=0)),
+            )
+            .order_by()
+        )
+
+        for fila in agregados:
+            buckets[fila["item_id"]] = {
+                "item_id": fila["item_id"],
+                "item_codigo": fila["item__codigo"],
+                "item_nombre": fila["item__nombre"],
+                "sum_vida_util": Decimal(fila["suma_vida_util"]),
+                "sum_costo_total_compra": Decimal(fila["suma_costo"] or 0),
+                "sum_duracion_ot": Decimal(fila["suma_duracion"] or 0),
+                "muestras": fila["muestras"],
+                "muestras_con_duracion": fila["muestras_con_duracion"],
+            }
 
         rows = []
         total_muestras = 0
@@ -1730,40 +1340,35 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=["get"], url_path="gestion-supervivencia-repuestos", permission_classes=[IsAuthenticated])
+    @cachear_resultado_gestion
     def gestion_supervivencia_repuestos(self, request):
         if not self._puede_ver_gestion(request.user):
             raise PermissionDenied("No tienes permisos para visualizar la curva de supervivencia.")
 
-        historiales_base = (
-            HistorialUbicacionItem.objects
-            .filter(
-                item_unidad__item__tipo_insumo=Item.TipoInsumo.REPUESTO,
-                maquinaria__isnull=False,
-                orden_trabajo__isnull=False,
-                horometro_fin__isnull=False,
-            )
-        )
+        if solicita_asincrono(request):
+            return encolar_solicitud(request)
 
         items_disponibles_qs = (
-            historiales_base
+            registros_supervivencia()
             .values(
-                "item_unidad__item_id",
-                "item_unidad__item__codigo",
-                "item_unidad__item__nombre",
+                "item_id",
+                "item__codigo",
+                "item__nombre",
             )
             .annotate(total_registros=Count("id"))
-            .order_by("item_unidad__item__codigo", "item_unidad__item__nombre", "item_unidad__item_id")
+            .order_by("item__codigo", "item__nombre", "item_id")
         )
 
         items_disponibles = [
             {
-                "id": row["item_unidad__item_id"],
-                "codigo": row["item_unidad__item__codigo"],
-                "nombre": row["item_unidad__item__nombre"],
+                "id": row["item_id"],
+                "codigo": row["item__codigo"],
+                "nombre": row["item__nombre"],
                 "total_registros": row["total_registros"],
             }
             for row in items_disponibles_qs
         ]
+        ids_disponibles = {item["id"] for item in items_disponibles}
 
         selected_item_id = request.query_params.get("item_id")
         if selected_item_id:
@@ -1776,46 +1381,54 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
         else:
             selected_item_id = None
 
-        if selected_item_id is not None and not any(
-            item["id"] == selected_item_id for item in items_disponibles
-        ):
+        if selected_item_id is not None and selected_item_id not in ids_disponibles:
             raise ValidationError(
                 {"item_id": "El item seleccionado no tiene historiales de repuesto utilizables."}
             )
 
-        curve = []
-        total_registros = 0
+        comparar_item_ids = self._ids_parametro(request, "item_ids")
+        comparar_maquinaria_ids = self._ids_parametro(request, "maquinaria_ids")
+        if comparar_item_ids - ids_disponibles:
+            raise ValidationError(
+                {"item_ids": "Algunos items no tienen historiales de repuesto utilizables."}
+            )
+
+        # Todas las curvas salen de una pasada y quedan cacheadas por item.
+        curvas = curvas_supervivencia(ids_disponibles)
+        for item in items_disponibles:
+            general = curvas[item["id"]]["general"] or {}
+            item["vida_mediana"] = general.get("vida_mediana")
+            item["censurados"] = general.get("censurados", 0)
+
         selected_item = next(
             (item for item in items_disponibles if item["id"] == selected_item_id),
             None,
         )
+        seleccionada = (curvas[selected_item_id]["general"] if selected_item_id is not None else None) or {}
+
+        items_por_id = {item["id"]: item for item in items_disponibles}
+        comparacion = []
+        for item_id in sorted(comparar_item_ids or ({selected_item_id} - {None})):
+            if comparar_maquinaria_ids:
+                por_maquinaria = curvas[item_id]["por_maquinaria"]
+                grupos = [
+                    (maquinaria_id, por_maquinaria[maquinaria_id])
+                    for maquinaria_id in sorted(comparar_maquinaria_ids)
+                    if maquinaria_id in por_maquinaria
+                ]
+            else:
+                grupos = [(None, curvas[item_id]["general"])]
 
-        if selected_item_id is not None:
-            eventos = list(
-                historiales_base
-                .filter(item_unidad__item_id=selected_item_id)
-                .values("horometro_fin")
-                .annotate(fallas=Count("id"))
-                .order_by("horometro_fin")
-            )
-
-            total_registros = sum(int(evento["fallas"] or 0) for evento in eventos)
-            restantes = total_registros
-
-            for evento in eventos:
-                fallas = int(evento["fallas"] or 0)
-                restantes = max(restantes - fallas, 0)
-                porcentaje_supervivencia = (
-                    (Decimal(restantes) / Decimal(total_registros)) * Decimal("100")
-                    if total_registros > 0
-                    else Decimal("0")
-                )
-                curve.append(
+            for maquinaria_id, curva in grupos:
+                comparacion.append(
                     {
-                        "horometro": float(evento["horometro_fin"]),
-                        "fallas": fallas,
-                        "cantidad_restante": restantes,
-                        "porcentaje_supervivencia": float(round(porcentaje_supervivencia, 2)),
+                        "item": items_por_id[item_id],
+                        "maquinaria_id": maquinaria_id,
+                        "curve": curva["curve"],
+                        "vida_mediana": curva["vida_mediana"],
+                        "total_registros": curva["total_registros"],
+                        "fallas": curva["fallas"],
+                        "censurados": curva["censurados"],
                     }
                 )
 
@@ -1823,135 +1436,128 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
             {
                 "items": items_disponibles,
                 "selected_item": selected_item,
-                "curve": curve,
+                "curve": seleccionada.get("curve", []),
+                "comparacion": comparacion,
                 "meta": {
-                    "total_registros": total_registros,
+                    "total_registros": seleccionada.get("total_registros", 0),
+                    "fallas": seleccionada.get("fallas", 0),
+                    "censurados": seleccionada.get("censurados", 0),
+                    "vida_mediana": seleccionada.get("vida_mediana"),
+                    "confianza": 0.95,
                 },
             }
         )
 
+    @staticmethod
+    def _ids_parametro(request, nombre):
+        valor = request.query_params.get(nombre) or ""
+        try:
+            return {int(parte) for parte in valor.split(",") if parte.strip()}
+        except ValueError as exc:
+            raise ValidationError({nombre: "Debe ser una lista de ids separados por coma."}) from exc
+
     @action(detail=False, methods=["get"], url_path="gestion-indicadores-maquinaria", permission_classes=[IsAuthenticated])
+    @cachear_resultado_gestion
     def gestion_indicadores_maquinaria(self, request):
         if not self._puede_ver_gestion(request.user):
             raise PermissionDenied("No tienes permisos para visualizar los indicadores de maquinaria.")
 
-        maquinarias = list(
-            Maquinaria.objects.all().order_by("codigo_maquina", "nombre", "id")
-        )
-        ordenes = list(
-            OrdenTrabajo.objects
-            .filter(maquinaria__isnull=False)
-            .values("id", "maquinaria_id", "fecha", "hora_inicio", "hora_fin")
-            .order_by("maquinaria_id", "fecha", "id")
-        )
+        if solicita_asincrono(request):
+            return encolar_solicitud(request)
+
+        fecha_desde = parse_fecha_param(request.query_params.get("fecha_desde"), "fecha_desde")
+        fecha_hasta = parse_fecha_param(request.query_params.get("fecha_hasta"), "fecha_hasta")
+        if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+            raise ValidationError(
+                {"fecha_hasta": "La fecha hasta debe ser posterior o igual a la fecha desde."}
+            )
 
-        fechas_por_maquinaria = {}
-        duraciones_por_maquinaria = {}
+        tipo_mantenimiento = request.query_params.get("tipo_mantenimiento") or None
+        if tipo_mantenimiento and tipo_mantenimiento not in ActividadTrabajo.TipoMantenimiento.values:
+            raise ValidationError({"tipo_mantenimiento": "El tipo de mantenimiento no es valido."})
 
-        for orden in ordenes:
-            maquinaria_id = orden["maquinaria_id"]
-            fechas_por_maquinaria.setdefault(maquinaria_id, []).append(orden["fecha"])
+        prioridad = request.query_params.get("prioridad") or None
+        prioridades_validas = {valor for valor, _ in OrdenTrabajo._meta.get_field("prioridad").choices}
+        if prioridad and prioridad not in prioridades_validas:
+            raise ValidationError({"prioridad": "La prioridad no es valida."})
 
-            duracion_horas = self._duracion_horas_orden(orden)
-            if duracion_horas is not None:
-                duraciones_por_maquinaria.setdefault(maquinaria_id, []).append(duracion_horas)
+        maquinarias = list(
+            Maquinaria.objects
+            .only("id", "codigo_maquina", "nombre", "centro_costos_pen")
+            .order_by("codigo_maquina", "nombre", "id")
+        )
+        indicadores, tendencia = indicadores_maquinaria(
+            ordenes_filtradas(
+                fecha_desde=fecha_desde,
+                fecha_hasta=fecha_hasta,
+                tipo_mantenimiento=tipo_mantenimiento,
+                prioridad=prioridad,
+            )
+        )
 
         rows = []
         for maquinaria in maquinarias:
-            fechas = fechas_por_maquinaria.get(maquinaria.id, [])
-            mtbf_dias = None
-            if len(fechas) >= 2:
-                diferencias = [
-                    Decimal((fechas[index] - fechas[index - 1]).days)
-                    for index in range(1, len(fechas))
-                ]
-                if diferencias:
-                    mtbf_dias = round(
-                        sum(diferencias, Decimal("0")) / Decimal(len(diferencias)),
-                        2,
-                    )
-
-            duraciones = duraciones_por_maquinaria.get(maquinaria.id, [])
-            mttr_horas = None
-            if duraciones:
-                mttr_horas = round(
-                    sum(duraciones, Decimal("0")) / Decimal(len(duraciones)),
-                    2,
-                )
-
-            centro_costos = round(maquinaria.calcular_centro_costos(), 2)
-
+            indicador = indicadores.get(maquinaria.id, {})
             rows.append(
                 {
                     "maquinaria_id": maquinaria.id,
                     "codigo": maquinaria.codigo_maquina,
                     "nombre": maquinaria.nombre,
-                    "mtbf_dias": float(mtbf_dias) if mtbf_dias is not None else None,
-                    "mttr_horas": float(mttr_horas) if mttr_horas is not None else None,
-                    "centro_costos": float(centro_costos),
+                    "total_ordenes": indicador.get("total_ordenes", 0),
+                    "mtbf_dias": indicador.get("mtbf_dias"),
+                    "mttr_horas": indicador.get("mttr_horas"),
+                    "centro_costos": float(round(maquinaria.centro_costos_pen, 2)),
                 }
             )
 
         return Response(
             {
                 "rows": rows,
+                "tendencia": tendencia,
                 "meta": {
                     "total_maquinarias": len(rows),
                     "maquinarias_con_mtbf": sum(1 for row in rows if row["mtbf_dias"] is not None),
                     "maquinarias_con_mttr": sum(1 for row in rows if row["mttr_horas"] is not None),
+                    "filtros": {
+                        "fecha_desde": fecha_desde,
+                        "fecha_hasta": fecha_hasta,
+                        "tipo_mantenimiento": tipo_mantenimiento,
+                        "prioridad": prioridad,
+                    },
                 },
             }
         )
-    
-    @staticmethod
-    def _monto_pen_por_detalle(monto, detalle):
-        if not detalle:
-            return Decimal("0.00")
 
-        monto = Decimal(monto)
-        if detalle.moneda == Compra.Moneda.PEN:
-            return monto
-
-        tipo_cambio = TipoCambioDiario.objects.filter(fecha=detalle.compra.fecha).first()
-        if not tipo_cambio:
+    def _monto_pen_por_detalle(self, monto, detalle):
+        if not detalle:
             return Decimal("0.00")
 
-        if detalle.moneda == Compra.Moneda.USD:
-            if tipo_cambio.compra_usd <= 0:
-                return Decimal("0.00")
-            return monto * tipo_cambio.compra_usd
-
-        if detalle.moneda == Compra.Moneda.EUR:
-            if tipo_cambio.compra_eur <= 0:
-                return Decimal("0.00")
-            return monto * tipo_cambio.compra_eur
-
-        return Decimal("0.00")
+        monto_pen = obtener_resolutor_tipo_cambio(self.request).monto_pen_por_detalle(
+            monto,
+            detalle,
+        )
+        return monto_pen if monto_pen is not None else Decimal("0.00")
 
-    @classmethod
-    def _costo_unitario_pen_por_detalle(cls, detalle):
+    def _costo_unitario_pen_por_detalle(self, detalle):
         if not detalle:
             return Decimal("0.00")
-        return cls._monto_pen_por_detalle(detalle.costo_unitario, detalle)
+        return self._monto_pen_por_detalle(detalle.costo_unitario, detalle)
 
-    @classmethod
-    def _valor_unitario_pen_por_detalle(cls, detalle):
+    def _valor_unitario_pen_por_detalle(self, detalle):
         if not detalle:
             return Decimal("0.00")
-        return cls._monto_pen_por_detalle(detalle.valor_unitario, detalle)
+        return self._monto_pen_por_detalle(detalle.valor_unitario, detalle)
 
-    @classmethod
-    def _costo_total_pen_por_detalle(cls, detalle):
+    def _costo_total_pen_por_detalle(self, detalle):
         if not detalle:
             return Decimal("0.00")
-        return cls._monto_pen_por_detalle(detalle.costo_total, detalle)
+        return self._monto_pen_por_detalle(detalle.costo_total, detalle)
 
-    @classmethod
-    def _costo_total_pen_asociado_a_unidad(cls, detalle):
+    def _costo_total_pen_asociado_a_unidad(self, detalle):
         if not detalle or not detalle.cantidad:
             return Decimal("0.00")
 
-        costo_total = cls._costo_total_pen_por_detalle(detalle)
+        costo_total = self._costo_total_pen_por_detalle(detalle)
         cantidad = Decimal(detalle.cantidad)
         if cantidad <= 0:
             return Decimal("0.00")
@@ -2048,12 +1654,12 @@ class MaquinariaViewSet(viewsets.ModelViewSet):
         })
 
 
-class TipoCambioDiarioViewSet(viewsets.ModelViewSet):
+class TipoCambioDiarioViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = TipoCambioDiario.objects.all().order_by("-fecha")
     serializer_class = TipoCambioDiarioSerializer
     permission_classes = [CompraPermission]
 
-class CompraViewSet(viewsets.ModelViewSet):
+class CompraViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         CompraDetalle.objects
         .select_related("compra", "compra__proveedor", "item", "unidad_medida")
@@ -2061,6 +1667,7 @@ class CompraViewSet(viewsets.ModelViewSet):
         .order_by("-compra__fecha")
     )
     permission_classes = [CompraPermission]
+    paginacion_obligatoria = True
 
     def get_serializer_class(self):
         if self.action in ["create", "batch"]:
@@ -2086,8 +1693,13 @@ class CompraViewSet(viewsets.ModelViewSet):
         except Compra.DoesNotExist:
             return Response({"detail": "Compra no encontrada."}, status=status.HTTP_404_NOT_FOUND)
 
+        if solicita_asincrono(request):
+            return encolar_solicitud(request)
+
         with transaction.atomic():
             detalles = list(compra.detalles.select_related("item"))
+            # QuerySet.delete no pasa por los hooks que mantienen el centro de costos.
+            maquinaria_ids = maquinarias_con_compra_detalles([detalle.id for detalle in detalles])
 
             for detalle in detalles:
                 item = detalle.item
@@ -2097,6 +1709,7 @@ class CompraViewSet(viewsets.ModelViewSet):
                     HistorialUbicacionItem.objects.filter(item_unidad__in=unidades).delete()
                     MovimientoRepuesto.objects.filter(item_unidad__in=unidades).delete()
                     unidades.delete()
+                    refrescar_saldos_unidades([item.id])
                 else:
                     lotes = LoteConsumible.objects.filter(compra_detalle=detalle)
                     HistorialConsumible.objects.filter(lote__in=lotes).delete()
@@ -2106,11 +1719,12 @@ class CompraViewSet(viewsets.ModelViewSet):
                 detalle.delete()
 
             compra.delete()
+            refrescar_centro_costos(maquinaria_ids)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class OrdenCompraViewSet(viewsets.ModelViewSet):
+class OrdenCompraViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         OrdenCompra.objects
         .select_related("emitido_por", "confirmado_por")
@@ -2180,7 +1794,7 @@ class OrdenCompraViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(orden).data)
 
 
-class OrdenRequerimientoViewSet(viewsets.ModelViewSet):
+class OrdenRequerimientoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         OrdenRequerimiento.objects
         .select_related(
@@ -2316,61 +1930,17 @@ class OrdenRequerimientoViewSet(viewsets.ModelViewSet):
             )
 
     def _entregar_consumibles(self, orden, detalle, tecnico):
-        restante = Decimal(detalle.cantidad)
-        historiales = list(
-            HistorialConsumible.objects
-            .select_related("lote", "almacen", "item", "unidad_medida")
-            .filter(
+        asignar_fifo(
+            HistorialConsumible.objects.filter(
                 item=detalle.item,
                 almacen__isnull=False,
-                fecha_fin__isnull=True,
                 cantidad__gt=0,
-            )
-            .order_by("fecha_inicio", "id")
+            ),
+            detalle.cantidad,
+            f"No hay stock suficiente en almacén para {detalle.item.codigo}.",
+            destino={"trabajador": tecnico, "orden_trabajo": orden.trabajo},
         )
 
-        disponible_total = sum(Decimal(h.cantidad) for h in historiales)
-        if disponible_total < restante:
-            raise ValidationError(
-                f"No hay stock suficiente en almacén para {detalle.item.codigo}."
-            )
-
-        now = timezone.now()
-        for historial in historiales:
-            if restante <= 0:
-                break
-
-            cantidad_historial = Decimal(historial.cantidad)
-            mover = min(cantidad_historial, restante)
-
-            historial.cerrar(fecha=now, cantidad=mover)
-
-            sobrante = cantidad_historial - mover
-            if sobrante > 0:
-                historial_restante = HistorialConsumible.objects.create(
-                    lote=historial.lote,
-                    item=historial.item,
-                    cantidad=sobrante,
-                    unidad_medida=historial.unidad_medida,
-                    almacen=historial.almacen,
-                    orden_trabajo=historial.orden_trabajo,
-                    horometro_inicio=historial.horometro_inicio,
-                )
-                HistorialConsumible.objects.filter(pk=historial_restante.pk).update(
-                    fecha_inicio=historial.fecha_inicio,
-                    fecha_fin=None,
-                )
-
-            HistorialConsumible.objects.create(
-                lote=historial.lote,
-                item=historial.item,
-                cantidad=mover,
-                unidad_medida=historial.unidad_medida,
-                trabajador=tecnico,
-                orden_trabajo=orden.trabajo,
-            )
-            restante -= mover
-
     @action(detail=True, methods=["post"])
     def cambiar_estado(self, request, pk=None):
         orden = self.get_object()
@@ -2474,7 +2044,7 @@ class OrdenRequerimientoViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(orden).data)
 
 
-class TrabajadorViewSet(viewsets.ModelViewSet):
+class TrabajadorViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Trabajador.objects.all()
     serializer_class = TrabajadorAdminSerializer
     permission_classes = [CatalogoPermission]
@@ -2512,23 +2082,27 @@ class MeView(APIView):
         serializer = MeSerializer(request.user)
         return Response(serializer.data)
     
-class OrdenTrabajoViewSet(viewsets.ModelViewSet):
+class OrdenTrabajoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = OrdenTrabajo.objects.all()
     serializer_class = OrdenTrabajoSerializer
     permission_classes = [TrabajoPermission]
+    paginacion_obligatoria = True
 
     def get_queryset(self):
         queryset = (
             OrdenTrabajo.objects
             .select_related("maquinaria")
-            .prefetch_related(
-                "tecnicos",
+            .prefetch_related("tecnicos")
+            .all()
+        )
+        if self.campo_solicitado("actividades"):
+            queryset = queryset.prefetch_related(
                 Prefetch(
                     "actividades",
                     queryset=(
                         ActividadTrabajo.objects
                         .prefetch_related(
-                            "evidencias",
+                            *(["evidencias"] if self.campo_solicitado("actividades.evidencias") else []),
                             Prefetch(
                                 "repuestos",
                                 queryset=MovimientoRepuesto.objects.select_related(
@@ -2549,11 +2123,9 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
                     ),
                 ),
             )
-            .all()
-        )
         user = self.request.user
 
-        if user.groups.filter(name="Tecnico").exists():
+        if user_in_group(user, "Tecnico"):
             try:
                 trabajador = user.perfil.trabajador
             except PerfilUsuario.DoesNotExist:
@@ -2574,7 +2146,7 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
 
     @staticmethod
     def _assert_user_is_assigned_tecnico(user, orden):
-        if not user.groups.filter(name="Tecnico").exists():
+        if not user_in_group(user, "Tecnico"):
             raise PermissionDenied("Solo el tecnico asignado puede completar actividades")
 
         try:
@@ -2741,7 +2313,7 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
-class ActividadTrabajoViewSet(viewsets.ModelViewSet):
+class ActividadTrabajoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = ActividadTrabajo.objects.all()
     serializer_class = ActividadTrabajoSerializer
     permission_classes = [ActividadTrabajoPermission]
@@ -2759,7 +2331,7 @@ class ActividadTrabajoViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         user = self.request.user
 
-        if user.groups.filter(name="Tecnico").exists():
+        if user_in_group(user, "Tecnico"):
             try:
                 trabajador = user.perfil.trabajador
             except PerfilUsuario.DoesNotExist:
@@ -2779,7 +2351,7 @@ class ActividadTrabajoViewSet(viewsets.ModelViewSet):
             serializer.save()
             return
 
-        if user.groups.filter(name="Tecnico").exists():
+        if user_in_group(user, "Tecnico"):
             try:
                 trabajador = user.perfil.trabajador
             except PerfilUsuario.DoesNotExist:
@@ -2805,7 +2377,7 @@ class ActividadTrabajoViewSet(viewsets.ModelViewSet):
             if not can_manage_planned_activities(user):
                 raise PermissionDenied(self._planned_activity_message())
 
-        if user.groups.filter(name="Tecnico").exists():
+        if user_in_group(user, "Tecnico"):
             try:
                 trabajador = user.perfil.trabajador
             except PerfilUsuario.DoesNotExist:
@@ -2822,7 +2394,7 @@ class ActividadTrabajoViewSet(viewsets.ModelViewSet):
             raise PermissionDenied(self._planned_activity_message())
 
         user = self.request.user
-        if user.groups.filter(name="Tecnico").exists():
+        if user_in_group(user, "Tecnico"):
             try:
                 trabajador = user.perfil.trabajador
             except PerfilUsuario.DoesNotExist:
@@ -2891,7 +2463,7 @@ class ActividadTrabajoViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(actividad)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class MovimientoRepuestoViewSet(viewsets.ModelViewSet):
+class MovimientoRepuestoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = MovimientoRepuesto.objects.all()
     serializer_class = MovimientoRepuestoSerializer
     permission_classes = [CambioEquipoPermission]
@@ -2912,7 +2484,7 @@ class MovimientoRepuestoViewSet(viewsets.ModelViewSet):
 
         return queryset
 
-class MovimientoConsumibleViewSet(viewsets.ModelViewSet):
+class MovimientoConsumibleViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = MovimientoConsumible.objects.all()
     serializer_class = MovimientoConsumibleSerializer
     permission_classes = [CambioEquipoPermission]
@@ -2934,7 +2506,7 @@ class MovimientoConsumibleViewSet(viewsets.ModelViewSet):
 
         return queryset
 
-class TrabajadorRegistroViewSet(viewsets.ModelViewSet):
+class TrabajadorRegistroViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Trabajador.objects.all()
     serializer_class = TrabajadorConCodigoSerializer
     permission_classes = [IsAdmin]
@@ -2955,32 +2527,33 @@ class RegistroUsuarioView(APIView):
         serializer.save()
         return Response({"message": "Usuario creado correctamente"})
 
-class ProveedorViewSet(viewsets.ModelViewSet):
+class ProveedorViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Proveedor.objects.all()
     serializer_class = ProveedorSerializer
     permission_classes = [CatalogoPermission]
 
 
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all().order_by("nombre")
     serializer_class = ClienteSerializer
     permission_classes = [CatalogoPermission]
 
 
-class UbicacionClienteViewSet(viewsets.ModelViewSet):
+class UbicacionClienteViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = UbicacionCliente.objects.select_related("cliente").all().order_by("cliente__nombre", "nombre")
     serializer_class = UbicacionClienteSerializer
     permission_classes = [CatalogoPermission]
 
 
-class SistemaViewSet(viewsets.ModelViewSet):
+class SistemaViewSet(CatalogoCacheadoMixin, InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Sistema.objects.all().order_by("nombre", "id")
     serializer_class = SistemaSerializer
     permission_classes = [EstandarizacionPermission]
+    pagination_class = None  # Catalogo pequeno: siempre completo.
 
 
-class ActividadChecklistViewSet(viewsets.ModelViewSet):
+class ActividadChecklistViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         ActividadChecklist.objects
         .select_related("item")
@@ -2993,7 +2566,7 @@ class ActividadChecklistViewSet(viewsets.ModelViewSet):
     filterset_fields = ["tipo_respuesta", "activo", "item"]
 
 
-class ChecklistViewSet(viewsets.ModelViewSet):
+class ChecklistViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         Checklist.objects
         .select_related("creado_por")
@@ -3012,7 +2585,7 @@ class ChecklistViewSet(viewsets.ModelViewSet):
     filterset_fields = ["estado"]
 
 
-class ChecklistActividadViewSet(viewsets.ModelViewSet):
+class ChecklistActividadViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         ChecklistActividad.objects
         .select_related("checklist", "actividad", "actividad__item", "sistema")
@@ -3025,7 +2598,7 @@ class ChecklistActividadViewSet(viewsets.ModelViewSet):
     filterset_fields = ["checklist", "actividad", "sistema"]
 
 
-class ChecklistEjecucionViewSet(viewsets.ModelViewSet):
+class ChecklistEjecucionViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         ChecklistEjecucion.objects
         .select_related("checklist", "realizado_por", "maquinaria", "lugar")
@@ -3039,7 +2612,7 @@ class ChecklistEjecucionViewSet(viewsets.ModelViewSet):
     filterset_fields = ["checklist", "estado", "realizado_por"]
 
 
-class ChecklistRespuestaViewSet(viewsets.ModelViewSet):
+class ChecklistRespuestaViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         ChecklistRespuesta.objects
         .select_related(
@@ -3056,9 +2629,10 @@ class ChecklistRespuestaViewSet(viewsets.ModelViewSet):
     permission_classes = [EstandarizacionPermission]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["ejecucion", "checklist_actividad"]
+    paginacion_obligatoria = True
 
 
-class EventoViewSet(viewsets.ModelViewSet):
+class EventoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         Evento.objects
         .select_related("estandarizacion")
@@ -3071,7 +2645,7 @@ class EventoViewSet(viewsets.ModelViewSet):
     filterset_fields = ["estandarizacion"]
 
 
-class AsistenciaViewSet(viewsets.ModelViewSet):
+class AsistenciaViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         Asistencia.objects
         .select_related("trabajador", "evento")
@@ -3084,7 +2658,7 @@ class AsistenciaViewSet(viewsets.ModelViewSet):
     filterset_fields = ["evento", "trabajador", "asistencia"]
 
 
-class TareaPorEstandarizarViewSet(viewsets.ModelViewSet):
+class TareaPorEstandarizarViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         TareaPorEstandarizar.objects
         .select_related("item")
@@ -3095,7 +2669,7 @@ class TareaPorEstandarizarViewSet(viewsets.ModelViewSet):
     permission_classes = [EstandarizacionPermission]
 
 
-class ReporteOrdenViewSet(viewsets.ModelViewSet):
+class ReporteOrdenViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         ReporteOrden.objects
         .select_related("orden_trabajo", "orden_trabajo__maquinaria")
@@ -3128,7 +2702,7 @@ class ReporteOrdenViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class ReporteIPERCViewSet(viewsets.ModelViewSet):
+class ReporteIPERCViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         ReporteIPERC.objects
         .select_related(
@@ -3152,7 +2726,7 @@ class ReporteIPERCViewSet(viewsets.ModelViewSet):
     filterset_fields = ["orden_trabajo", "motivo"]
 
 
-class IPERCViewSet(viewsets.ModelViewSet):
+class IPERCViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         IPERC.objects
         .select_related("reporte_iperc")
@@ -3166,7 +2740,7 @@ class IPERCViewSet(viewsets.ModelViewSet):
     filterset_fields = ["reporte_iperc"]
 
 
-class GestionCambioViewSet(viewsets.ModelViewSet):
+class GestionCambioViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         GestionCambio.objects
         .select_related("iperc", "iperc__reporte_iperc", "creado_por")
@@ -3183,7 +2757,7 @@ class GestionCambioViewSet(viewsets.ModelViewSet):
         serializer.save(creado_por=self.request.user)
 
 
-class SecuenciaControlRiesgoViewSet(viewsets.ModelViewSet):
+class SecuenciaControlRiesgoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         SecuenciaControlRiesgo.objects
         .select_related("reporte_iperc")
@@ -3196,7 +2770,7 @@ class SecuenciaControlRiesgoViewSet(viewsets.ModelViewSet):
     filterset_fields = ["reporte_iperc"]
 
 
-class MedidaCorrectivaViewSet(viewsets.ModelViewSet):
+class MedidaCorrectivaViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         MedidaCorrectiva.objects
         .select_related("reporte_iperc", "supervisor")
@@ -3209,7 +2783,7 @@ class MedidaCorrectivaViewSet(viewsets.ModelViewSet):
     filterset_fields = ["reporte_iperc", "supervisor"]
 
 
-class DetalleSupervisorViewSet(viewsets.ModelViewSet):
+class DetalleSupervisorViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         DetalleSupervisor.objects
         .select_related("reporte_orden", "reporte_iperc")
@@ -3233,7 +2807,7 @@ class DetalleSupervisorViewSet(viewsets.ModelViewSet):
             instance.reporte_orden.ensure_supervisor_slots()
 
 
-class EncabezadoDocumentoEstandarizacionViewSet(viewsets.ModelViewSet):
+class EncabezadoDocumentoEstandarizacionViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         EncabezadoDocumentoEstandarizacion.objects
         .select_related("revision", "tarea_por_estandarizar", "creado_por")
@@ -3246,7 +2820,7 @@ class EncabezadoDocumentoEstandarizacionViewSet(viewsets.ModelViewSet):
     filterset_fields = ["tarea_por_estandarizar"]
 
 
-class DetalleDocumentoEstandarizadoViewSet(viewsets.ModelViewSet):
+class DetalleDocumentoEstandarizadoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         DetalleDocumentoEstandarizado.objects
         .select_related("encabezado_documento", "encabezado_documento__tarea_por_estandarizar")
@@ -3350,7 +2924,7 @@ class DetalleDocumentoEstandarizadoViewSet(viewsets.ModelViewSet):
         return Response(output.data, status=status.HTTP_201_CREATED)
 
 
-class ConexionDetalleDocumentoViewSet(viewsets.ModelViewSet):
+class ConexionDetalleDocumentoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = (
         ConexionDetalleDocumento.objects
         .select_related(
@@ -3368,32 +2942,39 @@ class ConexionDetalleDocumentoViewSet(viewsets.ModelViewSet):
     filterset_fields = ["documento", "origen", "destino"]
 
 
-class DimensionViewSet(viewsets.ModelViewSet):
+class DimensionViewSet(CatalogoCacheadoMixin, InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Dimension.objects.all().order_by("nombre")
     serializer_class = DimensionSerializer
     permission_classes = [CatalogoPermission]
+    pagination_class = None  # Catalogo pequeno: siempre completo.
 
 
-class UnidadMedidaViewSet(viewsets.ModelViewSet):
+class UnidadMedidaViewSet(CatalogoCacheadoMixin, InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = UnidadMedida.objects.select_related("dimension").all().order_by("nombre")
     serializer_class = UnidadMedidaSerializer
     permission_classes = [CatalogoPermission]
+    pagination_class = None  # Catalogo pequeno: siempre completo.
 
 
-class UnidadRelacionViewSet(viewsets.ModelViewSet):
+class UnidadRelacionViewSet(CatalogoCacheadoMixin, InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = UnidadRelacion.objects.select_related(
         "dimension",
-        "unidad_base",
-        "unidad_relacionada",
+        "unidad_base__dimension",
+        "unidad_relacionada__dimension",
     ).all().order_by("dimension__nombre")
     serializer_class = UnidadRelacionSerializer
     permission_classes = [CatalogoPermission]
+    pagination_class = None  # Catalogo pequeno: siempre completo.
 
 class CatalogosView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        return Response({
+        return respuesta_catalogo(request, "catalogos", self._construir)
+
+    @staticmethod
+    def _construir():
+        return {
             "orden_trabajo": {
                 "prioridad": OrdenTrabajo._meta.get_field("prioridad").choices,
                 "lugar": OrdenTrabajo.Lugar.choices,
@@ -3413,23 +2994,42 @@ class CatalogosView(APIView):
                 many=True
             ).data,
             "unidades_medida": UnidadMedidaSerializer(
-                UnidadMedida.objects.all(),
+                UnidadMedida.objects.select_related("dimension"),
                 many=True
             ).data,
             "relaciones_unidad": UnidadRelacionSerializer(
-                UnidadRelacion.objects.all(),
+                UnidadRelacion.objects.select_related(
+                    "dimension",
+                    "unidad_base__dimension",
+                    "unidad_relacionada__dimension",
+                ),
                 many=True
             ).data,
-        })
+        }
 
 
 
-class ItemGrupoViewSet(viewsets.ModelViewSet):
+class ItemGrupoViewSet(InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = ItemGrupo.objects.all().prefetch_related("items__item", "items__unidad_medida").order_by("-created_at")
     serializer_class = ItemGrupoSerializer
     permission_classes = [ItemPermission]
     
-class AlmacenViewSet(viewsets.ModelViewSet):
+class AlmacenViewSet(CatalogoCacheadoMixin, InstrumentacionMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Almacen.objects.all().order_by("nombre")
     serializer_class = AlmacenSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = None  # Catalogo pequeno: siempre completo.
+
+
+class TareaAsincronaViewSet(viewsets.ReadOnlyModelViewSet):
+    """Estado de las tareas encoladas con ``?async=1``; cada usuario ve las suyas."""
+
+    queryset = TareaAsincrona.objects.all()
+    serializer_class = TareaAsincronaSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(creado_por=self.request.user)
@@ -90,7 +90,7 @@ if USE_CLOUDINARY:
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "app.authentication.RolesJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -98,14 +98,23 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend"
     ],
+    "DEFAULT_PAGINATION_CLASS": "app.pagination.CursorPaginacion",
 }
 
+# Con True, todos los listados se paginan aunque el cliente no envie cursor/page_size.
+PAGINACION_CURSOR_OBLIGATORIA = os.environ.get("PAGINACION_CURSOR_OBLIGATORIA", "False") == "True"
+
+# Instrumentacion opcional: consultas, tiempos y Server-Timing por vista; resumen en /api/_perf/.
+PERF_INSTRUMENTACION = os.environ.get("PERF_INSTRUMENTACION", "False") == "True"
+PERF_VENTANA = int(os.environ.get("PERF_VENTANA", "500"))
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    "app.perf.InstrumentacionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -150,8 +159,15 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
 
     "TOKEN_TYPE_CLAIM": "token_type",
+
+    "TOKEN_OBTAIN_SERIALIZER": "app.authentication.RolesTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "app.authentication.RolesTokenRefreshSerializer",
 }
 
+# Con True, el access token lleva los grupos del usuario y la autorizacion no los consulta.
+# Un cambio de roles se aplica al siguiente refresh (como maximo ACCESS_TOKEN_LIFETIME).
+JWT_ROLES_EN_TOKEN = os.environ.get("JWT_ROLES_EN_TOKEN", "False") == "True"
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -165,6 +181,21 @@ DATABASES = {
     )
 }
 
+# Con CACHE_DIR la cache (catalogos, tableros de gestion, tipos de cambio) se
+# guarda en disco y la comparten todos los workers del host; sin el, cada
+# proceso usa su propia memoria local.
+CACHE_DIR = os.environ.get("CACHE_DIR")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+        }
+        if CACHE_DIR
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
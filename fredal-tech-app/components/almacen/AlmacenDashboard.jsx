@@ -154,7 +154,7 @@ export default function AlmacenDashboard() {
   const itemsQuery = useQuery({
     queryKey: ['almacen-mobile-items', itemView],
     queryFn: async () => {
-      const { data } = await itemAPI.list({ vista: itemView });
+      const { data } = await itemAPI.listAll({ vista: itemView });
       return parseCollection(data);
     },
     refetchInterval: 5000,
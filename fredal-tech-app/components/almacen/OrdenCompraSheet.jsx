@@ -42,7 +42,7 @@ export default function OrdenCompraSheet({ visible, onClose, onCreated }) {
   const itemsQuery = useQuery({
     queryKey: ['orden-compra-mobile-form-items'],
     queryFn: async () => {
-      const { data } = await itemAPI.list();
+      const { data } = await itemAPI.listAll();
       return parseOptions(data).filter((item) => item?.activo !== false);
     },
     enabled: visible,
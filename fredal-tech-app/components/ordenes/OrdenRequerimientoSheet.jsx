@@ -89,7 +89,7 @@ export default function OrdenRequerimientoSheet({
   const itemsQuery = useQuery({
     queryKey: ['orden-requerimiento-mobile-form-items'],
     queryFn: async () => {
-      const { data } = await itemAPI.list();
+      const { data } = await itemAPI.listAll();
       return parseOptions(data).filter((item) => item?.activo !== false);
     },
     enabled: visible,
@@ -4,11 +4,14 @@ import { trabajoAPI } from '../lib/api';
 
 export const TRABAJOS_KEY = ['trabajos'];
 
+// La lista solo muestra tipos de actividad e ítems: las evidencias se cargan en la ficha.
+const LISTADO_PARAMS = { omit: 'actividades.evidencias' };
+
 export const useTrabajos = (params) =>
   useQuery({
     queryKey: [...TRABAJOS_KEY, params],
     queryFn: async () => {
-      const { data } = await trabajoAPI.list(params);
+      const { data } = await trabajoAPI.listAll({ ...LISTADO_PARAMS, ...params });
       return data;
     },
     refetchInterval: 5000,
@@ -38,6 +38,29 @@ api.interceptors.response.use(
   }
 );
 
+// ── Listados paginados ────────────────────────────────────────────
+// Items y trabajos siempre responden paginados por cursor; listAll recorre
+// las paginas cuando la pantalla necesita el listado completo.
+const LIST_ALL_PAGE_SIZE = 500;
+
+const cursorDe = (next) => {
+  const match = next && next.match(/[?&]cursor=([^&]+)/);
+  return match ? decodeURIComponent(match[1]) : null;
+};
+
+const listarTodo = async (url, params = {}) => {
+  const results = [];
+  let cursor = null;
+  do {
+    const { data } = await api.get(url, {
+      params: { page_size: LIST_ALL_PAGE_SIZE, ...params, ...(cursor ? { cursor } : {}) },
+    });
+    results.push(...(data?.results ?? data ?? []));
+    cursor = cursorDe(data?.next);
+  } while (cursor);
+  return { data: results };
+};
+
 // ── Auth ──────────────────────────────────────────────────────────
 export const authAPI = {
   login: async (username, password) => {
@@ -66,6 +89,7 @@ export const registroAPI = {
 // ── Trabajos ──────────────────────────────────────────────────────
 export const trabajoAPI = {
   list:     (params) => api.get('/api/trabajos/', { params }),
+  listAll:  (params) => listarTodo('/api/trabajos/', params),
   create:   (data) => api.post('/api/trabajos/', data),
   retrieve: (id)     => api.get(`/api/trabajos/${id}/`),
   patch:    (id, data) => api.patch(`/api/trabajos/${id}/`, data),
@@ -116,6 +140,7 @@ export const actividadAPI = {
 // ── Items ─────────────────────────────────────────────────────────
 export const itemAPI = {
   list:               (params)  => api.get('/api/items/', { params }),
+  listAll:            (params)  => listarTodo('/api/items/', params),
   retrieve:           (id)      => api.get(`/api/items/${id}/`),
   unidadesAsignables: (id, params) => api.get(`/api/items/${id}/unidades_asignables/`, { params }),
   lotesDisponibles:   (id, params) => api.get(`/api/items/${id}/lotes_disponibles/`, { params }),
@@ -92,7 +92,7 @@ export default function ChecklistPage() {
         checklistAPI.list(),
         actividadChecklistAPI.list(),
         sistemaAPI.list(),
-        itemAPI.list(),
+        itemAPI.listAll(),
       ]);
 
       setEjecuciones(normalizeCollection(ejecucionesResponse));
@@ -8,10 +8,17 @@ import CompraForm from "@/components/compras/CompraForm";
 import TipoCambioModal from "@/components/compras/TipoCambioModal";
 import OrdenCompraTable from "@/components/ordenes/OrdenCompraTable";
 
+// Registros por pagina del listado de compras (paginacion por cursor de la API).
+const PAGE_SIZE = 200;
+
+const cursorDe = (next) => (next ? new URL(next).searchParams.get("cursor") : null);
+
 export default function ComprasPage() {
   const [view, setView] = useState("registros");
   const [refresh, setRefresh] = useState(false);
   const [compras, setCompras] = useState([]);
+  const [siguienteCursor, setSiguienteCursor] = useState(null);
+  const [cargandoMas, setCargandoMas] = useState(false);
   const [ordenesCompra, setOrdenesCompra] = useState([]);
   const [loading, setLoading] = useState(true);
   const [deletingCompraId, setDeletingCompraId] = useState(null);
@@ -20,11 +27,25 @@ export default function ComprasPage() {
     if (!silent) setLoading(true);
     try {
       const [comprasRes, ordenesRes] = await Promise.all([
-        compraAPI.list(),
+        compraAPI.list({ page_size: PAGE_SIZE }),
         ordenCompraAPI.list(),
       ]);
 
-      setCompras(comprasRes.data || []);
+      const primeraPagina = comprasRes.data?.results || [];
+      if (silent) {
+        // El refresco automatico solo relee la primera pagina y conserva las ya cargadas.
+        setCompras((actuales) => {
+          const ids = new Set(primeraPagina.map((compra) => compra.id));
+          return [
+            ...primeraPagina,
+            ...actuales.slice(PAGE_SIZE).filter((compra) => !ids.has(compra.id)),
+          ];
+        });
+        setSiguienteCursor((actual) => actual ?? cursorDe(comprasRes.data?.next));
+      } else {
+        setCompras(primeraPagina);
+        setSiguienteCursor(cursorDe(comprasRes.data?.next));
+      }
       setOrdenesCompra(ordenesRes.data || []);
     } catch (error) {
       console.error("Error cargando compras:", error);
@@ -33,6 +54,20 @@ export default function ComprasPage() {
     }
   }, []);
 
+  const handleCargarMas = async () => {
+    if (!siguienteCursor) return;
+    setCargandoMas(true);
+    try {
+      const { data } = await compraAPI.list({ page_size: PAGE_SIZE, cursor: siguienteCursor });
+      setCompras((actuales) => [...actuales, ...(data?.results || [])]);
+      setSiguienteCursor(cursorDe(data?.next));
+    } catch (error) {
+      console.error("Error cargando mas compras:", error);
+    } finally {
+      setCargandoMas(false);
+    }
+  };
+
   useEffect(() => {
     loadData();
   }, [loadData, refresh]);
@@ -117,11 +152,25 @@ export default function ComprasPage() {
           </div>
         </div>
       ) : view === "registros" ? (
-        <CompraTable
-          compras={compras}
-          onDeleteRegistro={handleDeleteRegistro}
-          deletingCompraId={deletingCompraId}
-        />
+        <div className="space-y-4">
+          <CompraTable
+            compras={compras}
+            onDeleteRegistro={handleDeleteRegistro}
+            deletingCompraId={deletingCompraId}
+          />
+          {siguienteCursor && (
+            <div className="flex justify-center">
+              <button
+                type="button"
+                onClick={handleCargarMas}
+                disabled={cargandoMas}
+                className="px-4 py-2 rounded-full text-sm font-medium border border-gray-300 bg-white text-gray-700 hover:bg-gray-50 disabled:opacity-60"
+              >
+                {cargandoMas ? "Cargando..." : "Cargar registros anteriores"}
+              </button>
+            </div>
+          )}
+        </div>
       ) : (
         <OrdenCompraTable
           ordenes={ordenesCompra}
@@ -46,7 +46,7 @@ export default function ProcesosPage() {
     try {
       const [tareasResponse, itemsResponse] = await Promise.all([
         tareaPorEstandarizarAPI.list(),
-        itemAPI.list(),
+        itemAPI.listAll(),
       ]);
 
       setTareas(normalizeCollection(tareasResponse));
@@ -52,7 +52,7 @@ export default function ReportesPage() {
     try {
       const [reportesResponse, trabajosResponse] = await Promise.all([
         reporteOrdenAPI.list(),
-        trabajoAPI.list(),
+        trabajoAPI.listAll(),
       ]);
 
       setReportes(normalizeCollection(reportesResponse));
@@ -35,6 +35,9 @@ const formatTrabajoFecha = (value) => {
   return formatDisplayDate(value);
 };
 
+// Las tarjetas no muestran evidencias; el detalle las carga con sus actividades.
+const LISTADO_PARAMS = { omit: "actividades.evidencias" };
+
 export default function TrabajosPage() {
   const { roles, trabajador } = useAuth();
   const [trabajos, setTrabajos] = useState([]);
@@ -51,7 +54,7 @@ export default function TrabajosPage() {
   const loadTrabajos = useCallback(async ({ silent = false } = {}) => {
     if (!silent) setLoading(true);
     try {
-      const res = await trabajoAPI.list();
+      const res = await trabajoAPI.listAll(LISTADO_PARAMS);
       setTrabajos(res.data);
     } catch (error) {
       console.error("Error cargando trabajos:", error);
@@ -67,7 +70,7 @@ export default function TrabajosPage() {
       setLoading(true);
       try {
         const [trabajosRes, maquinariasRes, tecnicosRes] = await Promise.all([
-          trabajoAPI.list(),
+          trabajoAPI.listAll(LISTADO_PARAMS),
           maquinariaAPI.list(),
           trabajadorAPI.list(),
         ]);
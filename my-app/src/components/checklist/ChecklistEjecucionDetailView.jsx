@@ -110,7 +110,7 @@ export default function ChecklistEjecucionDetailView({
       const [checklistResponse, respuestasResponse, maquinariasResponse, ubicacionesResponse] =
         await Promise.all([
           checklistAPI.retrieve(ejecucionData.checklist),
-          checklistRespuestaAPI.list({ ejecucion: ejecucionId }),
+          checklistRespuestaAPI.listAll({ ejecucion: ejecucionId }),
           maquinariaAPI.list(),
           ubicacionClienteAPI.list(),
         ]);
@@ -79,7 +79,7 @@ export default function CompraForm({ onCreated }) {
 
   useEffect(() => {
     if (open) {
-      itemAPI.list().then((res) => setItems(res.data));
+      itemAPI.listAll().then((res) => setItems(res.data));
       proveedorAPI.list().then((res) => setProveedores(res.data));
       unidadMedidaAPI.list().then((res) =>
         setUnidadesMedida(res.data)
@@ -20,7 +20,7 @@ export default function ItemGroupModal({ onClose, onSaved, mode = "create", grou
   const isEdit = mode === "edit" && !!group?.id;
 
   useEffect(() => {
-    itemAPI.list().then((res) => setItems(res.data));
+    itemAPI.listAll().then((res) => setItems(res.data));
     unidadMedidaAPI.list().then((res) => setUnits(res.data));
   }, []);
 
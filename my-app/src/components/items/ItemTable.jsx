@@ -43,7 +43,7 @@ export default function ItemTable({
     setLoading(true);
     try {
       const params = vista && vista !== "general" ? { vista } : undefined;
-      const res = await itemAPI.list(params);
+      const res = await itemAPI.listAll(params);
       setItems(res.data);
     } catch (error) {
       console.error("Error loading items:", error);
@@ -159,7 +159,7 @@ export default function ManagementSurvivalCurve() {
     <section className="space-y-5">
       <FilterPanel
         title="Curva de vida util de repuestos"
-        description="Selecciona un repuesto y revisa su curva de supervivencia segun los horometros finales registrados."
+        description="Selecciona un repuesto y revisa su curva de supervivencia segun las horas de uso hasta la falla (las unidades aun instaladas cuentan como censuradas)."
         hasActiveFilters={Boolean(selectedItemId)}
       >
         <div className="grid grid-cols-1 gap-4 md:grid-cols-2">
@@ -308,7 +308,7 @@ export default function ManagementSurvivalCurve() {
               {geometry.dots.map((dot, index) => (
                 <g key={`${dot.horometro}-${index}`}>
                   <title>
-                    {`Horometro ${NUMBER_FORMATTER.format(dot.horometro)}: supervivencia ${PERCENT_FORMATTER.format(
+                    {`Horas de uso ${NUMBER_FORMATTER.format(dot.horometro)}: supervivencia ${PERCENT_FORMATTER.format(
                       dot.supervivencia
                     )}%, restante ${NUMBER_FORMATTER.format(dot.cantidadRestante)}, fallas ${dot.fallas}`}
                   </title>
@@ -329,7 +329,7 @@ export default function ManagementSurvivalCurve() {
                 textAnchor="middle"
                 className="fill-slate-600 text-[11px] font-semibold"
               >
-                Horometro
+                Horas de uso
               </text>
             </svg>
           </div>
@@ -339,7 +339,7 @@ export default function ManagementSurvivalCurve() {
               <thead className="bg-slate-50">
                 <tr>
                   <th className="px-4 py-3 text-left text-xs font-semibold uppercase tracking-wider text-gray-700">
-                    Horometro
+                    Horas de uso
                   </th>
                   <th className="px-4 py-3 text-left text-xs font-semibold uppercase tracking-wider text-gray-700">
                     Fallas
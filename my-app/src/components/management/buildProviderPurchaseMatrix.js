@@ -1,3 +1,5 @@
+import { rowsFromColumnar } from "./columnarMatrix";
+
 const HOURS_FORMATTER = new Intl.NumberFormat("es-PE", {
   minimumFractionDigits: 2,
   maximumFractionDigits: 2,
@@ -33,7 +35,14 @@ export function buildProviderPurchaseMatrix(payload = null) {
       : proveedor.nombre || "Proveedor",
   }));
 
-  const rows = (safePayload.rows || []).map((row) => ({
+  const sourceRows = safePayload.cells
+    ? rowsFromColumnar(
+        safePayload,
+        columns.map((column) => column.key)
+      )
+    : safePayload.rows || [];
+
+  const rows = sourceRows.map((row) => ({
     itemId: row.item_id,
     itemCodigo: row.item_codigo || "ITEM",
     itemNombre: row.item_nombre || "Sin nombre",
@@ -0,0 +1,28 @@
+// Convierte la respuesta ?formato=columnar de las matrices de gestion al
+// formato por filas (row.values indexado por id de columna) que usan los builders.
+export function rowsFromColumnar(payload, columnKeys) {
+  const rowColumns = payload?.rows || {};
+  const cells = payload?.cells || {};
+  const total = (rowColumns.item_id || []).length;
+  const cellFields = Object.keys(cells).filter(
+    (field) => field !== "row" && field !== "column"
+  );
+
+  const rows = Array.from({ length: total }, (_, index) => {
+    const row = { values: {} };
+    Object.entries(rowColumns).forEach(([field, values]) => {
+      row[field] = values[index];
+    });
+    return row;
+  });
+
+  (cells.row || []).forEach((rowIndex, index) => {
+    const cell = {};
+    cellFields.forEach((field) => {
+      cell[field] = cells[field][index];
+    });
+    rows[rowIndex].values[columnKeys[cells.column[index]]] = cell;
+  });
+
+  return rows;
+}
@@ -24,7 +24,7 @@ export default function OrdenCompraFormModal({
   useEffect(() => {
     if (!open) return;
 
-    Promise.all([itemAPI.list(), proveedorAPI.list()])
+    Promise.all([itemAPI.listAll(), proveedorAPI.list()])
       .then(([itemsRes, proveedoresRes]) => {
         setItems(itemsRes.data || []);
         setProveedores(proveedoresRes.data || []);
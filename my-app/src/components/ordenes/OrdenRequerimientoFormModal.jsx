@@ -51,7 +51,7 @@ export default function OrdenRequerimientoFormModal({
   useEffect(() => {
     if (!open) return;
 
-    Promise.all([itemAPI.list(), proveedorAPI.list(), trabajadorAPI.list(), userAPI.list()])
+    Promise.all([itemAPI.listAll(), proveedorAPI.list(), trabajadorAPI.list(), userAPI.list()])
       .then(([itemsRes, proveedoresRes, trabajadoresRes, usersRes]) => {
         setItems(parseCollection(itemsRes.data));
         setProveedores(parseCollection(proveedoresRes.data));
@@ -12,7 +12,7 @@ export default function TrabajoTable() {
 
   const loadData = async () => {
     try {
-      const res = await trabajoAPI.list();
+      const res = await trabajoAPI.listAll();
       setTrabajos(res.data);
     } catch (err) {
       console.error("Error cargando trabajos", err);
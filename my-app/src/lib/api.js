@@ -114,6 +114,28 @@ api.interceptors.response.use(
   }
 );
 
+/* =========================
+   LISTADOS PAGINADOS
+========================= */
+
+// Items, trabajos, compras y respuestas de checklist siempre responden
+// paginados por cursor; listAll recorre las paginas para las pantallas que
+// necesitan el listado completo (selectores, filtros en cliente).
+const LIST_ALL_PAGE_SIZE = 500;
+
+const listarTodo = async (url, params = {}) => {
+  const results = [];
+  let cursor = null;
+  do {
+    const { data } = await api.get(url, {
+      params: { page_size: LIST_ALL_PAGE_SIZE, ...params, ...(cursor ? { cursor } : {}) },
+    });
+    results.push(...(data?.results ?? data ?? []));
+    cursor = data?.next ? new URL(data.next).searchParams.get("cursor") : null;
+  } while (cursor);
+  return { data: results };
+};
+
 /* =========================
    AUTH API
 ========================= */
@@ -147,6 +169,7 @@ export const authAPI = {
 
 export const itemAPI = {
   list: (params) => api.get("/api/items/", { params }),
+  listAll: (params) => listarTodo("/api/items/", params),
   retrieve: (id) => api.get(`/api/items/${id}/`),
   create: (data) => api.post("/api/items/", data),
   update: (id, data) => api.put(`/api/items/${id}/`, data),
@@ -204,9 +227,13 @@ export const maquinariaAPI = {
   unidades: (id) =>
     api.get(`/api/maquinarias/${id}/unidades/`),
   gestionMatrix: () =>
-    api.get("/api/maquinarias/gestion-matriz/"),
+    api.get("/api/maquinarias/gestion-matriz/", {
+      params: { formato: "columnar" },
+    }),
   gestionMatrixProveedoresRepuestos: () =>
-    api.get("/api/maquinarias/gestion-matriz-proveedores-repuestos/"),
+    api.get("/api/maquinarias/gestion-matriz-proveedores-repuestos/", {
+      params: { formato: "columnar" },
+    }),
   gestionHistorialItems: (params) =>
     api.get("/api/maquinarias/gestion-historial-items/", { params }),
   gestionBubbleRepuestos: (params) =>
@@ -241,6 +268,7 @@ export const trabajadorAPI = {
 
 export const trabajoAPI = {
   list: (params) => api.get("/api/trabajos/", { params }),
+  listAll: (params) => listarTodo("/api/trabajos/", params),
   retrieve: (id) => api.get(`/api/trabajos/${id}/`),
   create: (data) => api.post("/api/trabajos/", data),
   update: (id, data) => api.put(`/api/trabajos/${id}/`, data),
@@ -447,6 +475,7 @@ export const checklistEjecucionAPI = {
 
 export const checklistRespuestaAPI = {
   list: (params) => api.get("/api/checklist-respuestas/", { params }),
+  listAll: (params) => listarTodo("/api/checklist-respuestas/", params),
   retrieve: (id) => api.get(`/api/checklist-respuestas/${id}/`),
   create: (data) => api.post("/api/checklist-respuestas/", data),
   patch: (id, data) => api.patch(`/api/checklist-respuestas/${id}/`, data),